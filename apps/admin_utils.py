@@ -0,0 +1,147 @@
+"""
+Utilitários para o admin com tabelas grandes (catálogo com centenas de milhares de músicas)
+
+- ``EstimatedCountPaginator``: no PostgreSQL usa a estimativa do planner
+  (``pg_class.reltuples`` sem filtros, ``EXPLAIN`` com filtros) em vez de
+  ``COUNT(*)`` quando a tabela passa de ``ADMIN_ESTIMATED_COUNT_THRESHOLD``;
+- ``LargeTableAdminMixin``: paginador estimado e sem a contagem total extra
+  (``show_full_result_count``);
+- ``RelatedAutocompleteFilter``: filtro por um ForeignKey com o autocomplete
+  do admin (``AutocompleteSelect``), no lugar do dropdown que lista todos os
+  registros.
+"""
+import json
+import logging
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_count(queryset):
+    """
+    Número aproximado de linhas do queryset segundo o planner do PostgreSQL
+
+    Retorna None em outros bancos ou se a estimativa não estiver disponível
+    (tabela nunca analisada).
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+
+    try:
+        with connection.cursor() as cursor:
+            if not queryset.query.where:
+                cursor.execute(
+                    'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                    [queryset.model._meta.db_table]
+                )
+                row = cursor.fetchone()
+                estimate = row[0] if row else None
+            else:
+                sql, params = queryset.order_by().query.sql_with_params()
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+                plan = cursor.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                estimate = plan[0]['Plan']['Plan Rows']
+    except Exception as e:
+        logger.warning(f"Erro ao estimar contagem de {queryset.model._meta.label}: {e}")
+        return None
+
+    if estimate is None or estimate < 0:
+        return None
+    return int(estimate)
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator que usa a contagem estimada em tabelas grandes"""
+
+    @cached_property
+    def count(self):
+        threshold = getattr(settings, 'ADMIN_ESTIMATED_COUNT_THRESHOLD', 10000)
+        estimate = estimate_count(self.object_list)
+        if estimate is not None and estimate >= threshold:
+            return estimate
+        # Tabela pequena (ou resultado filtrado pequeno): contagem exata é barata
+        return super().count
+
+
+class LargeTableAdminMixin:
+    """ModelAdmin para tabelas grandes: contagem estimada e sem contagem total extra"""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    @property
+    def media(self):
+        media = super().media
+        for list_filter in self.list_filter:
+            if isinstance(list_filter, type) and issubclass(list_filter, RelatedAutocompleteFilter):
+                # select2 e autocomplete.js do admin para os filtros
+                media += list_filter.widget(self.model, self.admin_site).media
+        return media
+
+
+class RelatedAutocompleteFilter(admin.SimpleListFilter):
+    """
+    Filtro por um ForeignKey com o autocomplete do admin
+
+    Subclasses definem ``title`` e ``field_name`` (ex.: ``'album'``). O
+    select2 busca no ``search_fields`` do admin do model relacionado, paginado
+    pela view de autocomplete, e o parâmetro da URL (o próprio campo) recebe
+    o id. O admin precisa herdar ``LargeTableAdminMixin`` para carregar o
+    JavaScript do widget.
+    """
+    template = 'admin/related_autocomplete_filter.html'
+    field_name = None
+
+    def __init__(self, request, params, model, model_admin):
+        self.parameter_name = self.field_name
+        self.model = model
+        self.admin_site = model_admin.admin_site
+        super().__init__(request, params, model, model_admin)
+
+    @classmethod
+    def widget(cls, model, admin_site, attrs=None):
+        field = model._meta.get_field(cls.field_name)
+        # O form field entrega os choices (queryset) para o widget exibir o registro selecionado
+        return field.formfield(widget=AutocompleteSelect(field, admin_site, attrs=attrs), required=False).widget
+
+    def lookups(self, request, model_admin):
+        return ()
+
+    def has_output(self):
+        return True
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if not value:
+            return queryset
+        try:
+            return queryset.filter(**{self.field_name: value})
+        except (ValueError, ValidationError) as e:
+            raise IncorrectLookupParameters(e)
+
+    def choices(self, changelist):
+        widget = self.widget(self.model, self.admin_site, attrs={
+            'id': f'changelist-filter-{self.parameter_name}',
+            'onchange': 'this.form.submit()',
+            'style': 'width: 100%;',
+        })
+        yield {
+            'selected': bool(self.value()),
+            'widget': widget.render(self.parameter_name, self.value()),
+            'query_string': changelist.get_query_string(remove=[self.parameter_name, 'p']),
+            # Mantém busca, ordenação e os outros filtros ao enviar o formulário
+            'hidden_params': [
+                (key, value) for key, value in changelist.params.items()
+                if key != self.parameter_name
+            ],
+        }
@@ -5,3 +5,7 @@ class ArtistsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.artists'
     verbose_name = 'Artistas'
+    
+    def ready(self):
+        """Importa os signals quando o app estiver pronto"""
+        import apps.artists.signals
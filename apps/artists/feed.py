@@ -0,0 +1,309 @@
+"""
+Feed "novidades de quem você segue" (fan-out híbrido)
+
+Cada lançamento (música ou álbum ativo) entra na lista recente do artista
+(``feed_artist_<id>``) e, se o artista tem menos de
+``FEED_FANOUT_MAX_FOLLOWERS`` seguidores, é copiado pela task ``fan_out_release``
+para o feed de cada seguidor (``feed_user_<id>``). Artistas muito seguidos não
+recebem cópias: na leitura, as listas recentes dos populares que o usuário
+segue são mescladas ao feed dele.
+
+As listas são sorted sets no Redis (score = data do lançamento) limitados a
+``FEED_MAX_ITEMS`` itens. Uma página é um ``ZREVRANGEBYSCORE`` com cursor
+(``before``) no feed do usuário e em cada popular seguido, todos em uma ida
+ao Redis: o custo depende do tamanho da página, não de quantos artistas o
+usuário segue.
+
+Uma lista fora do cache (expirada, cache limpo) é recriada do banco na
+leitura; o membro ``LOADED_MARKER`` distingue "vazia" de "ausente". Seguir ou
+deixar de seguir descarta o feed do usuário, recriado na leitura seguinte.
+Sem Redis (desenvolvimento/testes) as mesmas operações rodam no cache local.
+"""
+import heapq
+import logging
+import threading
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from ehit_backend.async_cache import is_redis_cache
+from .models import Album, Artist, ArtistFollow
+
+logger = logging.getLogger(__name__)
+
+# Membro com score 0 que marca a lista como carregada do banco
+LOADED_MARKER = '*'
+# Seguidores por pipeline no fan-out
+FANOUT_CHUNK_SIZE = 1000
+
+_local_lock = threading.Lock()
+
+
+def feed_cache_key(user_id):
+    return f'feed_user_{user_id}'
+
+
+def artist_feed_cache_key(artist_id):
+    return f'feed_artist_{artist_id}'
+
+
+def is_popular(artist):
+    """Artista cujos lançamentos são lidos na hora, sem fan-out"""
+    return artist.followers_count >= settings.FEED_FANOUT_MAX_FOLLOWERS
+
+
+# =============================================================================
+# LISTAS (SORTED SETS)
+# =============================================================================
+
+def _redis():
+    from django_redis import get_redis_connection
+
+    return get_redis_connection('default')
+
+
+def _read(ranges):
+    """
+    Lê várias listas de uma vez
+
+    Args:
+        ranges: [(chave, before, quantidade)]; ``before`` None = mais recentes
+
+    Returns:
+        [(carregada, [(membro, score)])] do mais recente para o mais antigo
+    """
+    if is_redis_cache():
+        pipe = _redis().pipeline(transaction=False)
+        for key, before, count in ranges:
+            key = cache.make_key(key)
+            pipe.zscore(key, LOADED_MARKER)
+            pipe.zrevrangebyscore(
+                key, f'({before!r}' if before else '+inf', '(0', start=0, num=count, withscores=True
+            )
+        results = pipe.execute()
+        return [
+            (results[index] is not None, [(member.decode(), score) for member, score in results[index + 1]])
+            for index in range(0, len(results), 2)
+        ]
+
+    read = []
+    for key, before, count in ranges:
+        items = cache.get(key) or {}
+        newest = sorted(
+            ((member, score) for member, score in items.items()
+             if member != LOADED_MARKER and (not before or score < before)),
+            key=lambda item: item[1],
+            reverse=True,
+        )
+        read.append((LOADED_MARKER in items, newest[:count]))
+    return read
+
+
+# KEYS[1]: lista; ARGV: marcador, 1 para marcar como carregada (senão só grava
+# em lista já marcada), limite de itens, validade em segundos (0 = sem) e pares
+# score, membro. Retorna 1 se gravou.
+WRITE_SCRIPT = """
+local key = KEYS[1]
+local marker = ARGV[1]
+if ARGV[2] == '1' then
+    redis.call('ZADD', key, 0, marker)
+elseif not redis.call('ZSCORE', key, marker) then
+    return 0
+end
+for i = 5, #ARGV, 2 do
+    redis.call('ZADD', key, ARGV[i], ARGV[i + 1])
+end
+-- O marcador (score 0) fica na posição 0: corta logo acima dele
+redis.call('ZREMRANGEBYRANK', key, 1, -(tonumber(ARGV[3]) + 1))
+if tonumber(ARGV[4]) > 0 then
+    redis.call('EXPIRE', key, ARGV[4])
+end
+return 1
+"""
+
+_write_script = None
+
+
+def _write(entries):
+    """
+    Grava itens em várias listas (uma ida ao Redis), mantendo só os mais recentes
+
+    Listas não marcadas como carregadas não recebem itens: o próximo
+    ``get_feed`` as recria do banco de qualquer forma.
+
+    Args:
+        entries: [(chave, [(membro, score)], marcar como carregada, validade)]
+
+    Returns:
+        int: listas gravadas
+    """
+    global _write_script
+    limit = settings.FEED_MAX_ITEMS
+    if is_redis_cache():
+        redis = _redis()
+        if _write_script is None:
+            _write_script = redis.register_script(WRITE_SCRIPT)
+        pipe = redis.pipeline(transaction=False)
+        for key, items, loaded, timeout in entries:
+            args = [LOADED_MARKER, int(bool(loaded)), limit, timeout or 0]
+            for member, score in items:
+                args += [score, member]
+            _write_script(keys=[cache.make_key(key)], args=args, client=pipe)
+        return sum(pipe.execute())
+
+    written = 0
+    with _local_lock:
+        for key, items, loaded, timeout in entries:
+            current = cache.get(key) or {}
+            if not loaded and LOADED_MARKER not in current:
+                continue
+            current.update(items)
+            newest = heapq.nlargest(
+                limit, ((m, s) for m, s in current.items() if m != LOADED_MARKER), key=lambda item: item[1]
+            )
+            trimmed = dict(newest)
+            trimmed[LOADED_MARKER] = 0
+            cache.set(key, trimmed, timeout)
+            written += 1
+    return written
+
+
+def _releases(artist_ids, count):
+    """(membro, score) dos lançamentos mais recentes dos artistas, direto do banco"""
+    from apps.music.models import Music
+
+    releases = []
+    for kind, model in (('music', Music), ('album', Album)):
+        rows = (
+            model.objects.filter(artist_id__in=artist_ids, is_active=True)
+            .order_by('-created_at')
+            .values_list('pk', 'created_at')[:count]
+        )
+        releases.extend((f'{kind}:{pk}', created_at.timestamp()) for pk, created_at in rows)
+    return releases
+
+
+# =============================================================================
+# SEGUIR
+# =============================================================================
+
+def follow(user, artist):
+    """Segue o artista (True se não seguia)"""
+    try:
+        with transaction.atomic():
+            _, created = ArtistFollow.objects.get_or_create(user=user, artist=artist)
+    except IntegrityError:
+        # Duas requisições simultâneas do mesmo usuário: a outra já gravou
+        created = False
+    if created:
+        Artist.objects.filter(pk=artist.pk).update(followers_count=F('followers_count') + 1)
+        cache.delete(feed_cache_key(user.pk))
+    return created
+
+
+def unfollow(user, artist):
+    """Deixa de seguir o artista (True se seguia)"""
+    deleted, _ = ArtistFollow.objects.filter(user=user, artist=artist).delete()
+    if deleted:
+        Artist.objects.filter(pk=artist.pk, followers_count__gt=0).update(followers_count=F('followers_count') - 1)
+        cache.delete(feed_cache_key(user.pk))
+    return bool(deleted)
+
+
+# =============================================================================
+# PUBLICAÇÃO (FAN-OUT)
+# =============================================================================
+
+def publish_release(kind, pk):
+    """
+    Distribui um lançamento ('music' ou 'album') aos seguidores do artista
+
+    Returns:
+        int: feeds em cache que receberam o lançamento (0 para artistas populares)
+    """
+    from apps.music.models import Music
+
+    model = Music if kind == 'music' else Album
+    release = model.objects.filter(pk=pk, is_active=True).select_related('artist').first()
+    if release is None:
+        return 0
+    item = [(f'{kind}:{pk}', release.created_at.timestamp())]
+    artist = release.artist
+    _write([(artist_feed_cache_key(artist.pk), item, False, None)])
+    if is_popular(artist):
+        return 0
+
+    pushed = 0
+    followers = ArtistFollow.objects.filter(artist=artist).values_list('user_id', flat=True)
+    followers = followers.iterator(chunk_size=FANOUT_CHUNK_SIZE)
+    while True:
+        chunk = list(islice(followers, FANOUT_CHUNK_SIZE))
+        if not chunk:
+            return pushed
+        # Só os feeds carregados recebem; os demais são montados do banco na próxima leitura
+        pushed += _write([(feed_cache_key(user_id), item, False, settings.FEED_TIMEOUT) for user_id in chunk])
+
+
+def enqueue_release(kind, pk):
+    """Agenda o fan-out (chamado após o commit do lançamento)"""
+    from .tasks import fan_out_release
+
+    try:
+        fan_out_release.delay(kind, pk)
+    except Exception as e:
+        # Sem broker o lançamento ainda chega a quem recarregar o feed do banco
+        logger.warning(f"Erro ao enfileirar fan-out de {kind} {pk}: {e}")
+
+
+# =============================================================================
+# LEITURA
+# =============================================================================
+
+def get_feed(user, before=None, limit=20):
+    """
+    Página do feed do usuário: [(tipo, id, score)] do mais recente para o mais antigo
+
+    ``before`` é o score do último item da página anterior.
+    """
+    popular = list(
+        ArtistFollow.objects.filter(
+            user=user,
+            artist__is_active=True,
+            artist__followers_count__gte=settings.FEED_FANOUT_MAX_FOLLOWERS,
+        ).values_list('artist_id', flat=True)
+    )
+    sources = [(feed_cache_key(user.pk), settings.FEED_TIMEOUT, None)]
+    sources += [(artist_feed_cache_key(artist_id), None, artist_id) for artist_id in popular]
+
+    pages = _read([(key, before, limit) for key, _, _ in sources])
+    best = {}
+    for (key, timeout, artist_id), (loaded, items) in zip(sources, pages):
+        if not loaded:
+            items = _reload(user, key, timeout, artist_id)
+            items = sorted((i for i in items if not before or i[1] < before), key=lambda i: i[1], reverse=True)
+        for member, score in items[:limit]:
+            # Artista que virou popular: o item pode estar no feed e na lista dele
+            if score > best.get(member, 0):
+                best[member] = score
+
+    page = heapq.nlargest(limit, best.items(), key=lambda item: item[1])
+    return [(member.split(':')[0], int(member.split(':')[1]), score) for member, score in page]
+
+
+def _reload(user, key, timeout, artist_id):
+    """Recria uma lista ausente do cache a partir do banco"""
+    if artist_id is not None:
+        artist_ids = [artist_id]
+    else:
+        artist_ids = [
+            followed_id for followed_id, followers in ArtistFollow.objects.filter(
+                user=user, artist__is_active=True
+            ).values_list('artist_id', 'artist__followers_count')
+            if followers < settings.FEED_FANOUT_MAX_FOLLOWERS
+        ]
+    items = _releases(artist_ids, settings.FEED_MAX_ITEMS) if artist_ids else []
+    _write([(key, items, True, timeout)])
+    return items
@@ -0,0 +1,51 @@
+"""
+Comando Django para calcular cor dominante e blurhash das imagens existentes
+"""
+from django.core.management.base import BaseCommand
+from apps.artists.models import Artist, Album
+from apps.music.models import Music
+from apps.image_utils import update_artwork_placeholders
+from banners.models import Banner
+
+
+# Os campos de cada model vêm de ``artwork_fields`` (ArtworkPlaceholdersMixin)
+ARTWORK_FIELDS = [
+    (model, *fields)
+    for model in (Artist, Album, Music, Banner)
+    for fields in model.artwork_fields
+]
+
+
+class Command(BaseCommand):
+    help = 'Calcular placeholders (cor dominante e blurhash) das imagens já enviadas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Recalcular também os registros que já possuem placeholders'
+        )
+
+    def handle(self, *args, **options):
+        force = options['force']
+
+        for model, image_field, color_field, blurhash_field in ARTWORK_FIELDS:
+            queryset = model.objects.exclude(**{image_field: ''}).exclude(**{f'{image_field}__isnull': True})
+            if not force:
+                queryset = queryset.filter(**{blurhash_field: ''})
+
+            updated = 0
+            for instance in queryset.only('pk', image_field, color_field, blurhash_field).iterator():
+                if force:
+                    setattr(instance, blurhash_field, '')
+                changed = update_artwork_placeholders(instance, image_field, color_field, blurhash_field)
+                if changed:
+                    # update() evita disparar signals de invalidação de cache para cada registro
+                    model.objects.filter(pk=instance.pk).update(
+                        **{field: getattr(instance, field) for field in changed}
+                    )
+                    updated += 1
+
+            self.stdout.write(
+                self.style.SUCCESS(f'✅ {model._meta.verbose_name_plural}: {updated} placeholders calculados')
+            )
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artists', '0005_album'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='album',
+            name='cover_blurhash',
+            field=models.CharField(blank=True, default='', help_text='Placeholder calculado automaticamente a partir da capa', max_length=64, verbose_name='Blurhash da Capa'),
+        ),
+        migrations.AddField(
+            model_name='album',
+            name='cover_color',
+            field=models.CharField(blank=True, default='', help_text='Calculada automaticamente a partir da capa', max_length=7, verbose_name='Cor Dominante da Capa'),
+        ),
+        migrations.AddField(
+            model_name='artist',
+            name='photo_blurhash',
+            field=models.CharField(blank=True, default='', help_text='Placeholder calculado automaticamente a partir da foto', max_length=64, verbose_name='Blurhash da Foto'),
+        ),
+        migrations.AddField(
+            model_name='artist',
+            name='photo_color',
+            field=models.CharField(blank=True, default='', help_text='Calculada automaticamente a partir da foto', max_length=7, verbose_name='Cor Dominante da Foto'),
+        ),
+    ]
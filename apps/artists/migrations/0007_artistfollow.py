@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-19 19:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artists', '0006_album_cover_blurhash_album_cover_color_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='artist',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0, help_text='Mantido pelo follow/unfollow (apps/artists/feed.py)', verbose_name='Seguidores'),
+        ),
+        migrations.CreateModel(
+            name='ArtistFollow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Seguindo desde')),
+                ('artist', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='follows', to='artists.artist', verbose_name='Artista')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='artist_follows', to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+            ],
+            options={
+                'verbose_name': 'Seguidor',
+                'verbose_name_plural': 'Seguidores',
+                'ordering': ['-created_at'],
+                'constraints': [models.UniqueConstraint(fields=('user', 'artist'), name='artist_follow_uniq')],
+            },
+        ),
+    ]
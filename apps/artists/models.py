@@ -1,4 +1,6 @@
+from django.conf import settings
 from django.db import models
+from apps.image_utils import ArtworkPlaceholdersMixin
 
 
 class BaseModel(models.Model):
@@ -12,7 +14,7 @@ class BaseModel(models.Model):
         ordering = ['-created_at']
 
 
-class Artist(BaseModel):
+class Artist(ArtworkPlaceholdersMixin, BaseModel):
     """
     Modelo para Artistas simplificado
     
@@ -29,6 +31,20 @@ class Artist(BaseModel):
         verbose_name='Foto do Artista',
         help_text='Foto de perfil do artista'
     )
+    photo_color = models.CharField(
+        max_length=7,
+        blank=True,
+        default='',
+        verbose_name='Cor Dominante da Foto',
+        help_text='Calculada automaticamente a partir da foto'
+    )
+    photo_blurhash = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+        verbose_name='Blurhash da Foto',
+        help_text='Placeholder calculado automaticamente a partir da foto'
+    )
     genre = models.ForeignKey(
         'genres.Genre',
         on_delete=models.SET_NULL,
@@ -37,6 +53,13 @@ class Artist(BaseModel):
         related_name='artists',
         verbose_name='Gênero Musical'
     )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Seguidores',
+        help_text='Mantido pelo follow/unfollow (apps/artists/feed.py)'
+    )
+    
+    artwork_fields = (('photo', 'photo_color', 'photo_blurhash'),)
     
     class Meta:
         verbose_name = 'Artista'
@@ -47,7 +70,7 @@ class Artist(BaseModel):
         return self.stage_name
 
 
-class Album(BaseModel):
+class Album(ArtworkPlaceholdersMixin, BaseModel):
     """
     Modelo para Álbuns dos artistas
     
@@ -70,6 +93,20 @@ class Album(BaseModel):
         verbose_name='Capa do Álbum',
         help_text='Capa do álbum'
     )
+    cover_color = models.CharField(
+        max_length=7,
+        blank=True,
+        default='',
+        verbose_name='Cor Dominante da Capa',
+        help_text='Calculada automaticamente a partir da capa'
+    )
+    cover_blurhash = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+        verbose_name='Blurhash da Capa',
+        help_text='Placeholder calculado automaticamente a partir da capa'
+    )
     release_date = models.DateField(
         blank=True,
         null=True,
@@ -81,6 +118,8 @@ class Album(BaseModel):
         help_text='Álbum em destaque'
     )
     
+    artwork_fields = (('cover', 'cover_color', 'cover_blurhash'),)
+    
     class Meta:
         verbose_name = 'Álbum'
         verbose_name_plural = 'Álbuns'
@@ -92,3 +131,36 @@ class Album(BaseModel):
     def get_musics_count(self):
         """Retorna número de músicas no álbum"""
         return self.musics.count()
+
+
+class ArtistFollow(models.Model):
+    """
+    Usuário seguindo um artista
+
+    Os lançamentos (músicas e álbuns) dos artistas seguidos aparecem no feed
+    "novidades de quem você segue" (``apps/artists/feed.py``).
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='artist_follows',
+        verbose_name='Usuário'
+    )
+    artist = models.ForeignKey(
+        Artist,
+        on_delete=models.CASCADE,
+        related_name='follows',
+        verbose_name='Artista'
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Seguindo desde')
+
+    class Meta:
+        verbose_name = 'Seguidor'
+        verbose_name_plural = 'Seguidores'
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'artist'], name='artist_follow_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} segue {self.artist_id}"
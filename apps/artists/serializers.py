@@ -19,11 +19,11 @@ class AlbumSerializer(serializers.ModelSerializer):
     class Meta:
         model = Album
         fields = [
-            'id', 'artist', 'artist_name', 'name', 'cover', 
+            'id', 'artist', 'artist_name', 'name', 'cover', 'cover_color', 'cover_blurhash',
             'release_date', 'featured', 'musics_count', 'musics',
             'created_at', 'updated_at', 'is_active'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'cover_color', 'cover_blurhash', 'created_at', 'updated_at']
     
     def get_musics_count(self, obj):
         """Retorna quantidade de músicas no álbum"""
@@ -46,6 +46,16 @@ class AlbumSerializer(serializers.ModelSerializer):
         return data
 
 
+class FeedAlbumSerializer(serializers.ModelSerializer):
+    """Álbum no feed de novidades (sem a lista de músicas)"""
+    
+    artist_name = serializers.CharField(source='artist.stage_name', read_only=True)
+    
+    class Meta:
+        model = Album
+        fields = ['id', 'artist', 'artist_name', 'name', 'cover', 'cover_color', 'cover_blurhash', 'release_date']
+
+
 class AlbumCreateSerializer(serializers.ModelSerializer):
     """Serializer para criação de álbum"""
     
@@ -69,10 +79,11 @@ class ArtistSerializer(serializers.ModelSerializer):
     class Meta:
         model = Artist
         fields = [
-            'id', 'stage_name', 'photo', 'genre', 'genre_data', 'albums_count',
+            'id', 'stage_name', 'photo', 'photo_color', 'photo_blurhash',
+            'genre', 'genre_data', 'albums_count', 'followers_count',
             'created_at', 'updated_at', 'is_active'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'photo_color', 'photo_blurhash', 'followers_count', 'created_at', 'updated_at']
     
     def get_albums_count(self, obj):
         """Retorna quantidade de álbuns do artista"""
@@ -0,0 +1,25 @@
+"""
+Signals dos artistas
+
+Cada música ou álbum criado já ativo é enviado, depois do commit, para o
+feed dos seguidores do artista (``feed.py``).
+"""
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from apps.music.models import Music
+from .feed import enqueue_release
+from .models import Album
+
+
+@receiver(post_save, sender=Music, dispatch_uid='feed_music_released')
+def music_released(sender, instance, created, **kwargs):
+    if created and instance.is_active:
+        transaction.on_commit(lambda: enqueue_release('music', instance.pk))
+
+
+@receiver(post_save, sender=Album, dispatch_uid='feed_album_released')
+def album_released(sender, instance, created, **kwargs):
+    if created and instance.is_active:
+        transaction.on_commit(lambda: enqueue_release('album', instance.pk))
@@ -0,0 +1,15 @@
+"""
+Tasks Celery dos artistas: fan-out dos lançamentos para o feed dos seguidores
+
+Os signals de ``signals.py`` enfileiram ``fan_out_release`` após o commit de
+cada música ou álbum novo.
+"""
+from celery import shared_task
+
+
+@shared_task(ignore_result=True)
+def fan_out_release(kind, pk):
+    """Copia um lançamento para o feed de cada seguidor do artista"""
+    from .feed import publish_release
+
+    return publish_release(kind, pk)
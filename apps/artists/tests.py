@@ -1,5 +1,11 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+from unittest.mock import patch
+from django.test import RequestFactory, TestCase, override_settings
 from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
 from rest_framework.test import APIClient
 from rest_framework import status
 from apps.genres.models import Genre
@@ -218,3 +224,385 @@ class ArtistViewTest(TestCase):
         self.assertEqual(artist.genre, self.genre)
         self.assertEqual(artist.genre.name, 'Forró')
 
+
+class ArtworkPlaceholderTest(TestCase):
+    """Testes para cor dominante e blurhash das capas"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.artist = Artist.objects.create(stage_name='Artwork Artist')
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def make_image(self, color=(200, 30, 40), size=(64, 48)):
+        buffer = io.BytesIO()
+        Image.new('RGB', size, color).save(buffer, 'PNG')
+        return SimpleUploadedFile('cover.png', buffer.getvalue(), content_type='image/png')
+
+    def decode_blurhash(self, blurhash):
+        """Decodifica o blurhash: (componentes, cor média #RRGGBB, componentes AC)"""
+        from apps.image_utils import BASE83_CHARACTERS
+
+        def base83(text):
+            value = 0
+            for char in text:
+                value = value * 83 + BASE83_CHARACTERS.index(char)
+            return value
+
+        size_flag = base83(blurhash[0])
+        components = (size_flag % 9 + 1, size_flag // 9 + 1)
+        max_value = (base83(blurhash[1]) + 1) / 166
+        dc = f'#{base83(blurhash[2:6]):06X}'
+        ac = []
+        for start in range(6, len(blurhash), 2):
+            value = base83(blurhash[start:start + 2])
+            quantised = (value // (19 * 19), value // 19 % 19, value % 19)
+            ac.append(tuple(
+                ((q - 9) / 9) * abs((q - 9) / 9) * max_value for q in quantised
+            ))
+        return components, dc, ac
+
+    def make_split_image(self, main=(20, 60, 200), other=(230, 230, 230), size=(64, 48)):
+        """3/4 da imagem em ``main`` (à esquerda) e 1/4 em ``other``"""
+        img = Image.new('RGB', size, other)
+        img.paste(main, (0, 0, size[0] * 3 // 4, size[1]))
+        buffer = io.BytesIO()
+        img.save(buffer, 'PNG')
+        return SimpleUploadedFile('split.png', buffer.getvalue(), content_type='image/png')
+
+    def test_dominant_color_and_blurhash(self):
+        """Testa cálculo dos placeholders para imagem de cor sólida"""
+        from apps.image_utils import compute_placeholders
+        color, blurhash = compute_placeholders(self.make_image())
+        self.assertEqual(color, '#C81E28')
+        # 4x3 componentes: 1 (tamanho) + 1 (máximo) + 4 (DC) + 2 * 11 (AC)
+        self.assertEqual(len(blurhash), 28)
+        components, dc, ac = self.decode_blurhash(blurhash)
+        self.assertEqual(components, (4, 3))
+        # Cor sólida: a média é a própria cor e a variação é desprezível
+        self.assertEqual(dc, '#C81E28')
+        self.assertEqual(len(ac), 11)
+        self.assertTrue(all(abs(value) < 0.05 for component in ac for value in component))
+
+    def test_dominant_color_is_most_common_color(self):
+        """Testa que a cor dominante é a mais frequente, e não a média"""
+        from apps.image_utils import compute_placeholders
+        color, blurhash = compute_placeholders(self.make_split_image())
+        self.assertEqual(color, '#143CC8')
+        _, dc, ac = self.decode_blurhash(blurhash)
+        # O blurhash guarda a média (mais clara que o azul) e a variação horizontal
+        self.assertNotEqual(dc, color)
+        self.assertGreater(int(dc[1:3], 16), 0x14)
+        self.assertLess(ac[0][0], 0)
+        self.assertGreater(ac[0][2], -1)
+
+    def test_placeholders_computed_on_upload(self):
+        """Testa que o upload da capa preenche os placeholders"""
+        album = Album.objects.create(artist=self.artist, name='Artwork Album', cover=self.make_image())
+        album.refresh_from_db()
+        self.assertEqual(album.cover_color, '#C81E28')
+        self.assertEqual(len(album.cover_blurhash), 28)
+
+    def test_placeholders_regenerated_only_when_image_changes(self):
+        """Testa que os placeholders só são recalculados quando a imagem muda"""
+        from apps import image_utils
+
+        self.artist.photo = self.make_image()
+        self.artist.save()
+        other = Album.objects.create(artist=self.artist, name='Other', cover=self.make_split_image())
+
+        artist = Artist.objects.get(pk=self.artist.pk)
+        with patch.object(image_utils, 'compute_placeholders', wraps=image_utils.compute_placeholders) as compute:
+            artist.stage_name = 'Novo nome'
+            artist.save()
+            artist.followers_count = 3
+            artist.save(update_fields=['followers_count'])
+            self.assertFalse(compute.called)
+
+            # Outro arquivo já salvo no storage
+            artist.photo = other.cover.name
+            artist.save()
+            self.assertEqual(compute.call_count, 1)
+            artist.refresh_from_db()
+            self.assertEqual(artist.photo_color, '#143CC8')
+
+            # Novo upload
+            artist.photo = self.make_image(color=(10, 20, 30))
+            artist.save()
+            self.assertEqual(compute.call_count, 2)
+            artist.save()
+            self.assertEqual(compute.call_count, 2)
+
+        artist.refresh_from_db()
+        self.assertEqual(artist.photo_color, '#0A141E')
+        self.assertEqual(self.decode_blurhash(artist.photo_blurhash)[1], '#0A141E')
+
+    def test_placeholders_cleared_when_image_removed(self):
+        """Testa que remover a imagem limpa os placeholders"""
+        self.artist.photo = self.make_image()
+        self.artist.save()
+        self.assertTrue(self.artist.photo_blurhash)
+
+        self.artist.photo = None
+        self.artist.save()
+        self.artist.refresh_from_db()
+        self.assertEqual(self.artist.photo_color, '')
+        self.assertEqual(self.artist.photo_blurhash, '')
+
+    def test_placeholders_exposed_in_serializer(self):
+        """Testa exposição dos placeholders no serializer"""
+        from .serializers import AlbumSerializer
+        album = Album.objects.create(artist=self.artist, name='Serialized Album', cover=self.make_image())
+        data = AlbumSerializer(album).data
+        self.assertEqual(data['cover_color'], '#C81E28')
+        self.assertEqual(data['cover_blurhash'], album.cover_blurhash)
+
+
+@override_settings(FEED_FANOUT_MAX_FOLLOWERS=2)
+class FollowingFeedTest(TestCase):
+    """Testes de seguir artistas e do feed de novidades"""
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        User = get_user_model()
+        self.user = User.objects.create_user(username='seguidor', password='testpass123')
+        self.fans = [User.objects.create_user(username=f'fa{i}', password='testpass123') for i in range(2)]
+        self.artist = Artist.objects.create(stage_name='Artista Normal')
+        self.popular = Artist.objects.create(stage_name='Artista Popular')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def release(self, artist, title):
+        from unittest.mock import patch
+        from apps.music.models import Music
+        from .tasks import fan_out_release
+
+        with patch('apps.artists.tasks.fan_out_release.delay', side_effect=fan_out_release) as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                music = Music.objects.create(title=title, artist=artist, file=f'music/{title}.mp3')
+        return music, delay
+
+    def follow(self, artist, action='follow'):
+        return self.client.post(f'/api/artists/{artist.pk}/follow/', {'action': action}, format='json')
+
+    def test_follow_is_idempotent(self):
+        """Seguir duas vezes conta um seguidor"""
+        self.assertEqual(self.follow(self.artist).data['followers_count'], 1)
+        self.assertEqual(self.follow(self.artist).data['followers_count'], 1)
+        self.artist.refresh_from_db()
+        self.assertEqual(self.artist.followers_count, 1)
+        self.assertEqual(self.follow(self.artist, 'unfollow').data['followers_count'], 0)
+        self.artist.refresh_from_db()
+        self.assertEqual(self.artist.followers_count, 0)
+
+    def test_fan_out_for_normal_and_pull_for_popular_artists(self):
+        """Lançamentos de artistas comuns são copiados; os de populares são lidos na hora"""
+        from .feed import get_feed, publish_release
+
+        self.follow(self.artist)
+        for fan in [self.user, *self.fans]:
+            self.client.force_authenticate(user=fan)
+            self.follow(self.popular)
+        self.client.force_authenticate(user=self.user)
+        old, _ = self.release(self.artist, 'antiga')
+        self.assertEqual([(kind, pk) for kind, pk, _ in get_feed(self.user)], [('music', old.pk)])
+
+        normal, delay = self.release(self.artist, 'nova')
+        delay.assert_called_once_with('music', normal.pk)
+        hit, _ = self.release(self.popular, 'sucesso')
+        # Republicar não duplica; popular não é copiado para ninguém
+        self.assertEqual(publish_release('music', normal.pk), 1)
+        self.assertEqual(publish_release('music', hit.pk), 0)
+
+        # Feed já carregado: só a consulta dos populares seguidos
+        with self.assertNumQueries(1):
+            page = get_feed(self.user, limit=2)
+        self.assertEqual([pk for _, pk, _ in page], [hit.pk, normal.pk])
+        self.assertEqual([pk for _, pk, _ in get_feed(self.user, before=page[-1][2])], [old.pk])
+
+    @override_settings(FEED_FANOUT_MAX_FOLLOWERS=10)
+    def test_fan_out_skips_feeds_not_loaded(self):
+        """Feeds fora do cache não recebem o lançamento e são montados do banco na leitura"""
+        from django.core.cache import cache
+        from .feed import feed_cache_key, get_feed, publish_release
+
+        for fan in [self.user, *self.fans]:
+            self.client.force_authenticate(user=fan)
+            self.follow(self.artist)
+        get_feed(self.user)
+        music, _ = self.release(self.artist, 'so-carregados')
+
+        self.assertEqual(publish_release('music', music.pk), 1)
+        self.assertIsNone(cache.get(feed_cache_key(self.fans[0].pk)))
+        self.assertEqual([pk for _, pk, _ in get_feed(self.fans[0])], [music.pk])
+        self.assertEqual([pk for _, pk, _ in get_feed(self.user)], [music.pk])
+
+    def test_redis_write_pushes_only_to_marked_lists(self):
+        """No Redis a gravação é um script: marca ou exige o marcador antes de gravar e cortar"""
+        from unittest.mock import MagicMock, patch
+        from . import feed
+
+        redis = MagicMock()
+        pipe = redis.pipeline.return_value
+        pipe.execute.return_value = [1, 0]
+        script = redis.register_script.return_value
+        with patch.object(feed, 'is_redis_cache', return_value=True), \
+                patch.object(feed, '_redis', return_value=redis), \
+                patch.object(feed, '_write_script', None), \
+                override_settings(FEED_MAX_ITEMS=50):
+            written = feed._write([
+                ('feed_user_1', [('music:7', 1700000000.5)], False, 600),
+                ('feed_user_2', [], True, None),
+            ])
+
+        self.assertEqual(written, 1)
+        redis.register_script.assert_called_once_with(feed.WRITE_SCRIPT)
+        first, second = script.call_args_list
+        self.assertEqual(first.kwargs['args'], [feed.LOADED_MARKER, 0, 50, 600, 1700000000.5, 'music:7'])
+        self.assertEqual(second.kwargs['args'], [feed.LOADED_MARKER, 1, 50, 0])
+        self.assertIs(first.kwargs['client'], pipe)
+
+    def test_feed_endpoint_pages_with_cursor(self):
+        """O endpoint pagina pelo cursor e some com o artista deixado de seguir"""
+        from .feed import publish_release
+
+        self.follow(self.artist)
+        music, _ = self.release(self.artist, 'faixa')
+        album = Album.objects.create(artist=self.artist, name='Disco Novo')
+        publish_release('album', album.pk)
+
+        response = self.client.get('/api/artists/feed/?limit=1')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['type'], 'album')
+        self.assertEqual(response.data['results'][0]['album']['name'], 'Disco Novo')
+
+        response = self.client.get(f"/api/artists/feed/?limit=1&before={response.data['next_before']}")
+        self.assertEqual(response.data['results'][0]['music']['id'], music.pk)
+
+        self.follow(self.artist, 'unfollow')
+        self.assertEqual(self.client.get('/api/artists/feed/').data['count'], 0)
+
+    def test_feed_requires_authentication(self):
+        """Anônimo não tem feed"""
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.client.get('/api/artists/feed/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class AlbumZipDownloadTest(TestCase):
+    """Testes do download do álbum em ZIP"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        from apps.music.models import Music
+
+        artist = Artist.objects.create(stage_name='Zip Artist')
+        buffer = io.BytesIO()
+        Image.new('RGB', (16, 16), (10, 20, 30)).save(buffer, 'PNG')
+        self.album = Album.objects.create(
+            artist=artist, name='Zip/Album', cover=SimpleUploadedFile('capa.png', buffer.getvalue())
+        )
+        self.contents = [bytes([i]) * (300000 + i) for i in range(3)]
+        self.musics = [
+            Music.objects.create(
+                artist=artist, album=self.album, title=f'Faixa {i}',
+                file=SimpleUploadedFile(f'f{i}.mp3', content)
+            )
+            for i, content in enumerate(self.contents)
+        ]
+        user = get_user_model().objects.create_user(username='baixador', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=user)
+        self.url = f'/api/artists/albums/{self.album.pk}/download/'
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def download(self, **headers):
+        response = self.client.get(self.url, **headers)
+        return response, b''.join(response.streaming_content)
+
+    def test_full_download_is_valid_stored_zip(self):
+        """O ZIP tem as faixas e a capa sem compressão e o tamanho anunciado"""
+        import zipfile
+        from apps.music.models import AudioBlob
+
+        response, body = self.download()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(int(response['Content-Length']), len(body))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+        archive = zipfile.ZipFile(io.BytesIO(body))
+        self.assertIsNone(archive.testzip())
+        names = archive.namelist()
+        self.assertEqual(names[:3], [f'Zip Artist - Zip_Album/0{i + 1} - Faixa {i}.mp3' for i in range(3)])
+        self.assertEqual(names[3], 'Zip Artist - Zip_Album/cover.png')
+        self.assertTrue(all(info.compress_type == zipfile.ZIP_STORED for info in archive.infolist()))
+        self.assertEqual(archive.read(names[1]), self.contents[1])
+        # CRCs guardados para as próximas retomadas; download contado uma vez
+        self.assertFalse(AudioBlob.objects.filter(crc32__isnull=True).exists())
+        self.musics[0].refresh_from_db()
+        self.assertEqual(self.musics[0].downloads_count, 1)
+
+    def test_range_resume_matches_full_download(self):
+        """Retomar com Range devolve exatamente os bytes que faltam"""
+        from apps.music.models import AudioBlob
+
+        _, full = self.download()
+        # Sem CRCs guardados: a retomada recalcula os das faixas puladas
+        AudioBlob.objects.update(crc32=None)
+        etag = self.client.get(self.url)['ETag']
+        for start in (0, 1000, 400000, len(full) - 50):
+            response, body = self.download(HTTP_RANGE=f'bytes={start}-', HTTP_IF_RANGE=etag)
+            self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT if start else status.HTTP_200_OK)
+            self.assertEqual(body, full[start:])
+            self.assertEqual(int(response['Content-Length']), len(full) - start)
+
+        response, body = self.download(HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(full)}')
+        self.assertEqual(body, full[10:20])
+
+        self.musics[0].refresh_from_db()
+        self.assertEqual(self.musics[0].downloads_count, 3)
+
+    def test_invalid_or_stale_range(self):
+        """Intervalo fora do arquivo dá 416; If-Range diferente devolve o ZIP inteiro"""
+        response = self.client.get(self.url, HTTP_RANGE='bytes=99999999-')
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        response, _ = self.download(HTTP_RANGE='bytes=100-', HTTP_IF_RANGE='"outro"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_asgi_streams_async_iterator(self):
+        """Com ASGI o corpo é assíncrono (lido bloco a bloco, não montado na memória)"""
+        from asgiref.sync import async_to_sync
+        from apps.music.album_zip import album_archive, archive_response
+
+        _, full = self.download()
+        archive, music_ids = album_archive(self.album)
+        request = RequestFactory().get(self.url)
+        with override_settings(SERVER_MODE='asgi'):
+            response = archive_response(request, archive, music_ids, 'album.zip')
+        self.assertTrue(response.is_async)
+        self.assertNotIn('X-Accel-Buffering', response)
+
+        async def consume():
+            return [chunk async for chunk in response]
+
+        chunks = async_to_sync(consume)()
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(b''.join(chunks), full)
+
+    def test_album_without_tracks(self):
+        """Álbum sem faixas ativas não tem ZIP"""
+        from apps.music.models import Music
+
+        Music.objects.filter(album=self.album).update(is_active=False)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_404_NOT_FOUND)
@@ -19,4 +19,11 @@ urlpatterns = [
     
     # Músicas do álbum (para ver músicas de um álbum específico)
     path('albums/<int:pk>/musics/', views.album_musics_view, name='album-musics'),
+    
+    # Álbum completo em ZIP (streaming, com Range para retomar)
+    path('albums/<int:pk>/download/', views.album_download_view, name='album-download'),
+    
+    # Seguir artista e novidades dos artistas seguidos
+    path('<int:pk>/follow/', views.follow_artist_view, name='artist-follow'),
+    path('feed/', views.following_feed_view, name='following-feed'),
 ]
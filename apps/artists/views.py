@@ -3,8 +3,12 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
 from django.db.models import Q, Count
+from apps.genres.models import Genre
+from . import feed
 from .models import Artist, Album
-from .serializers import ArtistSerializer, ArtistCreateSerializer, AlbumSerializer, AlbumCreateSerializer
+from .serializers import (
+    ArtistSerializer, ArtistCreateSerializer, AlbumSerializer, AlbumCreateSerializer, FeedAlbumSerializer
+)
 
 
 class StandardResultsSetPagination(PageNumberPagination):
@@ -37,6 +41,13 @@ class ArtistListView(generics.ListAPIView):
         if genre:
             queryset = queryset.filter(genre__name__icontains=genre)
         
+        # Filtro por gênero incluindo subgêneros (ID ou slug)
+        genre_tree = Genre.resolve(self.request.query_params.get('genre_tree'))
+        if genre_tree:
+            queryset = queryset.filter(genre_tree.subtree_filter())
+        elif self.request.query_params.get('genre_tree'):
+            queryset = queryset.none()
+        
         # Busca por nome artístico
         search = self.request.query_params.get('search')
         if search:
@@ -275,6 +286,13 @@ class AlbumListView(generics.ListAPIView):
         if genre:
             queryset = queryset.filter(artist__genre__name__icontains=genre)
         
+        # Filtro por gênero do artista incluindo subgêneros (ID ou slug)
+        genre_tree = Genre.resolve(self.request.query_params.get('genre_tree'))
+        if genre_tree:
+            queryset = queryset.filter(genre_tree.subtree_filter('artist__genre'))
+        elif self.request.query_params.get('genre_tree'):
+            queryset = queryset.none()
+        
         # Ordenação personalizada
         ordering = self.request.query_params.get('ordering')
         if ordering:
@@ -342,15 +360,135 @@ def album_musics_view(request, pk):
     
     musics_page = musics[start:end]
     
+    from apps.music.likes import annotate_liked
     from apps.music.serializers import MusicSerializer
     serializer = MusicSerializer(musics_page, many=True)
     
     response_data = {
-        'musics': serializer.data,
+        'musics': annotate_liked(request.user, serializer.data),
         'count': musics.count(),
         'page': page,
         'page_size': page_size,
         'total_pages': (musics.count() + page_size - 1) // page_size
     }
     
-    return Response(response_data)
\ No newline at end of file
+    return Response(response_data)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def album_download_view(request, pk):
+    """
+    Download do álbum em ZIP (faixas ativas e capa), gerado em streaming
+    
+    URL: /api/artists/albums/<id>/download/
+    
+    Aceita ``Range`` (um intervalo, com ``If-Range``) para retomar downloads.
+    """
+    from apps.music.album_zip import ZIP_MAX_SIZE, album_archive, archive_response
+    
+    try:
+        album = Album.objects.select_related('artist').get(pk=pk, is_active=True)
+    except Album.DoesNotExist:
+        return Response(
+            {'error': 'Álbum não encontrado'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    archive, music_ids = album_archive(album)
+    if archive is None:
+        return Response(
+            {'error': 'Álbum sem músicas'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    if archive.size > ZIP_MAX_SIZE:
+        return Response(
+            {'error': 'Álbum grande demais para download em ZIP'},
+            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
+    
+    return archive_response(request, archive, music_ids, f'{album.artist.stage_name} - {album.name}.zip')
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def follow_artist_view(request, pk):
+    """Seguir/deixar de seguir artista"""
+    try:
+        artist = Artist.objects.get(pk=pk, is_active=True)
+    except Artist.DoesNotExist:
+        return Response(
+            {'error': 'Artista não encontrado'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    action = request.data.get('action', 'follow')
+    
+    if action == 'follow':
+        changed = feed.follow(request.user, artist)
+        followers_count = artist.followers_count + changed
+        message = 'Seguindo artista'
+    elif action == 'unfollow':
+        changed = feed.unfollow(request.user, artist)
+        followers_count = max(artist.followers_count - changed, 0)
+        message = 'Deixou de seguir artista'
+    else:
+        return Response(
+            {'error': 'Ação inválida. Use "follow" ou "unfollow"'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    return Response({
+        'message': message,
+        'is_following': action == 'follow',
+        'followers_count': followers_count
+    })
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def following_feed_view(request):
+    """
+    Novidades dos artistas seguidos (músicas e álbuns, mais recentes primeiro)
+    
+    URL: /api/artists/feed/
+    
+    Query Parameters:
+    - limit: itens por página (máximo 50)
+    - before: cursor devolvido em ``next_before`` pela página anterior
+    """
+    try:
+        limit = min(max(int(request.query_params.get('limit', 20)), 1), 50)
+        before = float(request.query_params['before']) if request.query_params.get('before') else None
+    except ValueError:
+        return Response(
+            {'error': 'Parâmetros inválidos'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    from apps.music.models import Music
+    from apps.music.serializers import MusicTrendingSerializer
+    
+    page = feed.get_feed(request.user, before=before, limit=limit)
+    musics = Music.objects.filter(
+        pk__in=[pk for kind, pk, _ in page if kind == 'music'], is_active=True
+    ).select_related('artist', 'album').in_bulk()
+    albums = Album.objects.filter(
+        pk__in=[pk for kind, pk, _ in page if kind == 'album'], is_active=True
+    ).select_related('artist').in_bulk()
+    
+    results = []
+    for kind, pk, score in page:
+        if kind == 'music' and pk in musics:
+            data = MusicTrendingSerializer(musics[pk]).data
+        elif kind == 'album' and pk in albums:
+            data = FeedAlbumSerializer(albums[pk], context={'request': request}).data
+        else:
+            continue
+        results.append({'type': kind, kind: data})
+    
+    return Response({
+        'results': results,
+        'count': len(results),
+        'next_before': page[-1][2] if len(page) == limit else None
+    })
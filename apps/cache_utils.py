@@ -1,10 +1,14 @@
 """
 Utilitários de cache Redis para invalidação automática
 """
+import threading
+from contextlib import contextmanager
+
 from django.core.cache import cache
 from django_redis import get_redis_connection
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
+from ehit_backend.async_cache import is_redis_cache
 from .artists.models import Artist, Album
 from .music.models import Music
 from .playlists.models import Playlist
@@ -12,6 +16,9 @@ from .playlists.models import Playlist
 
 def delete_cache_pattern(pattern):
     """Deleta todas as chaves que correspondem ao padrão especificado"""
+    if not is_redis_cache():
+        # Cache local (desenvolvimento/testes) não suporta busca por padrão
+        return 0
     try:
         conn = get_redis_connection("default")
         keys = conn.keys(pattern)
@@ -85,6 +92,53 @@ def invalidate_playlist_cache(playlist_id=None):
     delete_cache_pattern("playlists_list_*")
 
 
+# Invalidações adiadas dentro de coalesce_cache_invalidation (por thread)
+_coalesce = threading.local()
+
+_INVALIDATORS = (
+    ('music', invalidate_music_cache),
+    ('album', invalidate_album_cache),
+    ('artist', invalidate_artist_cache),
+    ('playlist', invalidate_playlist_cache),
+)
+
+
+@contextmanager
+def coalesce_cache_invalidation():
+    """
+    Agrupa as invalidações de cache de um bloco em uma única passada
+
+    Cada save dispara várias varreduras por padrão (KEYS) no Redis; em ações
+    em massa isso se repete por registro. Dentro do bloco os signals apenas
+    anotam o tipo afetado ('music', 'album', 'artist', 'playlist') e, ao sair,
+    cada tipo é invalidado uma vez. O conjunto retornado aceita tipos extras
+    (ex.: alterações via ``QuerySet.update``, que não disparam signals).
+    """
+    pending = getattr(_coalesce, 'pending', None)
+    if pending is not None:
+        # Bloco aninhado: o externo faz a invalidação
+        yield pending
+        return
+
+    pending = _coalesce.pending = set()
+    try:
+        yield pending
+    finally:
+        _coalesce.pending = None
+        for kind, invalidate in _INVALIDATORS:
+            if kind in pending:
+                invalidate()
+
+
+def _defer_invalidation(*kinds):
+    """Anota os tipos afetados se houver um bloco coalescido ativo"""
+    pending = getattr(_coalesce, 'pending', None)
+    if pending is None:
+        return False
+    pending.update(kind for kind in kinds if kind)
+    return True
+
+
 # =============================================================================
 # SIGNALS PARA INVALIDAÇÃO AUTOMÁTICA DE CACHE
 # =============================================================================
@@ -92,30 +146,40 @@ def invalidate_playlist_cache(playlist_id=None):
 @receiver(post_save, sender=Artist)
 def artist_saved(sender, instance, **kwargs):
     """Invalidar cache quando artista é salvo"""
+    if _defer_invalidation('artist'):
+        return
     invalidate_artist_cache(instance.id)
 
 
 @receiver(post_delete, sender=Artist)
 def artist_deleted(sender, instance, **kwargs):
     """Invalidar cache quando artista é deletado"""
+    if _defer_invalidation('artist'):
+        return
     invalidate_artist_cache(instance.id)
 
 
 @receiver(post_save, sender=Album)
 def album_saved(sender, instance, **kwargs):
     """Invalidar cache quando álbum é salvo"""
+    if _defer_invalidation('album', 'artist'):
+        return
     invalidate_album_cache(instance.id, instance.artist.id)
 
 
 @receiver(post_delete, sender=Album)
 def album_deleted(sender, instance, **kwargs):
     """Invalidar cache quando álbum é deletado"""
+    if _defer_invalidation('album', 'artist'):
+        return
     invalidate_album_cache(instance.id, instance.artist.id)
 
 
 @receiver(post_save, sender=Music)
 def music_saved(sender, instance, **kwargs):
     """Invalidar cache quando música é salva"""
+    if _defer_invalidation('music', 'artist', instance.album_id and 'album'):
+        return
     invalidate_music_cache(
         instance.id, 
         instance.artist.id if instance.artist else None,
@@ -126,6 +190,8 @@ def music_saved(sender, instance, **kwargs):
 @receiver(post_delete, sender=Music)
 def music_deleted(sender, instance, **kwargs):
     """Invalidar cache quando música é deletada"""
+    if _defer_invalidation('music', 'artist', instance.album_id and 'album'):
+        return
     invalidate_music_cache(
         instance.id, 
         instance.artist.id if instance.artist else None,
@@ -136,12 +202,16 @@ def music_deleted(sender, instance, **kwargs):
 @receiver(post_save, sender=Playlist)
 def playlist_saved(sender, instance, **kwargs):
     """Invalidar cache quando playlist é salva"""
+    if _defer_invalidation('playlist'):
+        return
     invalidate_playlist_cache(instance.id)
 
 
 @receiver(post_delete, sender=Playlist)
 def playlist_deleted(sender, instance, **kwargs):
     """Invalidar cache quando playlist é deletada"""
+    if _defer_invalidation('playlist'):
+        return
     invalidate_playlist_cache(instance.id)
 
 
@@ -193,6 +263,15 @@ def warm_up_cache():
         print(f"❌ Erro ao aquecer cache: {e}")
 
 
+def _hit_rate(info):
+    """Taxa de acerto do Redis desde o último restart (keyspace_hits/misses)"""
+    hits = info.get('keyspace_hits', 0)
+    misses = info.get('keyspace_misses', 0)
+    if not hits + misses:
+        return 'N/A'
+    return f"{hits / (hits + misses):.1%}"
+
+
 def get_cache_stats():
     """Obter estatísticas detalhadas do cache Redis"""
     try:
@@ -207,7 +286,7 @@ def get_cache_stats():
             'connected_clients': info.get('connected_clients', 0),
             'used_memory_human': info.get('used_memory_human', 'N/A'),
             'total_keys': conn.dbsize(),
-            'hit_rate': 'N/A',
+            'hit_rate': _hit_rate(info),
             'compression_enabled': True,
         }
         
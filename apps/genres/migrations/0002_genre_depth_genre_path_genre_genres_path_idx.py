@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:29
+
+from django.db import migrations, models
+
+
+def fill_genre_paths(apps, schema_editor):
+    """Calcula path/depth dos gêneros existentes, da raiz para as folhas"""
+    Genre = apps.get_model('genres', 'Genre')
+    children = {}
+    for genre in Genre.objects.all():
+        children.setdefault(genre.parent_id, []).append(genre)
+
+    pending = [(genre, '') for genre in children.get(None, [])]
+    while pending:
+        genre, parent_path = pending.pop()
+        genre.path = f"{parent_path}{genre.pk}/"
+        genre.depth = genre.path.count('/') - 1
+        genre.save(update_fields=['path', 'depth'])
+        pending.extend((child, genre.path) for child in children.get(genre.pk, []))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('genres', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='genre',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Profundidade'),
+        ),
+        migrations.AddField(
+            model_name='genre',
+            name='path',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255, verbose_name='Caminho'),
+        ),
+        migrations.AddIndex(
+            model_name='genre',
+            index=models.Index(fields=['path'], name='genres_path_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.RunPython(fill_genre_paths, migrations.RunPython.noop),
+    ]
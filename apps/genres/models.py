@@ -1,4 +1,7 @@
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import Count, F, Q, Value
+from django.db.models.functions import Concat, Substr
 from django.utils.text import slugify
 
 class Genre(models.Model):
@@ -8,6 +11,10 @@ class Genre(models.Model):
     color = models.CharField(max_length=7, default="#FF6B6B", verbose_name="Cor")
     icon = models.CharField(max_length=50, blank=True, null=True, verbose_name="Ícone")
     parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='subgenres', verbose_name="Gênero Pai")
+    # Caminho materializado com os IDs dos ancestrais e do próprio gênero ("1/5/12/"):
+    # os descendentes de um gênero são os que têm o caminho começando pelo dele
+    path = models.CharField(max_length=255, blank=True, default='', editable=False, verbose_name="Caminho")
+    depth = models.PositiveSmallIntegerField(default=0, editable=False, verbose_name="Profundidade")
     is_active = models.BooleanField(default=True, verbose_name="Ativo")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Criado em")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Atualizado em")
@@ -16,21 +23,126 @@ class Genre(models.Model):
         verbose_name = "Gênero"
         verbose_name_plural = "Gêneros"
         ordering = ['name']
+        indexes = [
+            # varchar_pattern_ops permite usar o índice em path LIKE 'x/%' no PostgreSQL
+            models.Index(fields=['path'], name='genres_path_idx', opclasses=['varchar_pattern_ops']),
+        ]
+
+    def clean(self):
+        super().clean()
+        self._validate_parent()
+
+    def _validate_parent(self):
+        """Impede que o gênero seja filho de si mesmo ou de um descendente"""
+        if not self.parent_id or not self.pk:
+            return
+        if self.parent_id == self.pk or (self.path and self.parent.path.startswith(self.path)):
+            raise ValidationError({'parent': 'Um gênero não pode ser subgênero de si mesmo ou de um descendente'})
 
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.name)
+        self._validate_parent()
+
+        # Caminho atual no banco (a instância em memória pode estar desatualizada)
+        old_path, old_depth = '', 0
+        if self.pk:
+            current = Genre.objects.filter(pk=self.pk).values_list('path', 'depth').first()
+            if current:
+                old_path, old_depth = current
+
         super().save(*args, **kwargs)
 
+        parent_path = self.parent.path if self.parent_id else ''
+        new_path = f"{parent_path}{self.pk}/"
+        new_depth = new_path.count('/') - 1
+        if new_path != old_path:
+            if old_path:
+                # Move a subárvore inteira em um único UPDATE
+                Genre.objects.filter(path__startswith=old_path).update(
+                    path=Concat(Value(new_path), Substr('path', len(old_path) + 1)),
+                    depth=F('depth') + (new_depth - old_depth)
+                )
+            else:
+                Genre.objects.filter(pk=self.pk).update(path=new_path, depth=new_depth)
+        self.path, self.depth = new_path, new_depth
+
     def __str__(self):
         return self.name
 
     @property
     def song_count(self):
         """Retorna o número de músicas neste gênero"""
+        if hasattr(self, '_song_count'):
+            return self._song_count
         return self.musics.count()
 
     @property
     def artist_count(self):
         """Retorna o número de artistas neste gênero"""
+        if hasattr(self, '_artist_count'):
+            return self._artist_count
         return self.artists.count()
+
+    def get_descendants(self, include_self=True):
+        """Gêneros abaixo deste na árvore (consulta indexada pelo caminho)"""
+        queryset = Genre.objects.filter(path__startswith=self.path)
+        if not include_self:
+            queryset = queryset.exclude(pk=self.pk)
+        return queryset
+
+    def subtree_filter(self, lookup='genre'):
+        """
+        Q para filtrar outros modelos por este gênero e seus subgêneros
+
+        Ex.: ``Music.objects.filter(genre.subtree_filter())`` ou
+        ``Album.objects.filter(genre.subtree_filter('artist__genre'))``
+        """
+        return Q(**{f'{lookup}__path__startswith': self.path})
+
+    @classmethod
+    def resolve(cls, value):
+        """Busca um gênero ativo por ID ou slug (None se não existir)"""
+        value = (value or '').strip()
+        if not value:
+            return None
+        lookup = {'pk': int(value)} if value.isdigit() else {'slug': value}
+        return cls.objects.filter(is_active=True, **lookup).first()
+
+    @classmethod
+    def build_tree(cls, roots=None):
+        """
+        Carrega a árvore de gêneros ativos em uma única consulta
+
+        Preenche ``active_children`` em cada gênero (com contagens de músicas e
+        artistas já anotadas) e retorna a lista de raízes. Com ``roots``, carrega
+        apenas as subárvores desses gêneros e preenche os próprios objetos.
+        """
+        queryset = cls.objects.filter(is_active=True)
+        if roots is not None:
+            roots = list(roots)
+            if not roots:
+                return []
+            subtree = Q()
+            for root in roots:
+                subtree |= Q(path__startswith=root.path)
+            queryset = queryset.filter(subtree).exclude(pk__in=[root.pk for root in roots])
+
+        genres = list(queryset.annotate(
+            _song_count=Count('musics', distinct=True),
+            _artist_count=Count('artists', distinct=True)
+        ).order_by('depth', 'name'))
+
+        nodes = {genre.pk: genre for genre in genres}
+        if roots is not None:
+            nodes.update({root.pk: root for root in roots})
+        for node in nodes.values():
+            node.active_children = []
+        for genre in genres:
+            parent = nodes.get(genre.parent_id)
+            if parent is not None:
+                parent.active_children.append(genre)
+
+        if roots is not None:
+            return roots
+        return [genre for genre in genres if genre.parent_id is None]
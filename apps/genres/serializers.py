@@ -16,9 +16,15 @@ class GenreSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'slug', 'created_at', 'updated_at']
     
     def get_subgenres(self, obj):
-        """Retorna os subgêneros se existirem"""
-        subgenres = obj.subgenres.filter(is_active=True)
-        return GenreSerializer(subgenres, many=True).data
+        """
+        Retorna os subgêneros se existirem
+
+        A subárvore inteira é carregada em uma consulta (``Genre.build_tree``)
+        no primeiro nível; os níveis abaixo reaproveitam ``active_children``.
+        """
+        if not hasattr(obj, 'active_children'):
+            Genre.build_tree([obj])
+        return GenreSerializer(obj.active_children, many=True, context=self.context).data
 
 class GenreListSerializer(serializers.ModelSerializer):
     """Serializer simplificado para listagem"""
@@ -147,3 +147,78 @@ class GenreModelTest(TestCase):
         re_updated_genre = Genre.objects.get(id=self.genre.id)
         self.assertTrue(re_updated_genre.is_active)
 
+
+
+class GenreTreeTest(TestCase):
+    """Testes para a hierarquia de gêneros (caminho materializado)"""
+
+    def setUp(self):
+        self.sertanejo = Genre.objects.create(name='Sertanejo')
+        self.universitario = Genre.objects.create(name='Sertanejo Universitário', parent=self.sertanejo)
+        self.feminejo = Genre.objects.create(name='Feminejo', parent=self.universitario)
+        self.forro = Genre.objects.create(name='Forró')
+
+    def test_paths_and_depth(self):
+        """Testa caminho e profundidade calculados no save"""
+        self.assertEqual(self.sertanejo.path, f'{self.sertanejo.pk}/')
+        self.assertEqual(self.feminejo.path, f'{self.sertanejo.pk}/{self.universitario.pk}/{self.feminejo.pk}/')
+        self.assertEqual(self.feminejo.depth, 2)
+
+    def test_descendants(self):
+        """Testa busca de descendentes pelo caminho"""
+        descendants = set(self.sertanejo.get_descendants().values_list('name', flat=True))
+        self.assertEqual(descendants, {'Sertanejo', 'Sertanejo Universitário', 'Feminejo'})
+
+    def test_moving_genre_updates_subtree(self):
+        """Testa que mover um gênero atualiza o caminho de toda a subárvore"""
+        self.universitario.parent = self.forro
+        self.universitario.save()
+
+        self.feminejo.refresh_from_db()
+        self.assertEqual(self.feminejo.path, f'{self.forro.pk}/{self.universitario.pk}/{self.feminejo.pk}/')
+        self.assertEqual(self.feminejo.depth, 2)
+        self.assertEqual(self.sertanejo.get_descendants().count(), 1)
+
+    def test_cannot_move_under_descendant(self):
+        """Testa que um gênero não pode virar filho de um descendente"""
+        self.sertanejo.parent = self.feminejo
+        with self.assertRaises(ValidationError):
+            self.sertanejo.save()
+
+    def test_tree_serializes_in_one_query(self):
+        """Testa serialização da árvore completa com uma única consulta"""
+        from .serializers import GenreSerializer
+
+        with self.assertNumQueries(1):
+            data = GenreSerializer(Genre.build_tree(), many=True).data
+        sertanejo = next(genre for genre in data if genre['name'] == 'Sertanejo')
+        self.assertEqual(sertanejo['subgenres'][0]['name'], 'Sertanejo Universitário')
+        self.assertEqual(sertanejo['subgenres'][0]['subgenres'][0]['name'], 'Feminejo')
+
+    def test_tree_endpoint(self):
+        """Testa endpoint da árvore de gêneros"""
+        response = self.client.get('/api/genres/genres/tree/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([genre['name'] for genre in response.data], ['Forró', 'Sertanejo'])
+
+    def test_inactive_subgenre_hides_its_subtree(self):
+        """Testa que subgêneros inativos (e seus filhos) não aparecem na árvore"""
+        self.universitario.is_active = False
+        self.universitario.save()
+
+        roots = Genre.build_tree()
+        sertanejo = next(genre for genre in roots if genre.pk == self.sertanejo.pk)
+        self.assertEqual(sertanejo.active_children, [])
+
+    def test_music_list_filters_by_subtree(self):
+        """Testa filtro de músicas incluindo subgêneros"""
+        from apps.artists.models import Artist
+        from apps.music.models import Music
+
+        artist = Artist.objects.create(stage_name='Tree Artist')
+        Music.objects.create(artist=artist, title='Raiz', duration=100, genre=self.sertanejo)
+        Music.objects.create(artist=artist, title='Folha', duration=100, genre=self.feminejo)
+        Music.objects.create(artist=artist, title='Outro', duration=100, genre=self.forro)
+
+        musics = Music.objects.filter(self.sertanejo.subtree_filter())
+        self.assertEqual(set(musics.values_list('title', flat=True)), {'Raiz', 'Folha'})
@@ -1,11 +1,11 @@
 from rest_framework import viewsets, status, permissions
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.filters import SearchFilter, OrderingFilter
 from rest_framework.exceptions import NotFound
 from django.db.models import Q, Count
 from .models import Genre
-from .serializers import GenreListSerializer
+from .serializers import GenreListSerializer, GenreSerializer
 from apps.artists.serializers import ArtistSerializer
 
 class GenreViewSet(viewsets.ReadOnlyModelViewSet):
@@ -33,6 +33,17 @@ class GenreViewSet(viewsets.ReadOnlyModelViewSet):
         context = super().get_serializer_context()
         context['request'] = self.request
         return context
+    
+    @action(detail=False, methods=['get'])
+    def tree(self, request):
+        """
+        Árvore completa de gêneros ativos com subgêneros aninhados
+        
+        GET /api/genres/genres/tree/ (uma única consulta para toda a árvore)
+        """
+        roots = Genre.build_tree()
+        serializer = GenreSerializer(roots, many=True, context=self.get_serializer_context())
+        return Response(serializer.data)
 
 
 @api_view(['GET'])
@@ -0,0 +1,280 @@
+"""
+Utilitários de imagem para placeholders de artwork
+
+Calcula a cor dominante e o blurhash das capas (álbuns, músicas, artistas e
+banners) uma única vez, no momento do upload, para que os clientes pintem o
+placeholder imediatamente e carreguem a imagem completa sob demanda.
+"""
+import io
+import logging
+
+import numpy as np
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Lado máximo da miniatura usada nos cálculos (suficiente para o blurhash)
+THUMBNAIL_SIZE = 32
+
+# Componentes do blurhash (horizontal x vertical)
+BLURHASH_COMPONENTS = (4, 3)
+
+# Lado do mosaico 2x2 gerado para as playlists
+MOSAIC_SIZE = 640
+
+BASE83_CHARACTERS = (
+    '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+    'abcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~'
+)
+
+
+def _encode_base83(value, length):
+    """Codifica um inteiro em base83 com tamanho fixo"""
+    result = ''
+    for i in range(1, length + 1):
+        digit = (int(value) // (83 ** (length - i))) % 83
+        result += BASE83_CHARACTERS[digit]
+    return result
+
+
+def _srgb_to_linear(values):
+    """Converte canais sRGB (0-255) para RGB linear (0-1)"""
+    values = values / 255.0
+    return np.where(values <= 0.04045, values / 12.92, ((values + 0.055) / 1.055) ** 2.4)
+
+
+def _linear_to_srgb(value):
+    """Converte um canal RGB linear (0-1) para sRGB (0-255)"""
+    value = min(max(value, 0.0), 1.0)
+    if value <= 0.0031308:
+        return int(value * 12.92 * 255 + 0.5)
+    return int((1.055 * (value ** (1 / 2.4)) - 0.055) * 255 + 0.5)
+
+
+def _sign_pow(value, exponent):
+    return np.sign(value) * np.abs(value) ** exponent
+
+
+def load_thumbnail(image_file, size=THUMBNAIL_SIZE):
+    """
+    Abre a imagem e retorna um array RGB (altura, largura, 3) reduzido
+
+    O arquivo é reposicionado no início ao final para não atrapalhar o
+    salvamento do upload pelo storage.
+    """
+    if hasattr(image_file, 'seek'):
+        image_file.seek(0)
+    with Image.open(image_file) as img:
+        img.draft('RGB', (size * 4, size * 4))  # Decodificação reduzida em JPEG
+        img = img.convert('RGB')
+        img.thumbnail((size, size), Image.BILINEAR)
+        pixels = np.asarray(img, dtype=np.float64)
+    if hasattr(image_file, 'seek'):
+        image_file.seek(0)
+    return pixels
+
+
+def compute_dominant_color(pixels):
+    """
+    Retorna a cor dominante em hexadecimal (#RRGGBB)
+
+    Quantiza os pixels em 4 bits por canal, escolhe o grupo mais populoso e
+    devolve a média real dos pixels desse grupo.
+    """
+    flat = pixels.reshape(-1, 3)
+    quantized = flat.astype(np.uint16) >> 4
+    buckets = (quantized[:, 0] << 8) | (quantized[:, 1] << 4) | quantized[:, 2]
+    dominant_bucket = np.bincount(buckets).argmax()
+    red, green, blue = flat[buckets == dominant_bucket].mean(axis=0).round().astype(int)
+    return f'#{red:02X}{green:02X}{blue:02X}'
+
+
+def compute_blurhash(pixels, components=BLURHASH_COMPONENTS):
+    """Calcula o blurhash da imagem (algoritmo de referência, vetorizado)"""
+    components_x, components_y = components
+    height, width, _ = pixels.shape
+    linear = _srgb_to_linear(pixels)
+
+    # Bases de cosseno: (componentes, pixels) em cada eixo
+    basis_x = np.cos(np.pi * np.outer(np.arange(components_x), np.arange(width)) / width)
+    basis_y = np.cos(np.pi * np.outer(np.arange(components_y), np.arange(height)) / height)
+
+    # factors[j, i, canal] = soma(basis_y[j, y] * basis_x[i, x] * linear[y, x, canal])
+    factors = np.einsum('jy,ix,yxc->jic', basis_y, basis_x, linear) / (width * height)
+    normalisation = np.full((components_y, components_x), 2.0)
+    normalisation[0, 0] = 1.0
+    factors = (factors * normalisation[:, :, None]).reshape(-1, 3)
+
+    dc, ac = factors[0], factors[1:]
+
+    blurhash = _encode_base83((components_x - 1) + (components_y - 1) * 9, 1)
+
+    if len(ac):
+        actual_max = np.abs(ac).max()
+        quantised_max = int(max(0, min(82, np.floor(actual_max * 166 - 0.5))))
+        max_value = (quantised_max + 1) / 166
+        blurhash += _encode_base83(quantised_max, 1)
+    else:
+        max_value = 1
+        blurhash += _encode_base83(0, 1)
+
+    dc_value = (
+        (_linear_to_srgb(dc[0]) << 16) + (_linear_to_srgb(dc[1]) << 8) + _linear_to_srgb(dc[2])
+    )
+    blurhash += _encode_base83(dc_value, 4)
+
+    if len(ac):
+        quantised = np.clip(
+            np.floor(_sign_pow(ac / max_value, 0.5) * 9 + 9.5), 0, 18
+        ).astype(int)
+        ac_values = quantised[:, 0] * 19 * 19 + quantised[:, 1] * 19 + quantised[:, 2]
+        blurhash += ''.join(_encode_base83(value, 2) for value in ac_values)
+
+    return blurhash
+
+
+def compute_placeholders(image_file):
+    """
+    Retorna (cor_dominante, blurhash) para o arquivo de imagem
+
+    Em caso de erro retorna (None, None) para não bloquear o salvamento.
+    """
+    try:
+        pixels = load_thumbnail(image_file)
+        return compute_dominant_color(pixels), compute_blurhash(pixels)
+    except Exception as e:
+        logger.warning(f"Erro ao calcular placeholders da imagem: {e}")
+        return None, None
+
+
+def update_artwork_placeholders(instance, image_field, color_field, blurhash_field, update_fields=None,
+                                stored_name=None):
+    """
+    Atualiza cor dominante e blurhash do model quando a imagem muda
+
+    Recalcula apenas para uploads novos (arquivo ainda não persistido), quando
+    o campo aponta para outro arquivo já salvo (``stored_name`` é o nome lido
+    do banco) ou quando os placeholders ainda não foram calculados. Saves
+    parciais que não incluem o campo de imagem (ex.: contadores) são
+    ignorados. Retorna a lista de campos alterados para compor o
+    ``update_fields`` do save.
+    """
+    if update_fields is not None and image_field not in update_fields:
+        return []
+
+    changed_fields = [color_field, blurhash_field]
+    image = getattr(instance, image_field)
+
+    if not image:
+        if not (getattr(instance, color_field) or getattr(instance, blurhash_field)):
+            return []
+        setattr(instance, color_field, '')
+        setattr(instance, blurhash_field, '')
+        return changed_fields
+
+    is_new_upload = not getattr(image, '_committed', True)
+    replaced = stored_name is not None and image.name != stored_name
+    if not is_new_upload and not replaced and getattr(instance, blurhash_field):
+        return []
+
+    if is_new_upload:
+        color, blurhash = compute_placeholders(image)
+    else:
+        try:
+            image.open('rb')
+        except Exception as e:
+            logger.warning(f"Erro ao abrir imagem {image.name}: {e}")
+            return []
+        try:
+            color, blurhash = compute_placeholders(image)
+        finally:
+            image.close()
+
+    if blurhash is None:
+        return []
+
+    setattr(instance, color_field, color)
+    setattr(instance, blurhash_field, blurhash)
+    return changed_fields
+
+
+def _file_name(value):
+    """Nome do arquivo em ``instance.__dict__`` (string vinda do banco ou FieldFile)"""
+    return getattr(value, 'name', value)
+
+
+class ArtworkPlaceholdersMixin:
+    """
+    Calcula cor dominante e blurhash no ``save()`` dos models com artwork
+
+    ``artwork_fields`` lista as tuplas (imagem, cor, blurhash). O nome da
+    imagem lido do banco é guardado em ``from_db`` para recalcular só quando
+    a imagem muda.
+    """
+
+    artwork_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_artwork()
+        return instance
+
+    def _remember_artwork(self):
+        # Campos adiados (.only()/.defer()) ficam de fora: sem nome conhecido
+        self._stored_artwork = {
+            image_field: _file_name(self.__dict__[image_field])
+            for image_field, _, _ in self.artwork_fields
+            if image_field in self.__dict__
+        }
+
+    def save(self, *args, **kwargs):
+        stored = getattr(self, '_stored_artwork', {})
+        for image_field, color_field, blurhash_field in self.artwork_fields:
+            changed = update_artwork_placeholders(
+                self, image_field, color_field, blurhash_field, kwargs.get('update_fields'),
+                stored_name=stored.get(image_field),
+            )
+            if changed and kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = [*kwargs['update_fields'], *changed]
+        super().save(*args, **kwargs)
+        self._remember_artwork()
+
+
+def compose_mosaic(image_files, size=MOSAIC_SIZE):
+    """
+    Gera a capa em mosaico 2x2 (JPEG) a partir de até 4 imagens
+
+    Com menos de 4 imagens usa apenas a primeira, ocupando a capa inteira.
+    Retorna um ``ContentFile`` ou None se nenhuma imagem puder ser aberta.
+    """
+    images = []
+    for image_file in image_files:
+        try:
+            image_file.open('rb')
+            try:
+                with Image.open(image_file) as image:
+                    images.append(image.convert('RGB'))
+            finally:
+                image_file.close()
+        except Exception as e:
+            logger.warning(f"Erro ao abrir imagem do mosaico {getattr(image_file, 'name', '')}: {e}")
+
+    if not images:
+        return None
+
+    canvas = Image.new('RGB', (size, size))
+    if len(images) < 4:
+        canvas.paste(ImageOps.fit(images[0], (size, size), Image.LANCZOS), (0, 0))
+    else:
+        tile = size // 2
+        for index, image in enumerate(images[:4]):
+            canvas.paste(
+                ImageOps.fit(image, (tile, tile), Image.LANCZOS),
+                ((index % 2) * tile, (index // 2) * tile)
+            )
+
+    buffer = io.BytesIO()
+    canvas.save(buffer, format='JPEG', quality=85, optimize=True)
+    return ContentFile(buffer.getvalue())
@@ -0,0 +1,337 @@
+"""
+Download de álbum em ZIP, gerado em streaming
+
+O ZIP é montado na hora direto do storage, sem arquivo temporário e com
+memória constante: faixas e capa entram sem compressão (``stored``; áudio e
+imagem já são comprimidos) e são lidas em blocos de ``CHUNK_SIZE``. Sem
+compressão, o tamanho final é conhecido antes do primeiro byte
+(``Content-Length``) a partir de ``Music.file_size``.
+
+O CRC-32 de cada arquivo só é conhecido depois de lido, então vai no "data
+descriptor" depois dos dados (bit 3 das flags) e no diretório central do fim.
+Os CRCs das faixas ficam em ``AudioBlob.crc32``: um download retomado com
+``Range`` não precisa reler as faixas que o cliente já tem. O layout não
+depende dos CRCs, então cada byte tem sempre a mesma posição e a retomada é
+segura; o ``ETag`` muda quando as faixas do álbum mudam.
+
+Em produção o nginx bufferiza a resposta em disco (``proxy_max_temp_file_size``
+em docker/prod/nginx.conf): o worker gera o ZIP na velocidade do storage e fica
+livre, e o nginx entrega ao cliente no ritmo dele. Com ``SERVER_MODE=asgi`` o
+corpo é um iterador assíncrono, consumido bloco a bloco pelo servidor.
+
+Sem ZIP64: álbuns acima de 4 GiB não são oferecidos em ZIP.
+"""
+import hashlib
+import os
+import re
+import struct
+import zlib
+from dataclasses import dataclass
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import F
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.http import content_disposition_header
+
+from .models import AudioBlob, Music
+
+CHUNK_SIZE = 256 * 1024
+ZIP_MAX_SIZE = 0xFFFFFFFF
+
+# Versão 2.0 (criado em Unix, para as permissões), bit 3 (CRC no data descriptor)
+# e bit 11 (nomes em UTF-8)
+ZIP_VERSION = 20
+ZIP_VERSION_MADE_BY = (3 << 8) | ZIP_VERSION
+ZIP_FLAGS = 0x0808
+LOCAL_HEADER = struct.Struct('<IHHHHHIIIHH')
+DESCRIPTOR = struct.Struct('<IIII')
+CENTRAL_HEADER = struct.Struct('<IHHHHHHIIIHHHHHII')
+END_RECORD = struct.Struct('<IHHHHIIH')
+
+RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def _safe_name(value):
+    """Nome de arquivo sem separadores de caminho nem caracteres de controle"""
+    return re.sub(r'[\\/:*?"<>|\x00-\x1f]', '_', value).strip(' .') or 'sem nome'
+
+
+def _dos_datetime(value):
+    """(hora, data) no formato do MS-DOS usado pelo ZIP"""
+    year = min(max(value.year, 1980), 2107)
+    return (
+        (value.hour << 11) | (value.minute << 5) | (value.second // 2),
+        ((year - 1980) << 9) | (value.month << 5) | value.day,
+    )
+
+
+def read_range(storage, name, start, stop):
+    """Bytes [start, stop) de um arquivo do storage, em blocos"""
+    if start >= stop:
+        return
+    bucket = getattr(storage, 'bucket', None)
+    if bucket is not None:
+        # S3: GET com Range, sem baixar o objeto inteiro para um arquivo local
+        from storages.utils import clean_name
+
+        body = bucket.Object(storage._normalize_name(clean_name(name))).get(
+            Range=f'bytes={start}-{stop - 1}'
+        )['Body']
+        chunks = body.iter_chunks(CHUNK_SIZE)
+    else:
+        handle = storage.open(name, 'rb')
+        handle.seek(start)
+        chunks = iter(lambda: handle.read(min(CHUNK_SIZE, stop - start)), b'')
+    remaining = stop - start
+    try:
+        for chunk in chunks:
+            chunk = chunk[:remaining]
+            remaining -= len(chunk)
+            yield chunk
+            if not remaining:
+                return
+    finally:
+        (body if bucket is not None else handle).close()
+    raise IOError(f"{name}: arquivo menor que o tamanho registrado")
+
+
+@dataclass
+class ZipEntry:
+    name: str
+    storage: object
+    path: str
+    size: int
+    modified: object
+    crc: int = None
+    blob_id: int = None
+    offset: int = 0
+
+    @property
+    def encoded_name(self):
+        return self.name.encode('utf-8')
+
+    @property
+    def data_offset(self):
+        return self.offset + LOCAL_HEADER.size + len(self.encoded_name)
+
+    @property
+    def end(self):
+        return self.data_offset + self.size + DESCRIPTOR.size
+
+
+class ZipArchive:
+    """ZIP sem compressão com layout calculado de antemão"""
+
+    def __init__(self, entries):
+        self.entries = entries
+        offset = 0
+        for entry in entries:
+            entry.offset = offset
+            offset = entry.end
+        self.central_offset = offset
+        self.central_size = sum(CENTRAL_HEADER.size + len(entry.encoded_name) for entry in entries)
+        self.size = self.central_offset + self.central_size + END_RECORD.size
+
+    @property
+    def etag(self):
+        digest = hashlib.sha256()
+        for entry in self.entries:
+            digest.update(f'{entry.name}\0{entry.path}\0{entry.size}\0{entry.modified.isoformat()}\n'.encode())
+        return f'"{digest.hexdigest()[:32]}"'
+
+    def _local_header(self, entry):
+        time, date = _dos_datetime(entry.modified)
+        # CRC zerado: o valor vai no data descriptor
+        return LOCAL_HEADER.pack(
+            0x04034b50, ZIP_VERSION, ZIP_FLAGS, 0, time, date, 0, entry.size, entry.size,
+            len(entry.encoded_name), 0,
+        ) + entry.encoded_name
+
+    def _descriptor(self, entry):
+        return DESCRIPTOR.pack(0x08074b50, entry.crc, entry.size, entry.size)
+
+    def _central_directory(self):
+        records = []
+        for entry in self.entries:
+            if entry.crc is None:
+                self._compute_crc(entry)
+            time, date = _dos_datetime(entry.modified)
+            records.append(CENTRAL_HEADER.pack(
+                0x02014b50, ZIP_VERSION_MADE_BY, ZIP_VERSION, ZIP_FLAGS, 0, time, date, entry.crc, entry.size,
+                entry.size, len(entry.encoded_name), 0, 0, 0, 0, 0o100644 << 16, entry.offset,
+            ) + entry.encoded_name)
+        records.append(END_RECORD.pack(
+            0x06054b50, 0, 0, len(self.entries), len(self.entries), self.central_size, self.central_offset, 0,
+        ))
+        return b''.join(records)
+
+    def _store_crc(self, entry, crc):
+        entry.crc = crc
+        if entry.blob_id is not None:
+            AudioBlob.objects.filter(pk=entry.blob_id).update(crc32=crc)
+
+    def _compute_crc(self, entry):
+        crc = 0
+        for chunk in read_range(entry.storage, entry.path, 0, entry.size):
+            crc = zlib.crc32(chunk, crc)
+        self._store_crc(entry, crc)
+
+    def _data(self, entry, start, stop, need_crc):
+        """Bytes [start, stop) dos dados da entrada, calculando o CRC se ainda não conhecido"""
+        if entry.crc is not None:
+            yield from read_range(entry.storage, entry.path, start, stop)
+            return
+        # CRC desconhecido: lê desde o início (só até ``stop`` se o CRC não for necessário)
+        crc, position = 0, 0
+        for chunk in read_range(entry.storage, entry.path, 0, entry.size if need_crc else stop):
+            crc = zlib.crc32(chunk, crc)
+            begin, end = max(start - position, 0), min(stop - position, len(chunk))
+            if begin < end:
+                yield chunk[begin:end]
+            position += len(chunk)
+        if position == entry.size:
+            self._store_crc(entry, crc)
+
+    def iter_bytes(self, start=0, stop=None):
+        """Bytes [start, stop) do ZIP"""
+        stop = self.size if stop is None else stop
+
+        def part(data, position):
+            begin, end = max(start - position, 0), min(stop - position, len(data))
+            return data[begin:end] if begin < end else b''
+
+        for entry in self.entries:
+            if entry.end <= start:
+                continue
+            if entry.offset >= stop:
+                return
+            header = part(self._local_header(entry), entry.offset)
+            if header:
+                yield header
+            data_end = entry.data_offset + entry.size
+            yield from self._data(
+                entry,
+                max(start - entry.data_offset, 0),
+                max(min(stop, data_end) - entry.data_offset, 0),
+                need_crc=stop > data_end,
+            )
+            if stop > data_end:
+                descriptor = part(self._descriptor(entry), data_end)
+                if descriptor:
+                    yield descriptor
+        if stop > self.central_offset:
+            yield part(self._central_directory(), self.central_offset)
+
+
+def album_archive(album):
+    """
+    ZIP com as faixas ativas do álbum (na ordem de envio) e a capa
+
+    Returns:
+        tuple: (ZipArchive, ids das músicas), ou (None, []) se não há faixas
+    """
+    musics = list(
+        album.musics.filter(is_active=True).exclude(file='').order_by('created_at', 'pk')
+    )
+    if not musics:
+        return None, []
+    blobs = {blob.name: blob for blob in AudioBlob.objects.filter(name__in=[music.file.name for music in musics])}
+    folder = _safe_name(f'{album.artist.stage_name} - {album.name}')
+    entries = []
+    for number, music in enumerate(musics, start=1):
+        blob = blobs.get(music.file.name)
+        extension = os.path.splitext(music.file.name)[1] or '.mp3'
+        entries.append(ZipEntry(
+            name=f'{folder}/{number:02d} - {_safe_name(music.title)}{extension}',
+            storage=music.file.storage,
+            path=music.file.name,
+            size=music.file_size or (blob.size if blob else 0) or music.file.size,
+            modified=music.created_at,
+            crc=blob.crc32 if blob else None,
+            blob_id=blob.pk if blob else None,
+        ))
+    if album.cover:
+        entries.append(ZipEntry(
+            name=f'{folder}/cover{os.path.splitext(album.cover.name)[1] or ".jpg"}',
+            storage=album.cover.storage,
+            path=album.cover.name,
+            size=album.cover.size,
+            modified=album.updated_at,
+        ))
+    return ZipArchive(entries), [music.pk for music in musics]
+
+
+def parse_range(header, size):
+    """
+    (início, fim exclusivo) do cabeçalho Range, ou None para enviar o arquivo todo
+
+    Levanta ValueError se o intervalo é insatisfatível.
+    """
+    match = RANGE_PATTERN.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        # Vários intervalos ou formato desconhecido: resposta completa
+        return None
+    first, last = match.groups()
+    if not first:
+        start = max(size - int(last), 0)
+        stop = size
+    else:
+        start = int(first)
+        stop = min(int(last) + 1, size) if last else size
+    if start >= size or start >= stop:
+        raise ValueError(header)
+    return start, stop
+
+
+async def _async_chunks(chunks):
+    """Iterador assíncrono sobre um gerador síncrono, um bloco por vez"""
+    # Sem isso o Django lê o gerador inteiro para a memória antes de enviar (ASGI)
+    read = sync_to_async(next)
+    try:
+        while True:
+            chunk = await read(chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        # Cliente desconectado: fecha o arquivo aberto no storage
+        await sync_to_async(chunks.close)()
+
+
+def archive_response(request, archive, music_ids, filename):
+    """Resposta em streaming (200 ou 206 com Range) do ZIP do álbum"""
+    start, stop = 0, archive.size
+    etag = archive.etag
+    range_header = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if range_header and (not if_range or if_range == etag):
+        try:
+            requested = parse_range(range_header, archive.size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{archive.size}'
+            return response
+        if requested:
+            start, stop = requested
+
+    if start == 0:
+        # Conta o download uma vez, não a cada retomada
+        Music.objects.filter(pk__in=music_ids).update(downloads_count=F('downloads_count') + 1)
+
+    chunks = archive.iter_bytes(start, stop)
+    if settings.SERVER_MODE == 'asgi':
+        chunks = _async_chunks(chunks)
+    response = StreamingHttpResponse(
+        chunks,
+        status=206 if (start, stop) != (0, archive.size) else 200,
+        content_type='application/zip',
+    )
+    response['Content-Length'] = str(stop - start)
+    if response.status_code == 206:
+        response['Content-Range'] = f'bytes {start}-{stop - 1}/{archive.size}'
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Content-Disposition'] = content_disposition_header(True, filename)
+    response['Cache-Control'] = 'private, no-store'
+    return response
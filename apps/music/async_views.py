@@ -0,0 +1,145 @@
+"""
+Views assíncronas de leitura para o modo ASGI
+
+Versões async das listas da home (trending, popular, featured) e do
+autocomplete, com a mesma resposta e as mesmas chaves de cache das views
+sync em ``views.py``. Usam o ORM assíncrono do Django e o cliente Redis
+assíncrono, liberando o worker enquanto aguardam Postgres/Redis.
+"""
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.db.models import Q
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views.decorators.http import require_GET
+
+from ehit_backend import async_cache
+from .likes import annotate_liked, request_user
+from .models import Music
+from .serializers import MusicTrendingSerializer, MusicAutocompleteSerializer
+
+
+def _liked_rows(request, rows):
+    return annotate_liked(request_user(request), rows)
+
+
+async def _with_liked(request, data):
+    """Resposta de lista (compartilhada no cache) com ``is_liked`` do usuário"""
+    return dict(data, musics=await sync_to_async(_liked_rows)(request, data['musics']))
+
+
+async def _music_list_response(request, cache_key, queryset, timeout):
+    """Serializa a lista de músicas com cache (mesmo formato das views sync)"""
+    cached_data = await async_cache.aget(cache_key)
+    if cached_data:
+        return JsonResponse(await _with_liked(request, cached_data))
+
+    musics = [music async for music in queryset.select_related('artist', 'album')]
+    serializer = MusicTrendingSerializer(musics, many=True)
+    data = {
+        'musics': serializer.data,
+        'count': len(serializer.data)
+    }
+
+    await async_cache.aset(cache_key, data, timeout)
+
+    return JsonResponse(await _with_liked(request, data))
+
+
+@require_GET
+async def trending_music_view(request):
+    """Músicas em alta (async, com cache)"""
+    week_ago = timezone.now() - timedelta(days=7)
+    queryset = Music.objects.filter(
+        is_active=True,
+        created_at__gte=week_ago,
+        streams_count__gte=100
+    ).order_by('-streams_count')[:20]
+
+    # Cache por 30 minutos
+    return await _music_list_response(request, 'trending_music', queryset, 1800)
+
+
+@require_GET
+async def popular_music_view(request):
+    """Músicas populares (async, com cache)"""
+    queryset = Music.objects.filter(
+        is_active=True,
+        streams_count__gte=1000
+    ).order_by('-streams_count')[:20]
+
+    # Cache por 1 hora
+    return await _music_list_response(request, 'popular_music', queryset, 3600)
+
+
+@require_GET
+async def featured_music_view(request):
+    """Músicas em destaque (async, com cache)"""
+    queryset = Music.objects.filter(
+        is_active=True,
+        is_featured=True
+    ).order_by('-streams_count')
+
+    # Cache por 20 minutos
+    return await _music_list_response(request, 'featured_music', queryset, 60 * 20)
+
+
+@require_GET
+async def music_autocomplete_view(request):
+    """
+    Autocomplete de músicas (async, com cache)
+
+    Mesmos parâmetros de ``views.music_autocomplete_view``: q, limit e type.
+    """
+    query = request.GET.get('q', '').strip()
+    limit = min(int(request.GET.get('limit', 10)), 20)
+    search_type = request.GET.get('type', 'all')
+
+    if not query or len(query) < 2:
+        return JsonResponse({
+            'results': [],
+            'count': 0,
+            'message': 'Digite pelo menos 2 caracteres para buscar'
+        })
+
+    cache_key = f"music_autocomplete_{query}_{limit}_{search_type}"
+
+    cached_data = await async_cache.aget(cache_key)
+    if cached_data is not None:
+        return JsonResponse(cached_data)
+
+    queryset = Music.objects.filter(is_active=True)
+
+    if search_type == 'title':
+        queryset = queryset.filter(title__icontains=query)
+    elif search_type == 'artist':
+        queryset = queryset.filter(artist__stage_name__icontains=query)
+    elif search_type == 'album':
+        queryset = queryset.filter(album__name__icontains=query)
+    else:  # 'all'
+        queryset = queryset.filter(
+            Q(title__icontains=query) |
+            Q(artist__stage_name__icontains=query) |
+            Q(album__name__icontains=query)
+        )
+
+    musics = [
+        music async for music in
+        queryset.select_related('artist', 'album').order_by('-streams_count')[:limit]
+    ]
+
+    serializer = MusicAutocompleteSerializer(musics, many=True)
+
+    response_data = {
+        'results': serializer.data,
+        'count': len(serializer.data),
+        'query': query,
+        'search_type': search_type,
+        'limit': limit
+    }
+
+    # Cache por 5 minutos
+    await async_cache.aset(cache_key, response_data, 60 * 5)
+
+    return JsonResponse(response_data)
@@ -0,0 +1,164 @@
+"""
+Leitura dos cabeçalhos de áudio a partir dos primeiros bytes do arquivo
+
+Usado no upload em partes: assim que os primeiros ``PROBE_BYTES`` chegam, o
+formato, o bitrate e a duração são calculados sem precisar reler o arquivo
+completo no final. Suporta MP3 (CBR e VBR com cabeçalho Xing/Info/VBRI) e
+WAV; para outros formatos retorna None e a duração é calculada pelo mutagen.
+"""
+import struct
+
+# Bytes necessários para identificar o formato (cobre tags ID3 com capa pequena)
+PROBE_BYTES = 256 * 1024
+
+# Bitrates (kbps) do MPEG Layer III por versão
+_MPEG1_BITRATES = [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320]
+_MPEG2_BITRATES = [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160]
+
+# Taxas de amostragem por versão (bits de versão do cabeçalho: 3=MPEG1, 2=MPEG2, 0=MPEG2.5)
+_SAMPLE_RATES = {
+    3: [44100, 48000, 32000],
+    2: [22050, 24000, 16000],
+    0: [11025, 12000, 8000],
+}
+
+
+def _id3v2_size(head):
+    """Tamanho da tag ID3v2 no início do arquivo (0 se não houver)"""
+    if len(head) < 10 or head[:3] != b'ID3':
+        return 0
+    size = 0
+    for byte in head[6:10]:
+        size = (size << 7) | (byte & 0x7F)
+    footer = 10 if head[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def _parse_mpeg_header(data, pos):
+    """Decodifica o cabeçalho de frame MPEG Layer III na posição informada"""
+    if pos + 4 > len(data) or data[pos] != 0xFF or data[pos + 1] & 0xE0 != 0xE0:
+        return None
+    version = (data[pos + 1] >> 3) & 0x03
+    layer = (data[pos + 1] >> 1) & 0x03
+    bitrate_index = data[pos + 2] >> 4
+    sample_rate_index = (data[pos + 2] >> 2) & 0x03
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    bitrates = _MPEG1_BITRATES if version == 3 else _MPEG2_BITRATES
+    bitrate = bitrates[bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version][sample_rate_index]
+    padding = (data[pos + 2] >> 1) & 0x01
+    samples_per_frame = 1152 if version == 3 else 576
+    frame_length = samples_per_frame // 8 * bitrate // sample_rate + padding
+    return {
+        'version': version,
+        'bitrate': bitrate,
+        'sample_rate': sample_rate,
+        'mono': data[pos + 3] >> 6 == 3,
+        'samples_per_frame': samples_per_frame,
+        'frame_length': frame_length,
+    }
+
+
+def _vbr_frame_count(data, pos, header):
+    """Número de frames informado pelo cabeçalho Xing/Info ou VBRI (None se não houver)"""
+    if header['version'] == 3:
+        side_info = 17 if header['mono'] else 32
+    else:
+        side_info = 9 if header['mono'] else 17
+
+    xing = pos + 4 + side_info
+    if data[xing:xing + 4] in (b'Xing', b'Info') and len(data) >= xing + 12:
+        flags = struct.unpack('>I', data[xing + 4:xing + 8])[0]
+        if flags & 0x01:
+            return struct.unpack('>I', data[xing + 8:xing + 12])[0]
+
+    vbri = pos + 4 + 32
+    if data[vbri:vbri + 4] == b'VBRI' and len(data) >= vbri + 18:
+        return struct.unpack('>I', data[vbri + 14:vbri + 18])[0]
+    return None
+
+
+def probe_mp3(head, total_size):
+    """Formato, bitrate e duração de um MP3 a partir do início do arquivo"""
+    start = _id3v2_size(head)
+    if start >= len(head):
+        return None
+
+    # Procura o primeiro frame válido (confirmado pelo frame seguinte)
+    pos = start
+    limit = min(len(head) - 4, start + 64 * 1024)
+    while pos < limit:
+        header = _parse_mpeg_header(head, pos)
+        if header:
+            next_pos = pos + header['frame_length']
+            if next_pos + 4 > len(head) or _parse_mpeg_header(head, next_pos):
+                break
+        pos += 1
+    else:
+        return None
+
+    frames = _vbr_frame_count(head, pos, header)
+    if frames:
+        duration = frames * header['samples_per_frame'] / header['sample_rate']
+        bitrate = int((total_size - pos) * 8 / duration) if duration else header['bitrate']
+    else:
+        bitrate = header['bitrate']
+        duration = (total_size - pos) * 8 / bitrate
+
+    return {
+        'format': 'mp3',
+        'bitrate': bitrate,
+        'sample_rate': header['sample_rate'],
+        'duration': duration,
+    }
+
+
+def probe_wav(head, total_size):
+    """Formato e duração de um WAV (RIFF) a partir dos chunks iniciais"""
+    if len(head) < 12 or head[:4] != b'RIFF' or head[8:12] != b'WAVE':
+        return None
+
+    pos = 12
+    byte_rate = sample_rate = None
+    while pos + 8 <= len(head):
+        chunk_id = head[pos:pos + 4]
+        chunk_size = struct.unpack('<I', head[pos + 4:pos + 8])[0]
+        if chunk_id == b'fmt ' and pos + 20 <= len(head):
+            sample_rate, byte_rate = struct.unpack('<II', head[pos + 12:pos + 20])
+        elif chunk_id == b'data':
+            if not byte_rate:
+                return None
+            # Uploads de streaming podem trazer tamanho 0 ou maior que o arquivo
+            data_size = min(chunk_size or total_size, total_size - pos - 8)
+            return {
+                'format': 'wav',
+                'bitrate': byte_rate * 8,
+                'sample_rate': sample_rate,
+                'duration': data_size / byte_rate,
+            }
+        pos += 8 + chunk_size + (chunk_size & 1)
+    return None
+
+
+def probe_audio(head, total_size):
+    """
+    Identifica o áudio a partir dos primeiros bytes
+
+    Args:
+        head (bytes): início do arquivo (idealmente ``PROBE_BYTES``)
+        total_size (int): tamanho total do arquivo em bytes
+
+    Returns:
+        dict com ``format``, ``bitrate``, ``sample_rate`` e ``duration``
+        (segundos, float) ou None se o formato não for reconhecido
+    """
+    for probe in (probe_wav, probe_mp3):
+        try:
+            info = probe(head, total_size)
+        except (struct.error, ZeroDivisionError, IndexError):
+            info = None
+        if info:
+            return info
+    return None
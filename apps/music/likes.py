@@ -0,0 +1,249 @@
+"""
+Curtidas por usuário
+
+Cada curtida é uma linha de ``UserLike`` (usuário, música), então curtir de
+novo não conta duas vezes. Para as listas mostrarem quais músicas o usuário
+curtiu, o conjunto de músicas curtidas de cada usuário fica em cache:
+
+- com Redis, um SET ``liked_user_<id>``: a página inteira é respondida com um
+  único ``SMISMEMBER``;
+- sem Redis (desenvolvimento/testes), um ``set`` do Python no cache local.
+
+O conjunto é carregado do banco na primeira consulta, com um marcador
+(``LOADED_MARKER``) que distingue "sem curtidas" de "fora do cache", e
+atualizado a cada curtida/descurtida.
+
+``likes_count`` não é mais alterado na requisição: as músicas afetadas entram
+no conjunto ``likes_pending`` e ``flush_like_counts`` (task periódica) recalcula
+o contador a partir de ``UserLike`` com um UPDATE por lote. Recontar em vez de
+somar deltas torna o flush idempotente (reprocessar um lote não altera nada).
+Curtidas anteriores ao ``UserLike`` (sem usuário) ficam em
+``Music.legacy_likes_count`` e são somadas à recontagem.
+"""
+import logging
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from ehit_backend.async_cache import is_redis_cache
+from .models import Music, UserLike
+
+logger = logging.getLogger(__name__)
+
+# Membro que marca o conjunto como carregado (ids de música começam em 1)
+LOADED_MARKER = 0
+PENDING_KEY = 'likes_pending'
+# Músicas recontadas por UPDATE no flush
+FLUSH_BATCH_SIZE = 500
+
+_local_lock = threading.Lock()
+
+
+def liked_cache_key(user_id):
+    return f'liked_user_{user_id}'
+
+
+def _redis():
+    from django_redis import get_redis_connection
+
+    return get_redis_connection('default')
+
+
+def _load_liked(user_id):
+    return set(UserLike.objects.filter(user_id=user_id).values_list('music_id', flat=True))
+
+
+# =============================================================================
+# CONJUNTO DE CURTIDAS DO USUÁRIO
+# =============================================================================
+
+def _redis_liked(user_id, music_ids):
+    client = _redis()
+    key = cache.make_key(liked_cache_key(user_id))
+    pipe = client.pipeline(transaction=False)
+    pipe.smismember(key, [LOADED_MARKER, *music_ids])
+    pipe.expire(key, settings.LIKED_SET_TIMEOUT)
+    flags = pipe.execute()[0]
+    if flags[0]:
+        return {pk for pk, flag in zip(music_ids, flags[1:]) if flag}
+
+    # Fora do cache: carrega do banco. SADD soma ao que curtidas recentes já gravaram
+    liked = _load_liked(user_id)
+    pipe = client.pipeline(transaction=False)
+    pipe.sadd(key, LOADED_MARKER, *liked)
+    pipe.expire(key, settings.LIKED_SET_TIMEOUT)
+    pipe.execute()
+    return liked.intersection(music_ids)
+
+
+def _local_liked(user_id, music_ids):
+    key = liked_cache_key(user_id)
+    liked = cache.get(key)
+    if liked is None:
+        liked = _load_liked(user_id)
+        cache.set(key, liked, settings.LIKED_SET_TIMEOUT)
+    return liked.intersection(music_ids)
+
+
+def liked_ids(user, music_ids):
+    """Quais de ``music_ids`` o usuário curtiu (uma consulta ao cache para a lista toda)"""
+    music_ids = [int(pk) for pk in music_ids]
+    if not music_ids or user is None or not user.is_authenticated:
+        return set()
+    try:
+        if is_redis_cache():
+            return _redis_liked(user.pk, music_ids)
+        return _local_liked(user.pk, music_ids)
+    except Exception as e:
+        # Cache indisponível: consulta direto no banco
+        logger.warning(f"Erro ao ler curtidas do usuário {user.pk}: {e}")
+        return set(
+            UserLike.objects.filter(user=user, music_id__in=music_ids).values_list('music_id', flat=True)
+        )
+
+
+def annotate_liked(user, rows):
+    """Cópia das músicas serializadas (dicts com ``id``) com ``is_liked``"""
+    liked = liked_ids(user, [row['id'] for row in rows])
+    return [dict(row, is_liked=row['id'] in liked) for row in rows]
+
+
+def request_user(request):
+    """Usuário de uma requisição fora do DRF (views async): JWT ou sessão"""
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+
+    try:
+        authenticated = JWTAuthentication().authenticate(request)
+    except Exception:
+        authenticated = None
+    if authenticated:
+        return authenticated[0]
+    return getattr(request, 'user', None)
+
+
+def _update_liked_set(user_id, music_id, liked):
+    try:
+        if is_redis_cache():
+            client = _redis()
+            key = cache.make_key(liked_cache_key(user_id))
+            pipe = client.pipeline(transaction=False)
+            if liked:
+                pipe.sadd(key, music_id)
+            else:
+                pipe.srem(key, music_id)
+            pipe.expire(key, settings.LIKED_SET_TIMEOUT)
+            pipe.execute()
+            return
+        key = liked_cache_key(user_id)
+        with _local_lock:
+            current = cache.get(key)
+            if current is None:
+                return
+            if liked:
+                current.add(music_id)
+            else:
+                current.discard(music_id)
+            cache.set(key, current, settings.LIKED_SET_TIMEOUT)
+    except Exception as e:
+        # Conjunto desatualizado: remove para ser recarregado do banco
+        logger.warning(f"Erro ao atualizar curtidas do usuário {user_id}: {e}")
+        cache.delete(liked_cache_key(user_id))
+
+
+# =============================================================================
+# CURTIR / DESCURTIR
+# =============================================================================
+
+def like(user, music):
+    """Curte a música (True se a curtida é nova)"""
+    try:
+        with transaction.atomic():
+            _, created = UserLike.objects.get_or_create(user=user, music=music)
+    except IntegrityError:
+        # Duas requisições simultâneas do mesmo usuário: a outra já gravou
+        created = False
+    if created:
+        _update_liked_set(user.pk, music.pk, True)
+        mark_pending([music.pk])
+    return created
+
+
+def unlike(user, music):
+    """Remove a curtida (True se existia)"""
+    deleted, _ = UserLike.objects.filter(user=user, music=music).delete()
+    if deleted:
+        _update_liked_set(user.pk, music.pk, False)
+        mark_pending([music.pk])
+    return bool(deleted)
+
+
+# =============================================================================
+# CONTADORES EM LOTE
+# =============================================================================
+
+def mark_pending(music_ids):
+    """Agenda a recontagem de ``likes_count`` das músicas"""
+    music_ids = [int(pk) for pk in music_ids]
+    if not music_ids:
+        return
+    try:
+        if is_redis_cache():
+            _redis().sadd(cache.make_key(PENDING_KEY), *music_ids)
+            return
+        with _local_lock:
+            pending = cache.get(PENDING_KEY) or set()
+            pending.update(music_ids)
+            cache.set(PENDING_KEY, pending, None)
+    except Exception as e:
+        # Sem o agendamento o contador fica defasado até a próxima curtida da música
+        logger.warning(f"Erro ao agendar recontagem de curtidas: {e}")
+
+
+def _take_pending(count):
+    """Retira até ``count`` músicas pendentes (atômico entre workers)"""
+    if is_redis_cache():
+        return [int(pk) for pk in _redis().spop(cache.make_key(PENDING_KEY), count) or []]
+    with _local_lock:
+        pending = cache.get(PENDING_KEY) or set()
+        taken = [pending.pop() for _ in range(min(count, len(pending)))]
+        cache.set(PENDING_KEY, pending, None)
+    return taken
+
+
+def recount_likes(music_ids):
+    """Recalcula ``likes_count`` das músicas a partir de UserLike (um UPDATE)"""
+    likes = (
+        UserLike.objects.filter(music=OuterRef('pk'))
+        .order_by()
+        .values('music')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Music.objects.filter(pk__in=music_ids).update(
+        likes_count=F('legacy_likes_count') + Coalesce(Subquery(likes), 0)
+    )
+
+
+def current_likes_count(music):
+    """Valor que a próxima recontagem vai gravar (só leitura: o UPDATE continua em lote)"""
+    return music.legacy_likes_count + music.user_likes.count()
+
+
+def flush_like_counts(batch_size=FLUSH_BATCH_SIZE):
+    """Recalcula os contadores de todas as músicas pendentes (retorna quantas)"""
+    flushed = 0
+    while True:
+        music_ids = _take_pending(batch_size)
+        if not music_ids:
+            return flushed
+        try:
+            recount_likes(music_ids)
+        except Exception:
+            # Devolve o lote para a próxima execução
+            mark_pending(music_ids)
+            raise
+        flushed += len(music_ids)
@@ -0,0 +1,25 @@
+"""
+Comando Django para recalcular as músicas relacionadas (coocorrência nas PlayHits)
+"""
+from django.core.management.base import BaseCommand
+
+from apps.music.recommendations import CHUNK_SIZE, build_related
+
+
+class Command(BaseCommand):
+    help = 'Recalcular as músicas relacionadas a partir das PlayHits, artista e gênero'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, help='Vizinhos por música (padrão: RELATED_MUSIC_TOP_K)')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Músicas por bloco gravado')
+
+    def handle(self, *args, **options):
+        result = build_related(
+            top_k=options['top_k'],
+            chunk_size=options['chunk_size'],
+            log=lambda message: self.stdout.write(message),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {result['related']} relações para {result['tracks']} músicas "
+            f"({result['in_playlists']} em PlayHits) em {result['elapsed_s']}s"
+        ))
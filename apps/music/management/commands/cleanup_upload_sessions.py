@@ -0,0 +1,34 @@
+"""
+Comando Django para remover uploads em partes abandonados
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apps.music.models import UploadSession
+
+
+class Command(BaseCommand):
+    help = 'Remover sessões de upload sem atividade e seus arquivos parciais'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours',
+            type=int,
+            default=settings.UPLOAD_SESSION_EXPIRY_HOURS,
+            help='Horas sem receber partes para considerar o upload abandonado'
+        )
+
+    def handle(self, *args, **options):
+        limit = timezone.now() - timedelta(hours=options['hours'])
+        sessions = UploadSession.objects.filter(updated_at__lt=limit).exclude(
+            status=UploadSession.STATUS_COMPLETE
+        )
+        removed = 0
+        for session in sessions.iterator():
+            session.delete_partial()
+            session.delete()
+            removed += 1
+
+        self.stdout.write(self.style.SUCCESS(f'✅ {removed} uploads abandonados removidos'))
@@ -0,0 +1,43 @@
+"""
+Comando Django para calcular os picos da forma de onda das músicas já enviadas
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from apps.cache_utils import coalesce_cache_invalidation
+from apps.music.models import Music
+from apps.music.waveform import build_waveform
+
+
+class Command(BaseCommand):
+    help = 'Calcular os picos da forma de onda (scrubber do player) das músicas já enviadas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Recalcular também as músicas que já possuem forma de onda'
+        )
+
+    def handle(self, *args, **options):
+        musics = Music.objects.exclude(file='').exclude(content_hash='')
+        if not options['all']:
+            musics = musics.exclude(waveform_hash=F('content_hash'))
+
+        done = set()
+        failed = 0
+        # Uma invalidação do cache das listagens ao final, não uma por música
+        with coalesce_cache_invalidation():
+            for music in musics.order_by('pk').iterator():
+                # Músicas com o mesmo arquivo compartilham os picos
+                if music.content_hash in done:
+                    continue
+                try:
+                    build_waveform(music, force=options['all'])
+                except Exception as e:
+                    failed += 1
+                    self.stdout.write(self.style.WARNING(f'⚠️  Música {music.pk}: {e}'))
+                    continue
+                done.add(music.content_hash)
+
+        self.stdout.write(self.style.SUCCESS(f'✅ {len(done)} formas de onda calculadas, {failed} falhas'))
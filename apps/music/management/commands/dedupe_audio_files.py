@@ -0,0 +1,65 @@
+"""
+Comando Django para mover os áudios para o storage por conteúdo e recalcular as referências
+"""
+import os
+
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from apps.music.models import AudioBlob, Music
+from ehit_backend.storage import audio_storage, content_hash_from_name
+
+
+class Command(BaseCommand):
+    help = 'Renomear áudios antigos pelo hash do conteúdo (removendo duplicatas) e recalcular as referências'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Apenas listar os arquivos que seriam movidos'
+        )
+
+    def handle(self, *args, **options):
+        storage = audio_storage()
+        moved = 0
+        legacy = Music.objects.exclude(file='').only('id', 'file', 'file_size', 'content_hash', 'waveform_hash')
+        for music in legacy.iterator():
+            old_name = music.file.name
+            if content_hash_from_name(old_name):
+                continue
+            if not storage.exists(old_name):
+                self.stdout.write(self.style.WARNING(f'⚠️  Arquivo não encontrado: {old_name}'))
+                continue
+            if options['dry_run']:
+                self.stdout.write(f'  {old_name}')
+                moved += 1
+                continue
+
+            with storage.open(old_name, 'rb') as source:
+                music.file_size = source.size
+                music.file.save(os.path.basename(old_name), File(source), save=False)
+            music.save(update_fields=['file', 'file_size', 'content_hash'])
+            if not Music.objects.filter(file=old_name).exists():
+                storage.delete(old_name)
+            moved += 1
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f'✅ {moved} arquivos seriam movidos'))
+            return
+
+        # Recalcula as referências a partir das músicas (corrige contagens divergentes)
+        counts = dict(
+            Music.objects.exclude(file='').values('file').annotate(total=Count('id')).values_list('file', 'total')
+        )
+        orphans = AudioBlob.objects.exclude(name__in=list(counts))
+        for blob in orphans:
+            storage.delete(blob.name)
+        orphans.delete()
+        for name, total in counts.items():
+            AudioBlob.acquire(name)
+            AudioBlob.objects.filter(name=name).update(ref_count=total)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ {moved} arquivos movidos, {len(counts)} arquivos de áudio referenciados')
+        )
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music', '0004_remove_music_lyrics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='music',
+            name='cover_blurhash',
+            field=models.CharField(blank=True, default='', help_text='Placeholder calculado automaticamente a partir da capa', max_length=64, verbose_name='Blurhash da Capa'),
+        ),
+        migrations.AddField(
+            model_name='music',
+            name='cover_color',
+            field=models.CharField(blank=True, default='', help_text='Calculada automaticamente a partir da capa', max_length=7, verbose_name='Cor Dominante da Capa'),
+        ),
+    ]
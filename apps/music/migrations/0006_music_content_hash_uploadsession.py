@@ -0,0 +1,48 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:40
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artists', '0006_album_cover_blurhash_album_cover_color_and_more'),
+        ('music', '0005_music_cover_blurhash_music_cover_color'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='music',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, default='', help_text='SHA-256 em blocos de 4 MiB do arquivo de áudio (calculado no upload)', max_length=64, verbose_name='Hash do Conteúdo'),
+        ),
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(max_length=255, verbose_name='Nome do Arquivo')),
+                ('size', models.BigIntegerField(verbose_name='Tamanho Total (bytes)')),
+                ('offset', models.BigIntegerField(default=0, verbose_name='Bytes Recebidos')),
+                ('metadata', models.JSONField(blank=True, default=dict, help_text='Título, álbum e gênero da música a ser criada', verbose_name='Metadados')),
+                ('block_hashes', models.TextField(blank=True, default='', help_text='SHA-256 (hex) de cada bloco de 4 MiB completo já recebido', verbose_name='Hashes dos Blocos')),
+                ('content_hash', models.CharField(blank=True, default='', max_length=64, verbose_name='Hash do Conteúdo')),
+                ('audio_info', models.JSONField(blank=True, help_text='Formato, bitrate e duração lidos dos cabeçalhos', null=True, verbose_name='Informações do Áudio')),
+                ('status', models.CharField(choices=[('uploading', 'Enviando'), ('complete', 'Concluído'), ('failed', 'Falhou')], default='uploading', max_length=20, verbose_name='Status')),
+                ('error', models.CharField(blank=True, default='', max_length=255, verbose_name='Erro')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('artist', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to='artists.artist', verbose_name='Artista')),
+                ('music', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='upload_sessions', to='music.music', verbose_name='Música Criada')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+            ],
+            options={
+                'verbose_name': 'Sessão de Upload',
+                'verbose_name_plural': 'Sessões de Upload',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
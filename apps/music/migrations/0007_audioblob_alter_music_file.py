@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:43
+
+import ehit_backend.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music', '0006_music_content_hash_uploadsession'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AudioBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Arquivo')),
+                ('content_hash', models.CharField(blank=True, db_index=True, default='', max_length=64, verbose_name='Hash do Conteúdo')),
+                ('size', models.BigIntegerField(default=0, verbose_name='Tamanho (bytes)')),
+                ('ref_count', models.PositiveIntegerField(default=0, verbose_name='Referências')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+            ],
+            options={
+                'verbose_name': 'Arquivo de Áudio',
+                'verbose_name_plural': 'Arquivos de Áudio',
+            },
+        ),
+        migrations.AlterField(
+            model_name='music',
+            name='file',
+            field=models.FileField(help_text='Arquivo de áudio (nomeado pelo hash do conteúdo)', storage=ehit_backend.storage.audio_storage, upload_to='music/', verbose_name='Arquivo de Áudio'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music', '0007_audioblob_alter_music_file'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='music',
+            name='file_size',
+            field=models.BigIntegerField(default=0, help_text='Guardado no upload para não consultar o storage a cada leitura', verbose_name='Tamanho do Arquivo (bytes)'),
+        ),
+    ]
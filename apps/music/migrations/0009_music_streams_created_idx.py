@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artists', '0006_album_cover_blurhash_album_cover_color_and_more'),
+        ('genres', '0002_genre_depth_genre_path_genre_genres_path_idx'),
+        ('music', '0008_music_file_size'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='music',
+            index=models.Index(fields=['-streams_count', '-created_at'], name='music_streams_created_idx'),
+        ),
+    ]
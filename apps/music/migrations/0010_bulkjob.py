@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music', '0009_music_streams_created_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BulkJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('transcode', 'Comprimir áudio'), ('recompute', 'Recalcular duração e metadados'), ('feature', 'Marcar como destaque'), ('unfeature', 'Remover destaque'), ('deactivate_albums', 'Desativar álbuns e suas músicas')], max_length=32, verbose_name='Ação')),
+                ('object_ids', models.JSONField(default=list, verbose_name='Ids Selecionados')),
+                ('options', models.JSONField(blank=True, default=dict, verbose_name='Opções')),
+                ('status', models.CharField(choices=[('pending', 'Na fila'), ('running', 'Em execução'), ('done', 'Concluído'), ('failed', 'Falhou')], db_index=True, default='pending', max_length=16, verbose_name='Status')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Total')),
+                ('processed', models.PositiveIntegerField(default=0, verbose_name='Processados')),
+                ('failed', models.PositiveIntegerField(default=0, verbose_name='Falhas')),
+                ('error', models.TextField(blank=True, default='', verbose_name='Erros')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Iniciado em')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Finalizado em')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bulk_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Criado por')),
+            ],
+            options={
+                'verbose_name': 'Ação em Massa',
+                'verbose_name_plural': 'Ações em Massa',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
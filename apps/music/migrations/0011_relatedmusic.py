@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-19 19:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music', '0010_bulkjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedMusic',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField(verbose_name='Posição')),
+                ('score', models.FloatField(verbose_name='Similaridade')),
+                ('music', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_entries', to='music.music', verbose_name='Música')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='music.music', verbose_name='Música Relacionada')),
+            ],
+            options={
+                'verbose_name': 'Música Relacionada',
+                'verbose_name_plural': 'Músicas Relacionadas',
+                'ordering': ['music', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('music', 'rank'), name='related_music_rank_uniq')],
+            },
+        ),
+    ]
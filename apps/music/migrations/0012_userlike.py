@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-19 19:21
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music', '0011_relatedmusic'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserLike',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Curtida em')),
+                ('music', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user_likes', to='music.music', verbose_name='Música')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='music_likes', to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+            ],
+            options={
+                'verbose_name': 'Curtida',
+                'verbose_name_plural': 'Curtidas',
+                'ordering': ['-created_at'],
+                'constraints': [models.UniqueConstraint(fields=('user', 'music'), name='user_like_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 19:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music', '0012_userlike'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='audioblob',
+            name='crc32',
+            field=models.BigIntegerField(blank=True, help_text='Calculado no primeiro download do álbum em ZIP (apps/music/album_zip.py)', null=True, verbose_name='CRC-32'),
+        ),
+    ]
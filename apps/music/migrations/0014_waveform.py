@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-19 19:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music', '0013_audioblob_crc32'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Waveform',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64, unique=True, verbose_name='Hash do Conteúdo')),
+                ('data', models.BinaryField(verbose_name='Picos')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+            ],
+            options={
+                'verbose_name': 'Forma de Onda',
+                'verbose_name_plural': 'Formas de Onda',
+            },
+        ),
+        migrations.AddField(
+            model_name='music',
+            name='waveform_hash',
+            field=models.CharField(blank=True, default='', help_text='Hash do conteúdo cujos picos (Waveform) já foram calculados', max_length=64, verbose_name='Forma de Onda'),
+        ),
+    ]
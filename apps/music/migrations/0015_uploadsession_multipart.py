@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-19 19:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music', '0014_waveform'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadsession',
+            name='multipart_id',
+            field=models.CharField(blank=True, default='', help_text='UploadId do multipart upload que guarda o arquivo parcial (MEDIA_STORAGE=s3)', max_length=255, verbose_name='Multipart do S3'),
+        ),
+        migrations.AddField(
+            model_name='uploadsession',
+            name='parts',
+            field=models.JSONField(blank=True, default=list, help_text='ETags das partes do multipart upload já enviadas ao S3', verbose_name='Partes Enviadas'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-19 19:48
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+
+def keep_legacy_likes(apps, schema_editor):
+    """Curtidas sem UserLike (contador antigo) preservadas como deslocamento da recontagem"""
+    Music = apps.get_model('music', 'Music')
+    UserLike = apps.get_model('music', 'UserLike')
+    likes = (
+        UserLike.objects.filter(music=OuterRef('pk'))
+        .order_by()
+        .values('music')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    Music.objects.filter(likes_count__gt=0).update(
+        legacy_likes_count=Greatest(
+            Value(0), models.F('likes_count') - Coalesce(Subquery(likes, output_field=IntegerField()), 0)
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music', '0015_uploadsession_multipart'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='music',
+            name='legacy_likes_count',
+            field=models.PositiveIntegerField(default=0, help_text='Curtidas anteriores ao UserLike (sem usuário), somadas na recontagem de likes_count', verbose_name='Curtidas Antigas'),
+        ),
+        migrations.RunPython(keep_legacy_likes, migrations.RunPython.noop),
+    ]
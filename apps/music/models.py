@@ -1,14 +1,19 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.utils import timezone
 from apps.artists.models import BaseModel, Artist, Album
+from apps.image_utils import ArtworkPlaceholdersMixin
 import os
 import subprocess
 import tempfile
+import uuid
+from django.conf import settings
 from django.core.files import File
 from mutagen import File as MutagenFile
+from ehit_backend.storage import audio_storage, content_hash_from_name
 
 
-class Music(BaseModel):
+class Music(ArtworkPlaceholdersMixin, BaseModel):
     """
     Modelo para músicas baseado no Sua Música
     
@@ -49,7 +54,8 @@ class Music(BaseModel):
     )
     file = models.FileField(
         upload_to='music/', 
-        help_text="Arquivo de áudio",
+        storage=audio_storage,
+        help_text="Arquivo de áudio (nomeado pelo hash do conteúdo)",
         verbose_name='Arquivo de Áudio'
     )
     cover = models.ImageField(
@@ -58,6 +64,20 @@ class Music(BaseModel):
         null=True,
         verbose_name='Capa'
     )
+    cover_color = models.CharField(
+        max_length=7,
+        blank=True,
+        default='',
+        verbose_name='Cor Dominante da Capa',
+        help_text='Calculada automaticamente a partir da capa'
+    )
+    cover_blurhash = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+        verbose_name='Blurhash da Capa',
+        help_text='Placeholder calculado automaticamente a partir da capa'
+    )
     release_date = models.DateField(
         default=timezone.now,
         verbose_name='Data de Lançamento'
@@ -74,19 +94,64 @@ class Music(BaseModel):
         default=0,
         verbose_name='Curtidas'
     )
+    legacy_likes_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Curtidas Antigas',
+        help_text='Curtidas anteriores ao UserLike (sem usuário), somadas na recontagem de likes_count'
+    )
     is_featured = models.BooleanField(
         default=False,
         verbose_name='Em Destaque'
     )
+    file_size = models.BigIntegerField(
+        default=0,
+        verbose_name='Tamanho do Arquivo (bytes)',
+        help_text='Guardado no upload para não consultar o storage a cada leitura'
+    )
+    content_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+        db_index=True,
+        verbose_name='Hash do Conteúdo',
+        help_text='SHA-256 em blocos de 4 MiB do arquivo de áudio (calculado no upload)'
+    )
+    waveform_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+        verbose_name='Forma de Onda',
+        help_text='Hash do conteúdo cujos picos (Waveform) já foram calculados'
+    )
+    
+    artwork_fields = (('cover', 'cover_color', 'cover_blurhash'),)
     
     class Meta:
         verbose_name = 'Música'
         verbose_name_plural = 'Músicas'
         ordering = ['-streams_count', '-created_at']
+        indexes = [
+            # Ordenação padrão (listas e admin) sem ordenar a tabela inteira
+            models.Index(fields=['-streams_count', '-created_at'], name='music_streams_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.artist.stage_name}"
     
+    def save(self, *args, **kwargs):
+        if self.file and not self.file._committed:
+            # Grava antes para saber o hash (o nome do arquivo é o próprio hash)
+            self.file_size = self.file.file.size or 0
+            self.file.save(self.file.name, self.file.file, save=False)
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = [*kwargs['update_fields'], 'file_size']
+        content_hash = content_hash_from_name(self.file.name)
+        if content_hash and content_hash != self.content_hash:
+            self.content_hash = content_hash
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = [*kwargs['update_fields'], 'content_hash']
+        super().save(*args, **kwargs)
+    
     def get_stream_url(self):
         """Retorna URL para streaming"""
         return f"/api/music/{self.id}/stream/"
@@ -95,6 +160,12 @@ class Music(BaseModel):
         """Retorna URL para download"""
         return f"/api/music/{self.id}/download/"
     
+    def get_waveform_url(self):
+        """URL dos picos da forma de onda (None enquanto não calculados para o arquivo atual)"""
+        if not self.content_hash or self.waveform_hash != self.content_hash:
+            return None
+        return f"/api/music/waveform/{self.content_hash}/"
+    
     def get_duration_formatted(self):
         """Retorna duração formatada (MM:SS)"""
         if self.duration is None:
@@ -157,15 +228,27 @@ class Music(BaseModel):
         
         bitrate = quality_settings.get(quality, '192k')
         
+        input_temp_path = None
         try:
             # Criar arquivo temporário
             with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as temp_file:
                 temp_path = temp_file.name
             
+            try:
+                input_path = self.file.path
+            except NotImplementedError:
+                # Storage remoto (S3): baixa para um arquivo local antes do FFmpeg
+                extension = os.path.splitext(self.file.name)[1]
+                with tempfile.NamedTemporaryFile(suffix=extension, delete=False) as input_file:
+                    input_temp_path = input_path = input_file.name
+                    with self.file.open('rb') as source:
+                        for chunk in source.chunks():
+                            input_file.write(chunk)
+            
             # Comando FFmpeg para compressão
             cmd = [
                 'ffmpeg',
-                '-i', self.file.path,  # Arquivo de entrada
+                '-i', input_path,     # Arquivo de entrada
                 '-b:a', bitrate,      # Bitrate de áudio
                 '-ac', '2',           # 2 canais (estéreo)
                 '-ar', '44100',       # Sample rate
@@ -178,11 +261,12 @@ class Music(BaseModel):
             
             if result.returncode == 0:
                 # Verificar se o arquivo comprimido é menor
-                original_size = os.path.getsize(self.file.path)
+                original_size = os.path.getsize(input_path)
                 compressed_size = os.path.getsize(temp_path)
                 
                 if compressed_size < original_size:
                     # Substituir o arquivo original pelo comprimido
+                    self.file_size = compressed_size
                     with open(temp_path, 'rb') as compressed_file:
                         django_file = File(compressed_file)
                         self.file.save(
@@ -207,13 +291,20 @@ class Music(BaseModel):
         except Exception as e:
             print(f"Erro na compressão: {e}")
             return False
+        finally:
+            if input_temp_path:
+                os.unlink(input_temp_path)
     
     def get_file_size_mb(self):
         """Retorna o tamanho do arquivo em MB"""
-        if self.file and os.path.exists(self.file.path):
-            size_bytes = os.path.getsize(self.file.path)
-            return round(size_bytes / (1024 * 1024), 2)
-        return 0
+        size_bytes = self.file_size
+        if not size_bytes and self.file:
+            # Músicas antigas: só consulta o disco local (no S3 seria uma chamada por música)
+            try:
+                size_bytes = os.path.getsize(self.file.path)
+            except (NotImplementedError, OSError):
+                size_bytes = 0
+        return round(size_bytes / (1024 * 1024), 2)
     
     def calculate_duration(self):
         """Calcula e define a duração da música a partir do arquivo de áudio"""
@@ -221,8 +312,9 @@ class Music(BaseModel):
             return None
         
         try:
-            # Usar mutagen para extrair duração
-            audio = MutagenFile(self.file.path)
+            # Usar mutagen para extrair duração (lê apenas os cabeçalhos)
+            with self.file.open('rb') as audio_file:
+                audio = MutagenFile(audio_file)
             if audio is not None:
                 duration = audio.info.length
                 return int(duration)
@@ -230,3 +322,348 @@ class Music(BaseModel):
         except Exception as e:
             print(f"Erro ao calcular duração: {e}")
             return None
+
+
+class AudioBlob(models.Model):
+    """
+    Arquivo de áudio armazenado e quantas músicas apontam para ele
+
+    Como o storage é endereçado por conteúdo, várias músicas podem usar o
+    mesmo arquivo; ele só é apagado quando a última referência é removida.
+    Mantido pelos signals de ``Music`` (signals.py).
+    """
+    name = models.CharField(max_length=255, unique=True, verbose_name='Arquivo')
+    content_hash = models.CharField(max_length=64, blank=True, default='', db_index=True, verbose_name='Hash do Conteúdo')
+    size = models.BigIntegerField(default=0, verbose_name='Tamanho (bytes)')
+    crc32 = models.BigIntegerField(
+        null=True,
+        blank=True,
+        verbose_name='CRC-32',
+        help_text='Calculado no primeiro download do álbum em ZIP (apps/music/album_zip.py)'
+    )
+    ref_count = models.PositiveIntegerField(default=0, verbose_name='Referências')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Criado em')
+
+    class Meta:
+        verbose_name = 'Arquivo de Áudio'
+        verbose_name_plural = 'Arquivos de Áudio'
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count})"
+
+    @classmethod
+    def acquire(cls, name):
+        """Registra mais uma música usando o arquivo"""
+        if not name:
+            return
+        storage = audio_storage()
+        try:
+            size = storage.size(name)
+        except OSError:
+            size = 0
+        blob, _ = cls.objects.get_or_create(
+            name=name,
+            defaults={'content_hash': content_hash_from_name(name) or '', 'size': size}
+        )
+        cls.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+
+    @classmethod
+    def release(cls, name):
+        """
+        Remove uma referência; o arquivo é apagado quando não sobra nenhuma,
+        junto com os picos (``Waveform``) se nenhum outro arquivo tem o mesmo conteúdo
+        """
+        if not name:
+            return
+        with transaction.atomic():
+            blob = cls.objects.select_for_update().filter(name=name).first()
+            if blob is None:
+                return
+            if blob.ref_count > 1:
+                cls.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') - 1)
+                return
+            blob.delete()
+            if blob.content_hash and not cls.objects.filter(content_hash=blob.content_hash).exists():
+                Waveform.objects.filter(content_hash=blob.content_hash).delete()
+
+        def delete_file():
+            # Um upload igual pode ter voltado a referenciar o arquivo
+            if not cls.objects.filter(name=name).exists():
+                audio_storage().delete(name)
+
+        transaction.on_commit(delete_file)
+
+
+class UploadSession(models.Model):
+    """
+    Upload de áudio em partes, retomável (protocolo no estilo tus)
+
+    O cliente cria a sessão informando o tamanho total e envia o arquivo em
+    partes com o offset atual; se a conexão cair, consulta o offset e continua
+    de onde parou. O hash do conteúdo e os cabeçalhos de áudio são calculados
+    enquanto as partes chegam e a música é criada ao receber o último byte.
+    """
+    STATUS_UPLOADING = 'uploading'
+    STATUS_COMPLETE = 'complete'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_UPLOADING, 'Enviando'),
+        (STATUS_COMPLETE, 'Concluído'),
+        (STATUS_FAILED, 'Falhou'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='upload_sessions',
+        verbose_name='Usuário'
+    )
+    artist = models.ForeignKey(
+        Artist,
+        on_delete=models.CASCADE,
+        related_name='upload_sessions',
+        verbose_name='Artista'
+    )
+    filename = models.CharField(max_length=255, verbose_name='Nome do Arquivo')
+    size = models.BigIntegerField(verbose_name='Tamanho Total (bytes)')
+    offset = models.BigIntegerField(default=0, verbose_name='Bytes Recebidos')
+    metadata = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name='Metadados',
+        help_text='Título, álbum e gênero da música a ser criada'
+    )
+    block_hashes = models.TextField(
+        blank=True,
+        default='',
+        verbose_name='Hashes dos Blocos',
+        help_text='SHA-256 (hex) de cada bloco de 4 MiB completo já recebido'
+    )
+    content_hash = models.CharField(max_length=64, blank=True, default='', verbose_name='Hash do Conteúdo')
+    audio_info = models.JSONField(
+        null=True,
+        blank=True,
+        verbose_name='Informações do Áudio',
+        help_text='Formato, bitrate e duração lidos dos cabeçalhos'
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_UPLOADING,
+        verbose_name='Status'
+    )
+    error = models.CharField(max_length=255, blank=True, default='', verbose_name='Erro')
+    multipart_id = models.CharField(
+        max_length=255,
+        blank=True,
+        default='',
+        verbose_name='Multipart do S3',
+        help_text='UploadId do multipart upload que guarda o arquivo parcial (MEDIA_STORAGE=s3)'
+    )
+    parts = models.JSONField(
+        default=list,
+        blank=True,
+        verbose_name='Partes Enviadas',
+        help_text='ETags das partes do multipart upload já enviadas ao S3'
+    )
+    music = models.ForeignKey(
+        Music,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='upload_sessions',
+        verbose_name='Música Criada'
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Criado em')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Atualizado em')
+
+    class Meta:
+        verbose_name = 'Sessão de Upload'
+        verbose_name_plural = 'Sessões de Upload'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size})"
+
+    @property
+    def partial_path(self):
+        """Arquivo parcial no disco enquanto o upload não termina (storage local)"""
+        return os.path.join(settings.MEDIA_ROOT, 'uploads', 'partial', f"{self.pk}.part")
+
+    @property
+    def is_finished(self):
+        return self.offset >= self.size
+
+    def delete_partial(self):
+        """Remove o arquivo parcial (se existir)"""
+        from .uploads import partial_store
+
+        partial_store().delete(self)
+
+
+class BulkJob(models.Model):
+    """
+    Ação em massa do admin executada em segundo plano (Celery)
+
+    Guarda os ids selecionados e o progresso; a task processa em lotes de
+    ``BULK_JOB_CHUNK_SIZE`` e atualiza ``processed``/``failed`` e
+    ``heartbeat_at`` a cada lote. Um job em execução sem heartbeat há mais de
+    ``BULK_JOB_STALE_SECONDS`` (worker morto, deploy) pode ser retomado de onde
+    parou.
+    """
+    ACTION_TRANSCODE = 'transcode'
+    ACTION_RECOMPUTE = 'recompute'
+    ACTION_FEATURE = 'feature'
+    ACTION_UNFEATURE = 'unfeature'
+    ACTION_DEACTIVATE_ALBUMS = 'deactivate_albums'
+    ACTION_CHOICES = [
+        (ACTION_TRANSCODE, 'Comprimir áudio'),
+        (ACTION_RECOMPUTE, 'Recalcular duração e metadados'),
+        (ACTION_FEATURE, 'Marcar como destaque'),
+        (ACTION_UNFEATURE, 'Remover destaque'),
+        (ACTION_DEACTIVATE_ALBUMS, 'Desativar álbuns e suas músicas'),
+    ]
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Na fila'),
+        (STATUS_RUNNING, 'Em execução'),
+        (STATUS_DONE, 'Concluído'),
+        (STATUS_FAILED, 'Falhou'),
+    ]
+
+    action = models.CharField(max_length=32, choices=ACTION_CHOICES, verbose_name='Ação')
+    object_ids = models.JSONField(default=list, verbose_name='Ids Selecionados')
+    options = models.JSONField(default=dict, blank=True, verbose_name='Opções')
+    status = models.CharField(
+        max_length=16,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        db_index=True,
+        verbose_name='Status'
+    )
+    total = models.PositiveIntegerField(default=0, verbose_name='Total')
+    processed = models.PositiveIntegerField(default=0, verbose_name='Processados')
+    failed = models.PositiveIntegerField(default=0, verbose_name='Falhas')
+    error = models.TextField(blank=True, default='', verbose_name='Erros')
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='bulk_jobs',
+        verbose_name='Criado por'
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Criado em')
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name='Iniciado em')
+    heartbeat_at = models.DateTimeField(null=True, blank=True, verbose_name='Último Sinal do Worker')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='Finalizado em')
+
+    class Meta:
+        verbose_name = 'Ação em Massa'
+        verbose_name_plural = 'Ações em Massa'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.get_action_display()} ({self.processed}/{self.total})"
+
+    @property
+    def progress(self):
+        """Percentual concluído (0-100)"""
+        if not self.total:
+            return 100 if self.status == self.STATUS_DONE else 0
+        return int(self.processed * 100 / self.total)
+
+
+class RelatedMusic(models.Model):
+    """
+    Vizinho pré-calculado de uma música ("mais como esta")
+
+    Gerado em lote por ``apps/music/recommendations.py`` a partir da
+    coocorrência nas PlayHits (com peso para mesmo artista e mesmo gênero);
+    a API lê os ``RELATED_MUSIC_TOP_K`` vizinhos de uma música pelo índice
+    (music, rank).
+    """
+    music = models.ForeignKey(
+        Music,
+        on_delete=models.CASCADE,
+        related_name='related_entries',
+        verbose_name='Música'
+    )
+    related = models.ForeignKey(
+        Music,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Música Relacionada'
+    )
+    rank = models.PositiveSmallIntegerField(verbose_name='Posição')
+    score = models.FloatField(verbose_name='Similaridade')
+
+    class Meta:
+        verbose_name = 'Música Relacionada'
+        verbose_name_plural = 'Músicas Relacionadas'
+        ordering = ['music', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['music', 'rank'], name='related_music_rank_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.music_id} -> {self.related_id} ({self.score:.3f})"
+
+
+class UserLike(models.Model):
+    """
+    Curtida de um usuário em uma música
+
+    Uma linha por par (usuário, música): curtir de novo não conta duas vezes.
+    ``Music.likes_count`` é recalculado a partir desta tabela em lote
+    (``apps/music/likes.py``).
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='music_likes',
+        verbose_name='Usuário'
+    )
+    music = models.ForeignKey(
+        Music,
+        on_delete=models.CASCADE,
+        related_name='user_likes',
+        verbose_name='Música'
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Curtida em')
+
+    class Meta:
+        verbose_name = 'Curtida'
+        verbose_name_plural = 'Curtidas'
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'music'], name='user_like_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} curtiu {self.music_id}"
+
+
+class Waveform(models.Model):
+    """
+    Picos da forma de onda de um arquivo de áudio (scrubber do player)
+
+    Um registro por conteúdo: músicas com o mesmo arquivo compartilham os
+    picos. Gerado fora da requisição por ``apps/music/waveform.py``; ``data``
+    segue o formato binário descrito lá.
+    """
+    content_hash = models.CharField(max_length=64, unique=True, verbose_name='Hash do Conteúdo')
+    data = models.BinaryField(verbose_name='Picos')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Criado em')
+
+    class Meta:
+        verbose_name = 'Forma de Onda'
+        verbose_name_plural = 'Formas de Onda'
+
+    def __str__(self):
+        return f"{self.content_hash} ({len(self.data)} bytes)"
@@ -0,0 +1,169 @@
+"""
+Rádio: fila longa e sem repetição a partir de uma música, artista ou gênero
+
+A fila percorre os vizinhos pré-calculados (``RelatedMusic``) a partir das
+músicas semente, sempre tocando a candidata de maior nota (similaridade que
+decai a cada salto) e evitando o mesmo artista em sequência. Cada expansão
+busca os vizinhos de várias músicas em uma única query, com limite de
+expansões e de tempo; quando o grafo não rende o suficiente, a fila é
+completada com as mais tocadas do gênero das sementes e, por fim, do catálogo.
+
+A fila (só os ids) fica em cache por semente; o endpoint pagina sobre ela.
+"""
+import heapq
+import time
+from collections import deque
+
+from django.conf import settings
+from django.core.cache import cache
+
+from apps.genres.models import Genre
+from .models import Music, RelatedMusic
+
+SEED_TRACKS = 5
+EXPAND_BATCH = 25
+# Peso de cada salto a partir das sementes (vizinho do vizinho vale menos)
+HOP_DECAY = 0.7
+# Músicas seguidas de artistas diferentes (quando há candidatas)
+ARTIST_SPACING = 2
+# Candidatas adiadas (mesmo artista) examinadas por escolha
+MAX_DEFERRED = 50
+
+
+def radio_cache_key(kind, pk):
+    return f'radio_{kind}_{pk}'
+
+
+def _seed_tracks(kind, obj):
+    """Músicas semente e gêneros para completar a fila"""
+    active = Music.objects.filter(is_active=True)
+    if kind == 'track':
+        return [(obj.pk, obj.artist_id)], [obj.genre] if obj.genre_id else []
+    if kind == 'artist':
+        seeds = list(active.filter(artist=obj).order_by('-streams_count').values_list('pk', 'artist_id')[:SEED_TRACKS])
+        return seeds, [obj.genre] if obj.genre_id else []
+    seeds = list(
+        active.filter(obj.subtree_filter()).order_by('-streams_count').values_list('pk', 'artist_id')[:SEED_TRACKS]
+    )
+    return seeds, [obj]
+
+
+def _popular(genres, exclude, count):
+    """Mais tocadas dos gêneros (com subgêneros) ou do catálogo, fora as já usadas"""
+    queryset = Music.objects.filter(is_active=True)
+    if genres:
+        subtree = genres[0].subtree_filter()
+        for genre in genres[1:]:
+            subtree |= genre.subtree_filter()
+        queryset = queryset.filter(subtree)
+    return [
+        row for row in queryset.order_by('-streams_count').values_list('pk', 'artist_id')[:count + len(exclude)]
+        if row[0] not in exclude
+    ][:count]
+
+
+def build_queue(kind, obj, length=None):
+    """
+    Gera a fila do rádio (lista de ids de músicas)
+
+    Para semente ``track`` a própria música não entra (o cliente acabou de
+    tocá-la); para ``artist`` e ``genre`` as sementes abrem a fila.
+    """
+    length = length or settings.RADIO_QUEUE_LENGTH
+    deadline = time.monotonic() + settings.RADIO_BUILD_SECONDS
+    expansions_left = settings.RADIO_MAX_EXPANSIONS
+
+    seeds, genres = _seed_tracks(kind, obj)
+    queue = []
+    seen = {pk for pk, _ in seeds}
+    recent_artists = deque(maxlen=ARTIST_SPACING)
+    to_expand = [(pk, 1.0, 0) for pk, _ in seeds]
+    if kind != 'track':
+        for pk, artist_id in seeds:
+            queue.append(pk)
+            recent_artists.append(artist_id)
+
+    heap = []
+    counter = 0
+    while len(queue) < length:
+        can_expand = to_expand and expansions_left and time.monotonic() < deadline
+        # Expande em lote: quando faltam candidatas ou o lote está cheio
+        if can_expand and (not heap or len(to_expand) >= EXPAND_BATCH):
+            batch, to_expand = to_expand[:EXPAND_BATCH], to_expand[EXPAND_BATCH:]
+            weights = {pk: (weight, hops) for pk, weight, hops in batch}
+            expansions_left -= 1
+            neighbours = RelatedMusic.objects.filter(
+                music_id__in=list(weights), related__is_active=True
+            ).values_list('music_id', 'related_id', 'score', 'related__artist_id')
+            for source, related, score, artist_id in neighbours:
+                if related in seen:
+                    continue
+                weight, hops = weights[source]
+                counter += 1
+                heapq.heappush(heap, (-score * weight, counter, related, artist_id, hops + 1))
+            continue
+        if not heap:
+            break
+
+        # Melhor candidata de outro artista; sem opção, aceita o mesmo artista
+        candidate = None
+        deferred = []
+        while heap and len(deferred) < MAX_DEFERRED:
+            item = heapq.heappop(heap)
+            if item[2] in seen:
+                continue
+            if item[3] in recent_artists:
+                deferred.append(item)
+                continue
+            candidate = item
+            break
+        if candidate is None and deferred:
+            candidate = deferred.pop(0)
+        for item in deferred:
+            heapq.heappush(heap, item)
+        if candidate is None:
+            continue
+
+        _, _, pk, artist_id, hops = candidate
+        seen.add(pk)
+        queue.append(pk)
+        recent_artists.append(artist_id)
+        to_expand.append((pk, HOP_DECAY ** hops, hops))
+
+    # Completa com as mais tocadas do gênero das sementes e depois do catálogo
+    for fill_genres in ([genres] if genres else []) + [[]]:
+        if len(queue) >= length:
+            break
+        for pk, _ in _popular(fill_genres, seen, length - len(queue)):
+            seen.add(pk)
+            queue.append(pk)
+    return queue[:length]
+
+
+def get_queue(kind, obj):
+    """Fila do rádio da semente, calculada uma vez e mantida em cache"""
+    key = radio_cache_key(kind, obj.pk)
+    queue = cache.get(key)
+    if queue is None:
+        queue = build_queue(kind, obj)
+        cache.set(key, queue, settings.RADIO_CACHE_TIMEOUT)
+    return queue
+
+
+def resolve_seed(params):
+    """(tipo, objeto) a partir de ?track=, ?artist= ou ?genre= (None se inválido)"""
+    from apps.artists.models import Artist
+
+    for kind, lookup in (
+        ('track', lambda value: Music.objects.select_related('genre').filter(pk=int(value), is_active=True).first()),
+        ('artist', lambda value: Artist.objects.select_related('genre').filter(pk=int(value), is_active=True).first()),
+        ('genre', Genre.resolve),
+    ):
+        value = (params.get(kind) or '').strip()
+        if not value:
+            continue
+        if kind != 'genre' and not value.isdigit():
+            return None
+        obj = lookup(value)
+        return (kind, obj) if obj else None
+    return None
@@ -0,0 +1,150 @@
+"""
+Músicas relacionadas ("mais como esta") por coocorrência nas PlayHits
+
+As PlayHits são a única curadoria do catálogo: duas faixas que aparecem juntas
+em várias PlayHits tendem a agradar o mesmo ouvinte. O cálculo em lote:
+
+1. monta a matriz esparsa faixa × PlayHit (1 quando a faixa está na PlayHit)
+   e normaliza as linhas, de forma que ``A · Aᵀ`` dê a similaridade de
+   cosseno entre faixas;
+2. calcula as linhas dessa matriz em blocos de faixas, sem materializá-la
+   inteira;
+3. soma pesos de mesmo artista (``RELATED_MUSIC_ARTIST_WEIGHT``) e mesmo
+   gênero (``RELATED_MUSIC_GENRE_WEIGHT``); as faixas mais tocadas do artista e
+   do gênero entram como candidatas, então faixas fora de PlayHits também
+   recebem vizinhos;
+4. grava os ``RELATED_MUSIC_TOP_K`` melhores por faixa em ``RelatedMusic``,
+   substituindo os vizinhos de cada bloco em uma transação (a API nunca vê uma
+   lista pela metade).
+"""
+import time
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from scipy import sparse
+
+from apps.playlists.models import PlaylistMusic
+from .models import Music, RelatedMusic
+
+CHUNK_SIZE = 2000
+
+
+def _top_by_group(groups, streams, count):
+    """Para cada grupo (artista/gênero), índices das ``count`` faixas mais tocadas"""
+    order = np.lexsort((-streams, groups))
+    sorted_groups = groups[order]
+    starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]])
+    ends = np.r_[starts[1:], len(order)]
+    return {
+        int(sorted_groups[start]): order[start:min(end, start + count)]
+        for start, end in zip(starts, ends)
+    }
+
+
+def _cooccurrence_matrix(ids):
+    """Matriz faixa × PlayHit com linhas normalizadas (norma L2 = 1)"""
+    entries = np.array(
+        PlaylistMusic.objects.filter(
+            playlist__is_active=True, music__is_active=True
+        ).values_list('music_id', 'playlist_id'),
+        dtype=np.int64,
+    ).reshape(-1, 2)
+    rows = np.searchsorted(ids, entries[:, 0])
+    _, columns = np.unique(entries[:, 1], return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(entries), dtype=np.float32), (rows, columns)),
+        shape=(len(ids), int(columns.max()) + 1 if len(entries) else 0),
+    )
+    norms = np.sqrt(np.asarray(matrix.sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.diags(1 / norms).dot(matrix).tocsr()
+
+
+def build_related(top_k=None, artist_weight=None, genre_weight=None, chunk_size=CHUNK_SIZE, log=None):
+    """
+    Recalcula as músicas relacionadas de todo o catálogo ativo
+
+    Returns:
+        dict: faixas processadas, vizinhos gravados e tempo gasto
+    """
+    top_k = top_k or settings.RELATED_MUSIC_TOP_K
+    artist_weight = settings.RELATED_MUSIC_ARTIST_WEIGHT if artist_weight is None else artist_weight
+    genre_weight = settings.RELATED_MUSIC_GENRE_WEIGHT if genre_weight is None else genre_weight
+    started = time.perf_counter()
+
+    tracks = np.array(
+        Music.objects.filter(is_active=True).order_by('pk').values_list(
+            'pk', 'artist_id', 'genre_id', 'streams_count'
+        ),
+        dtype=object,
+    ).reshape(-1, 4)
+    ids = tracks[:, 0].astype(np.int64)
+    artists = tracks[:, 1].astype(np.int64)
+    # Sem gênero = -1 (não conta como "mesmo gênero")
+    genres = np.array([genre if genre is not None else -1 for genre in tracks[:, 2]], dtype=np.int64)
+    streams = tracks[:, 3].astype(np.int64)
+
+    if not len(ids):
+        RelatedMusic.objects.all().delete()
+        return {'tracks': 0, 'in_playlists': 0, 'related': 0, 'elapsed_s': 0.0}
+
+    matrix = _cooccurrence_matrix(ids)
+    matrix_t = matrix.T.tocsr()
+    by_artist = _top_by_group(artists, streams, top_k + 1)
+    by_genre = _top_by_group(genres, streams, top_k + 1)
+    empty = np.empty(0, dtype=np.int64)
+
+    written = 0
+    for start in range(0, len(ids), chunk_size):
+        stop = min(start + chunk_size, len(ids))
+        similarity = matrix[start:stop].dot(matrix_t).tocsr()
+        objects = []
+        for offset, index in enumerate(range(start, stop)):
+            row = slice(similarity.indptr[offset], similarity.indptr[offset + 1])
+            candidates = np.concatenate([
+                similarity.indices[row],
+                by_artist.get(int(artists[index]), empty),
+                by_genre.get(int(genres[index]), empty) if genres[index] >= 0 else empty,
+            ])
+            cosine = np.concatenate([
+                similarity.data[row],
+                np.zeros(len(candidates) - (row.stop - row.start), dtype=np.float32),
+            ])
+            # Mantém a maior similaridade de cada candidata e remove a própria faixa
+            order = np.lexsort((-cosine, candidates))
+            candidates, cosine = candidates[order], cosine[order]
+            keep = np.r_[True, candidates[1:] != candidates[:-1]] & (candidates != index)
+            candidates, cosine = candidates[keep], cosine[keep]
+            if not len(candidates):
+                continue
+
+            scores = (
+                cosine
+                + artist_weight * (artists[candidates] == artists[index])
+                + genre_weight * ((genres[candidates] == genres[index]) & (genres[index] >= 0))
+            )
+            # Maior nota primeiro; empate decidido pela popularidade
+            best = np.lexsort((-streams[candidates], -scores))[:top_k]
+            objects.extend(
+                RelatedMusic(music_id=int(ids[index]), related_id=int(ids[candidates[position]]),
+                             rank=rank, score=round(float(scores[position]), 4))
+                for rank, position in enumerate(best, start=1)
+            )
+
+        with transaction.atomic():
+            RelatedMusic.objects.filter(music_id__gte=int(ids[start]), music_id__lte=int(ids[stop - 1])).delete()
+            RelatedMusic.objects.bulk_create(objects, batch_size=5000)
+        written += len(objects)
+        if log:
+            log(f"  {stop}/{len(ids)} músicas")
+
+    # Vizinhos de faixas desativadas desde a última execução
+    RelatedMusic.objects.exclude(music__is_active=True).delete()
+
+    return {
+        'tracks': len(ids),
+        'in_playlists': int(np.count_nonzero(np.diff(matrix.indptr))),
+        'related': written,
+        'elapsed_s': round(time.perf_counter() - started, 2),
+    }
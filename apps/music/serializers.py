@@ -1,5 +1,8 @@
+import os
+
+from django.conf import settings
 from rest_framework import serializers
-from .models import Music
+from .models import Music, UploadSession
 
 
 class GenreSerializer(serializers.ModelSerializer):
@@ -22,7 +25,7 @@ class AlbumSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Music.album.field.related_model
-        fields = ['id', 'name', 'cover', 'featured']
+        fields = ['id', 'name', 'cover', 'cover_color', 'cover_blurhash', 'featured']
 
 
 class MusicSerializer(serializers.ModelSerializer):
@@ -35,6 +38,7 @@ class MusicSerializer(serializers.ModelSerializer):
     album_data = AlbumSerializer(source='album', read_only=True, allow_null=True)
     stream_url = serializers.CharField(source='get_stream_url', read_only=True, allow_null=True)
     download_url = serializers.CharField(source='get_download_url', read_only=True, allow_null=True)
+    waveform_url = serializers.CharField(source='get_waveform_url', read_only=True, allow_null=True)
     file_size_mb = serializers.SerializerMethodField()
     is_popular = serializers.BooleanField(read_only=True, default=False)
     is_trending = serializers.BooleanField(read_only=True, default=False)
@@ -44,13 +48,14 @@ class MusicSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'artist', 'artist_name', 'album', 'album_name', 'album_featured', 'album_data',
             'title', 'genre', 'genre_data', 'duration', 'file', 'file_size_mb',
-            'cover', 'release_date', 'streams_count', 'downloads_count', 'likes_count',
+            'cover', 'cover_color', 'cover_blurhash', 'release_date',
+            'streams_count', 'downloads_count', 'likes_count',
             'is_featured', 'is_popular', 'is_trending', 'stream_url',
-            'download_url', 'created_at', 'updated_at', 'is_active'
+            'download_url', 'waveform_url', 'created_at', 'updated_at', 'is_active'
         ]
         read_only_fields = [
-            'id', 'created_at', 'updated_at', 'streams_count',
-            'downloads_count', 'likes_count'
+            'id', 'cover_color', 'cover_blurhash', 'created_at', 'updated_at',
+            'streams_count', 'downloads_count', 'likes_count'
         ]
     
     def validate_title(self, value):
@@ -132,7 +137,7 @@ class MusicAutocompleteSerializer(serializers.ModelSerializer):
         model = Music
         fields = [
             'id', 'title', 'artist_name', 'album_name', 'genre',
-            'cover'
+            'cover', 'cover_color', 'cover_blurhash'
         ]
 
 
@@ -147,5 +152,52 @@ class MusicTrendingSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'title', 'artist_name', 'album_name', 'genre',
             'streams_count', 'likes_count',
-            'is_featured', 'cover'
+            'is_featured', 'cover', 'cover_color', 'cover_blurhash'
+        ]
+
+
+class UploadSessionCreateSerializer(serializers.Serializer):
+    """Dados para iniciar um upload em partes"""
+    filename = serializers.CharField(max_length=255)
+    size = serializers.IntegerField(min_value=1)
+    title = serializers.CharField(max_length=200, required=False, allow_blank=True)
+    album_id = serializers.IntegerField(required=False, allow_null=True)
+    genre_id = serializers.IntegerField(required=False, allow_null=True)
+    artist_id = serializers.IntegerField(required=False, allow_null=True)
+
+    def validate_filename(self, value):
+        """Validação da extensão do arquivo de áudio"""
+        value = os.path.basename(value.strip())
+        extension = os.path.splitext(value)[1].lower()
+        if extension not in settings.UPLOAD_AUDIO_EXTENSIONS:
+            raise serializers.ValidationError(
+                f"Formato não suportado. Use: {', '.join(settings.UPLOAD_AUDIO_EXTENSIONS)}."
+            )
+        return value
+
+    def validate_size(self, value):
+        """Validação do tamanho total"""
+        if value > settings.UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(
+                f"Arquivo maior que o limite de {settings.UPLOAD_MAX_SIZE // (1024 * 1024)} MB."
+            )
+        return value
+
+    def validate_title(self, value):
+        """Validação do título"""
+        if value and len(value.strip()) < 2:
+            raise serializers.ValidationError("Título deve ter pelo menos 2 caracteres.")
+        return value.strip()
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """Estado de um upload em partes"""
+    music_id = serializers.IntegerField(read_only=True, allow_null=True)
+
+    class Meta:
+        model = UploadSession
+        fields = [
+            'id', 'filename', 'size', 'offset', 'status', 'error',
+            'content_hash', 'audio_info', 'music_id', 'created_at', 'updated_at'
         ]
+        read_only_fields = fields
@@ -1,2 +1,49 @@
-# Signals removidos para melhorar performance do upload
-# O cálculo de duração pode ser feito manualmente ou via tarefa assíncrona
+"""
+Signals das músicas
+
+Mantêm a contagem de referências dos arquivos de áudio (``AudioBlob``): o
+storage é endereçado por conteúdo e o mesmo arquivo pode servir várias
+músicas, então ele só é apagado quando nenhuma música o usa mais. A troca de
+arquivo também agenda o cálculo dos picos da forma de onda.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .models import AudioBlob, Music
+
+
+def _file_name(value):
+    return getattr(value, 'name', value) or ''
+
+
+@receiver(post_init, sender=Music)
+def remember_file(sender, instance, **kwargs):
+    """Guarda o arquivo carregado do banco para detectar trocas no save"""
+    # Lido do __dict__ para não disparar consulta quando o campo foi adiado (defer)
+    instance._stored_file_name = _file_name(instance.__dict__.get('file'))
+
+
+@receiver(post_save, sender=Music)
+def music_file_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'file' not in update_fields:
+        return
+    if 'file' not in instance.__dict__:
+        return
+    new_name = _file_name(instance.file)
+    old_name = getattr(instance, '_stored_file_name', '')
+    if new_name == old_name:
+        return
+    AudioBlob.acquire(new_name)
+    AudioBlob.release(old_name)
+    instance._stored_file_name = new_name
+    if new_name and instance.waveform_hash != instance.content_hash:
+        from .waveform import enqueue_waveform
+
+        music_id = instance.pk
+        transaction.on_commit(lambda: enqueue_waveform(music_id))
+
+
+@receiver(post_delete, sender=Music)
+def music_deleted(sender, instance, **kwargs):
+    AudioBlob.release(_file_name(instance.__dict__.get('file')))
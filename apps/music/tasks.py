@@ -0,0 +1,205 @@
+"""
+Tasks Celery das músicas: ações em massa do admin, músicas relacionadas e
+contadores de curtidas
+
+O admin só cria um ``BulkJob`` com os ids selecionados e enfileira
+``run_bulk_job``; o worker processa em lotes de ``BULK_JOB_CHUNK_SIZE``,
+grava o progresso (e o heartbeat) a cada lote e invalida o cache uma única
+vez no fim. A mensagem só é confirmada ao terminar (``acks_late``): se o
+worker morre, o broker reentrega e o job é retomado do último lote gravado.
+``recover_stale_bulk_jobs`` (beat) reenfileira os jobs sem heartbeat há mais
+de ``BULK_JOB_STALE_SECONDS``.
+
+``build_related_music`` recalcula as músicas relacionadas (agendar no beat
+ou rodar ``manage.py build_related_music``); ``flush_like_counts`` recalcula
+``likes_count`` das músicas curtidas/descurtidas (agendada no beat, ver
+``CELERY_BEAT_SCHEDULE``); ``compute_waveform`` calcula os picos da forma de
+onda de uma música após o upload.
+"""
+import logging
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.db import transaction
+from django.db.models import DateTimeField, F, Q, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.artists.models import Album
+from .models import BulkJob, Music
+
+logger = logging.getLogger(__name__)
+
+
+def _transcode(ids, options):
+    failures = []
+    for music in Music.objects.filter(pk__in=ids).select_related('artist', 'album'):
+        try:
+            music.compress_audio(options.get('quality', 'medium'))
+        except Exception as e:
+            failures.append(f"{music.pk}: {e}")
+    return failures
+
+
+def _recompute(ids, options):
+    failures = []
+    changed = []
+    for music in Music.objects.filter(pk__in=ids).only('pk', 'file', 'duration', 'file_size'):
+        try:
+            music.duration = music.calculate_duration()
+            music.file_size = music.file.size if music.file else 0
+        except Exception as e:
+            failures.append(f"{music.pk}: {e}")
+            continue
+        changed.append(music)
+    Music.objects.bulk_update(changed, ['duration', 'file_size'])
+    return failures
+
+
+def _set_featured(value):
+    def handler(ids, options):
+        Music.objects.filter(pk__in=ids).update(is_featured=value, updated_at=timezone.now())
+        return []
+    return handler
+
+
+def _deactivate_albums(ids, options):
+    now = timezone.now()
+    with transaction.atomic():
+        Album.objects.filter(pk__in=ids).update(is_active=False, updated_at=now)
+        Music.objects.filter(album_id__in=ids).update(is_active=False, updated_at=now)
+    return []
+
+
+# ação -> (função que processa um lote de ids, caches afetados)
+BULK_ACTIONS = {
+    BulkJob.ACTION_TRANSCODE: (_transcode, {'music'}),
+    BulkJob.ACTION_RECOMPUTE: (_recompute, {'music'}),
+    BulkJob.ACTION_FEATURE: (_set_featured(True), {'music'}),
+    BulkJob.ACTION_UNFEATURE: (_set_featured(False), {'music'}),
+    BulkJob.ACTION_DEACTIVATE_ALBUMS: (_deactivate_albums, {'music', 'album', 'artist'}),
+}
+
+
+def _stale():
+    """Jobs em execução cujo worker parou de dar sinal (morto, deploy)"""
+    limit = timezone.now() - timedelta(seconds=settings.BULK_JOB_STALE_SECONDS)
+    return Q(status=BulkJob.STATUS_RUNNING) & (
+        Q(heartbeat_at__lt=limit) | Q(heartbeat_at__isnull=True, started_at__lt=limit)
+    )
+
+
+@shared_task(ignore_result=True, acks_late=True, reject_on_worker_lost=True)
+def run_bulk_job(job_id):
+    """Executa (ou retoma) um BulkJob em lotes, atualizando o progresso"""
+    # Importado aqui: cache_utils conecta os signals de invalidação ao ser carregado
+    from apps.cache_utils import coalesce_cache_invalidation
+
+    # Assume o job na fila ou abandonado; entrega duplicada de um job ativo não reprocessa
+    beat = timezone.now()
+    claimed = BulkJob.objects.filter(
+        Q(status=BulkJob.STATUS_PENDING) | _stale(), pk=job_id
+    ).update(
+        status=BulkJob.STATUS_RUNNING,
+        started_at=Coalesce(F('started_at'), Value(beat), output_field=DateTimeField()),
+        heartbeat_at=beat,
+    )
+    if not claimed:
+        return
+
+    job = BulkJob.objects.get(pk=job_id)
+    handler, cache_kinds = BULK_ACTIONS[job.action]
+    chunk_size = settings.BULK_JOB_CHUNK_SIZE
+    errors = job.error.splitlines() if job.error else []
+
+    try:
+        with coalesce_cache_invalidation() as pending:
+            pending.update(cache_kinds)
+            # Retomada: os lotes já gravados em ``processed`` não são refeitos
+            for start in range(job.processed, len(job.object_ids), chunk_size):
+                chunk = job.object_ids[start:start + chunk_size]
+                failures = handler(chunk, job.options)
+                errors.extend(failures)
+                job.processed += len(chunk)
+                job.failed += len(failures)
+                job.error = '\n'.join(errors[-50:])
+                # heartbeat_at também serve de posse: se outro worker retomou o job, este para
+                now = timezone.now()
+                owned = BulkJob.objects.filter(pk=job.pk, heartbeat_at=beat).update(
+                    processed=job.processed, failed=job.failed, error=job.error, heartbeat_at=now
+                )
+                if not owned:
+                    logger.warning("Ação em massa %s retomada por outro worker", job.pk)
+                    return
+                beat = now
+        job.status = BulkJob.STATUS_DONE
+    except Exception as e:
+        logger.exception("Erro na ação em massa %s", job.pk)
+        job.status = BulkJob.STATUS_FAILED
+        job.error = '\n'.join([*errors[-49:], str(e)])
+
+    BulkJob.objects.filter(pk=job.pk, heartbeat_at=beat).update(
+        status=job.status, error=job.error, finished_at=timezone.now()
+    )
+
+
+@shared_task(ignore_result=True)
+def recover_stale_bulk_jobs():
+    """Reenfileira os jobs abandonados por um worker que parou (retomados do último lote)"""
+    job_ids = list(BulkJob.objects.filter(_stale()).values_list('pk', flat=True))
+    for job_id in job_ids:
+        logger.warning("Retomando ação em massa %s sem heartbeat", job_id)
+        _dispatch(job_id)
+    return len(job_ids)
+
+
+def _dispatch(job_id):
+    try:
+        run_bulk_job.delay(job_id)
+    except Exception as e:
+        # Broker indisponível: o job fica registrado como falho em vez de parado na fila
+        logger.exception("Erro ao enfileirar ação em massa %s", job_id)
+        BulkJob.objects.filter(pk=job_id).update(
+            status=BulkJob.STATUS_FAILED, error=f"Erro ao enfileirar: {e}", finished_at=timezone.now()
+        )
+
+
+def enqueue_bulk_job(action, object_ids, user=None, options=None):
+    """Cria o BulkJob e enfileira a execução após o commit"""
+    object_ids = list(object_ids)
+    job = BulkJob.objects.create(
+        action=action,
+        object_ids=object_ids,
+        options=options or {},
+        total=len(object_ids),
+        created_by=user,
+    )
+    transaction.on_commit(lambda: _dispatch(job.pk))
+    return job
+
+
+@shared_task(ignore_result=True)
+def build_related_music():
+    """Recalcula as músicas relacionadas de todo o catálogo"""
+    from .recommendations import build_related
+
+    return build_related()
+
+
+@shared_task(ignore_result=True)
+def flush_like_counts():
+    """Recalcula likes_count das músicas curtidas/descurtidas desde a última execução"""
+    from .likes import flush_like_counts as flush
+
+    return flush()
+
+
+@shared_task(ignore_result=True)
+def compute_waveform(music_id):
+    """Calcula os picos da forma de onda do arquivo atual da música"""
+    from .waveform import build_waveform
+
+    music = Music.objects.filter(pk=music_id).first()
+    if music is not None:
+        build_waveform(music)
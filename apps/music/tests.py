@@ -304,3 +304,913 @@ class MusicIntegrationTest(TestCase):
         for music in musics:
             self.assertEqual(music.album, self.album)
 
+
+
+class MusicAsyncViewsTest(TestCase):
+    """Testes para as views async de leitura (modo ASGI)"""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.artist = Artist.objects.create(stage_name='Async Artist')
+        self.album = Album.objects.create(artist=self.artist, name='Async Album')
+        self.music = Music.objects.create(
+            artist=self.artist,
+            album=self.album,
+            title='Async Music',
+            duration=180,
+            streams_count=1500,
+            is_featured=True
+        )
+
+    async def test_popular_music_view_matches_sync(self):
+        """Testa que a view async retorna o mesmo conteúdo da view sync"""
+        import json
+        from asgiref.sync import sync_to_async
+        from django.core.cache import cache
+        from django.test import AsyncRequestFactory, RequestFactory
+        from . import async_views, views
+
+        response = await async_views.popular_music_view(AsyncRequestFactory().get('/api/music/popular/'))
+        self.assertEqual(response.status_code, 200)
+        async_data = json.loads(response.content)
+
+        await cache.aclear()
+        sync_response = await sync_to_async(views.popular_music_view)(RequestFactory().get('/api/music/popular/'))
+        self.assertEqual(async_data, json.loads(json.dumps(sync_response.data)))
+        self.assertEqual(async_data['musics'][0]['artist_name'], 'Async Artist')
+
+    async def test_autocomplete_requires_two_characters(self):
+        """Testa validação do termo de busca no autocomplete async"""
+        import json
+        from django.test import AsyncRequestFactory
+        from . import async_views
+
+        response = await async_views.music_autocomplete_view(AsyncRequestFactory().get('/api/music/search/?q=a'))
+        self.assertEqual(json.loads(response.content)['count'], 0)
+
+
+class ResumableUploadTest(TestCase):
+    """Testes para o upload de áudio em partes, retomável"""
+
+    def setUp(self):
+        import tempfile
+        from django.test import override_settings
+
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+
+        self.artist = Artist.objects.create(stage_name='Upload Artist')
+        self.user = User.objects.create_user(
+            username='uploader', email='uploader@example.com', password='testpass123', is_staff=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def tearDown(self):
+        import shutil
+
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def make_mp3(self, frames=400):
+        """MP3 CBR de 128 kbps / 44.1 kHz com tag ID3 (frames de silêncio)"""
+        id3 = b'ID3\x03\x00\x00\x00\x00\x00\x0a' + b'\x00' * 10
+        frame = b'\xff\xfb\x90\x64' + b'\x00' * 413  # 144 * 128000 / 44100 = 417 bytes
+        return id3 + frame * frames
+
+    def create_session(self, data):
+        response = self.client.post('/api/uploads/', {
+            'filename': 'faixa.mp3', 'size': len(data), 'title': 'Faixa Enviada', 'artist_id': self.artist.id
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response
+
+    def send_chunk(self, session_id, offset, chunk):
+        return self.client.generic(
+            'PATCH', f'/api/uploads/{session_id}/', chunk,
+            content_type='application/offset+octet-stream', HTTP_UPLOAD_OFFSET=str(offset)
+        )
+
+    def test_probe_mp3_duration(self):
+        """Testa a leitura de duração do cabeçalho MP3 (CBR)"""
+        from .audio_probe import probe_audio
+
+        data = self.make_mp3(frames=1000)
+        info = probe_audio(data[:64 * 1024], len(data))
+        self.assertEqual(info['format'], 'mp3')
+        self.assertEqual(info['bitrate'], 128000)
+        self.assertAlmostEqual(info['duration'], 1000 * 1152 / 44100, delta=0.1)
+
+    def test_content_hash_resumes_across_sessions(self):
+        """Testa que o hash retomado a partir dos blocos salvos é igual ao hash direto"""
+        import os
+        from ehit_backend.storage import CONTENT_HASH_BLOCK_SIZE, ContentHasher
+
+        data = os.urandom(CONTENT_HASH_BLOCK_SIZE + 1000)
+        direct = ContentHasher()
+        direct.update(data)
+
+        first = ContentHasher()
+        first.update(data[:CONTENT_HASH_BLOCK_SIZE + 10])
+        resumed = ContentHasher(first.completed_blocks, data[CONTENT_HASH_BLOCK_SIZE:CONTENT_HASH_BLOCK_SIZE + 10])
+        resumed.update(data[CONTENT_HASH_BLOCK_SIZE + 10:])
+        self.assertEqual(resumed.hexdigest(), direct.hexdigest())
+
+    def test_chunked_upload_creates_music(self):
+        """Testa upload em partes, retomada pelo offset e criação da música"""
+        from ehit_backend.storage import ContentHasher
+
+        data = self.make_mp3()
+        response = self.create_session(data)
+        session_id = response.data['id']
+        self.assertEqual(response['Upload-Offset'], '0')
+
+        response = self.send_chunk(session_id, 0, data[:50000])
+        self.assertEqual(response['Upload-Offset'], '50000')
+
+        # Offset desatualizado (ex.: cliente que perdeu a resposta)
+        response = self.send_chunk(session_id, 0, data[:50000])
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response['Upload-Offset'], '50000')
+
+        # Retomada: HEAD informa de onde continuar
+        response = self.client.head(f'/api/uploads/{session_id}/')
+        offset = int(response['Upload-Offset'])
+        response = self.send_chunk(session_id, offset, data[offset:])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'complete')
+
+        music = Music.objects.get(pk=response.data['music_id'])
+        hasher = ContentHasher()
+        hasher.update(data)
+        self.assertEqual(music.title, 'Faixa Enviada')
+        self.assertEqual(music.artist, self.artist)
+        self.assertEqual(music.duration, round(400 * 1152 / 44100))
+        self.assertEqual(music.content_hash, hasher.hexdigest())
+        with music.file.open('rb') as stored:
+            self.assertEqual(stored.read(), data)
+
+    def test_chunk_beyond_size_is_rejected(self):
+        """Testa que partes além do tamanho declarado são recusadas"""
+        data = self.make_mp3(frames=10)
+        session_id = self.create_session(data).data['id']
+
+        response = self.send_chunk(session_id, 0, data + b'extra')
+        self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.assertEqual(self.client.head(f'/api/uploads/{session_id}/')['Upload-Offset'], '0')
+
+    def test_upload_requires_artist(self):
+        """Testa que usuários sem perfil de artista não iniciam uploads"""
+        user = User.objects.create_user(username='listener', email='listener@example.com', password='testpass123')
+        self.client.force_authenticate(user=user)
+        response = self.client.post('/api/uploads/', {'filename': 'faixa.mp3', 'size': 100}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_multipart_chunk(self):
+        """Testa partes enviadas em multipart (campo file)"""
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        data = self.make_mp3(frames=20)
+        session_id = self.create_session(data).data['id']
+        response = self.client.patch(
+            f'/api/uploads/{session_id}/', {'file': SimpleUploadedFile('parte.bin', data)},
+            format='multipart', HTTP_UPLOAD_OFFSET='0'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['offset'], len(data))
+        self.assertIsNotNone(response.data['music_id'])
+
+    def test_s3_partial_store_uses_multipart_upload(self):
+        """No S3 o parcial fica em um multipart upload: qualquer nó retoma e o hash confere"""
+        import os
+        from types import SimpleNamespace
+        from ehit_backend.storage import ContentHasher
+        from .models import UploadSession
+        from .uploads import UPLOAD_PART_SIZE, S3PartialStore, append_chunk
+
+        client = FakeS3Client()
+        storage = SimpleNamespace(
+            bucket=SimpleNamespace(meta=SimpleNamespace(client=client)), bucket_name='audio',
+            _normalize_name=lambda name: name, exists=lambda name: False, object_parameters={},
+        )
+        data = self.make_mp3(frames=10) + os.urandom(UPLOAD_PART_SIZE * 2 + 12345)
+        session = UploadSession.objects.create(
+            user=self.user, artist=self.artist, filename='faixa.mp3', size=len(data)
+        )
+        sizes = [1000, UPLOAD_PART_SIZE, UPLOAD_PART_SIZE + 5000, len(data)]
+        start = 0
+        for stop in sizes:
+            # Cada parte em uma "requisição" com a sessão recarregada do banco
+            session = UploadSession.objects.get(pk=session.pk)
+            with self.captureOnCommitCallbacks(execute=True):
+                append_chunk(session, data[start:stop], S3PartialStore(storage))
+            start = stop
+        self.assertEqual(len(session.parts), 2)
+        self.assertEqual(session.audio_info['format'], 'mp3')
+        hasher = ContentHasher()
+        hasher.update(data)
+        self.assertEqual(session.content_hash, hasher.hexdigest())
+        # Só o resto da última parte incompleta continua como objeto solto
+        self.assertEqual(list(client.objects), [f'uploads/partial/{session.pk}/tail-{len(data)}'])
+
+        field_file = SimpleNamespace(
+            storage=storage, instance=None, name=None,
+            field=SimpleNamespace(generate_filename=lambda instance, name: f'music/{name}'),
+        )
+        S3PartialStore(storage).save(session, field_file)
+        self.assertTrue(field_file.name.endswith(f'{session.content_hash}.mp3'))
+        self.assertEqual(client.objects[field_file.name], data)
+
+        S3PartialStore(storage).delete(session)
+        self.assertEqual(list(client.objects), [field_file.name])
+
+
+class FakeS3Client:
+    """Cliente S3 em memória com as chamadas usadas pelo upload em partes"""
+
+    def __init__(self):
+        self.objects = {}
+        self.multipart = {}
+
+    def create_multipart_upload(self, Bucket, Key):
+        upload_id = f'upload-{len(self.multipart) + 1}'
+        self.multipart[upload_id] = {}
+        return {'UploadId': upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self.multipart[UploadId][PartNumber] = Body
+        return {'ETag': f'"{PartNumber}"'}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        parts = self.multipart.pop(UploadId)
+        self.objects[Key] = b''.join(parts[part['PartNumber']] for part in MultipartUpload['Parts'])
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        from botocore.exceptions import ClientError
+
+        if self.multipart.pop(UploadId, None) is None:
+            raise ClientError({'Error': {'Code': 'NoSuchUpload'}}, 'AbortMultipartUpload')
+
+    def put_object(self, Bucket, Key, Body):
+        self.objects[Key] = Body
+
+    def get_object(self, Bucket, Key, Range):
+        from io import BytesIO
+
+        first, last = Range[len('bytes='):].split('-')
+        return {'Body': BytesIO(self.objects[Key][int(first):int(last) + 1])}
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop(Key, None)
+
+    def copy(self, CopySource, Bucket, Key, ExtraArgs=None):
+        self.objects[Key] = self.objects[CopySource['Key']]
+
+    def list_objects_v2(self, Bucket, Prefix):
+        return {'Contents': [{'Key': key} for key in self.objects if key.startswith(Prefix)]}
+
+    def delete_objects(self, Bucket, Delete):
+        for item in Delete['Objects']:
+            self.objects.pop(item['Key'], None)
+
+
+class ContentAddressedStorageTest(TestCase):
+    """Testes para o armazenamento de áudio por hash do conteúdo"""
+
+    def setUp(self):
+        import tempfile
+        from django.test import override_settings
+
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.artist = Artist.objects.create(stage_name='Storage Artist')
+
+    def tearDown(self):
+        import shutil
+
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def create_music(self, title, content, filename='faixa.mp3'):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        return Music.objects.create(
+            artist=self.artist, title=title, file=SimpleUploadedFile(filename, content)
+        )
+
+    def test_file_named_by_content_hash(self):
+        """Testa o nome do arquivo no formato music/ab/cd/<hash>.mp3"""
+        from ehit_backend.storage import ContentHasher
+
+        hasher = ContentHasher()
+        hasher.update(b'audio-data')
+        digest = hasher.hexdigest()
+
+        music = self.create_music('Hash', b'audio-data', 'Minha Faixa.MP3')
+        self.assertEqual(music.file.name, f'music/{digest[:2]}/{digest[2:4]}/{digest}.mp3')
+        self.assertEqual(music.content_hash, digest)
+
+    def test_identical_uploads_share_file(self):
+        """Testa que uploads iguais usam o mesmo arquivo até a última referência sair"""
+        import os
+        from .models import AudioBlob
+
+        first = self.create_music('Primeira', b'same-bytes', 'a.mp3')
+        second = self.create_music('Segunda', b'same-bytes', 'b.mp3')
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertEqual(AudioBlob.objects.get(name=first.file.name).ref_count, 2)
+        path = first.file.path
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(AudioBlob.objects.get(name=second.file.name).ref_count, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(AudioBlob.objects.exists())
+
+    def test_replacing_file_releases_old_reference(self):
+        """Testa que trocar o arquivo da música libera o anterior"""
+        import os
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        music = self.create_music('Troca', b'version-1')
+        old_path = music.file.path
+        music.file = SimpleUploadedFile('faixa.mp3', b'version-2')
+        with self.captureOnCommitCallbacks(execute=True):
+            music.save()
+        self.assertFalse(os.path.exists(old_path))
+        self.assertTrue(os.path.exists(music.file.path))
+
+    def test_dedupe_command_moves_legacy_files(self):
+        """Testa a migração de arquivos antigos (music/<nome>) para o layout por hash"""
+        import os
+        from io import StringIO
+        from django.core.management import call_command
+        from .models import AudioBlob
+
+        os.makedirs(os.path.join(self.media_root, 'music'))
+        for name in ('antiga.mp3', 'copia.mp3'):
+            with open(os.path.join(self.media_root, 'music', name), 'wb') as legacy:
+                legacy.write(b'legacy-bytes')
+        first = Music.objects.create(artist=self.artist, title='Antiga')
+        second = Music.objects.create(artist=self.artist, title='Cópia')
+        Music.objects.filter(pk=first.pk).update(file='music/antiga.mp3')
+        Music.objects.filter(pk=second.pk).update(file='music/copia.mp3')
+
+        call_command('dedupe_audio_files', stdout=StringIO())
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertTrue(first.content_hash)
+        self.assertEqual(AudioBlob.objects.get(name=first.file.name).ref_count, 2)
+        self.assertEqual(os.listdir(os.path.join(self.media_root, 'music')), [first.content_hash[:2]])
+
+    def test_stream_get_redirects_to_file(self):
+        """Testa que o GET do stream contabiliza e redireciona para o arquivo"""
+        music = self.create_music('Stream', b'stream-bytes')
+        user = User.objects.create_user(username='listener', email='listener@example.com', password='testpass123')
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        response = client.get(f'/api/music/{music.id}/stream/')
+        self.assertEqual(response.status_code, status.HTTP_302_FOUND)
+        self.assertTrue(response['Location'].endswith(music.file.url))
+        music.refresh_from_db()
+        self.assertEqual(music.streams_count, 1)
+
+
+class BulkJobTest(TestCase):
+    """Testes das ações em massa executadas em segundo plano"""
+
+    def setUp(self):
+        self.artist = Artist.objects.create(stage_name='Bulk Artist')
+        self.album = Album.objects.create(name='Bulk Album', artist=self.artist)
+        self.musics = Music.objects.bulk_create([
+            Music(title=f'Faixa {i}', artist=self.artist, album=self.album if i < 3 else None,
+                  file=f'music/faixa-{i}.mp3')
+            for i in range(5)
+        ])
+
+    def run_job(self, action, ids, **options):
+        from unittest.mock import patch
+        from .tasks import enqueue_bulk_job, run_bulk_job
+
+        with patch('apps.cache_utils.delete_cache_pattern') as delete_pattern:
+            with patch('apps.music.tasks.run_bulk_job.delay', side_effect=run_bulk_job):
+                with self.captureOnCommitCallbacks(execute=True):
+                    job = enqueue_bulk_job(action, ids, options=options)
+        job.refresh_from_db()
+        return job, delete_pattern
+
+    def test_feature_in_chunks_with_progress(self):
+        """Marca destaque em lotes e registra o progresso"""
+        from django.test import override_settings
+        from .models import BulkJob
+
+        with override_settings(BULK_JOB_CHUNK_SIZE=2):
+            job, _ = self.run_job(BulkJob.ACTION_FEATURE, [m.pk for m in self.musics[:4]])
+
+        self.assertEqual(job.status, BulkJob.STATUS_DONE)
+        self.assertEqual((job.processed, job.total, job.failed), (4, 4, 0))
+        self.assertEqual(job.progress, 100)
+        self.assertEqual(Music.objects.filter(is_featured=True).count(), 4)
+
+    def test_deactivate_album_with_tracks(self):
+        """Desativa o álbum e todas as suas músicas"""
+        from .models import BulkJob
+
+        job, _ = self.run_job(BulkJob.ACTION_DEACTIVATE_ALBUMS, [self.album.pk])
+
+        self.assertEqual(job.status, BulkJob.STATUS_DONE)
+        self.album.refresh_from_db()
+        self.assertFalse(self.album.is_active)
+        self.assertEqual(Music.objects.filter(is_active=False).count(), 3)
+
+    def test_cache_invalidated_once_per_job(self):
+        """Saves dentro do job invalidam o cache uma única vez, no fim"""
+        from unittest.mock import patch
+        from .models import BulkJob
+
+        def fake_compress(music, quality='medium'):
+            music.title = f'{music.title} (comprimida)'
+            music.save(update_fields=['title'])
+            return True
+
+        with patch.object(Music, 'compress_audio', fake_compress):
+            job, delete_pattern = self.run_job(BulkJob.ACTION_TRANSCODE, [m.pk for m in self.musics])
+
+        self.assertEqual(job.status, BulkJob.STATUS_DONE)
+        self.assertEqual(Music.objects.filter(title__endswith='(comprimida)').count(), 5)
+        patterns = [call.args[0] for call in delete_pattern.call_args_list]
+        self.assertEqual(patterns.count('trending_music'), 1)
+
+    def test_dispatch_failure_marks_job_failed(self):
+        """Sem broker o job fica como falho em vez de parado na fila"""
+        from unittest.mock import patch
+        from .models import BulkJob
+        from .tasks import enqueue_bulk_job
+
+        with patch('apps.music.tasks.run_bulk_job.delay', side_effect=ConnectionError('sem broker')):
+            with self.captureOnCommitCallbacks(execute=True):
+                job = enqueue_bulk_job(BulkJob.ACTION_FEATURE, [self.musics[0].pk])
+        job.refresh_from_db()
+        self.assertEqual(job.status, BulkJob.STATUS_FAILED)
+        self.assertIn('sem broker', job.error)
+
+    def test_stale_running_job_is_resumed(self):
+        """Job abandonado por um worker morto é retomado do último lote gravado"""
+        from datetime import timedelta
+        from unittest.mock import patch
+        from django.test import override_settings
+        from django.utils import timezone
+        from .models import BulkJob
+        from .tasks import recover_stale_bulk_jobs, run_bulk_job
+
+        ids = [m.pk for m in self.musics]
+        now = timezone.now()
+        job = BulkJob.objects.create(
+            action=BulkJob.ACTION_FEATURE, object_ids=ids, total=5, processed=2,
+            status=BulkJob.STATUS_RUNNING, started_at=now, heartbeat_at=now,
+        )
+        # Worker ainda ativo: entrega duplicada e recuperação não mexem no job
+        run_bulk_job(job.pk)
+        self.assertEqual(recover_stale_bulk_jobs(), 0)
+        self.assertFalse(Music.objects.filter(is_featured=True).exists())
+
+        BulkJob.objects.filter(pk=job.pk).update(heartbeat_at=now - timedelta(hours=1))
+        with override_settings(BULK_JOB_CHUNK_SIZE=2), \
+                patch('apps.cache_utils.delete_cache_pattern'), \
+                patch('apps.music.tasks.run_bulk_job.delay', side_effect=run_bulk_job):
+            self.assertEqual(recover_stale_bulk_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, BulkJob.STATUS_DONE)
+        self.assertEqual(job.processed, 5)
+        # Os dois primeiros já estavam processados antes da queda
+        self.assertEqual(
+            set(Music.objects.filter(is_featured=True).values_list('pk', flat=True)), set(ids[2:])
+        )
+
+
+class RelatedMusicTest(TestCase):
+    """Testes das músicas relacionadas por coocorrência nas PlayHits"""
+
+    def setUp(self):
+        from apps.playlists.models import Playlist, PlaylistMusic
+
+        forro = Genre.objects.create(name='Forró', slug='forro-rel')
+        self.artist = Artist.objects.create(stage_name='Artista A')
+        other = Artist.objects.create(stage_name='Artista B')
+        self.musics = Music.objects.bulk_create([
+            Music(title='A1', artist=self.artist, genre=forro, file='music/a1.mp3', streams_count=10),
+            Music(title='A2', artist=self.artist, file='music/a2.mp3', streams_count=50),
+            Music(title='B1', artist=other, genre=forro, file='music/b1.mp3', streams_count=5),
+            Music(title='B2', artist=other, file='music/b2.mp3', streams_count=1),
+            Music(title='Solo', artist=Artist.objects.create(stage_name='C'), file='music/c.mp3'),
+        ])
+        a1, a2, b1, b2, _ = self.musics
+        for index, tracks in enumerate([[a1, b1], [a1, b1, b2], [a2, b2]]):
+            playlist = Playlist.objects.create(name=f'PlayHit {index}')
+            PlaylistMusic.objects.bulk_create([
+                PlaylistMusic(playlist=playlist, music=music, position=position)
+                for position, music in enumerate(tracks)
+            ])
+
+    def test_build_and_serve_related(self):
+        """Vizinhos por coocorrência, com peso de artista, servidos em uma query"""
+        from .models import RelatedMusic
+        from .recommendations import build_related
+
+        a1, a2, b1, b2, solo = self.musics
+        result = build_related(top_k=3, chunk_size=2)
+        self.assertEqual(result['tracks'], 5)
+        self.assertEqual(result['in_playlists'], 4)
+
+        related = list(RelatedMusic.objects.filter(music=a1).values_list('related_id', flat=True))
+        # B1 divide duas PlayHits e o gênero; A2 só o artista
+        self.assertEqual(related[0], b1.pk)
+        self.assertIn(a2.pk, related)
+        self.assertNotIn(a1.pk, related)
+        # Faixa fora de PlayHits e sem artista/gênero em comum não recebe vizinhos
+        self.assertFalse(RelatedMusic.objects.filter(music=solo).exists())
+
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/music/{a1.pk}/related/?limit=2')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['id'] for item in response.data['musics']], related[:2])
+
+    def test_rebuild_drops_inactive_tracks(self):
+        """Faixas desativadas saem das listas na próxima execução"""
+        from .models import RelatedMusic
+        from .recommendations import build_related
+
+        a1, a2, b1, b2, solo = self.musics
+        build_related(top_k=3)
+        Music.objects.filter(pk=b1.pk).update(is_active=False)
+        build_related(top_k=3)
+
+        self.assertFalse(RelatedMusic.objects.filter(related=b1).exists())
+        self.assertFalse(RelatedMusic.objects.filter(music=b1).exists())
+
+    def test_unknown_music_returns_404(self):
+        """Música inexistente retorna 404; sem vizinhos retorna lista vazia"""
+        self.assertEqual(self.client.get('/api/music/999999/related/').status_code, 404)
+        response = self.client.get(f'/api/music/{self.musics[4].pk}/related/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 0)
+
+
+class RadioTest(TestCase):
+    """Testes da fila do rádio"""
+
+    def setUp(self):
+        from django.core.cache import cache
+        from apps.playlists.models import Playlist, PlaylistMusic
+        from .recommendations import build_related
+
+        cache.clear()
+        self.genre = Genre.objects.create(name='Piseiro', slug='piseiro-radio')
+        other_genre = Genre.objects.create(name='Rock', slug='rock-radio')
+        self.artists = [Artist.objects.create(stage_name=f'Radio {i}', genre=self.genre) for i in range(4)]
+        self.musics = Music.objects.bulk_create([
+            Music(title=f'R{i}', artist=self.artists[i % 4], genre=self.genre if i < 12 else other_genre,
+                  file=f'music/r{i}.mp3', streams_count=100 - i)
+            for i in range(16)
+        ])
+        # Duas PlayHits encadeadas: a fila deve andar pelos vizinhos
+        for index, tracks in enumerate([self.musics[0:5], self.musics[4:9]]):
+            playlist = Playlist.objects.create(name=f'Radio {index}')
+            PlaylistMusic.objects.bulk_create([
+                PlaylistMusic(playlist=playlist, music=music, position=position)
+                for position, music in enumerate(tracks)
+            ])
+        build_related(top_k=5)
+
+    def test_track_radio_walks_neighbours_without_repeating(self):
+        """A fila começa pelos vizinhos, não repete e não inclui a semente"""
+        from .radio import build_queue
+
+        seed = self.musics[0]
+        queue = build_queue('track', seed, length=14)
+        self.assertNotIn(seed.pk, queue)
+        self.assertEqual(len(queue), len(set(queue)))
+        self.assertIn(queue[0], [music.pk for music in self.musics[1:5]])
+        # Grafo + mais tocadas do gênero + catálogo: chega a 14 músicas
+        self.assertEqual(len(queue), 14)
+        # Mais tocadas do gênero antes das de outro gênero
+        self.assertLess(queue.index(self.musics[11].pk), queue.index(self.musics[12].pk))
+
+    def test_no_consecutive_tracks_by_same_artist_when_avoidable(self):
+        """Evita o mesmo artista em sequência"""
+        from .radio import build_queue
+
+        queue = build_queue('genre', self.genre, length=8)
+        artists = dict(Music.objects.filter(pk__in=queue).values_list('pk', 'artist_id'))
+        sequence = [artists[pk] for pk in queue]
+        self.assertTrue(all(a != b for a, b in zip(sequence, sequence[1:])))
+
+    def test_endpoint_pages_cached_queue(self):
+        """O endpoint pagina a fila em cache e respeita o exclude"""
+        seed = self.musics[0]
+        response = self.client.get(f'/api/music/radio/?track={seed.pk}&limit=5')
+        self.assertEqual(response.status_code, 200)
+        first_page = [item['id'] for item in response.data['musics']]
+        self.assertEqual(len(first_page), 5)
+        self.assertEqual(response.data['next_offset'], 5)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                f'/api/music/radio/?track={seed.pk}&offset=5&limit=5&exclude={first_page[0]}'
+            )
+        second_page = [item['id'] for item in response.data['musics']]
+        self.assertFalse(set(first_page) & set(second_page))
+
+    def test_invalid_seed(self):
+        """Sem semente válida retorna 400"""
+        self.assertEqual(self.client.get('/api/music/radio/').status_code, 400)
+        self.assertEqual(self.client.get('/api/music/radio/?artist=abc').status_code, 400)
+        self.assertEqual(self.client.get('/api/music/radio/?genre=piseiro-radio').status_code, 200)
+
+
+class UserLikeTest(TestCase):
+    """Testes das curtidas por usuário"""
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username='fan', password='testpass123')
+        self.other = get_user_model().objects.create_user(username='fan2', password='testpass123')
+        artist = Artist.objects.create(stage_name='Curtido')
+        self.musics = Music.objects.bulk_create([
+            Music(title=f'L{i}', artist=artist, file=f'music/l{i}.mp3', likes_count=0)
+            for i in range(5)
+        ])
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def like(self, music, action='like'):
+        return self.client.post(f'/api/music/{music.pk}/like/', {'action': action}, format='json')
+
+    def test_like_is_idempotent_and_counted_in_batch(self):
+        """Curtir duas vezes conta uma; likes_count é recontado no flush"""
+        from .likes import flush_like_counts
+
+        music = self.musics[0]
+        self.assertEqual(self.like(music).data['likes_count'], 1)
+        self.assertEqual(self.like(music).data['likes_count'], 1)
+        self.assertEqual(music.user_likes.count(), 1)
+
+        self.client.force_authenticate(user=self.other)
+        self.like(music)
+        self.like(self.musics[1])
+        # Contador só muda no flush, com um UPDATE para todas as músicas pendentes
+        music.refresh_from_db()
+        self.assertEqual(music.likes_count, 0)
+        with self.assertNumQueries(1):
+            self.assertEqual(flush_like_counts(), 2)
+        music.refresh_from_db()
+        self.assertEqual(music.likes_count, 2)
+
+        self.like(music, 'unlike')
+        self.like(music, 'unlike')
+        flush_like_counts()
+        music.refresh_from_db()
+        self.assertEqual(music.likes_count, 1)
+        self.assertEqual(flush_like_counts(), 0)
+
+    def test_recount_keeps_legacy_likes(self):
+        """Curtidas do contador antigo (sem UserLike) não somem na primeira recontagem"""
+        from .likes import flush_like_counts
+
+        music = self.musics[0]
+        Music.objects.filter(pk=music.pk).update(likes_count=7, legacy_likes_count=7)
+        music.refresh_from_db()
+        self.assertEqual(self.like(music).data['likes_count'], 8)
+        flush_like_counts()
+        music.refresh_from_db()
+        self.assertEqual(music.likes_count, 8)
+        self.assertEqual(self.like(music, 'unlike').data['likes_count'], 7)
+
+    def test_liked_ids_uses_cached_set(self):
+        """O conjunto é carregado do banco uma vez e atualizado a cada curtida"""
+        from .likes import like, liked_ids, unlike
+
+        like(self.user, self.musics[0])
+        ids = [music.pk for music in self.musics]
+        with self.assertNumQueries(1):
+            self.assertEqual(liked_ids(self.user, ids), {self.musics[0].pk})
+        like(self.user, self.musics[2])
+        unlike(self.user, self.musics[0])
+        with self.assertNumQueries(0):
+            self.assertEqual(liked_ids(self.user, ids), {self.musics[2].pk})
+            self.assertEqual(liked_ids(self.other, []), set())
+
+    def test_listings_annotate_is_liked(self):
+        """Listas compartilhadas no cache recebem is_liked por usuário"""
+        from apps.playlists.models import Playlist, PlaylistMusic
+        from .recommendations import build_related
+
+        Music.objects.filter(pk__in=[music.pk for music in self.musics]).update(is_featured=True)
+        playlist = Playlist.objects.create(name='Curtidas')
+        PlaylistMusic.objects.bulk_create([
+            PlaylistMusic(playlist=playlist, music=music, position=position)
+            for position, music in enumerate(self.musics)
+        ])
+        build_related(top_k=4)
+        self.like(self.musics[1])
+
+        response = self.client.get('/api/music/featured/')
+        liked = {item['id']: item['is_liked'] for item in response.data['musics']}
+        self.assertTrue(liked[self.musics[1].pk])
+        self.assertFalse(liked[self.musics[2].pk])
+
+        # Outro usuário vê a mesma lista (do cache) sem as curtidas do primeiro
+        self.client.force_authenticate(user=self.other)
+        response = self.client.get('/api/music/featured/')
+        self.assertFalse(any(item['is_liked'] for item in response.data['musics']))
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(f'/api/music/{self.musics[0].pk}/related/')
+        liked = {item['id']: item['is_liked'] for item in response.data['musics']}
+        self.assertTrue(liked[self.musics[1].pk])
+
+    def test_like_requires_authentication(self):
+        """Anônimo não curte"""
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.like(self.musics[0]).status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class WaveformTest(TestCase):
+    """Testes dos picos da forma de onda do player"""
+
+    def setUp(self):
+        import tempfile
+        from django.test import override_settings
+
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.artist = Artist.objects.create(stage_name='Onda')
+
+    def tearDown(self):
+        import shutil
+
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def samples(self, seconds=3):
+        import numpy as np
+        from django.conf import settings
+
+        t = np.arange(seconds * settings.WAVEFORM_SAMPLE_RATE) / settings.WAVEFORM_SAMPLE_RATE
+        # Seno de 220 Hz com volume crescente
+        return (np.sin(2 * np.pi * 220 * t) * 32767 * t / seconds).astype(np.int16)
+
+    def upload(self, title, content):
+        """Cria a música executando o cálculo agendado no commit (decodificação simulada)"""
+        from unittest.mock import patch
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from . import tasks
+
+        with patch('apps.music.waveform.decode_pcm', return_value=self.samples()) as decode, \
+                patch.object(tasks.compute_waveform, 'delay', side_effect=tasks.compute_waveform), \
+                self.captureOnCommitCallbacks(execute=True):
+            music = Music.objects.create(
+                artist=self.artist, title=title, file=SimpleUploadedFile('onda.mp3', content)
+            )
+        music.refresh_from_db()
+        return music, decode
+
+    def test_peaks_roundtrip(self):
+        """Picos por resolução reduzidos da maior e lidos de volta do formato binário"""
+        import numpy as np
+        from .waveform import compute_peaks, encode_waveform, parse_waveform
+
+        samples = self.samples()
+        levels = compute_peaks(samples, (128, 2048, 512))
+        self.assertEqual([len(peaks) for peaks in levels], [2048, 512, 128])
+        finest, coarse = levels[0].astype(int), levels[2].astype(int)
+        self.assertEqual(coarse[0, 0], finest[:16, 0].min())
+        self.assertEqual(coarse[-1, 1], finest[-16:, 1].max())
+        self.assertEqual(finest[:, 1].max(), samples.max() >> 8)
+        self.assertTrue((finest[:, 0] <= finest[:, 1]).all())
+
+        data = encode_waveform(levels, 3000)
+        self.assertEqual(len(data), 12 + 3 * 4 + 2 * (2048 + 512 + 128))
+        duration_ms, parsed = parse_waveform(data)
+        self.assertEqual(duration_ms, 3000)
+        for original, read in zip(levels, parsed):
+            np.testing.assert_array_equal(original, read)
+
+        # Áudio mais curto que a resolução: um par por amostra
+        self.assertEqual([len(peaks) for peaks in compute_peaks(samples[:100], (2048, 512))], [100, 100])
+
+    def test_upload_computes_waveform_served_as_immutable(self):
+        """O upload agenda o cálculo; a URL na música serve o binário com cache permanente"""
+        from .serializers import MusicSerializer
+        from .waveform import parse_waveform
+
+        music, decode = self.upload('Com onda', b'waveform-bytes')
+        decode.assert_called_once()
+        self.assertEqual(music.waveform_hash, music.content_hash)
+        url = MusicSerializer(music).data['waveform_url']
+        self.assertEqual(url, f'/api/music/waveform/{music.content_hash}/')
+
+        client = APIClient()
+        response = client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/octet-stream')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(parse_waveform(response.content)[0], 3000)
+
+        etag = response['ETag']
+        for if_none_match in (etag, f'W/{etag}', f'"outro", {etag}', '*'):
+            response = client.get(url, HTTP_IF_NONE_MATCH=if_none_match)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED, if_none_match)
+            self.assertEqual(response['ETag'], etag)
+            self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(client.get(url, HTTP_IF_NONE_MATCH='"outro"').status_code, status.HTTP_200_OK)
+        self.assertEqual(client.get('/api/music/waveform/desconhecido/').status_code, status.HTTP_404_NOT_FOUND)
+
+        # Mesmo conteúdo em outra música: reaproveita os picos sem decodificar
+        copy, decode = self.upload('Cópia', b'waveform-bytes')
+        decode.assert_not_called()
+        self.assertEqual(MusicSerializer(copy).data['waveform_url'], url)
+
+    def test_waveform_invalidates_music_list_cache(self):
+        """Marcar a onda via update() invalida as listagens em cache (sem signals)"""
+        from unittest.mock import patch
+
+        with patch('apps.cache_utils.delete_cache_pattern') as delete_pattern:
+            self.upload('Em cache', b'cached-bytes')
+        patterns = [call.args[0] for call in delete_pattern.call_args_list]
+        # Uma invalidação no save da música e outra após gravar a onda (que inclui álbuns)
+        self.assertEqual(patterns.count('trending_music'), 2)
+        self.assertIn('album_musics_*', patterns)
+
+    def test_release_of_last_file_deletes_waveform(self):
+        """Os picos são apagados junto com a última referência ao conteúdo"""
+        from .models import AudioBlob, Waveform
+
+        music, _ = self.upload('Única', b'release-bytes')
+        copy, _ = self.upload('Cópia', b'release-bytes')
+        content_hash = music.content_hash
+
+        with self.captureOnCommitCallbacks(execute=True):
+            music.delete()
+        self.assertTrue(Waveform.objects.filter(content_hash=content_hash).exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            copy.delete()
+        self.assertFalse(AudioBlob.objects.filter(content_hash=content_hash).exists())
+        self.assertFalse(Waveform.objects.filter(content_hash=content_hash).exists())
+
+    def test_command_fills_missing_waveforms(self):
+        """compute_waveforms calcula só as músicas sem onda, uma vez por conteúdo"""
+        from io import StringIO
+        from unittest.mock import patch
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from django.core.management import call_command
+
+        musics = [
+            Music.objects.create(artist=self.artist, title=title, file=SimpleUploadedFile('a.mp3', content))
+            for title, content in (('A', b'bytes-a'), ('B', b'bytes-a'), ('C', b'bytes-c'))
+        ]
+        self.assertIsNone(musics[0].get_waveform_url())
+
+        with patch('apps.music.waveform.decode_pcm', return_value=self.samples()) as decode:
+            call_command('compute_waveforms', stdout=StringIO())
+            self.assertEqual(decode.call_count, 2)
+            call_command('compute_waveforms', stdout=StringIO())
+            self.assertEqual(decode.call_count, 2)
+        for music in musics:
+            music.refresh_from_db()
+            self.assertEqual(music.waveform_hash, music.content_hash)
+
+    def test_decode_with_ffmpeg(self):
+        """Decodificação real de um WAV pelo FFmpeg"""
+        import os
+        import shutil
+        import unittest
+        import wave
+
+        if not shutil.which('ffmpeg'):
+            raise unittest.SkipTest('FFmpeg não instalado')
+        from .waveform import decode_pcm
+
+        path = os.path.join(self.media_root, 'seno.wav')
+        with wave.open(path, 'wb') as output:
+            output.setnchannels(1)
+            output.setsampwidth(2)
+            output.setframerate(8000)
+            output.writeframes(self.samples(seconds=1).tobytes())
+        samples = decode_pcm(path, 8000)
+        self.assertEqual(len(samples), 8000)
+        self.assertGreater(samples.max(), 16000)
@@ -0,0 +1,149 @@
+"""
+API de upload de áudio em partes, retomável (no estilo do protocolo tus)
+
+    POST   /api/uploads/        {"filename", "size", "title", "album_id", "genre_id"}
+                                -> 201, cabeçalhos Location e Upload-Offset: 0
+    HEAD   /api/uploads/<id>/   -> Upload-Offset com os bytes já recebidos
+    PATCH  /api/uploads/<id>/   cabeçalho Upload-Offset + corpo
+                                application/offset+octet-stream (ou multipart
+                                com o campo "file") -> novo Upload-Offset
+    DELETE /api/uploads/<id>/   cancela o upload
+
+Se a conexão cair, o cliente faz HEAD e continua a partir do offset
+retornado. Ao receber o último byte a música é criada e ``music_id`` aparece
+na resposta.
+"""
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from rest_framework import status, permissions
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+
+from apps.artists.models import Album, Artist
+from apps.genres.models import Genre
+from .models import UploadSession
+from .serializers import UploadSessionCreateSerializer, UploadSessionSerializer
+from .uploads import UploadOffsetError, append_chunk, finalize_upload, read_chunk
+
+logger = logging.getLogger(__name__)
+
+
+def _session_response(session, request, status_code=status.HTTP_200_OK, body=True):
+    """Resposta com o estado da sessão e os cabeçalhos de offset"""
+    response = Response(UploadSessionSerializer(session).data if body else None, status=status_code)
+    response['Upload-Offset'] = str(session.offset)
+    response['Upload-Length'] = str(session.size)
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+def _resolve_artist(request, artist_id):
+    """Artista do upload: o perfil do usuário ou, para staff, o informado"""
+    if request.user.is_staff and artist_id:
+        return Artist.objects.filter(pk=artist_id).first()
+    try:
+        return getattr(request.user, 'artist_profile', None)
+    except Artist.DoesNotExist:
+        return None
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def upload_create_view(request):
+    """Inicia um upload em partes"""
+    serializer = UploadSessionCreateSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    data = serializer.validated_data
+
+    artist = _resolve_artist(request, data.get('artist_id'))
+    if artist is None:
+        return Response(
+            {'error': 'Você precisa ser um artista para enviar músicas'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    album_id = data.get('album_id')
+    if album_id and not Album.objects.filter(pk=album_id, artist=artist).exists():
+        return Response({'error': 'Álbum não encontrado'}, status=status.HTTP_400_BAD_REQUEST)
+    genre_id = data.get('genre_id')
+    if genre_id and not Genre.objects.filter(pk=genre_id).exists():
+        return Response({'error': 'Gênero não encontrado'}, status=status.HTTP_400_BAD_REQUEST)
+
+    session = UploadSession.objects.create(
+        user=request.user,
+        artist=artist,
+        filename=data['filename'],
+        size=data['size'],
+        metadata={'title': data.get('title', ''), 'album_id': album_id, 'genre_id': genre_id},
+    )
+    response = _session_response(session, request, status.HTTP_201_CREATED)
+    response['Location'] = request.build_absolute_uri(f"{request.path.rstrip('/')}/{session.pk}/")
+    return response
+
+
+@api_view(['GET', 'HEAD', 'PATCH', 'DELETE'])
+@permission_classes([permissions.IsAuthenticated])
+def upload_detail_view(request, upload_id):
+    """Consulta o offset, envia uma parte ou cancela o upload"""
+    session = get_object_or_404(UploadSession, pk=upload_id, user=request.user)
+
+    if request.method in ('GET', 'HEAD'):
+        return _session_response(session, request, body=request.method == 'GET')
+
+    if request.method == 'DELETE':
+        session.delete_partial()
+        session.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    try:
+        offset = int(request.headers['Upload-Offset'])
+    except (KeyError, ValueError):
+        return Response(
+            {'error': 'Cabeçalho Upload-Offset é obrigatório'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if session.status != UploadSession.STATUS_UPLOADING or offset != session.offset:
+        # Conferido de novo com a trava; aqui evita ler um corpo que será recusado
+        return _session_response(session, request, status.HTTP_409_CONFLICT)
+
+    content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+    if content_length > settings.UPLOAD_CHUNK_MAX_SIZE:
+        return Response(
+            {'error': f'Cada parte pode ter no máximo {settings.UPLOAD_CHUNK_MAX_SIZE} bytes'},
+            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
+
+    # Corpo lido antes da trava: um cliente lento não segura a sessão
+    data = read_chunk(request, content_length)
+    if data is None:
+        return Response({'error': 'Campo file é obrigatório'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(data) > settings.UPLOAD_CHUNK_MAX_SIZE:
+        return Response(
+            {'error': f'Cada parte pode ter no máximo {settings.UPLOAD_CHUNK_MAX_SIZE} bytes'},
+            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
+
+    try:
+        with transaction.atomic():
+            # Bloqueia a sessão só para conferir o offset e anexar a parte já recebida
+            session = UploadSession.objects.select_for_update().get(pk=session.pk)
+            if session.status != UploadSession.STATUS_UPLOADING or offset != session.offset:
+                return _session_response(session, request, status.HTTP_409_CONFLICT)
+            append_chunk(session, data)
+    except UploadOffsetError as e:
+        return Response({'error': str(e)}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    if session.is_finished:
+        try:
+            finalize_upload(session)
+        except Exception as e:
+            logger.exception(f"Erro ao finalizar upload {session.pk}")
+            session.status = UploadSession.STATUS_FAILED
+            session.error = str(e)[:255]
+            session.save(update_fields=['status', 'error', 'updated_at'])
+            return _session_response(session, request, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    return _session_response(session, request)
@@ -0,0 +1,321 @@
+"""
+Upload de áudio em partes, retomável
+
+Cada parte é recebida em duas etapas:
+
+1. ``read_chunk`` lê o corpo da requisição (cru ou o campo ``file`` do
+   multipart) sem travar nada: um cliente lento não segura a sessão;
+2. ``append_chunk``, com a sessão bloqueada (``select_for_update``), confere
+   o offset, anexa a parte ao arquivo parcial e grava o novo offset. A trava
+   dura só a gravação de uma parte que já está no servidor.
+
+No mesmo passo o hash do conteúdo é atualizado (SHA-256 de blocos de 4 MiB,
+depois SHA-256 da concatenação dos hashes dos blocos). Os hashes dos blocos
+completos ficam salvos na sessão, então retomar o upload só relê o último
+bloco incompleto. Os cabeçalhos de áudio são lidos assim que os primeiros
+``PROBE_BYTES`` chegam.
+
+O arquivo parcial fica onde ficam os áudios (``partial_store``), para que
+qualquer nó possa receber a parte seguinte:
+
+- ``MEDIA_STORAGE=s3``: multipart upload do S3. Os bytes sobem em partes de
+  ``UPLOAD_PART_SIZE`` (múltiplo do bloco do hash e acima do mínimo de 5 MiB
+  do S3); o que ainda não completa uma parte fica em um objeto nomeado pelo
+  offset, substituído a cada parte recebida;
+- local: ``MEDIA_ROOT/uploads/partial`` (um nó só ou volume compartilhado).
+
+Ao receber o último byte, ``finalize_upload`` move o arquivo para o storage e
+cria a ``Music`` com duração e hash já calculados, sem reler o arquivo.
+"""
+import mimetypes
+import os
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.uploadhandler import MemoryFileUploadHandler, TemporaryFileUploadHandler
+from django.db import transaction
+from django.http import UnreadablePostError
+from django.http.multipartparser import MultiPartParser
+
+from ehit_backend.storage import CONTENT_HASH_BLOCK_SIZE, ContentHasher, audio_storage, hashed_name
+
+from .audio_probe import PROBE_BYTES, probe_audio
+from .models import Music, UploadSession
+
+READ_CHUNK_SIZE = 256 * 1024
+# Partes do multipart upload do S3: blocos do hash inteiros, acima do mínimo de 5 MiB
+UPLOAD_PART_SIZE = 2 * CONTENT_HASH_BLOCK_SIZE
+
+
+class UploadOffsetError(Exception):
+    """Parte enviada com offset diferente do esperado ou além do tamanho total"""
+
+
+# =============================================================================
+# ARQUIVO PARCIAL
+# =============================================================================
+
+class LocalPartialStore:
+    """Arquivo parcial em ``MEDIA_ROOT/uploads/partial`` (storage local)"""
+
+    def read(self, session, start, stop):
+        """Bytes [start, stop) já confirmados"""
+        if start >= stop:
+            return b''
+        with open(session.partial_path, 'rb') as partial:
+            partial.seek(start)
+            return partial.read(stop - start)
+
+    def append(self, session, data):
+        os.makedirs(os.path.dirname(session.partial_path), exist_ok=True)
+        mode = 'r+b' if os.path.exists(session.partial_path) else 'w+b'
+        with open(session.partial_path, mode) as partial:
+            # Descarta bytes de uma parte anterior que não foi confirmada
+            partial.truncate(session.offset)
+            partial.seek(session.offset)
+            partial.write(data)
+            partial.flush()
+            os.fsync(partial.fileno())
+
+    def save(self, session, field_file):
+        """Grava o arquivo completo no campo (o FileSystemStorage move em vez de copiar)"""
+        with open(session.partial_path, 'rb') as partial:
+            field_file.save(session.filename, _PartialFile(partial, session.content_hash), save=False)
+
+    def delete(self, session):
+        try:
+            os.remove(session.partial_path)
+        except FileNotFoundError:
+            pass
+
+
+class S3PartialStore:
+    """
+    Arquivo parcial em um multipart upload do S3
+
+    As partes enviadas (``session.parts``) cobrem os primeiros
+    ``len(parts) * UPLOAD_PART_SIZE`` bytes; o restante até o offset fica no
+    objeto ``uploads/partial/<id>/tail-<offset>``. Como o nome traz o offset
+    confirmado, uma parte que falhe antes do commit não altera o que a sessão
+    enxerga.
+    """
+
+    def __init__(self, storage=None):
+        self.storage = storage or audio_storage()
+        self.client = self.storage.bucket.meta.client
+        self.bucket = self.storage.bucket_name
+
+    def _key(self, storage, name):
+        from storages.utils import clean_name
+
+        return storage._normalize_name(clean_name(name))
+
+    def _prefix(self, session):
+        return f"{self._key(self.storage, f'uploads/partial/{session.pk}')}/"
+
+    def _file_key(self, session):
+        return f'{self._prefix(session)}file'
+
+    def _tail_key(self, session, offset):
+        return f'{self._prefix(session)}tail-{offset}'
+
+    def _uploaded(self, session):
+        return len(session.parts) * UPLOAD_PART_SIZE
+
+    def _upload_part(self, session, data):
+        number = len(session.parts) + 1
+        response = self.client.upload_part(
+            Bucket=self.bucket, Key=self._file_key(session), UploadId=session.multipart_id,
+            PartNumber=number, Body=data,
+        )
+        session.parts = [*session.parts, response['ETag']]
+
+    def read(self, session, start, stop):
+        """Bytes [start, stop) já confirmados (só os que ainda não subiram em uma parte)"""
+        if start >= stop:
+            return b''
+        uploaded = self._uploaded(session)
+        if start < uploaded:
+            raise ValueError('Bytes já enviados em partes do multipart upload não podem ser relidos')
+        response = self.client.get_object(
+            Bucket=self.bucket, Key=self._tail_key(session, session.offset),
+            Range=f'bytes={start - uploaded}-{stop - uploaded - 1}',
+        )
+        return response['Body'].read()
+
+    def append(self, session, data):
+        if not data:
+            return
+        if not session.multipart_id:
+            session.multipart_id = self.client.create_multipart_upload(
+                Bucket=self.bucket, Key=self._file_key(session)
+            )['UploadId']
+        pending = self.read(session, self._uploaded(session), session.offset) + data
+        complete = len(pending) // UPLOAD_PART_SIZE * UPLOAD_PART_SIZE
+        for start in range(0, complete, UPLOAD_PART_SIZE):
+            self._upload_part(session, pending[start:start + UPLOAD_PART_SIZE])
+        self.client.put_object(
+            Bucket=self.bucket, Key=self._tail_key(session, session.offset + len(data)), Body=pending[complete:]
+        )
+        previous = self._tail_key(session, session.offset)
+        transaction.on_commit(lambda: self.client.delete_object(Bucket=self.bucket, Key=previous))
+
+    def save(self, session, field_file):
+        """Conclui o multipart e copia no servidor do S3 para o nome final (hash do conteúdo)"""
+        tail = self.read(session, self._uploaded(session), session.offset)
+        if tail or not session.parts:
+            # A última parte pode ter menos de 5 MiB
+            self._upload_part(session, tail)
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket, Key=self._file_key(session), UploadId=session.multipart_id,
+            MultipartUpload={'Parts': [
+                {'ETag': etag, 'PartNumber': number} for number, etag in enumerate(session.parts, start=1)
+            ]},
+        )
+
+        storage = field_file.storage
+        name = hashed_name(
+            field_file.field.generate_filename(field_file.instance, session.filename), session.content_hash
+        )
+        if not storage.exists(name):
+            extra = dict(getattr(storage, 'object_parameters', None) or {})
+            extra['ContentType'] = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+            self.client.copy(
+                {'Bucket': self.bucket, 'Key': self._file_key(session)},
+                storage.bucket_name, self._key(storage, name), ExtraArgs=extra,
+            )
+        field_file.name = name
+
+    def delete(self, session):
+        from botocore.exceptions import ClientError
+
+        if session.multipart_id:
+            try:
+                self.client.abort_multipart_upload(
+                    Bucket=self.bucket, Key=self._file_key(session), UploadId=session.multipart_id
+                )
+            except ClientError:
+                # Já concluído ou abortado
+                pass
+        listing = self.client.list_objects_v2(Bucket=self.bucket, Prefix=self._prefix(session))
+        keys = [{'Key': item['Key']} for item in listing.get('Contents', [])]
+        if keys:
+            self.client.delete_objects(Bucket=self.bucket, Delete={'Objects': keys})
+
+
+def partial_store():
+    """Onde ficam os arquivos parciais (o mesmo lugar dos áudios)"""
+    if getattr(settings, 'MEDIA_STORAGE', 'local') == 's3':
+        return S3PartialStore()
+    return LocalPartialStore()
+
+
+# =============================================================================
+# RECEBIMENTO DAS PARTES
+# =============================================================================
+
+def read_chunk(request, content_length):
+    """
+    Bytes de uma parte, lidos antes de bloquear a sessão
+
+    O corpo pode ser cru (``application/offset+octet-stream``, no estilo tus)
+    ou multipart com o campo ``file``. Se a conexão cair no meio, devolve o
+    que chegou para o cliente retomar dali. Retorna None se o multipart não
+    tem o campo ``file``.
+    """
+    if request.content_type.startswith('multipart/form-data'):
+        # Parser do Django direto: o request.POST pode já ter sido lido por middlewares
+        django_request = getattr(request, '_request', request)
+        handlers = [MemoryFileUploadHandler(django_request), TemporaryFileUploadHandler(django_request)]
+        _, files = MultiPartParser(request.META, request.stream, handlers, settings.DEFAULT_CHARSET).parse()
+        if 'file' not in files:
+            return None
+        with files['file'] as uploaded:
+            return uploaded.read()
+
+    chunks = []
+    received = 0
+    try:
+        while received < content_length:
+            chunk = request.stream.read(min(READ_CHUNK_SIZE, content_length - received))
+            if not chunk:
+                break
+            chunks.append(chunk)
+            received += len(chunk)
+    except UnreadablePostError:
+        # Conexão caiu no meio da parte: confirma o que chegou
+        pass
+    return b''.join(chunks)
+
+
+def append_chunk(session, data, store=None):
+    """
+    Anexa uma parte ao arquivo parcial e grava o novo offset
+
+    A sessão deve estar bloqueada (``select_for_update``) e ``session.offset``
+    deve ser o offset enviado pelo cliente.
+    """
+    if session.offset + len(data) > session.size:
+        raise UploadOffsetError('A parte ultrapassa o tamanho informado na criação do upload')
+    store = store or partial_store()
+
+    tail_start = len(session.block_hashes) // 64 * CONTENT_HASH_BLOCK_SIZE
+    hasher = ContentHasher(session.block_hashes, store.read(session, tail_start, session.offset))
+    finished = session.offset + len(data) >= session.size
+    if session.audio_info is None and (session.offset + len(data) >= PROBE_BYTES or finished):
+        # audio_info vazio: o offset anterior ainda não tinha os primeiros PROBE_BYTES
+        head = store.read(session, 0, session.offset) + data[:PROBE_BYTES]
+        session.audio_info = probe_audio(head[:PROBE_BYTES], session.size) or {}
+
+    store.append(session, data)
+    hasher.update(data)
+    session.offset += len(data)
+    session.block_hashes = hasher.completed_blocks
+    if finished:
+        session.content_hash = hasher.hexdigest()
+    session.save(update_fields=[
+        'offset', 'block_hashes', 'audio_info', 'content_hash', 'multipart_id', 'parts', 'updated_at'
+    ])
+
+
+class _PartialFile(File):
+    """
+    Arquivo parcial já completo: o FileSystemStorage o move em vez de copiar
+    e o storage por conteúdo usa o hash já calculado em vez de reler
+    """
+
+    def __init__(self, file, content_hash):
+        super().__init__(file)
+        self.content_hash = content_hash
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def finalize_upload(session):
+    """Cria a música a partir de uma sessão com todos os bytes recebidos"""
+    metadata = session.metadata or {}
+    audio_info = session.audio_info or {}
+    duration = audio_info.get('duration')
+
+    music = Music(
+        artist=session.artist,
+        title=metadata.get('title') or os.path.splitext(session.filename)[0],
+        album_id=metadata.get('album_id'),
+        genre_id=metadata.get('genre_id'),
+        duration=round(duration) if duration else None,
+        file_size=session.size,
+        content_hash=session.content_hash,
+    )
+    partial_store().save(session, music.file)
+    if music.duration is None:
+        # Formato não reconhecido pelo probe: o mutagen lê apenas os cabeçalhos
+        music.duration = music.calculate_duration()
+
+    with transaction.atomic():
+        music.save()
+        session.music = music
+        session.status = UploadSession.STATUS_COMPLETE
+        session.save(update_fields=['music', 'status', 'updated_at'])
+    session.delete_partial()
+    return music
@@ -1,8 +1,54 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import upload_views, views
 
 app_name = 'music'
 
+# Listas da home e autocomplete (somente leitura)
+if settings.SERVER_MODE == 'asgi':
+    from . import async_views
+
+    home_urlpatterns = [
+        path('trending/', async_views.trending_music_view, name='trending-music'),
+        path('popular/', async_views.popular_music_view, name='popular-music'),
+        path('featured/', async_views.featured_music_view, name='featured-music'),
+        path('search/', async_views.music_autocomplete_view, name='music-autocomplete'),
+    ]
+else:
+    home_urlpatterns = [
+        path('trending/', views.trending_music_view, name='trending-music'),
+        path('popular/', views.popular_music_view, name='popular-music'),
+        path('featured/', views.featured_music_view, name='featured-music'),
+        path('search/', views.music_autocomplete_view, name='music-autocomplete'),
+    ]
+
+# Stream: contabiliza e redireciona para o arquivo no storage
+stream_urlpatterns = [
+    path('<int:pk>/stream/', views.stream_music_view, name='stream-music'),
+]
+
+# Músicas relacionadas (pré-calculadas por recommendations.py) e rádio
+related_urlpatterns = [
+    path('<int:pk>/related/', views.related_music_view, name='related-music'),
+    path('radio/', views.radio_view, name='music-radio'),
+]
+
+# Curtidas do usuário (UserLike)
+likes_urlpatterns = [
+    path('<int:pk>/like/', views.like_music_view, name='like-music'),
+]
+
+# Picos da forma de onda do player (waveform.py)
+waveform_urlpatterns = [
+    path('waveform/<slug:content_hash>/', views.waveform_view, name='music-waveform'),
+]
+
+# Upload de áudio em partes, retomável
+upload_urlpatterns = [
+    path('', upload_views.upload_create_view, name='upload-create'),
+    path('<uuid:upload_id>/', upload_views.upload_detail_view, name='upload-detail'),
+]
+
 urlpatterns = [
     # Lista e criação de músicas
     path('', views.MusicListView.as_view(), name='music-list'),
@@ -10,18 +56,15 @@ urlpatterns = [
     path('<int:pk>/', views.MusicDetailView.as_view(), name='music-detail'),
     
     # Ações com músicas
-    path('<int:pk>/stream/', views.stream_music_view, name='stream-music'),
+    *stream_urlpatterns,
+    *related_urlpatterns,
+    *likes_urlpatterns,
+    *waveform_urlpatterns,
     path('<int:pk>/download/', views.download_music_view, name='download-music'),
-    path('<int:pk>/like/', views.like_music_view, name='like-music'),
     path('<int:pk>/stats/', views.music_stats_view, name='music-stats'),
     
-    # Listas especiais
-    path('trending/', views.trending_music_view, name='trending-music'),
-    path('popular/', views.popular_music_view, name='popular-music'),
-    path('featured/', views.featured_music_view, name='featured-music'),
+    # Listas especiais e busca/autocomplete
+    *home_urlpatterns,
     path('genres/', views.genres_view, name='genres'),
     path('albums/', views.albums_view, name='albums'),
-    
-    # Busca e autocomplete
-    path('search/', views.music_autocomplete_view, name='music-autocomplete'),
 ]
@@ -2,15 +2,22 @@ from rest_framework import generics, status, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
+from django.conf import settings
 from django.db.models import Q, Count
 from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseRedirect
 from django.utils import timezone
+from django.utils.cache import get_conditional_response
 from django.utils.decorators import method_decorator
+from django.utils.http import quote_etag
 from django.views.decorators.cache import cache_page
 from django.views.decorators.vary import vary_on_headers
 from rest_framework.exceptions import PermissionDenied
 from datetime import timedelta
-from .models import Music
+from apps.genres.models import Genre
+from . import likes
+from .models import Music, RelatedMusic, Waveform
+from .radio import get_queue, resolve_seed
 from .serializers import (
     MusicSerializer, MusicCreateSerializer, MusicStatsSerializer, 
     MusicTrendingSerializer, MusicAutocompleteSerializer
@@ -39,7 +46,7 @@ class MusicListView(generics.ListAPIView):
     def get_queryset(self):
         """Filtros de busca com cache"""
         # Criar chave de cache baseada nos parâmetros
-        cache_key = f"musics_list_{self.request.query_params.get('artist', '')}_{self.request.query_params.get('genre', '')}_{self.request.query_params.get('album', '')}_{self.request.query_params.get('featured', '')}_{self.request.query_params.get('search', '')}_{self.request.query_params.get('ordering', '-streams_count')}"
+        cache_key = f"musics_list_{self.request.query_params.get('artist', '')}_{self.request.query_params.get('genre', '')}_{self.request.query_params.get('genre_tree', '')}_{self.request.query_params.get('album', '')}_{self.request.query_params.get('featured', '')}_{self.request.query_params.get('search', '')}_{self.request.query_params.get('ordering', '-streams_count')}"
         
         # Tentar buscar do cache primeiro
         cached_queryset = cache.get(cache_key)
@@ -56,7 +63,14 @@ class MusicListView(generics.ListAPIView):
         # Filtro por gênero
         genre = self.request.query_params.get('genre')
         if genre:
-            queryset = queryset.filter(genre__icontains=genre)
+            queryset = queryset.filter(genre__name__icontains=genre)
+        
+        # Filtro por gênero incluindo subgêneros (ID ou slug)
+        genre_tree = Genre.resolve(self.request.query_params.get('genre_tree'))
+        if genre_tree:
+            queryset = queryset.filter(genre_tree.subtree_filter())
+        elif self.request.query_params.get('genre_tree'):
+            queryset = queryset.none()
         
         # Filtro por álbum (ID)
         album_id = self.request.query_params.get('album')
@@ -125,6 +139,11 @@ class MusicCreateView(generics.CreateAPIView):
         pass
 
 
+def _with_liked(request, data):
+    """Resposta de lista (compartilhada no cache) com ``is_liked`` do usuário"""
+    return dict(data, musics=likes.annotate_liked(request.user, data['musics']))
+
+
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
 def trending_music_view(request):
@@ -133,7 +152,7 @@ def trending_music_view(request):
     cached_data = cache.get(cache_key)
     
     if cached_data:
-        return Response(cached_data)
+        return Response(_with_liked(request, cached_data))
     
     # Músicas criadas na última semana com mais de 100 streams
     week_ago = timezone.now() - timedelta(days=7)
@@ -153,7 +172,7 @@ def trending_music_view(request):
     # Cache por 30 minutos
     cache.set(cache_key, data, 1800)
     
-    return Response(data)
+    return Response(_with_liked(request, data))
 
 
 @api_view(['GET'])
@@ -164,7 +183,7 @@ def popular_music_view(request):
     cached_data = cache.get(cache_key)
     
     if cached_data:
-        return Response(cached_data)
+        return Response(_with_liked(request, cached_data))
     
     # Músicas com mais de 1000 streams
     musics = Music.objects.filter(
@@ -181,7 +200,7 @@ def popular_music_view(request):
     # Cache por 1 hora
     cache.set(cache_key, data, 3600)
     
-    return Response(data)
+    return Response(_with_liked(request, data))
 
 
 @api_view(['GET'])
@@ -193,7 +212,7 @@ def featured_music_view(request):
     # Tentar buscar do cache primeiro
     cached_data = cache.get(cache_key)
     if cached_data is not None:
-        return Response(cached_data)
+        return Response(_with_liked(request, cached_data))
     
     musics = Music.objects.filter(
         is_active=True,
@@ -210,13 +229,89 @@ def featured_music_view(request):
     # Cache por 20 minutos
     cache.set(cache_key, response_data, 60 * 20)
     
-    return Response(response_data)
+    return Response(_with_liked(request, response_data))
 
 
-@api_view(['POST'])
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def related_music_view(request, pk):
+    """
+    Músicas relacionadas ("mais como esta")
+
+    Lê os vizinhos pré-calculados (RelatedMusic) em uma única query pelo
+    índice (music, rank); ``?limit=`` limita a quantidade.
+    """
+    try:
+        limit = min(int(request.GET.get('limit', settings.RELATED_MUSIC_TOP_K)), settings.RELATED_MUSIC_TOP_K)
+    except ValueError:
+        limit = settings.RELATED_MUSIC_TOP_K
+    
+    entries = list(
+        RelatedMusic.objects.filter(music_id=pk, related__is_active=True)
+        .select_related('related__artist', 'related__album')
+        .order_by('rank')[:max(limit, 1)]
+    )
+    # Sem vizinhos: distingue música inexistente de música sem relacionadas
+    if not entries and not Music.objects.filter(pk=pk, is_active=True).exists():
+        return Response(
+            {'error': 'Música não encontrada'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    serializer = MusicTrendingSerializer([entry.related for entry in entries], many=True)
+    return Response({
+        'musics': likes.annotate_liked(request.user, serializer.data),
+        'count': len(serializer.data)
+    })
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def radio_view(request):
+    """
+    Rádio a partir de uma música, artista ou gênero
+
+    ``?track=``, ``?artist=`` ou ``?genre=`` (id ou slug) escolhem a semente;
+    ``offset``/``limit`` paginam a fila (calculada uma vez e mantida em cache)
+    e ``exclude`` (ids separados por vírgula) remove o que o cliente já tocou.
+    """
+    seed = resolve_seed(request.GET)
+    if seed is None:
+        return Response(
+            {'error': 'Informe uma música, artista ou gênero válido (track, artist ou genre)'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    kind, obj = seed
+    
+    try:
+        offset = max(int(request.GET.get('offset', 0)), 0)
+        limit = min(max(int(request.GET.get('limit', 50)), 1), 100)
+    except ValueError:
+        offset, limit = 0, 50
+    exclude = {int(value) for value in request.GET.get('exclude', '').split(',')[:200] if value.strip().isdigit()}
+    
+    queue = get_queue(kind, obj)
+    page = [pk for pk in queue[offset:offset + limit] if pk not in exclude]
+    musics = Music.objects.filter(pk__in=page, is_active=True).select_related('artist', 'album').in_bulk()
+    serializer = MusicTrendingSerializer([musics[pk] for pk in page if pk in musics], many=True)
+    next_offset = offset + limit
+    return Response({
+        'seed': {'type': kind, 'id': obj.pk},
+        'musics': likes.annotate_liked(request.user, serializer.data),
+        'count': len(serializer.data),
+        'next_offset': next_offset if next_offset < len(queue) else None,
+    })
+
+
+@api_view(['GET', 'POST'])
 @permission_classes([permissions.IsAuthenticated])
 def stream_music_view(request, pk):
-    """Incrementar contador de streams"""
+    """
+    Incrementar contador de streams
+
+    GET também redireciona para a URL do arquivo (assinada quando a mídia
+    está no S3), então o áudio é baixado direto do storage.
+    """
     try:
         music = Music.objects.get(pk=pk, is_active=True)
     except Music.DoesNotExist:
@@ -225,9 +320,20 @@ def stream_music_view(request, pk):
             status=status.HTTP_404_NOT_FOUND
         )
     
+    if request.method == 'GET' and not music.file:
+        return Response(
+            {'error': 'Arquivo de áudio não encontrado'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
     # Incrementar streams
     music.increment_streams()
     
+    if request.method == 'GET':
+        response = HttpResponseRedirect(request.build_absolute_uri(music.file.url))
+        response['Cache-Control'] = 'no-store'
+        return response
+    
     return Response({
         'message': 'Stream contabilizado',
         'streams_count': music.streams_count
@@ -270,10 +376,10 @@ def like_music_view(request, pk):
     action = request.data.get('action', 'like')
     
     if action == 'like':
-        music.increment_likes()
+        likes.like(request.user, music)
         message = 'Música curtida'
     elif action == 'unlike':
-        music.decrement_likes()
+        likes.unlike(request.user, music)
         message = 'Curtida removida'
     else:
         return Response(
@@ -281,12 +387,38 @@ def like_music_view(request, pk):
             status=status.HTTP_400_BAD_REQUEST
         )
     
+    # likes_count é gravado em lote: a resposta traz o valor que a recontagem vai gravar
     return Response({
         'message': message,
-        'likes_count': music.likes_count
+        'is_liked': action == 'like',
+        'likes_count': likes.current_likes_count(music)
     })
 
 
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def waveform_view(request, content_hash):
+    """Picos da forma de onda (binário, ver waveform.py), imutáveis por hash do conteúdo"""
+    etag = quote_etag(content_hash)
+    # Compara como o Django: ETags fracas (W/) e listas separadas por vírgula
+    response = get_conditional_response(request, etag=etag)
+    if response is not None and response.status_code != 304:
+        # If-Match sem correspondência (412)
+        return response
+    if response is None:
+        data = Waveform.objects.filter(content_hash=content_hash).values_list('data', flat=True).first()
+        if data is None:
+            return Response(
+                {'error': 'Forma de onda não encontrada'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        response = HttpResponse(bytes(data), content_type='application/octet-stream')
+    # O conteúdo de um hash nunca muda: navegador e CDN guardam sem revalidar
+    response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    response['ETag'] = etag
+    return response
+
+
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
 def music_stats_view(request, pk):
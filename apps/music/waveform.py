@@ -0,0 +1,163 @@
+"""
+Picos da forma de onda para o scrubber do player
+
+Calculados fora da requisição (task ``compute_waveform`` após o upload ou
+``manage.py compute_waveforms``): o FFmpeg decodifica o áudio para PCM mono
+de 16 bits em ``WAVEFORM_SAMPLE_RATE`` e o NumPy calcula o mínimo e o máximo
+de cada faixa de amostras (``reduceat``, sem laço em Python) em cada uma das
+resoluções de ``WAVEFORM_RESOLUTIONS``. As resoluções menores são reduzidas a
+partir da maior, sem voltar às amostras.
+
+Formato binário (little-endian), poucos KB por música:
+
+    cabeçalho  '<4sBBHI': b'EHWF', versão, canais (1), resoluções, duração (ms)
+    resolução  '<I': N, seguido de N pares (mínimo, máximo) em int8
+
+As resoluções vêm da maior para a menor; os valores são as amostras de 16
+bits reduzidas a 8 (-128 a 127), o suficiente para desenhar a onda. Os picos
+são identificados pelo hash do conteúdo do áudio, então a URL nunca muda de
+conteúdo e é servida como imutável.
+"""
+import logging
+import struct
+import subprocess
+
+import numpy as np
+from django.conf import settings
+
+from .models import Music, Waveform
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'EHWF'
+VERSION = 1
+HEADER = struct.Struct('<4sBBHI')
+LEVEL_HEADER = struct.Struct('<I')
+
+
+def audio_source(music):
+    """Caminho local do áudio ou, no S3, URL assinada (o FFmpeg lê por HTTP, sem cópia local)"""
+    try:
+        return music.file.path
+    except NotImplementedError:
+        return music.file.url
+
+
+def decode_pcm(source, sample_rate=None):
+    """Amostras PCM mono int16 do arquivo (via FFmpeg)"""
+    sample_rate = sample_rate or settings.WAVEFORM_SAMPLE_RATE
+    cmd = [
+        'ffmpeg',
+        '-v', 'error',
+        '-nostdin',
+        '-i', source,
+        '-ac', '1',                 # Mono
+        '-ar', str(sample_rate),    # Poucas amostras bastam para os picos
+        '-f', 's16le',              # PCM 16 bits sem cabeçalho na saída padrão
+        '-',
+    ]
+    result = subprocess.run(cmd, capture_output=True, timeout=settings.WAVEFORM_DECODE_TIMEOUT)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.decode(errors='replace').strip() or 'FFmpeg falhou')
+    data = result.stdout[:len(result.stdout) // 2 * 2]
+    return np.frombuffer(data, dtype='<i2')
+
+
+def _reduce(mins, maxs, count):
+    """Mínimo e máximo de ``count`` faixas de tamanho (quase) igual"""
+    edges = np.arange(count, dtype=np.int64) * len(mins) // count
+    return np.minimum.reduceat(mins, edges), np.maximum.reduceat(maxs, edges)
+
+
+def compute_peaks(samples, resolutions=None):
+    """
+    Picos (mínimo, máximo) em int8 por resolução
+
+    Returns:
+        list: arrays (N, 2) int8, na ordem de ``resolutions`` do maior para o menor
+    """
+    resolutions = sorted(set(resolutions or settings.WAVEFORM_RESOLUTIONS), reverse=True)
+    samples = np.asarray(samples, dtype=np.int16)
+    if not len(samples):
+        return [np.zeros((0, 2), dtype=np.int8) for _ in resolutions]
+
+    mins, maxs = _reduce(samples, samples, min(resolutions[0], len(samples)))
+    levels = []
+    for resolution in resolutions:
+        if resolution < len(mins):
+            mins, maxs = _reduce(mins, maxs, resolution)
+        # 16 -> 8 bits: o deslocamento aritmético mantém o sinal (-32768 -> -128)
+        levels.append(np.column_stack((mins >> 8, maxs >> 8)).astype(np.int8))
+    return levels
+
+
+def encode_waveform(levels, duration_ms):
+    parts = [HEADER.pack(MAGIC, VERSION, 1, len(levels), int(duration_ms))]
+    for peaks in levels:
+        parts.append(LEVEL_HEADER.pack(len(peaks)))
+        parts.append(np.ascontiguousarray(peaks, dtype=np.int8).tobytes())
+    return b''.join(parts)
+
+
+def parse_waveform(data):
+    """
+    Lê o formato binário
+
+    Returns:
+        tuple: (duração em ms, [arrays (N, 2) int8])
+    """
+    magic, version, channels, count, duration_ms = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError('Formato de forma de onda desconhecido')
+    offset = HEADER.size
+    levels = []
+    for _ in range(count):
+        (length,) = LEVEL_HEADER.unpack_from(data, offset)
+        offset += LEVEL_HEADER.size
+        peaks = np.frombuffer(data, dtype=np.int8, count=length * 2 * channels, offset=offset)
+        levels.append(peaks.reshape(length, 2 * channels))
+        offset += length * 2 * channels
+    return duration_ms, levels
+
+
+def build_waveform(music, force=False):
+    """
+    Calcula e grava os picos do arquivo atual da música
+
+    Reaproveita os picos de outra música com o mesmo conteúdo (a menos de
+    ``force``), marca todas as músicas desse conteúdo e invalida o cache das
+    listagens que as incluem.
+
+    Returns:
+        Waveform ou None se a música não tem arquivo
+    """
+    if not music.file or not music.content_hash:
+        return None
+    content_hash = music.content_hash
+    waveform = None if force else Waveform.objects.filter(content_hash=content_hash).first()
+    if waveform is None:
+        sample_rate = settings.WAVEFORM_SAMPLE_RATE
+        samples = decode_pcm(audio_source(music), sample_rate)
+        data = encode_waveform(compute_peaks(samples), len(samples) * 1000 // sample_rate)
+        waveform, _ = Waveform.objects.update_or_create(content_hash=content_hash, defaults={'data': data})
+    updated = Music.objects.filter(content_hash=content_hash).exclude(waveform_hash=content_hash).update(
+        waveform_hash=content_hash
+    )
+    if updated:
+        # update() não dispara signals: as listagens em cache ainda trazem waveform_url nulo
+        from apps.cache_utils import coalesce_cache_invalidation
+
+        with coalesce_cache_invalidation() as pending:
+            pending.update(('music', 'album', 'artist'))
+    return waveform
+
+
+def enqueue_waveform(music_id):
+    """Agenda o cálculo dos picos (chamado após o commit do upload)"""
+    from .tasks import compute_waveform
+
+    try:
+        compute_waveform.delay(music_id)
+    except Exception as e:
+        # Sem broker a música fica sem onda até ``manage.py compute_waveforms``
+        logger.warning(f"Erro ao enfileirar forma de onda da música {music_id}: {e}")
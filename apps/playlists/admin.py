@@ -1,11 +1,27 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
-from .models import Playlist
+from apps.admin_utils import LargeTableAdminMixin
+from apps.music.models import Music
+from .models import Playlist, PlaylistMusic
+
+
+class PlaylistMusicInline(admin.TabularInline):
+    """Músicas da PlayHit na ordem de exibição"""
+    model = PlaylistMusic
+    fields = ['music', 'position']
+    autocomplete_fields = ['music']
+    extra = 0
+    
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'music':
+            # O rótulo da música selecionada usa o artista
+            kwargs['queryset'] = Music.objects.select_related('artist')
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
 
 
 @admin.register(Playlist)
-class PlaylistAdmin(admin.ModelAdmin):
+class PlaylistAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     """Admin para o modelo Playlist"""
     
     list_display = [
@@ -35,8 +51,8 @@ class PlaylistAdmin(admin.ModelAdmin):
             'fields': ('is_active', 'is_featured', 'order')
         }),
         ('Músicas', {
-            'fields': ('add_music_link', 'musics', 'musics_count'),
-            'description': '💡 Dica: Use o botão "Adicionar Música" acima para criar novas músicas. Ou selecione músicas existentes no campo abaixo.'
+            'fields': ('add_music_link', 'musics_count'),
+            'description': '💡 Dica: Use o botão "Adicionar Música" acima para criar novas músicas. Ou adicione músicas existentes na lista abaixo (posição vazia = final da PlayHit).'
         }),
         ('Metadados', {
             'fields': ('created_at', 'updated_at'),
@@ -44,12 +60,13 @@ class PlaylistAdmin(admin.ModelAdmin):
         }),
     )
     
-    filter_horizontal = ['musics']
+    inlines = [PlaylistMusicInline]
     
     def musics_count(self, obj):
         """Contador de músicas"""
-        return obj.musics.count()
+        return obj.tracks_count
     musics_count.short_description = 'Nº de Músicas'
+    musics_count.admin_order_field = 'tracks_count'
     
     def add_music_link(self, obj):
         """Link para adicionar nova música"""
@@ -64,6 +81,10 @@ class PlaylistAdmin(admin.ModelAdmin):
         return "Salve a playlist primeiro para adicionar músicas"
     add_music_link.short_description = "Ações"
     
-    def get_queryset(self, request):
-        """Otimizar consultas"""
-        return super().get_queryset(request).prefetch_related('musics')
+    def save_related(self, request, form, formsets, change):
+        """O inline grava PlaylistMusic direto: posiciona e recalcula os agregados"""
+        super().save_related(request, form, formsets, change)
+        playlist = form.instance
+        PlaylistMusic.assign_missing_positions(playlist.pk)
+        playlist.refresh_aggregates()
+        playlist.refresh_mosaic()
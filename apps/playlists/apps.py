@@ -5,3 +5,7 @@ class PlaylistsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.playlists'
     verbose_name = 'Playlists'
+
+    def ready(self):
+        """Importa os signals quando o app estiver pronto"""
+        import apps.playlists.signals
@@ -0,0 +1,51 @@
+"""
+Views assíncronas de leitura para o modo ASGI
+
+Versão async da listagem de PlayHits, com os mesmos filtros e a mesma
+resposta paginada do ``PlaylistListView``.
+"""
+from django.db import models
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from ehit_backend.async_pagination import InvalidPage, apaginate
+from .models import Playlist, PlaylistMusic
+from .serializers import PlaylistSerializer
+
+
+@require_GET
+async def playlist_list_view(request):
+    """Lista de PlayHits (async, paginada)"""
+    queryset = Playlist.objects.filter(is_active=True, tracks_count__gt=0).annotate(
+        musics_count=models.F('tracks_count')
+    )
+
+    # Busca por nome
+    search = request.GET.get('search')
+    if search:
+        queryset = queryset.filter(name__icontains=search)
+
+    # Filtro por destaque
+    featured = request.GET.get('featured')
+    if featured and featured.lower() == 'true':
+        queryset = queryset.filter(is_featured=True)
+
+    # Ordenação
+    ordering = request.GET.get('ordering', 'order')
+    queryset = queryset.order_by(ordering)
+
+    # Músicas (em ordem) carregadas junto para não acessar o banco durante a serialização
+    queryset = queryset.prefetch_related(
+        models.Prefetch(
+            'entries',
+            queryset=PlaylistMusic.objects.select_related('music__artist', 'music__album', 'music__genre')
+        )
+    )
+
+    try:
+        playlists, page = await apaginate(request, queryset)
+    except InvalidPage:
+        return JsonResponse({'detail': 'Invalid page.'}, status=404)
+
+    serializer = PlaylistSerializer(playlists, many=True, context={'request': request})
+    return JsonResponse({**page, 'results': serializer.data})
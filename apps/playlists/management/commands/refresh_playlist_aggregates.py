@@ -0,0 +1,30 @@
+"""
+Comando Django para recalcular duração total, número de músicas e mosaico das PlayHits
+"""
+from django.core.management.base import BaseCommand
+from apps.playlists.models import Playlist
+
+
+class Command(BaseCommand):
+    help = 'Recalcular agregados (duração total, nº de músicas) e capa em mosaico das PlayHits'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regerar o mosaico mesmo que as capas de origem não tenham mudado'
+        )
+
+    def handle(self, *args, **options):
+        mosaics = 0
+        playlists = Playlist.objects.all()
+        for playlist in playlists.iterator():
+            playlist.refresh_aggregates()
+            if options['force']:
+                playlist.mosaic_key = ''
+            if playlist.refresh_mosaic():
+                mosaics += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ {playlists.count()} PlayHits atualizadas, {mosaics} mosaicos gerados')
+        )
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_positions(apps, schema_editor):
+    """Posições iniciais na ordem de inclusão (id) de cada PlayHit"""
+    PlaylistMusic = apps.get_model('playlists', 'PlaylistMusic')
+    step = 1 << 16
+    entries = list(PlaylistMusic.objects.order_by('playlist_id', 'id'))
+    current_playlist, index = None, 0
+    for entry in entries:
+        if entry.playlist_id != current_playlist:
+            current_playlist, index = entry.playlist_id, 0
+        index += 1
+        entry.position = index * step
+    PlaylistMusic.objects.bulk_update(entries, ['position'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music', '0005_music_cover_blurhash_music_cover_color'),
+        ('playlists', '0006_alter_playlist_options_remove_playlist_position_and_more'),
+    ]
+
+    operations = [
+        # A tabela do ManyToMany já existe: apenas o estado passa a usar o modelo explícito
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='PlaylistMusic',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('music', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='playlist_entries', to='music.music', verbose_name='Música')),
+                        ('playlist', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='playlists.playlist', verbose_name='PlayHit')),
+                    ],
+                    options={
+                        'verbose_name': 'Música da PlayHit',
+                        'verbose_name_plural': 'Músicas da PlayHit',
+                        'db_table': 'playlists_playlist_musics',
+                        'ordering': [models.OrderBy(models.F('position'), nulls_last=True), 'id'],
+                        'unique_together': {('playlist', 'music')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='playlist',
+                    name='musics',
+                    field=models.ManyToManyField(blank=True, related_name='playlists', through='playlists.PlaylistMusic', to='music.music', verbose_name='Músicas'),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='playlistmusic',
+            name='position',
+            field=models.BigIntegerField(blank=True, help_text='Ordem da música na PlayHit (preenchida automaticamente)', null=True, verbose_name='Posição'),
+        ),
+        migrations.AddIndex(
+            model_name='playlistmusic',
+            index=models.Index(fields=['playlist', 'position'], name='playlist_music_position_idx'),
+        ),
+        migrations.RunPython(fill_positions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:35
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def fill_aggregates(apps, schema_editor):
+    """Duração total e número de músicas das PlayHits existentes"""
+    Playlist = apps.get_model('playlists', 'Playlist')
+    playlists = list(Playlist.objects.annotate(
+        duration_sum=Sum('musics__duration'),
+        musics_total=Count('musics')
+    ))
+    for playlist in playlists:
+        playlist.total_duration = playlist.duration_sum or 0
+        playlist.tracks_count = playlist.musics_total
+    Playlist.objects.bulk_update(playlists, ['total_duration', 'tracks_count'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('playlists', '0007_playlistmusic'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='playlist',
+            name='mosaic',
+            field=models.ImageField(blank=True, editable=False, help_text='Gerada com as capas das 4 primeiras músicas (usada quando não há capa)', null=True, upload_to='playlist_mosaics/', verbose_name='Capa em Mosaico'),
+        ),
+        migrations.AddField(
+            model_name='playlist',
+            name='mosaic_key',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Hash das capas usadas no mosaico atual', max_length=40, verbose_name='Chave do Mosaico'),
+        ),
+        migrations.AddField(
+            model_name='playlist',
+            name='total_duration',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Soma da duração das músicas em segundos (calculada automaticamente)', verbose_name='Duração Total'),
+        ),
+        migrations.AddField(
+            model_name='playlist',
+            name='tracks_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Calculado automaticamente', verbose_name='Nº de Músicas'),
+        ),
+        migrations.RunPython(fill_aggregates, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,14 @@
-from django.db import models
+import hashlib
+import logging
+
+from django.db import models, transaction
+from django.db.models import Case, Count, F, Max, Sum, Value, When
 from apps.artists.models import BaseModel
+from apps.image_utils import compose_mosaic
 from apps.music.models import Music
 
+logger = logging.getLogger(__name__)
+
 
 class Playlist(BaseModel):
     """
@@ -21,10 +28,40 @@ class Playlist(BaseModel):
     )
     musics = models.ManyToManyField(
         Music, 
+        through='PlaylistMusic',
         related_name='playlists',
         verbose_name='Músicas',
         blank=True
     )
+    # Agregados mantidos pelos signals (ver signals.py): a listagem lê tudo da própria linha
+    total_duration = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Duração Total',
+        help_text='Soma da duração das músicas em segundos (calculada automaticamente)'
+    )
+    tracks_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Nº de Músicas',
+        help_text='Calculado automaticamente'
+    )
+    mosaic = models.ImageField(
+        upload_to='playlist_mosaics/',
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name='Capa em Mosaico',
+        help_text='Gerada com as capas das 4 primeiras músicas (usada quando não há capa)'
+    )
+    mosaic_key = models.CharField(
+        max_length=40,
+        blank=True,
+        default='',
+        editable=False,
+        verbose_name='Chave do Mosaico',
+        help_text='Hash das capas usadas no mosaico atual'
+    )
     is_featured = models.BooleanField(
         default=False,
         verbose_name='Em Destaque',
@@ -47,11 +84,7 @@ class Playlist(BaseModel):
     
     def get_total_duration(self):
         """Retorna duração total da playlist em segundos"""
-        total = sum(
-            music.duration for music in self.musics.all() 
-            if music.duration is not None
-        )
-        return total or 0
+        return self.total_duration or 0
     
     def get_total_duration_formatted(self):
         """Retorna duração total formatada (HH:MM:SS)"""
@@ -68,14 +101,213 @@ class Playlist(BaseModel):
     
     def get_musics_count(self):
         """Retorna número de músicas na playlist"""
-        return self.musics.count()
+        return self.tracks_count
+    
+    def refresh_aggregates(self):
+        """Recalcula duração total e número de músicas (uma consulta + um UPDATE)"""
+        totals = PlaylistMusic.objects.filter(playlist=self).aggregate(
+            total_duration=Sum('music__duration'),
+            tracks_count=Count('id')
+        )
+        self.total_duration = totals['total_duration'] or 0
+        self.tracks_count = totals['tracks_count'] or 0
+        Playlist.objects.filter(pk=self.pk).update(
+            total_duration=self.total_duration,
+            tracks_count=self.tracks_count
+        )
+    
+    def get_mosaic_sources(self):
+        """Capas distintas das 4 primeiras músicas (capa da música ou do álbum)"""
+        sources = []
+        names = set()
+        entries = PlaylistMusic.objects.filter(playlist=self).select_related('music__album')
+        for entry in entries.iterator():
+            cover = entry.music.cover or (entry.music.album.cover if entry.music.album else None)
+            if cover and cover.name not in names:
+                names.add(cover.name)
+                sources.append(cover)
+                if len(sources) == 4:
+                    break
+        return sources
+    
+    def refresh_mosaic(self):
+        """Regera o mosaico apenas quando as capas de origem mudam"""
+        sources = self.get_mosaic_sources()
+        key = hashlib.sha1('|'.join(cover.name for cover in sources).encode()).hexdigest() if sources else ''
+        if key == self.mosaic_key and (self.mosaic or not sources):
+            return False
+        
+        old_name = self.mosaic.name if self.mosaic else None
+        content = compose_mosaic(sources) if sources else None
+        if content is not None:
+            self.mosaic.save(f"{self.pk}_{key[:12]}.jpg", content, save=False)
+        else:
+            self.mosaic = None
+        self.mosaic_key = key
+        Playlist.objects.filter(pk=self.pk).update(mosaic=self.mosaic.name if self.mosaic else None, mosaic_key=key)
+        
+        if old_name and old_name != (self.mosaic.name if self.mosaic else None):
+            try:
+                self.mosaic.storage.delete(old_name)
+            except Exception as e:
+                logger.warning(f"Erro ao remover mosaico antigo {old_name}: {e}")
+        return True
+    
+    def get_ordered_entries(self):
+        """Entradas (música + posição) na ordem da playlist"""
+        if 'entries' in getattr(self, '_prefetched_objects_cache', {}):
+            return list(self.entries.all())
+        return list(self.entries.select_related('music__artist', 'music__album', 'music__genre'))
+    
+    def get_ordered_musics(self):
+        """Músicas na ordem da playlist (usa o prefetch de ``entries`` se houver)"""
+        return [entry.music for entry in self.get_ordered_entries()]
     
     def add_music(self, music):
-        """Adiciona música à playlist"""
+        """Adiciona música ao final da playlist"""
         self.musics.add(music)
     
     def remove_music(self, music):
         """Remove música da playlist"""
         self.musics.remove(music)
+    
+    def move_music(self, music, after=None):
+        """
+        Move a música para logo depois de ``after`` (ou para o início se None)
+        
+        Atualiza apenas a linha da música movida: a nova posição é o ponto
+        médio entre as vizinhas. Só quando não há espaço entre elas a
+        playlist é renumerada (em um único UPDATE).
+        """
+        with transaction.atomic():
+            entries = PlaylistMusic.objects.select_for_update().filter(playlist=self)
+            entry = entries.get(music=music)
+            
+            if after is None:
+                previous_position = None
+            else:
+                previous_position = entries.get(music=after).position
+            
+            following = entries.exclude(pk=entry.pk)
+            if previous_position is not None:
+                following = following.filter(position__gt=previous_position)
+            next_position = following.order_by('position').values_list('position', flat=True).first()
+            
+            position = PlaylistMusic.position_between(previous_position, next_position)
+            if position is None:
+                # Sem espaço entre as vizinhas: renumera e tenta de novo
+                self.renumber_positions()
+                return self.move_music(music, after)
+            
+            PlaylistMusic.objects.filter(pk=entry.pk).update(position=position)
+        
+        # As 4 primeiras músicas podem ter mudado
+        self.refresh_mosaic()
+        return position
+    
+    def reorder_musics(self, music_ids):
+        """
+        Reordena as músicas conforme a lista de IDs em um único UPDATE
+        
+        Músicas da playlist que não estiverem na lista mantêm a ordem
+        relativa e vão para o final.
+        """
+        with transaction.atomic():
+            current = list(
+                PlaylistMusic.objects.select_for_update().filter(playlist=self)
+                .values_list('music_id', flat=True)
+            )
+            current_ids = set(current)
+            requested = [music_id for music_id in dict.fromkeys(music_ids) if music_id in current_ids]
+            requested_ids = set(requested)
+            ordered = requested + [music_id for music_id in current if music_id not in requested_ids]
+            self._apply_order(ordered)
+        
+        self.refresh_mosaic()
+    
+    def renumber_positions(self):
+        """Redistribui as posições com espaçamento uniforme (mantendo a ordem)"""
+        ordered = list(self.entries.values_list('music_id', flat=True))
+        self._apply_order(ordered)
+    
+    def _apply_order(self, music_ids):
+        if not music_ids:
+            return
+        PlaylistMusic.objects.filter(playlist=self, music_id__in=music_ids).update(
+            position=Case(
+                *[
+                    When(music_id=music_id, then=Value((index + 1) * PlaylistMusic.POSITION_STEP))
+                    for index, music_id in enumerate(music_ids)
+                ],
+                output_field=models.BigIntegerField()
+            )
+        )
+
+
+class PlaylistMusic(models.Model):
+    """
+    Música dentro de uma PlayHit, com posição esparsa
+    
+    As posições são espaçadas de ``POSITION_STEP``: inserir ou mover uma música
+    grava o ponto médio entre as vizinhas, alterando uma única linha.
+    Usa a tabela já existente do ManyToMany (playlists_playlist_musics).
+    """
+    POSITION_STEP = 1 << 16
+    
+    playlist = models.ForeignKey(
+        Playlist,
+        on_delete=models.CASCADE,
+        related_name='entries',
+        verbose_name='PlayHit'
+    )
+    music = models.ForeignKey(
+        Music,
+        on_delete=models.CASCADE,
+        related_name='playlist_entries',
+        verbose_name='Música'
+    )
+    position = models.BigIntegerField(
+        null=True,
+        blank=True,
+        verbose_name='Posição',
+        help_text='Ordem da música na PlayHit (preenchida automaticamente)'
+    )
+    
+    class Meta:
+        db_table = 'playlists_playlist_musics'
+        verbose_name = 'Música da PlayHit'
+        verbose_name_plural = 'Músicas da PlayHit'
+        ordering = [F('position').asc(nulls_last=True), 'id']
+        unique_together = [('playlist', 'music')]
+        indexes = [
+            models.Index(fields=['playlist', 'position'], name='playlist_music_position_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.playlist} - {self.music}"
+    
+    @classmethod
+    def position_between(cls, previous_position, next_position):
+        """Posição entre duas vizinhas (None se não houver espaço)"""
+        if previous_position is None and next_position is None:
+            return cls.POSITION_STEP
+        if previous_position is None:
+            return next_position - cls.POSITION_STEP
+        if next_position is None:
+            return previous_position + cls.POSITION_STEP
+        if next_position - previous_position < 2:
+            return None
+        return (previous_position + next_position) // 2
+    
+    @classmethod
+    def assign_missing_positions(cls, playlist_id):
+        """Coloca no final as entradas ainda sem posição (ex.: ``musics.add``)"""
+        missing = list(cls.objects.filter(playlist_id=playlist_id, position__isnull=True).order_by('id'))
+        if not missing:
+            return
+        last = cls.objects.filter(playlist_id=playlist_id).aggregate(last=Max('position'))['last'] or 0
+        for index, entry in enumerate(missing, start=1):
+            entry.position = last + index * cls.POSITION_STEP
+        cls.objects.bulk_update(missing, ['position'])
 
 
@@ -8,22 +8,24 @@ class PlaylistSerializer(serializers.ModelSerializer):
     
     musics_count = serializers.SerializerMethodField()
     musics_data = serializers.SerializerMethodField()
+    total_duration_formatted = serializers.CharField(source='get_total_duration_formatted', read_only=True)
     
     class Meta:
         model = Playlist
         fields = [
-            'id', 'name', 'cover', 'musics_count', 'musics_data',
+            'id', 'name', 'cover', 'mosaic', 'musics_count', 'total_duration',
+            'total_duration_formatted', 'musics_data',
             'created_at', 'updated_at', 'is_active', 'is_featured', 'order'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'mosaic', 'total_duration', 'created_at', 'updated_at']
     
     def get_musics_count(self, obj):
         """Retorna quantidade de músicas"""
         return obj.get_musics_count()
     
     def get_musics_data(self, obj):
-        """Retorna dados completos das músicas"""
-        musics = obj.musics.all()
+        """Retorna dados completos das músicas (na ordem da PlayHit)"""
+        musics = obj.get_ordered_musics()
         return MusicSerializer(musics, many=True, context=self.context).data
 
 
@@ -50,12 +52,13 @@ class PlaylistDetailSerializer(serializers.ModelSerializer):
     
     musics_count = serializers.SerializerMethodField()
     musics_data = serializers.SerializerMethodField()
+    total_duration_formatted = serializers.CharField(source='get_total_duration_formatted', read_only=True)
     
     class Meta:
         model = Playlist
         fields = [
-            'id', 'name', 'cover', 'musics',
-            'musics_data', 'musics_count',
+            'id', 'name', 'cover', 'mosaic', 'musics',
+            'musics_data', 'musics_count', 'total_duration', 'total_duration_formatted',
             'created_at', 'updated_at', 'is_active', 'is_featured', 'order'
         ]
     
@@ -63,8 +66,8 @@ class PlaylistDetailSerializer(serializers.ModelSerializer):
         return obj.get_musics_count()
     
     def get_musics_data(self, obj):
-        """Retorna dados completos das músicas"""
-        musics = obj.musics.all()
+        """Retorna dados completos das músicas (na ordem da PlayHit)"""
+        musics = obj.get_ordered_musics()
         return MusicSerializer(musics, many=True, context=self.context).data
 
 
@@ -0,0 +1,121 @@
+"""
+Signals das PlayHits
+
+Mantêm a posição das músicas adicionadas e os agregados da PlayHit
+(duração total, número de músicas e capa em mosaico) atualizados a cada
+alteração de músicas, e da capa dos álbuns usada no mosaico, para que a
+listagem não precise consultá-las.
+"""
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+
+from apps.artists.models import Album
+from apps.music.models import Music
+from .models import Playlist, PlaylistMusic
+
+# Campos da música que afetam os agregados da PlayHit
+AGGREGATE_FIELDS = {'duration', 'cover', 'album'}
+
+# Campo adiado (defer) no carregamento: valor anterior desconhecido
+_NOT_LOADED = object()
+
+
+def _aggregate_values(music):
+    """Duração, capa e álbum da música, lidos do __dict__ para não consultar campos adiados"""
+    values = music.__dict__
+    cover = values.get('cover', _NOT_LOADED)
+    return (
+        values.get('duration', _NOT_LOADED),
+        getattr(cover, 'name', cover) or '',
+        values.get('album_id', _NOT_LOADED),
+    )
+
+
+def refresh_playlists(playlists):
+    """Recalcula os agregados e o mosaico das PlayHits informadas"""
+    for playlist in playlists:
+        playlist.refresh_aggregates()
+        playlist.refresh_mosaic()
+
+
+@receiver(m2m_changed, sender=Playlist.musics.through)
+def playlist_musics_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Músicas adicionadas vão para o final; qualquer mudança recalcula os agregados"""
+    if action == 'pre_clear' and reverse:
+        # Depois do clear não dá mais para saber quais PlayHits tinham a música
+        instance._cleared_playlist_ids = list(instance.playlists.values_list('pk', flat=True))
+        return
+
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        playlists = [instance]
+    elif action == 'post_clear':
+        playlists = Playlist.objects.filter(pk__in=getattr(instance, '_cleared_playlist_ids', []))
+    else:
+        playlists = Playlist.objects.filter(pk__in=pk_set or [])
+
+    if action == 'post_add':
+        for playlist in playlists:
+            PlaylistMusic.assign_missing_positions(playlist.pk)
+
+    refresh_playlists(playlists)
+
+
+@receiver(post_init, sender=Music)
+def remember_aggregate_values(sender, instance, **kwargs):
+    """Guarda duração, capa e álbum carregados para detectar mudanças no save"""
+    instance._playlist_aggregate_values = _aggregate_values(instance)
+
+
+@receiver(post_save, sender=Music)
+def music_changed(sender, instance, created, update_fields=None, **kwargs):
+    """Duração, capa ou álbum alterados atualizam as PlayHits que contêm a música"""
+    if created:
+        return
+    if update_fields is not None and not AGGREGATE_FIELDS.intersection(update_fields):
+        return
+    # Saves que não mexem nesses campos (título no admin, transcodificação) não recalculam
+    values = _aggregate_values(instance)
+    if values == getattr(instance, '_playlist_aggregate_values', None):
+        return
+    instance._playlist_aggregate_values = values
+    refresh_playlists(Playlist.objects.filter(entries__music=instance).distinct())
+
+
+@receiver(pre_delete, sender=Music)
+def music_deleting(sender, instance, **kwargs):
+    """Guarda as PlayHits da música antes da exclusão em cascata"""
+    instance._deleted_playlist_ids = list(instance.playlist_entries.values_list('playlist_id', flat=True))
+
+
+@receiver(post_delete, sender=Music)
+def music_deleted(sender, instance, **kwargs):
+    refresh_playlists(Playlist.objects.filter(pk__in=getattr(instance, '_deleted_playlist_ids', [])))
+
+
+@receiver(post_init, sender=Album)
+def remember_album_cover(sender, instance, **kwargs):
+    """Guarda a capa carregada do álbum para detectar trocas no save"""
+    cover = instance.__dict__.get('cover', _NOT_LOADED)
+    instance._playlist_cover_name = getattr(cover, 'name', cover) or ''
+
+
+@receiver(post_save, sender=Album)
+def album_cover_changed(sender, instance, created, update_fields=None, **kwargs):
+    """Nova capa do álbum atualiza o mosaico das PlayHits com músicas sem capa própria"""
+    if created or 'cover' not in instance.__dict__:
+        return
+    if update_fields is not None and 'cover' not in update_fields:
+        return
+    cover_name = instance.cover.name or ''
+    if cover_name == getattr(instance, '_playlist_cover_name', cover_name):
+        return
+    instance._playlist_cover_name = cover_name
+    # Capa vazia pode estar gravada como '' ou NULL
+    without_cover = Q(entries__music__cover='') | Q(entries__music__cover__isnull=True)
+    refresh_playlists(
+        Playlist.objects.filter(without_cover, entries__music__album=instance).distinct()
+    )
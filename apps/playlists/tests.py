@@ -191,3 +191,224 @@ class PlaylistModelTest(TestCase):
         
         self.assertEqual(self.playlist.get_musics_count(), 4)
 
+
+
+class PlaylistOrderingTest(TestCase):
+    """Testes para a ordem das músicas na PlayHit (posições esparsas)"""
+
+    def setUp(self):
+        self.artist = Artist.objects.create(stage_name='Ordering Artist')
+        self.musics = [
+            Music.objects.create(artist=self.artist, title=f'Faixa {index}', duration=100)
+            for index in range(4)
+        ]
+        self.playlist = Playlist.objects.create(name='Ordem')
+        for music in self.musics:
+            self.playlist.add_music(music)
+
+    def ordered_titles(self):
+        return [music.title for music in self.playlist.get_ordered_musics()]
+
+    def test_add_appends_at_end(self):
+        """Testa que músicas adicionadas vão para o final"""
+        self.assertEqual(self.ordered_titles(), ['Faixa 0', 'Faixa 1', 'Faixa 2', 'Faixa 3'])
+
+    def test_move_updates_single_row(self):
+        """Testa que mover uma música altera apenas a linha dela"""
+        from .models import PlaylistMusic
+
+        before = dict(PlaylistMusic.objects.filter(playlist=self.playlist).values_list('music_id', 'position'))
+        self.playlist.move_music(self.musics[3], after=self.musics[0])
+        after = dict(PlaylistMusic.objects.filter(playlist=self.playlist).values_list('music_id', 'position'))
+
+        changed = [music_id for music_id in before if before[music_id] != after[music_id]]
+        self.assertEqual(changed, [self.musics[3].id])
+        self.assertEqual(self.ordered_titles(), ['Faixa 0', 'Faixa 3', 'Faixa 1', 'Faixa 2'])
+
+    def test_move_to_start(self):
+        """Testa mover para o início da PlayHit"""
+        self.playlist.move_music(self.musics[2])
+        self.assertEqual(self.ordered_titles()[0], 'Faixa 2')
+
+    def test_move_renumbers_when_no_gap(self):
+        """Testa renumeração quando não há espaço entre as vizinhas"""
+        from .models import PlaylistMusic
+
+        PlaylistMusic.objects.filter(playlist=self.playlist, music=self.musics[1]).update(position=10)
+        PlaylistMusic.objects.filter(playlist=self.playlist, music=self.musics[2]).update(position=11)
+        PlaylistMusic.objects.filter(playlist=self.playlist, music=self.musics[0]).update(position=1)
+        self.playlist.move_music(self.musics[3], after=self.musics[1])
+        self.assertEqual(self.ordered_titles(), ['Faixa 0', 'Faixa 1', 'Faixa 3', 'Faixa 2'])
+
+    def test_reorder_in_single_statement(self):
+        """Testa reordenação em lote com um único UPDATE"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        new_order = [self.musics[2].id, self.musics[0].id]
+        with CaptureQueriesContext(connection) as context:
+            self.playlist.reorder_musics(new_order)
+        updates = [query for query in context.captured_queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(self.ordered_titles(), ['Faixa 2', 'Faixa 0', 'Faixa 1', 'Faixa 3'])
+
+    def test_reorder_endpoint_requires_staff(self):
+        """Testa endpoint de reordenação (apenas staff)"""
+        client = APIClient()
+        url = f'/api/playlists/{self.playlist.id}/reorder/'
+        payload = {'music_orders': [music.id for music in reversed(self.musics)]}
+
+        user = User.objects.create_user(username='comum', password='senha12345')
+        client.force_authenticate(user)
+        self.assertEqual(client.put(url, payload, format='json').status_code, status.HTTP_403_FORBIDDEN)
+
+        staff = User.objects.create_user(username='staff', password='senha12345', is_staff=True)
+        client.force_authenticate(staff)
+        response = client.put(url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['music_ids'], payload['music_orders'])
+
+
+class PlaylistAggregatesTest(TestCase):
+    """Testes para os agregados mantidos na própria PlayHit"""
+
+    def setUp(self):
+        import tempfile
+        from django.test import override_settings
+
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+
+        self.artist = Artist.objects.create(stage_name='Aggregate Artist')
+        self.music1 = Music.objects.create(artist=self.artist, title='Um', duration=100)
+        self.music2 = Music.objects.create(artist=self.artist, title='Dois', duration=250)
+        self.playlist = Playlist.objects.create(name='Agregados')
+
+    def tearDown(self):
+        import shutil
+
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def make_cover(self, color):
+        import io
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from PIL import Image
+
+        buffer = io.BytesIO()
+        Image.new('RGB', (40, 40), color).save(buffer, 'PNG')
+        return SimpleUploadedFile('cover.png', buffer.getvalue(), content_type='image/png')
+
+    def stored(self):
+        return Playlist.objects.get(pk=self.playlist.pk)
+
+    def test_add_and_remove_update_aggregates(self):
+        """Testa duração total e número de músicas ao adicionar e remover"""
+        self.playlist.musics.add(self.music1, self.music2)
+        self.assertEqual((self.stored().total_duration, self.stored().tracks_count), (350, 2))
+        self.assertEqual(self.playlist.get_total_duration_formatted(), '5:50')
+
+        self.playlist.musics.remove(self.music2)
+        self.assertEqual((self.stored().total_duration, self.stored().tracks_count), (100, 1))
+
+    def test_reverse_add_and_clear(self):
+        """Testa alterações feitas pelo lado da música"""
+        self.music1.playlists.add(self.playlist)
+        self.assertEqual(self.stored().tracks_count, 1)
+
+        self.music1.playlists.clear()
+        self.assertEqual(self.stored().tracks_count, 0)
+
+    def test_duration_change_and_delete(self):
+        """Testa mudança de duração e exclusão de música"""
+        self.playlist.musics.add(self.music1, self.music2)
+
+        self.music1.duration = 160
+        self.music1.save()
+        self.assertEqual(self.stored().total_duration, 410)
+
+        self.music2.delete()
+        self.assertEqual((self.stored().total_duration, self.stored().tracks_count), (160, 1))
+
+    def test_unrelated_music_save_skips_refresh(self):
+        """Salvar a música sem mudar duração, capa ou álbum não recalcula as PlayHits"""
+        from unittest.mock import patch
+
+        self.playlist.musics.add(self.music1)
+        music = Music.objects.get(pk=self.music1.pk)
+        with patch.object(Playlist, 'refresh_aggregates') as refresh:
+            music.title = 'Novo título'
+            music.save()
+            self.assertFalse(refresh.called)
+
+            music.duration = 120
+            music.save()
+            self.assertEqual(refresh.call_count, 1)
+            music.save()
+            self.assertEqual(refresh.call_count, 1)
+
+    def test_mosaic_generated_from_first_covers(self):
+        """Testa geração do mosaico 2x2 com as capas das 4 primeiras músicas"""
+        from PIL import Image
+
+        colors = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 0)]
+        for index, color in enumerate(colors):
+            music = Music.objects.create(
+                artist=self.artist, title=f'Capa {index}', duration=60, cover=self.make_cover(color)
+            )
+            self.playlist.add_music(music)
+
+        playlist = self.stored()
+        self.assertTrue(playlist.mosaic)
+        with Image.open(playlist.mosaic.path) as mosaic:
+            width, height = mosaic.size
+            top_left = mosaic.getpixel((width // 4, height // 4))
+            bottom_right = mosaic.getpixel((3 * width // 4, 3 * height // 4))
+        self.assertGreater(top_left[0], 200)
+        self.assertGreater(bottom_right[1], 200)
+
+        # Sem mudança nas capas o mosaico não é regerado
+        self.assertFalse(playlist.refresh_mosaic())
+
+    def test_album_cover_change_refreshes_mosaic(self):
+        """Trocar a capa do álbum regera o mosaico das PlayHits com músicas sem capa"""
+        from apps.artists.models import Album
+
+        album = Album.objects.create(artist=self.artist, name='Álbum', cover=self.make_cover((255, 0, 0)))
+        Music.objects.filter(pk=self.music1.pk).update(album=album)
+        self.playlist.musics.add(self.music1)
+        other = Playlist.objects.create(name='Sem o álbum')
+        other.musics.add(self.music2)
+        old_key = self.stored().mosaic_key
+        self.assertTrue(old_key)
+
+        album = Album.objects.get(pk=album.pk)
+        album.name = 'Renomeado'
+        album.save()
+        self.assertEqual(self.stored().mosaic_key, old_key)
+
+        album.cover = self.make_cover((0, 0, 255))
+        album.save()
+        playlist = self.stored()
+        self.assertNotEqual(playlist.mosaic_key, old_key)
+        self.assertEqual([cover.name for cover in playlist.get_mosaic_sources()], [album.cover.name])
+
+    def test_list_renders_without_per_row_queries(self):
+        """Testa que a listagem não faz consultas por PlayHit"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        self.playlist.musics.add(self.music1)
+        client = APIClient()
+        with CaptureQueriesContext(connection) as single:
+            client.get('/api/playlists/')
+
+        for index in range(3):
+            playlist = Playlist.objects.create(name=f'Extra {index}')
+            playlist.musics.add(self.music1, self.music2)
+        with CaptureQueriesContext(connection) as several:
+            response = client.get('/api/playlists/')
+
+        self.assertEqual(response.data['count'], 4)
+        self.assertEqual(len(single.captured_queries), len(several.captured_queries))
@@ -1,16 +1,27 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
 app_name = 'playlists'
 
+# Em modo ASGI a listagem usa a view async
+if settings.SERVER_MODE == 'asgi':
+    from .async_views import playlist_list_view
+else:
+    playlist_list_view = views.PlaylistListView.as_view()
+
 urlpatterns = [
     # =============================================================================
     # PLAYLISTS (PlayHits) - Simplified (only what's used)
     # =============================================================================
     
     # Lista de PlayHits (usa ?featured=true para filtro)
-    path('', views.PlaylistListView.as_view(), name='playlist-list'),
+    path('', playlist_list_view, name='playlist-list'),
     
     # Detalhes do PlayHit
     path('<int:pk>/', views.PlaylistDetailView.as_view(), name='playlist-detail'),
+    
+    # Ordem das músicas (somente staff)
+    path('<int:pk>/reorder/', views.reorder_playlist_musics_view, name='playlist-reorder'),
+    path('<int:pk>/musics/<int:music_id>/move/', views.move_playlist_music_view, name='playlist-move-music'),
 ]
@@ -3,7 +3,7 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
 from django.db import models
-from .models import Playlist
+from .models import Playlist, PlaylistMusic
 from .serializers import (
     PlaylistSerializer, PlaylistCreateSerializer, PlaylistDetailSerializer
 )
@@ -18,9 +18,7 @@ class StandardResultsSetPagination(PageNumberPagination):
 
 class PlaylistListView(generics.ListAPIView):
     """Lista de playlists com cache Redis"""
-    queryset = Playlist.objects.filter(is_active=True).annotate(
-        musics_count=models.Count('musics')
-    ).filter(musics_count__gt=0)
+    queryset = Playlist.objects.filter(is_active=True, tracks_count__gt=0)
     serializer_class = PlaylistSerializer
     pagination_class = StandardResultsSetPagination
     permission_classes = [permissions.AllowAny]
@@ -29,13 +27,11 @@ class PlaylistListView(generics.ListAPIView):
         """Filtros de busca com cache"""
         queryset = super().get_queryset()
         
-        # Filtro por visibilidade (apenas ativas)
-        queryset = queryset.filter(is_active=True)
-        
-        # Apenas playlists com músicas
-        queryset = queryset.annotate(
-            musics_count=models.Count('musics')
-        ).filter(musics_count__gt=0)
+        # Filtro por visibilidade (apenas ativas) e apenas playlists com músicas
+        # (tracks_count é mantido na própria linha; musics_count segue disponível para ordenação)
+        queryset = queryset.filter(is_active=True, tracks_count__gt=0).annotate(
+            musics_count=models.F('tracks_count')
+        )
         
         # Busca por nome
         search = self.request.query_params.get('search')
@@ -51,6 +47,14 @@ class PlaylistListView(generics.ListAPIView):
         ordering = self.request.query_params.get('ordering', 'order')
         queryset = queryset.order_by(ordering)
         
+        # Músicas em ordem carregadas junto (evita uma consulta por PlayHit)
+        queryset = queryset.prefetch_related(
+            models.Prefetch(
+                'entries',
+                queryset=PlaylistMusic.objects.select_related('music__artist', 'music__album', 'music__genre')
+            )
+        )
+        
         return queryset
 
 
@@ -145,11 +149,16 @@ def remove_music_from_playlist_view(request, pk, music_id):
 
 
 @api_view(['PUT'])
-@permission_classes([permissions.IsAuthenticated])
+@permission_classes([permissions.IsAdminUser])
 def reorder_playlist_musics_view(request, pk):
-    """Reordenar músicas da playlist"""
+    """
+    Reordenar músicas da playlist
+    
+    Body: {"music_orders": [id_musica, ...]} na nova ordem (aceita também
+    [{"music_id": id, "order": n}, ...]). Aplicado em um único UPDATE.
+    """
     try:
-        playlist = Playlist.objects.get(pk=pk, user=request.user, is_active=True)
+        playlist = Playlist.objects.get(pk=pk, is_active=True)
     except Playlist.DoesNotExist:
         return Response(
             {'error': 'Playlist não encontrada'},
@@ -157,16 +166,74 @@ def reorder_playlist_musics_view(request, pk):
         )
     
     music_orders = request.data.get('music_orders')
-    if not music_orders:
+    if not music_orders or not isinstance(music_orders, list):
         return Response(
             {'error': 'music_orders é obrigatório'},
             status=status.HTTP_400_BAD_REQUEST
         )
     
+    try:
+        if isinstance(music_orders[0], dict):
+            music_orders = sorted(music_orders, key=lambda item: int(item.get('order', 0)))
+            music_ids = [int(item['music_id']) for item in music_orders]
+        else:
+            music_ids = [int(music_id) for music_id in music_orders]
+    except (KeyError, TypeError, ValueError):
+        return Response(
+            {'error': 'music_orders inválido'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
     # Reordenar músicas
-    playlist.reorder_musics(music_orders)
+    playlist.reorder_musics(music_ids)
     
-    return Response({'message': 'Músicas reordenadas com sucesso'})
+    return Response({
+        'message': 'Músicas reordenadas com sucesso',
+        'music_ids': [music.id for music in playlist.get_ordered_musics()]
+    })
+
+
+@api_view(['PATCH'])
+@permission_classes([permissions.IsAdminUser])
+def move_playlist_music_view(request, pk, music_id):
+    """
+    Mover uma música dentro da playlist (altera apenas a linha dela)
+    
+    Body: {"after_id": id_musica} para colocar logo após outra música, ou
+    {"after_id": null} para mover para o início.
+    """
+    try:
+        playlist = Playlist.objects.get(pk=pk, is_active=True)
+    except Playlist.DoesNotExist:
+        return Response(
+            {'error': 'Playlist não encontrada'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    after_id = request.data.get('after_id')
+    if after_id is not None:
+        try:
+            after_id = int(after_id)
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'after_id inválido'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+    
+    music_ids = {music_id} if after_id is None else {music_id, after_id}
+    entries = PlaylistMusic.objects.filter(playlist=playlist, music_id__in=music_ids)
+    if entries.count() != len(music_ids):
+        return Response(
+            {'error': 'Música não encontrada na playlist'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    position = playlist.move_music(music_id, after=after_id)
+    
+    return Response({
+        'message': 'Música movida com sucesso',
+        'position': position
+    })
 
 
 
@@ -176,10 +243,14 @@ def reorder_playlist_musics_view(request, pk):
 def active_playhits_view(request):
     """PlayHits ativas"""
     playhits = Playlist.objects.filter(
-        is_active=True
-    ).annotate(
-        musics_count=models.Count('musics')
-    ).filter(musics_count__gt=0).order_by('order', '-is_featured', '-created_at')
+        is_active=True,
+        tracks_count__gt=0
+    ).order_by('order', '-is_featured', '-created_at').prefetch_related(
+        models.Prefetch(
+            'entries',
+            queryset=PlaylistMusic.objects.select_related('music__artist', 'music__album', 'music__genre')
+        )
+    )
     
     serializer = PlaylistSerializer(playhits, many=True)
     
@@ -197,10 +268,14 @@ def featured_playhits_view(request):
     """PlayHits em destaque"""
     featured_playhits = Playlist.objects.filter(
         is_active=True,
-        is_featured=True
-    ).annotate(
-        musics_count=models.Count('musics')
-    ).filter(musics_count__gt=0).order_by('order', '-created_at')
+        is_featured=True,
+        tracks_count__gt=0
+    ).order_by('order', '-created_at').prefetch_related(
+        models.Prefetch(
+            'entries',
+            queryset=PlaylistMusic.objects.select_related('music__artist', 'music__album', 'music__genre')
+        )
+    )
     
     serializer = PlaylistSerializer(featured_playhits, many=True)
     
@@ -6,12 +6,56 @@ Centraliza a administração de todos os modelos em um local
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.db import models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.urls import reverse
+from django.utils.html import format_html
 
 # Importar todos os models
 from apps.users.models import User
 from apps.artists.models import Artist, Album
-from apps.music.models import Music
+from apps.music.models import BulkJob, Music
+from apps.music.tasks import enqueue_bulk_job
 from apps.genres.models import Genre
+from apps.admin_utils import LargeTableAdminMixin, RelatedAutocompleteFilter
+
+
+def count_subquery(model, field):
+    """Contagem de ``model`` por ``field`` como subconsulta (calculada só para as linhas da página)"""
+    counts = (
+        model.objects.filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts), 0)
+
+
+def enqueue_bulk_action(modeladmin, request, queryset, action, options=None):
+    """Enfileira uma ação em massa com os registros selecionados"""
+    job = enqueue_bulk_job(
+        action, queryset.order_by().values_list('pk', flat=True), request.user, options
+    )
+    url = reverse('admin:music_bulkjob_change', args=[job.pk])
+    modeladmin.message_user(
+        request,
+        format_html(
+            '{} ({} registros) enviada para processamento em segundo plano. '
+            '<a href="{}">Acompanhar progresso</a>',
+            job.get_action_display(), job.total, url
+        )
+    )
+
+
+class ArtistAutocompleteFilter(RelatedAutocompleteFilter):
+    title = 'artista'
+    field_name = 'artist'
+
+
+class AlbumAutocompleteFilter(RelatedAutocompleteFilter):
+    title = 'álbum'
+    field_name = 'album'
 
 
 # =============================================================================
@@ -45,11 +89,12 @@ class UserAdmin(BaseUserAdmin):
 # =============================================================================
 
 @admin.register(Artist)
-class ArtistAdmin(admin.ModelAdmin):
+class ArtistAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     """Admin para o modelo Artist simplificado"""
     
     list_display = ('stage_name', 'genre', 'is_active', 'created_at')
     list_filter = ('genre', 'is_active', 'created_at')
+    list_select_related = ('genre',)
     search_fields = ('stage_name',)
     ordering = ('-created_at',)
     
@@ -70,13 +115,15 @@ class ArtistAdmin(admin.ModelAdmin):
 # =============================================================================
 
 @admin.register(Album)
-class AlbumAdmin(admin.ModelAdmin):
-    """Admin para o modelo Album - similar a Playlist com filter_horizontal"""
+class AlbumAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    """Admin para o modelo Album - músicas editadas no inline"""
     
-    list_display = ('name', 'artist', 'featured', 'get_musics_count', 'release_date', 'is_active', 'created_at')
-    list_filter = ('featured', 'is_active', 'artist', 'created_at', 'release_date')
+    list_display = ('name', 'artist', 'featured', 'musics_count', 'release_date', 'is_active', 'created_at')
+    list_filter = ('featured', 'is_active', ArtistAutocompleteFilter, 'created_at', 'release_date')
+    list_select_related = ('artist',)
     search_fields = ('name', 'artist__stage_name')
     ordering = ('-featured', '-release_date', '-created_at')
+    autocomplete_fields = ['artist']
     
     fieldsets = (
         ('Informações Básicas', {
@@ -103,6 +150,23 @@ class AlbumAdmin(admin.ModelAdmin):
         show_change_link = True
     
     inlines = [MusicInline]
+    actions = ['deactivate_with_tracks']
+    
+    def get_queryset(self, request):
+        # Álbum.__str__ usa o artista (autocomplete) e a contagem vem de uma subconsulta
+        return super().get_queryset(request).select_related('artist').annotate(
+            _musics_count=count_subquery(Music, 'album')
+        )
+    
+    def musics_count(self, obj):
+        """Número de músicas do álbum"""
+        return obj._musics_count
+    musics_count.short_description = 'Nº de Músicas'
+    musics_count.admin_order_field = '_musics_count'
+    
+    @admin.action(description='Desativar álbuns selecionados e suas músicas')
+    def deactivate_with_tracks(self, request, queryset):
+        enqueue_bulk_action(self, request, queryset, BulkJob.ACTION_DEACTIVATE_ALBUMS)
     
     def save_formset(self, request, form, formset, change):
         """Define valores padrão para músicas ao salvar - OTIMIZADO"""
@@ -158,11 +222,13 @@ class AlbumAdmin(admin.ModelAdmin):
 # =============================================================================
 
 @admin.register(Music)
-class MusicAdmin(admin.ModelAdmin):
+class MusicAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     """Admin para o modelo Music"""
     
     list_display = ('title', 'artist', 'album', 'genre', 'streams_count', 'downloads_count', 'likes_count', 'is_featured', 'created_at')
-    list_filter = ('genre', 'album', 'is_featured', 'is_active', 'created_at', 'release_date')
+    # Artista e álbum por autocomplete: um dropdown com todos os álbuns não escala
+    list_filter = ('genre', ArtistAutocompleteFilter, AlbumAutocompleteFilter, 'is_featured', 'is_active', 'created_at', 'release_date')
+    list_select_related = ('artist', 'album__artist', 'genre')
     search_fields = ('title', 'album__name', 'artist__stage_name')
     ordering = ('-streams_count', '-created_at')
     
@@ -200,10 +266,61 @@ class MusicAdmin(admin.ModelAdmin):
     
     autocomplete_fields = ['artist', 'album', 'genre']
     
+    actions = ['feature_selected', 'unfeature_selected', 'recompute_selected', 'transcode_selected']
+    
+    def get_queryset(self, request):
+        # Music.__str__ usa o artista (resultados do autocomplete). O ChangeList
+        # ignora list_select_related se o queryset já tem select_related
+        return super().get_queryset(request).select_related(*self.list_select_related)
+    
     def get_duration_formatted(self, obj):
         """Retorna duração formatada"""
         return obj.get_duration_formatted()
     get_duration_formatted.short_description = 'Duração'
+    
+    @admin.action(description='Marcar como destaque')
+    def feature_selected(self, request, queryset):
+        enqueue_bulk_action(self, request, queryset, BulkJob.ACTION_FEATURE)
+    
+    @admin.action(description='Remover destaque')
+    def unfeature_selected(self, request, queryset):
+        enqueue_bulk_action(self, request, queryset, BulkJob.ACTION_UNFEATURE)
+    
+    @admin.action(description='Recalcular duração e tamanho do arquivo')
+    def recompute_selected(self, request, queryset):
+        enqueue_bulk_action(self, request, queryset, BulkJob.ACTION_RECOMPUTE)
+    
+    @admin.action(description='Comprimir áudio (192 kbps)')
+    def transcode_selected(self, request, queryset):
+        enqueue_bulk_action(self, request, queryset, BulkJob.ACTION_TRANSCODE, {'quality': 'medium'})
+
+
+@admin.register(BulkJob)
+class BulkJobAdmin(admin.ModelAdmin):
+    """Acompanhamento das ações em massa executadas em segundo plano"""
+    
+    list_display = ('action', 'status', 'progress_bar', 'processed', 'total', 'failed', 'created_by', 'created_at', 'finished_at')
+    list_filter = ('action', 'status')
+    list_select_related = ('created_by',)
+    readonly_fields = (
+        'action', 'status', 'progress_bar', 'total', 'processed', 'failed', 'options',
+        'error', 'created_by', 'created_at', 'started_at', 'finished_at'
+    )
+    exclude = ('object_ids',)
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def progress_bar(self, obj):
+        """Barra de progresso do job"""
+        return format_html(
+            '<progress value="{}" max="100" style="width: 120px"></progress> {}%',
+            obj.progress, obj.progress
+        )
+    progress_bar.short_description = 'Progresso'
 
 
 # =============================================================================
@@ -219,6 +336,14 @@ class GenreAdmin(admin.ModelAdmin):
     search_fields = ['name', 'description']
     prepopulated_fields = {'slug': ('name',)}
     readonly_fields = ['created_at', 'updated_at', 'song_count', 'artist_count']
+    list_select_related = ('parent',)
+    
+    def get_queryset(self, request):
+        # Contagens anotadas (song_count/artist_count leem _song_count/_artist_count)
+        return super().get_queryset(request).annotate(
+            _song_count=count_subquery(Music, 'genre'),
+            _artist_count=count_subquery(Artist, 'genre'),
+        )
     
     fieldsets = (
         ('Informações Básicas', {
@@ -133,3 +133,97 @@ class UserSerializerIntegrationTest(TestCase):
         self.assertEqual(updated_user.first_name, 'Updated')
         self.assertEqual(updated_user.bio, 'New bio')
 
+
+
+class LargeTableAdminTest(TestCase):
+    """Testes das listagens do admin com tabelas grandes"""
+
+    def setUp(self):
+        from apps.artists.models import Album, Artist
+        from apps.genres.models import Genre
+        from apps.music.models import Music
+
+        self.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='testpass123'
+        )
+        self.client.force_login(self.admin)
+        genre = Genre.objects.create(name='Forró', slug='forro')
+        self.artists = [Artist.objects.create(stage_name=f'Artista {i}', genre=genre) for i in range(3)]
+        self.albums = [Album.objects.create(name=f'Álbum {i}', artist=artist) for i, artist in enumerate(self.artists)]
+        Music.objects.bulk_create([
+            Music(
+                title=f'Faixa {i}', artist=self.artists[i % 3], album=self.albums[i % 3],
+                genre=genre, file=f'music/faixa-{i}.mp3'
+            )
+            for i in range(12)
+        ])
+
+    def test_music_changelist_queries_do_not_grow_with_rows(self):
+        """A listagem de músicas não faz uma consulta por linha"""
+        url = reverse('admin:music_music_changelist')
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['cl'].result_count, 12)
+
+    def test_related_autocomplete_filter(self):
+        """Filtro por artista usa o autocomplete do admin e filtra pelo id"""
+        url = reverse('admin:music_music_changelist')
+        response = self.client.get(url, {'artist': str(self.artists[2].pk)})
+        self.assertEqual(response.context['cl'].result_count, 4)
+        # select2 com a view de autocomplete; só o registro selecionado é renderizado
+        self.assertContains(response, 'class="admin-autocomplete"', count=2)
+        self.assertContains(response, 'data-ajax--url="/admin/autocomplete/"', count=2)
+        self.assertContains(response, 'data-field-name="artist"')
+        self.assertContains(response, f'<option value="{self.artists[2].pk}" selected>Artista 2</option>', html=True)
+        self.assertNotContains(response, 'Artista 0</option>')
+        self.assertContains(response, 'admin/js/autocomplete.js')
+
+        response = self.client.get(url, {'artist': 'artista 1'})
+        self.assertRedirects(response, f'{url}?e=1', fetch_redirect_response=False)
+
+    def test_related_autocomplete_filter_lookup(self):
+        """A busca do filtro usa a view de autocomplete do admin"""
+        response = self.client.get(reverse('admin:autocomplete'), {
+            'app_label': 'music', 'model_name': 'music', 'field_name': 'album', 'term': 'Álbum 1',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['text'] for item in response.json()['results']], [str(self.albums[1])])
+
+    def test_album_changelist_annotated_count(self):
+        """Contagem de músicas do álbum vem anotada e pode ser ordenada"""
+        from apps.music.models import Music
+
+        Music.objects.create(title='Extra', artist=self.artists[0], album=self.albums[0], file='music/extra.mp3')
+        url = reverse('admin:artists_album_changelist')
+        response = self.client.get(url, {'o': '4'})
+        self.assertEqual(response.status_code, 200)
+        counts = {album.name: album._musics_count for album in response.context['cl'].result_list}
+        self.assertEqual(counts, {'Álbum 0': 5, 'Álbum 1': 4, 'Álbum 2': 4})
+
+    def test_estimated_paginator_falls_back_to_exact_count(self):
+        """Fora do PostgreSQL o paginador usa COUNT(*) exato"""
+        from apps.admin_utils import EstimatedCountPaginator, estimate_count
+        from apps.music.models import Music
+
+        queryset = Music.objects.order_by('pk')
+        self.assertIsNone(estimate_count(queryset))
+        self.assertEqual(EstimatedCountPaginator(queryset, 5).count, 12)
+
+    def test_bulk_action_enqueues_job(self):
+        """Ação do admin cria o job em segundo plano em vez de alterar na requisição"""
+        from apps.music.models import BulkJob, Music
+
+        ids = list(Music.objects.values_list('pk', flat=True)[:3])
+        with patch('apps.music.tasks.run_bulk_job.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(reverse('admin:music_music_changelist'), {
+                    'action': 'feature_selected',
+                    '_selected_action': ids,
+                })
+        self.assertEqual(response.status_code, 302)
+        job = BulkJob.objects.get()
+        self.assertEqual(job.action, BulkJob.ACTION_FEATURE)
+        self.assertEqual(sorted(job.object_ids), sorted(ids))
+        delay.assert_called_once_with(job.pk)
+        self.assertFalse(Music.objects.filter(is_featured=True).exists())
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class BannersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'banners'
+
+    def ready(self):
+        """Importa os signals quando o app estiver pronto"""
+        import banners.signals
@@ -0,0 +1,29 @@
+"""
+Views assíncronas de leitura para o modo ASGI
+
+Versão async da listagem de banners ativos, com a mesma resposta paginada
+do ``BannerViewSet`` e a mesma agenda em cache (ver ``schedule.py``).
+"""
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from ehit_backend.async_pagination import InvalidPage, paginate_list
+from .schedule import aget_active_banners_data
+
+
+@require_GET
+async def banner_list_view(request):
+    """Banners ativos no momento (async, paginado)"""
+    banners = await aget_active_banners_data(request)
+    try:
+        results, page = paginate_list(request, banners)
+    except InvalidPage:
+        return JsonResponse({'detail': 'Invalid page.'}, status=404)
+
+    return JsonResponse({**page, 'results': results})
+
+
+@require_GET
+async def active_banners_view(request):
+    """Banners ativos no momento (async, sem paginação)"""
+    return JsonResponse(await aget_active_banners_data(request), safe=False)
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('banners', '0003_banner_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='banner',
+            name='image_blurhash',
+            field=models.CharField(blank=True, default='', help_text='Placeholder calculado automaticamente a partir da imagem', max_length=64, verbose_name='Blurhash'),
+        ),
+        migrations.AddField(
+            model_name='banner',
+            name='image_color',
+            field=models.CharField(blank=True, default='', help_text='Calculada automaticamente a partir da imagem', max_length=7, verbose_name='Cor Dominante'),
+        ),
+    ]
@@ -1,10 +1,13 @@
+from datetime import timedelta
+
 from django.db import models
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from PIL import Image
+from apps.image_utils import ArtworkPlaceholdersMixin
 
 
-class Banner(models.Model):
+class Banner(ArtworkPlaceholdersMixin, models.Model):
     """
     Modelo simplificado para gerenciar banners do sistema
     """
@@ -22,6 +25,22 @@ class Banner(models.Model):
         help_text='Imagem do banner (1920x1080 recomendado)'
     )
     
+    image_color = models.CharField(
+        max_length=7,
+        blank=True,
+        default='',
+        verbose_name='Cor Dominante',
+        help_text='Calculada automaticamente a partir da imagem'
+    )
+    
+    image_blurhash = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+        verbose_name='Blurhash',
+        help_text='Placeholder calculado automaticamente a partir da imagem'
+    )
+    
     link = models.URLField(
         blank=True,
         null=True,
@@ -51,6 +70,8 @@ class Banner(models.Model):
         verbose_name='Atualizado em'
     )
     
+    artwork_fields = (('image', 'image_color', 'image_blurhash'),)
+    
     class Meta:
         verbose_name = 'Banner'
         verbose_name_plural = 'Banners'
@@ -76,9 +97,9 @@ class Banner(models.Model):
                     'image': f'Erro ao processar imagem: {str(e)}'
                 })
     
-    def is_currently_active(self):
-        """Verifica se o banner está ativo no momento atual"""
-        now = timezone.now()
+    def is_currently_active(self, now=None):
+        """Verifica se o banner está ativo no momento atual (ou em ``now``)"""
+        now = now or timezone.now()
         
         if self.start_date > now:
             return False
@@ -89,9 +110,9 @@ class Banner(models.Model):
         return True
     
     @classmethod
-    def get_active_banners(cls):
-        """Retorna banners ativos no momento atual"""
-        now = timezone.now()
+    def get_active_banners(cls, now=None):
+        """Retorna banners ativos no momento atual (ou em ``now``)"""
+        now = now or timezone.now()
         
         queryset = cls.objects.filter(
             start_date__lte=now
@@ -99,4 +120,29 @@ class Banner(models.Model):
             models.Q(end_date__isnull=True) | models.Q(end_date__gte=now)
         )
         
-        return queryset.order_by('-start_date')
\ No newline at end of file
+        return queryset.order_by('-start_date')
+    
+    @classmethod
+    def get_next_transition(cls, now=None):
+        """
+        Próximo instante em que o conjunto de banners ativos muda
+        
+        É o menor entre o próximo ``start_date`` futuro (banner entra) e o
+        próximo ``end_date`` ainda não passado (banner sai logo após ele).
+        Retorna None se não houver mudança agendada.
+        """
+        now = now or timezone.now()
+        
+        next_dates = cls.objects.aggregate(
+            next_start=models.Min('start_date', filter=models.Q(start_date__gt=now)),
+            next_end=models.Min('end_date', filter=models.Q(end_date__gte=now)),
+        )
+        
+        candidates = []
+        if next_dates['next_start']:
+            candidates.append(next_dates['next_start'])
+        if next_dates['next_end']:
+            # end_date é inclusivo: o banner sai no microssegundo seguinte
+            candidates.append(next_dates['next_end'] + timedelta(microseconds=1))
+        
+        return min(candidates) if candidates else None
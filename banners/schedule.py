@@ -0,0 +1,99 @@
+"""
+Agenda de banners ativos com cache que expira na próxima transição
+
+O conjunto de banners ativos só muda quando um banner começa (``start_date``)
+ou termina (``end_date``). A lista serializada é calculada uma vez junto com
+o instante da próxima transição (``valid_until``) e guardada no cache com TTL
+até esse instante; as leituras comparam ``valid_until`` com o relógio, então
+a troca acontece no segundo agendado mesmo com a granularidade do TTL.
+
+As URLs das imagens ficam relativas no cache e são completadas com o host da
+requisição na leitura; com mídia no S3 (URLs assinadas) a agenda também
+expira antes das URLs. Alterações em banners invalidam o cache (signals.py).
+"""
+import math
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.utils import timezone
+
+from ehit_backend import async_cache
+from ehit_backend.storage import media_url_max_age
+from .models import Banner
+from .serializers import BannerSerializer
+
+ACTIVE_BANNERS_CACHE_KEY = 'banners_active_schedule'
+
+# TTL máximo quando não há transição agendada (segundos)
+MAX_SCHEDULE_TTL = 60 * 60 * 24
+
+
+def build_schedule(now=None):
+    """Calcula a lista de banners ativos e o instante da próxima transição"""
+    now = now or timezone.now()
+    banners = Banner.get_active_banners(now)
+    serializer = BannerSerializer(banners, many=True, context={'now': now})
+    next_transition = Banner.get_next_transition(now)
+    valid_until = next_transition.timestamp() if next_transition else None
+
+    # Com mídia no S3 as URLs das imagens são assinadas e expiram
+    url_max_age = media_url_max_age()
+    if url_max_age is not None:
+        url_valid_until = now.timestamp() + url_max_age
+        valid_until = url_valid_until if valid_until is None else min(valid_until, url_valid_until)
+
+    return {
+        'banners': [dict(banner) for banner in serializer.data],
+        'valid_until': valid_until,
+    }
+
+
+def schedule_ttl(schedule, now):
+    """Segundos até a próxima transição (arredondado para cima)"""
+    if schedule['valid_until'] is None:
+        return MAX_SCHEDULE_TTL
+    remaining = schedule['valid_until'] - now.timestamp()
+    return max(1, min(MAX_SCHEDULE_TTL, math.ceil(remaining)))
+
+
+def is_schedule_valid(schedule, now):
+    """Verifica se a agenda em cache ainda vale no instante ``now``"""
+    if not schedule:
+        return False
+    valid_until = schedule.get('valid_until')
+    return valid_until is None or now.timestamp() < valid_until
+
+
+def absolutize_banners(banners, request):
+    """Completa as URLs relativas das imagens com o host da requisição"""
+    if request is None:
+        return list(banners)
+    return [
+        {**banner, 'image': request.build_absolute_uri(banner['image'])} if banner.get('image') else banner
+        for banner in banners
+    ]
+
+
+def get_active_banners_data(request=None):
+    """Lista serializada dos banners ativos (leitura do cache na maioria das vezes)"""
+    now = timezone.now()
+    schedule = cache.get(ACTIVE_BANNERS_CACHE_KEY)
+    if not is_schedule_valid(schedule, now):
+        schedule = build_schedule(now)
+        cache.set(ACTIVE_BANNERS_CACHE_KEY, schedule, schedule_ttl(schedule, now))
+    return absolutize_banners(schedule['banners'], request)
+
+
+async def aget_active_banners_data(request=None):
+    """Versão async de ``get_active_banners_data`` (mesma entrada de cache)"""
+    now = timezone.now()
+    schedule = await async_cache.aget(ACTIVE_BANNERS_CACHE_KEY)
+    if not is_schedule_valid(schedule, now):
+        schedule = await sync_to_async(build_schedule)(now)
+        await async_cache.aset(ACTIVE_BANNERS_CACHE_KEY, schedule, schedule_ttl(schedule, now))
+    return absolutize_banners(schedule['banners'], request)
+
+
+def invalidate_active_banners():
+    """Remove a agenda do cache (chamado quando um banner é alterado)"""
+    cache.delete(ACTIVE_BANNERS_CACHE_KEY)
@@ -13,6 +13,8 @@ class BannerSerializer(serializers.ModelSerializer):
             'id',
             'name',
             'image',
+            'image_color',
+            'image_blurhash',
             'link',
             'start_date',
             'end_date',
@@ -20,11 +22,11 @@ class BannerSerializer(serializers.ModelSerializer):
             'created_at',
             'updated_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'image_color', 'image_blurhash', 'created_at', 'updated_at']
     
     def get_is_currently_active(self, obj):
-        """Retorna se o banner está ativo no momento"""
-        return obj.is_currently_active()
+        """Retorna se o banner está ativo no momento (mesmo instante para toda a lista)"""
+        return obj.is_currently_active(self.context.get('now'))
     
     def to_representation(self, instance):
         """Customiza a representação do serializer"""
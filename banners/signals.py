@@ -0,0 +1,15 @@
+"""
+Invalidação da agenda de banners ativos em cache
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Banner
+from .schedule import invalidate_active_banners
+
+
+@receiver(post_save, sender=Banner)
+@receiver(post_delete, sender=Banner)
+def banner_changed(sender, instance, **kwargs):
+    """Qualquer alteração em banners recalcula a agenda na próxima leitura"""
+    invalidate_active_banners()
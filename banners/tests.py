@@ -444,3 +444,71 @@ class BannerIntegrationTest(TestCase):
         self.assertIn(in_range, active_banners)
         self.assertNotIn(out_of_range, active_banners)
 
+
+
+class BannerScheduleCacheTest(TestCase):
+    """Testes para a agenda de banners ativos em cache"""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.now = timezone.now()
+        self.current = Banner.objects.create(
+            name='Atual',
+            image='banners/atual.jpg',
+            start_date=self.now - timedelta(days=1),
+            end_date=self.now + timedelta(hours=2)
+        )
+        self.upcoming = Banner.objects.create(
+            name='Próximo',
+            image='banners/proximo.jpg',
+            start_date=self.now + timedelta(hours=1)
+        )
+
+    def test_next_transition(self):
+        """Testa que a próxima transição é o início mais próximo"""
+        self.assertEqual(Banner.get_next_transition(self.now), self.upcoming.start_date)
+
+    def test_schedule_switches_at_transition(self):
+        """Testa a troca de banners no instante agendado sem invalidação manual"""
+        from unittest import mock
+        from .schedule import get_active_banners_data
+
+        with mock.patch('banners.schedule.timezone.now', return_value=self.now):
+            names = [banner['name'] for banner in get_active_banners_data()]
+        self.assertEqual(names, ['Atual'])
+
+        # Ainda antes da transição: lida do cache, sem consultas
+        with mock.patch('banners.schedule.timezone.now', return_value=self.upcoming.start_date - timedelta(seconds=1)):
+            with self.assertNumQueries(0):
+                get_active_banners_data()
+
+        # No instante de início o próximo banner entra
+        with mock.patch('banners.schedule.timezone.now', return_value=self.upcoming.start_date):
+            names = [banner['name'] for banner in get_active_banners_data()]
+        self.assertEqual(names, ['Próximo', 'Atual'])
+
+    def test_ttl_expires_at_transition(self):
+        """Testa TTL igual ao tempo até a próxima transição"""
+        from .schedule import build_schedule, schedule_ttl
+
+        schedule = build_schedule(self.now)
+        self.assertEqual(schedule_ttl(schedule, self.now), 3600)
+
+    def test_save_invalidates_schedule(self):
+        """Testa que alterar um banner invalida a agenda"""
+        from .schedule import get_active_banners_data
+
+        get_active_banners_data()
+        self.current.name = 'Atual editado'
+        self.current.save()
+        names = [banner['name'] for banner in get_active_banners_data()]
+        self.assertIn('Atual editado', names)
+
+    def test_list_returns_absolute_image_urls(self):
+        """Testa URLs absolutas das imagens na listagem da API"""
+        response = self.client.get('/api/banners/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 1)
+        self.assertTrue(response.data['results'][0]['image'].startswith('http://testserver/'))
+        self.assertTrue(response.data['results'][0]['is_currently_active'])
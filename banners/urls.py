@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import BannerViewSet
@@ -8,3 +9,11 @@ router.register(r'banners', BannerViewSet, basename='banner')
 
 urlpatterns = router.urls
 
+# Em modo ASGI as listagens de banners ativos usam as views async
+if settings.SERVER_MODE == 'asgi':
+    from . import async_views
+
+    urlpatterns = [
+        path('banners/', async_views.banner_list_view, name='banner-list'),
+        path('banners/active/', async_views.active_banners_view, name='banner-active'),
+    ] + urlpatterns
@@ -4,6 +4,7 @@ from rest_framework.response import Response
 from django.utils import timezone
 from .models import Banner
 from .serializers import BannerSerializer
+from .schedule import get_active_banners_data
 
 
 class BannerViewSet(viewsets.ReadOnlyModelViewSet):
@@ -20,6 +21,18 @@ class BannerViewSet(viewsets.ReadOnlyModelViewSet):
         """Retorna apenas banners ativos"""
         return Banner.get_active_banners()
     
+    def list(self, request, *args, **kwargs):
+        """
+        Lista paginada dos banners ativos
+        
+        Lida da agenda em cache (expira na próxima transição de banners)
+        """
+        banners = get_active_banners_data(request)
+        page = self.paginate_queryset(banners)
+        if page is not None:
+            return self.get_paginated_response(page)
+        return Response(banners)
+    
     @action(detail=False, methods=['get'])
     def all(self, request):
         """
@@ -39,7 +52,5 @@ class BannerViewSet(viewsets.ReadOnlyModelViewSet):
         
         GET /api/banners/active/
         """
-        banners = Banner.get_active_banners()
-        serializer = self.get_serializer(banners, many=True)
-        return Response(serializer.data)
+        return Response(get_active_banners_data(request))
 
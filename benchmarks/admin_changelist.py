@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Tempo de resposta e número de queries das listagens do admin com muitos registros
+
+Cria um banco de teste com o catálogo sintético (benchmarks/catalog.py),
+faz login como superusuário e mede cada changelist do admin algumas vezes,
+reportando latências e queries em JSON.
+
+Uso (rodar antes e depois da mudança e comparar):
+    DJANGO_SETTINGS_MODULE=ehit_backend.settings \\
+        python benchmarks/admin_changelist.py --scale 100k --output depois.json
+
+Com PostgreSQL (DATABASE_URL/DB_*) o resultado reflete a contagem estimada;
+no SQLite as contagens continuam exatas.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from catalog import benchmark_database, build_catalog, resolve_scale  # noqa: E402
+
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+
+DEFAULT_PATHS = [
+    '/admin/music/music/',
+    '/admin/music/music/?o=-6',
+    '/admin/music/music/?artist=amor',
+    '/admin/artists/album/',
+    '/admin/artists/artist/',
+    '/admin/playlists/playlist/',
+    '/admin/genres/genre/',
+]
+
+
+def measure(client, path, repeats):
+    """Latências (ms) e número de queries de um changelist"""
+    latencies = []
+    queries = None
+    for _ in range(repeats):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = client.get(path)
+            latencies.append((time.perf_counter() - started) * 1000)
+        if response.status_code != 200:
+            return {'status': response.status_code}
+        queries = len(captured)
+    latencies.sort()
+    return {
+        'status': 200,
+        'queries': queries,
+        'min_ms': round(latencies[0], 2),
+        'median_ms': round(latencies[len(latencies) // 2], 2),
+        'max_ms': round(latencies[-1], 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', default='100k', help='1k, 10k, 100k, 1m ou número de músicas')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--paths', nargs='+', default=DEFAULT_PATHS)
+    parser.add_argument('--output', help='Arquivo JSON para salvar o relatório')
+    args = parser.parse_args()
+
+    from django.contrib.auth import get_user_model
+
+    tracks = resolve_scale(args.scale)
+    with benchmark_database():
+        catalog = build_catalog(tracks, seed=args.seed, log=lambda message: print(message, file=sys.stderr))
+
+        admin = get_user_model().objects.create_superuser(
+            username='bench', email='bench@example.com', password='bench'
+        )
+        client = Client()
+        client.force_login(admin)
+        # Primeira requisição aquece templates e caches
+        client.get(args.paths[0])
+
+        report = {
+            'database': connection.vendor,
+            'tracks': tracks,
+            'repeats': args.repeats,
+            'catalog': {'build_s': catalog['build_s'], 'counts': catalog['counts']},
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'endpoints': {path: measure(client, path, args.repeats) for path in args.paths},
+        }
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    print(output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
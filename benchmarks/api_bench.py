@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Benchmark das rotas públicas da API sobre um catálogo sintético
+
+Em processo (padrão): cria um banco de teste, gera o catálogo na escala
+pedida (benchmarks/catalog.py) e mede cada cenário com o client de testes do
+Django: latência fria (cache limpo) e quente (p50/p95/p99), vazão sequencial
+e número de queries. O relatório em JSON permite comparar execuções.
+
+    python benchmarks/api_bench.py --scale 100k --output base.json
+    python benchmarks/api_bench.py --scale 100k --output novo.json
+    python benchmarks/api_bench.py --compare base.json novo.json
+
+Contra um servidor rodando (vazão com concorrência, via http_load.py), com o
+catálogo já gerado no banco do servidor (``catalog.py --scale 100k --yes``):
+
+    python benchmarks/api_bench.py --base-url http://localhost:3030 \\
+        --concurrency 64 --duration 30 --output servidor.json
+
+``--compare`` termina com código 1 se algum cenário piorar além da tolerância
+(``--tolerance``, padrão 20% na latência) ou fizer mais queries.
+"""
+import argparse
+import fnmatch
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from catalog import SCALES, benchmark_database, build_catalog, catalog_samples, resolve_scale  # noqa: E402
+from http_load import percentile, run_load  # noqa: E402
+
+from django.core.cache import cache  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+
+
+def build_scenarios(samples):
+    """
+    Cenários por grupo: (nome, [caminhos])
+
+    Cenários com vários caminhos alternam entre ids/termos da amostra, para
+    não medir sempre a mesma linha.
+    """
+    def each(template, key):
+        return [template.format(value) for value in samples[key]]
+
+    return [
+        # Home
+        ('home.trending', ['/api/music/trending/']),
+        ('home.popular', ['/api/music/popular/']),
+        ('home.featured', ['/api/music/featured/']),
+        ('home.playhits_featured', ['/api/playlists/?featured=true']),
+        # Banners
+        ('banners.list', ['/api/banners/']),
+        ('banners.active', ['/api/banners/active/']),
+        # Listagens
+        ('list.artists', ['/api/artists/']),
+        ('list.artists_by_genre', each('/api/artists/?genre={}', 'genre')),
+        ('list.artists_by_genre_tree', each('/api/artists/?genre_tree={}', 'genre')),
+        ('list.playlists', ['/api/playlists/']),
+        ('list.genres', ['/api/genres/genres/']),
+        # Detalhes
+        ('detail.artist', each('/api/artists/{}/', 'artist')),
+        ('detail.artist_albums', each('/api/artists/{}/albums/', 'artist')),
+        ('detail.album_musics', each('/api/artists/albums/{}/musics/', 'album')),
+        ('detail.playlist', each('/api/playlists/{}/', 'playlist')),
+        ('detail.genre', each('/api/genres/genres/{}/', 'genre')),
+        ('detail.genre_artists', each('/api/genres/{}/artists/', 'genre')),
+        # Busca
+        ('search.music_autocomplete', each('/api/music/search/?q={}', 'word')),
+        ('search.artists', each('/api/artists/?search={}', 'word')),
+    ]
+
+
+def summarize(latencies_ms, errors, elapsed):
+    """Resumo das latências no mesmo formato do http_load.py"""
+    values = sorted(latencies_ms)
+    return {
+        'requests': len(values),
+        'errors': errors,
+        'throughput_rps': round(len(values) / elapsed, 2) if elapsed else 0,
+        'p50_ms': round(percentile(values, 0.50), 2) if values else None,
+        'p95_ms': round(percentile(values, 0.95), 2) if values else None,
+        'p99_ms': round(percentile(values, 0.99), 2) if values else None,
+        'max_ms': round(values[-1], 2) if values else None,
+    }
+
+
+def measure(client, paths, repeats):
+    """Latência fria (cache limpo), quente e queries de um cenário"""
+    cache.clear()
+    with CaptureQueriesContext(connection) as cold_queries:
+        started = time.perf_counter()
+        response = client.get(paths[0], HTTP_ACCEPT='application/json')
+        cold_ms = (time.perf_counter() - started) * 1000
+    if response.status_code >= 400:
+        return {'status': response.status_code, 'errors': 1}
+
+    latencies = []
+    errors = 0
+    warm_queries = []
+    started = time.perf_counter()
+    for index in range(repeats):
+        path = paths[index % len(paths)]
+        with CaptureQueriesContext(connection) as captured:
+            request_started = time.perf_counter()
+            response = client.get(path, HTTP_ACCEPT='application/json')
+            elapsed_ms = (time.perf_counter() - request_started) * 1000
+        if response.status_code >= 400:
+            errors += 1
+            continue
+        latencies.append(elapsed_ms)
+        warm_queries.append(len(captured))
+    elapsed = time.perf_counter() - started
+
+    result = summarize(latencies, errors, elapsed)
+    result.update({
+        'status': 200,
+        'cold_ms': round(cold_ms, 2),
+        'cold_queries': len(cold_queries),
+        'queries': max(warm_queries) if warm_queries else None,
+    })
+    return result
+
+
+def run_inprocess(tracks, seed, repeats, only):
+    """Gera o catálogo em um banco de teste e mede todos os cenários"""
+    with benchmark_database():
+        print(f"Gerando catálogo com {tracks} músicas...", file=sys.stderr)
+        catalog = build_catalog(tracks, seed=seed, log=lambda message: print(message, file=sys.stderr))
+        scenarios = [
+            (name, paths) for name, paths in build_scenarios(catalog['samples'])
+            if not only or any(fnmatch.fnmatch(name, pattern) for pattern in only)
+        ]
+
+        client = Client()
+        results = {}
+        for name, paths in scenarios:
+            print(f"  {name}", file=sys.stderr)
+            results[name] = measure(client, paths, repeats)
+            results[name]['paths'] = paths[:3]
+
+        total_errors = sum(result.get('errors', 0) for result in results.values())
+        p50_values = [result['p50_ms'] for result in results.values() if result.get('p50_ms') is not None]
+
+    return {
+        'mode': 'inprocess',
+        'database': connection.vendor,
+        'tracks': tracks,
+        'seed': seed,
+        'repeats': repeats,
+        'catalog': {'build_s': catalog['build_s'], 'counts': catalog['counts']},
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'total': {
+            'errors': total_errors,
+            'sum_p50_ms': round(sum(p50_values), 2),
+            'queries': sum(result.get('queries') or 0 for result in results.values()),
+        },
+        'endpoints': results,
+    }
+
+
+def run_server(base_url, seed, concurrency, duration, only):
+    """Carga concorrente contra um servidor, com ids do catálogo do banco configurado"""
+    scenarios = [
+        (name, paths) for name, paths in build_scenarios(catalog_samples(seed))
+        if not only or any(fnmatch.fnmatch(name, pattern) for pattern in only)
+    ]
+    paths = [path for _, scenario_paths in scenarios for path in scenario_paths[:3]]
+    report = run_load(base_url, paths, concurrency, duration)
+    report['mode'] = 'server'
+    return report
+
+
+def compare(baseline_path, candidate_path, tolerance):
+    """Compara dois relatórios e aponta regressões; retorna o número delas"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    with open(candidate_path) as f:
+        candidate = json.load(f)
+
+    regressions = 0
+    print(f"{'cenário':34} {'métrica':>9} {'base':>10} {'novo':>10} {'variação':>9}")
+    for name, old in baseline['endpoints'].items():
+        new = candidate['endpoints'].get(name)
+        if new is None:
+            continue
+        for metric in ('p50_ms', 'p95_ms', 'cold_ms', 'queries', 'errors'):
+            before, after = old.get(metric), new.get(metric)
+            if before is None or after is None:
+                continue
+            change = f"{(after - before) / before * 100:+.1f}%" if before else ''
+            if metric in ('queries', 'errors'):
+                worse = after > before
+            else:
+                worse = before > 0 and (after - before) / before > tolerance
+            regressions += worse
+            flag = ' <-' if worse else ''
+            print(f"{name[:34]:34} {metric:>9} {before:>10} {after:>10} {change:>9}{flag}")
+    print(f"\n{regressions} regressão(ões) (tolerância de latência {tolerance:.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', default='1k', help=f"{', '.join(SCALES)} ou número de músicas")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeats', type=int, default=30, help='Requisições quentes por cenário')
+    parser.add_argument('--only', nargs='+', help='Filtra cenários (ex.: "home.*" "detail.artist")')
+    parser.add_argument('--base-url', help='Mede um servidor rodando em vez do processo local')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--output', help='Arquivo JSON para salvar o relatório')
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'NOVO'),
+                        help='Compara dois relatórios JSON em vez de medir')
+    parser.add_argument('--tolerance', type=float, default=0.20)
+    args = parser.parse_args()
+
+    if args.compare:
+        return 1 if compare(*args.compare, args.tolerance) else 0
+
+    if args.base_url:
+        report = run_server(args.base_url, args.seed, args.concurrency, args.duration, args.only)
+    else:
+        report = run_inprocess(resolve_scale(args.scale), args.seed, args.repeats, args.only)
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    print(output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Catálogo sintético em escala para benchmarks
+
+Gera gêneros (com subgêneros), artistas, álbuns, músicas, PlayHits e
+banners com inserts em lote e distribuições próximas das reais:
+
+- artistas com número de álbuns e de faixas desigual (poucos com muitos);
+- ~30% de singles (sem álbum), álbuns de 6 a 14 faixas;
+- streams com cauda longa (Pareto): poucas faixas concentram a audiência;
+- PlayHits de 20 a 100 faixas, sorteadas com peso na popularidade.
+
+A geração é determinística para a mesma semente, então duas execuções do
+benchmark usam exatamente o mesmo catálogo.
+
+Uso direto (popula o banco configurado, ex.: para medir um servidor rodando):
+    python benchmarks/catalog.py --scale 100k --yes
+
+Nos benchmarks (banco de teste descartável):
+    from catalog import benchmark_database, build_catalog
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ehit_backend.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection, transaction  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+SCALES = {
+    '1k': 1_000,
+    '10k': 10_000,
+    '100k': 100_000,
+    '1m': 1_000_000,
+}
+
+BATCH_SIZE = 5000
+
+# Palavras dos títulos (também usadas nas buscas dos benchmarks)
+WORDS = [
+    'amor', 'saudade', 'forró', 'sertão', 'coração', 'noite', 'estrada', 'lua',
+    'paixão', 'vaquejada', 'piseiro', 'xote', 'baião', 'festa', 'chuva', 'sol',
+    'menina', 'vida', 'cidade', 'sonho', 'beijo', 'céu', 'mar', 'fogueira',
+]
+
+ROOT_GENRES = [
+    'Forró', 'Piseiro', 'Sertanejo', 'Arrocha', 'Brega', 'Axé',
+    'Pagode', 'Funk', 'MPB', 'Gospel', 'Pop', 'Rock',
+]
+
+
+def resolve_scale(value):
+    """'100k' -> 100000 (aceita também números)"""
+    value = str(value).lower()
+    if value in SCALES:
+        return SCALES[value]
+    return int(value)
+
+
+def _title(rng, words=2):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def _create_genres():
+    from apps.genres.models import Genre
+
+    roots = Genre.objects.bulk_create([
+        Genre(name=name, slug=f'bench-{index}') for index, name in enumerate(ROOT_GENRES)
+    ])
+    children = Genre.objects.bulk_create([
+        Genre(name=f'{root.name} {suffix}', slug=f'bench-{root.pk}-{index}', parent=root)
+        for root in roots
+        for index, suffix in enumerate(('Raiz', 'Eletrônico', 'Romântico'))
+    ])
+    # bulk_create não passa pelo save(): preenche o caminho da árvore aqui
+    for genre in roots:
+        genre.path, genre.depth = f'{genre.pk}/', 0
+    for genre in children:
+        genre.path, genre.depth = f'{genre.parent_id}/{genre.pk}/', 1
+    Genre.objects.bulk_update(roots + children, ['path', 'depth'])
+    return roots + children
+
+
+def build_catalog(tracks, seed=42, log=print):
+    """
+    Cria o catálogo sintético com ``tracks`` músicas
+
+    Returns:
+        dict: contagens criadas e amostras de ids/termos para os cenários
+    """
+    from apps.artists.models import Album, Artist
+    from apps.music.models import Music
+    from apps.playlists.models import Playlist, PlaylistMusic
+    from banners.models import Banner
+
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    today = date.today()
+
+    with transaction.atomic():
+        genres = _create_genres()
+
+        artist_count = max(5, tracks // 25)
+        artists = Artist.objects.bulk_create([
+            Artist(stage_name=f'{_title(rng)} {index}', genre=rng.choice(genres))
+            for index in range(artist_count)
+        ], batch_size=BATCH_SIZE)
+        # Peso de cada artista: poucos artistas com catálogo grande
+        artist_weights = [rng.paretovariate(1.2) for _ in artists]
+        log(f"  {len(genres)} gêneros, {len(artists)} artistas")
+
+        albums = []
+        album_artist = {}
+        album_count = max(1, int(tracks * 0.7 / 10))
+        for start in range(0, album_count, BATCH_SIZE):
+            owners = rng.choices(artists, weights=artist_weights, k=min(BATCH_SIZE, album_count - start))
+            batch = Album.objects.bulk_create([
+                Album(
+                    name=_title(rng, 3),
+                    artist=owner,
+                    featured=rng.random() < 0.02,
+                    release_date=today - timedelta(days=rng.randint(0, 3650)),
+                )
+                for owner in owners
+            ])
+            albums.extend(album.pk for album in batch)
+            album_artist.update((album.pk, album.artist_id) for album in batch)
+        log(f"  {len(albums)} álbuns")
+
+        # Faixas: álbuns completos (6 a 14 faixas) e o restante como singles
+        album_slots = []
+        for album_id in albums:
+            album_slots.extend([album_id] * rng.randint(6, 14))
+        album_slots = album_slots[:int(tracks * 0.7)]
+        album_slots.extend([None] * (tracks - len(album_slots)))
+        rng.shuffle(album_slots)
+
+        music_ids = []
+        music_meta = {}
+        for start in range(0, tracks, BATCH_SIZE):
+            batch = []
+            for index in range(start, min(start + BATCH_SIZE, tracks)):
+                album_id = album_slots[index]
+                artist_id = album_artist[album_id] if album_id else rng.choices(artists, weights=artist_weights)[0].pk
+                batch.append(Music(
+                    title=f'{_title(rng)} {index}',
+                    artist_id=artist_id,
+                    album_id=album_id,
+                    genre=rng.choice(genres),
+                    duration=rng.randint(120, 360),
+                    file=f'music/bench/{index}.mp3',
+                    file_size=rng.randint(2, 12) * 1024 * 1024,
+                    streams_count=int(rng.paretovariate(1.1) * 10) - 10,
+                    likes_count=rng.randint(0, 500),
+                    downloads_count=rng.randint(0, 200),
+                    is_featured=rng.random() < 0.01,
+                    release_date=today - timedelta(days=rng.randint(0, 3650)),
+                ))
+            created = Music.objects.bulk_create(batch)
+            music_ids.extend(music.pk for music in created)
+            music_meta.update((music.pk, (music.duration, music.streams_count)) for music in created)
+            log(f"  {len(music_ids)}/{tracks} músicas")
+
+        playlist_count = max(20, tracks // 500)
+        playlists = Playlist.objects.bulk_create([
+            Playlist(name=f'PlayHits {_title(rng)} {index}', is_featured=index < 10, order=index)
+            for index in range(playlist_count)
+        ])
+        # Sorteio com peso na popularidade, sobre uma amostra para não pesar a memória
+        pool = rng.sample(music_ids, min(len(music_ids), 20000))
+        pool_weights = [music_meta[pk][1] + 1 for pk in pool]
+        entries = []
+        for playlist in playlists:
+            chosen = list(dict.fromkeys(rng.choices(pool, weights=pool_weights, k=rng.randint(20, 100))))
+            entries.extend(
+                PlaylistMusic(playlist=playlist, music_id=music_id, position=(index + 1) * PlaylistMusic.POSITION_STEP)
+                for index, music_id in enumerate(chosen)
+            )
+            # Contadores mantidos pelos signals no uso normal (bulk_create não dispara)
+            playlist.tracks_count = len(chosen)
+            playlist.total_duration = sum(music_meta[music_id][0] for music_id in chosen)
+        PlaylistMusic.objects.bulk_create(entries, batch_size=BATCH_SIZE)
+        Playlist.objects.bulk_update(playlists, ['tracks_count', 'total_duration'], batch_size=BATCH_SIZE)
+        log(f"  {len(playlists)} PlayHits, {len(entries)} faixas em PlayHits")
+
+        now = timezone.now()
+        Banner.objects.bulk_create([
+            Banner(
+                name=f'Banner {index}',
+                image=f'banners/bench-{index}.jpg',
+                start_date=now - timedelta(days=rng.randint(1, 30)),
+                end_date=None if index % 3 else now + timedelta(days=rng.randint(1, 30)),
+            )
+            for index in range(12)
+        ])
+
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    sample = random.Random(seed + 1)
+    return {
+        'tracks': tracks,
+        'seed': seed,
+        'build_s': round(time.perf_counter() - started, 2),
+        'counts': {
+            'genres': len(genres),
+            'artists': len(artists),
+            'albums': len(albums),
+            'musics': len(music_ids),
+            'playlists': len(playlists),
+            'playlist_entries': len(entries),
+        },
+        'samples': {
+            'genre': [genre.pk for genre in sample.sample(genres, min(5, len(genres)))],
+            'artist': [artist.pk for artist in sample.sample(artists, min(20, len(artists)))],
+            'album': sample.sample(albums, min(20, len(albums))),
+            'music': sample.sample(music_ids, min(20, len(music_ids))),
+            'playlist': [playlist.pk for playlist in sample.sample(playlists, min(20, len(playlists)))],
+            'word': sample.sample(WORDS, 5),
+        },
+    }
+
+
+def catalog_samples(seed=42):
+    """Amostras de ids de um catálogo já existente (ex.: no banco do servidor)"""
+    from apps.artists.models import Album, Artist
+    from apps.genres.models import Genre
+    from apps.music.models import Music
+    from apps.playlists.models import Playlist
+
+    sample = random.Random(seed + 1)
+
+    def ids(model, k):
+        values = list(model.objects.order_by('pk').values_list('pk', flat=True)[:5000])
+        return sample.sample(values, min(k, len(values)))
+
+    return {
+        'genre': ids(Genre, 5),
+        'artist': ids(Artist, 20),
+        'album': ids(Album, 20),
+        'music': ids(Music, 20),
+        'playlist': ids(Playlist, 20),
+        'word': sample.sample(WORDS, 5),
+    }
+
+
+@contextmanager
+def benchmark_database():
+    """Banco de teste descartável (mesmo backend das settings), removido ao sair"""
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield connection.settings_dict['NAME']
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', default='1k', help=f"{', '.join(SCALES)} ou número de músicas")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--yes', action='store_true', help='Confirma a escrita no banco configurado')
+    args = parser.parse_args()
+
+    if not args.yes:
+        print(f"Isto grava o catálogo sintético em {connection.settings_dict['NAME']}; use --yes para confirmar.")
+        return 1
+
+    tracks = resolve_scale(args.scale)
+    print(f"Gerando catálogo com {tracks} músicas...")
+    result = build_catalog(tracks, seed=args.seed)
+    print(f"Concluído em {result['build_s']}s: {result['counts']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
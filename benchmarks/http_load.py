@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Gerador de carga HTTP para comparar os modos WSGI e ASGI
+
+Dispara requisições GET concorrentes (conexões keep-alive) contra uma lista
+de endpoints por um tempo fixo e reporta vazão, erros e latências
+(p50/p95/p99/máx) por endpoint, em JSON.
+
+Uso (mesmo número de workers nos dois modos):
+    SERVER_MODE=wsgi GUNICORN_WORKERS=3 ./entrypoint_prod.sh
+    python benchmarks/http_load.py --base-url http://localhost:3030 \\
+        --concurrency 64 --duration 30 --output wsgi.json
+
+    SERVER_MODE=asgi GUNICORN_WORKERS=3 ./entrypoint_prod.sh
+    python benchmarks/http_load.py --base-url http://localhost:3030 \\
+        --concurrency 64 --duration 30 --output asgi.json
+
+    python benchmarks/http_load.py --compare wsgi.json asgi.json
+"""
+import argparse
+import http.client
+import json
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+# Rotas de leitura mais acessadas (home, banners, playlists e autocomplete)
+DEFAULT_PATHS = [
+    '/api/banners/',
+    '/api/playlists/',
+    '/api/playlists/?featured=true',
+    '/api/music/trending/',
+    '/api/music/popular/',
+    '/api/music/featured/',
+    '/api/music/search/?q=forro',
+]
+
+
+def percentile(sorted_values, fraction):
+    """Percentil por interpolação linear sobre valores já ordenados"""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    weight = position - lower
+    return sorted_values[lower] * (1 - weight) + sorted_values[upper] * weight
+
+
+def summarize(latencies_ms, errors, elapsed):
+    """Resumo estatístico das latências (em milissegundos)"""
+    values = sorted(latencies_ms)
+    return {
+        'requests': len(values),
+        'errors': errors,
+        'throughput_rps': round(len(values) / elapsed, 2) if elapsed else 0,
+        'p50_ms': round(percentile(values, 0.50), 2) if values else None,
+        'p95_ms': round(percentile(values, 0.95), 2) if values else None,
+        'p99_ms': round(percentile(values, 0.99), 2) if values else None,
+        'max_ms': round(values[-1], 2) if values else None,
+    }
+
+
+class LoadWorker(threading.Thread):
+    """Cliente que repete requisições em uma conexão keep-alive até o prazo"""
+
+    def __init__(self, base_url, paths, deadline, offset, timeout):
+        super().__init__(daemon=True)
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.paths = paths
+        self.deadline = deadline
+        self.offset = offset
+        self.timeout = timeout
+        self.latencies = {path: [] for path in paths}
+        self.errors = {path: 0 for path in paths}
+
+    def connect(self):
+        connection_class = (
+            http.client.HTTPSConnection if self.scheme == 'https' else http.client.HTTPConnection
+        )
+        return connection_class(self.host, self.port, timeout=self.timeout)
+
+    def run(self):
+        connection = self.connect()
+        index = self.offset
+        while time.perf_counter() < self.deadline:
+            path = self.paths[index % len(self.paths)]
+            index += 1
+            started = time.perf_counter()
+            try:
+                connection.request('GET', path, headers={'Accept': 'application/json'})
+                response = connection.getresponse()
+                response.read()
+                if response.status >= 400:
+                    self.errors[path] += 1
+                    continue
+            except (OSError, http.client.HTTPException):
+                self.errors[path] += 1
+                connection.close()
+                connection = self.connect()
+                continue
+            self.latencies[path].append((time.perf_counter() - started) * 1000)
+        connection.close()
+
+
+def run_load(base_url, paths, concurrency, duration, timeout=30):
+    """Executa a carga e retorna o relatório por endpoint e total"""
+    started = time.perf_counter()
+    deadline = started + duration
+    workers = [
+        LoadWorker(base_url, paths, deadline, offset, timeout)
+        for offset in range(concurrency)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    endpoints = {}
+    all_latencies = []
+    total_errors = 0
+    for path in paths:
+        latencies = [value for worker in workers for value in worker.latencies[path]]
+        errors = sum(worker.errors[path] for worker in workers)
+        endpoints[path] = summarize(latencies, errors, elapsed)
+        all_latencies.extend(latencies)
+        total_errors += errors
+
+    return {
+        'base_url': base_url,
+        'concurrency': concurrency,
+        'duration_s': duration,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'total': summarize(all_latencies, total_errors, elapsed),
+        'endpoints': endpoints,
+    }
+
+
+def compare(baseline_path, candidate_path):
+    """Compara dois relatórios (ex.: WSGI x ASGI) e imprime a variação"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    with open(candidate_path) as f:
+        candidate = json.load(f)
+
+    print(f"{'endpoint':40} {'métrica':>14} {'base':>10} {'novo':>10} {'variação':>9}")
+    rows = [('TOTAL', baseline['total'], candidate['total'])] + [
+        (path, stats, candidate['endpoints'].get(path, {}))
+        for path, stats in baseline['endpoints'].items()
+    ]
+    for name, old, new in rows:
+        for metric in ('throughput_rps', 'p50_ms', 'p99_ms', 'errors'):
+            before, after = old.get(metric), new.get(metric)
+            if before in (None, 0) or after is None:
+                change = ''
+            else:
+                change = f"{(after - before) / before * 100:+.1f}%"
+            print(f"{name[:40]:40} {metric:>14} {str(before):>10} {str(after):>10} {change:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default='http://localhost:3030')
+    parser.add_argument('--paths', nargs='+', default=DEFAULT_PATHS)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--output', help='Arquivo JSON para salvar o relatório')
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'NOVO'),
+                        help='Compara dois relatórios JSON em vez de gerar carga')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return 0
+
+    report = run_load(args.base_url, args.paths, args.concurrency, args.duration)
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    print(output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,4 @@
+# Carrega o Celery junto com o Django para que @shared_task use esta aplicação
+from .celery import app as celery_app
+
+__all__ = ('celery_app',)
@@ -5,6 +5,11 @@ class EhitBackendConfig(AppConfig):
     name = 'ehit_backend'
     
     def ready(self):
+        # Registra o contador de conexões usado nas métricas do banco
+        from . import db_pool  # noqa: F401
+        # Instala o coletor de queries nas conexões (Server-Timing)
+        from . import instrumentation  # noqa: F401
+
         from django.contrib import admin
         admin.site.site_header = "Éhit Administração"
         admin.site.site_title = "Éhit Administração"
@@ -0,0 +1,92 @@
+"""
+Cliente de cache assíncrono para as views async (modo ASGI)
+
+Usa ``redis.asyncio`` direto no Redis configurado em ``CACHES['default']``,
+reaproveitando o formato de chave (prefixo + versão) e o serializer/compressor
+do django-redis. Assim as views sync e async leem e gravam as mesmas entradas,
+e a invalidação por padrão em ``apps/cache_utils.py`` continua valendo.
+
+Com outros backends (ex.: LocMemCache em desenvolvimento) cai para os métodos
+async do próprio cache do Django.
+"""
+import asyncio
+import logging
+import time
+import weakref
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .instrumentation import record_cache
+from .metrics import record_cache_lookup
+
+logger = logging.getLogger(__name__)
+
+# Um client por event loop: em WSGI cada view async roda em um loop próprio
+_clients = weakref.WeakKeyDictionary()
+
+
+def is_redis_cache():
+    """Verifica se o cache padrão é o django-redis"""
+    return settings.CACHES['default']['BACKEND'] == 'django_redis.cache.RedisCache'
+
+
+def _get_client():
+    import redis.asyncio as aioredis
+
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        options = settings.CACHES['default'].get('OPTIONS', {})
+        pool_kwargs = options.get('CONNECTION_POOL_KWARGS', {})
+        client = aioredis.from_url(
+            settings.CACHES['default']['LOCATION'],
+            max_connections=pool_kwargs.get('max_connections', 50),
+            socket_timeout=options.get('SOCKET_TIMEOUT', 5),
+            socket_connect_timeout=options.get('SOCKET_CONNECT_TIMEOUT', 5),
+        )
+        _clients[loop] = client
+    return client
+
+
+async def aget(key, default=None):
+    """Busca uma chave do cache sem bloquear o event loop"""
+    if not is_redis_cache():
+        return await cache.aget(key, default)
+
+    started = time.perf_counter()
+    try:
+        value = await _get_client().get(cache.make_key(key))
+    except Exception as e:
+        logger.warning(f"Erro ao ler cache async {key}: {e}")
+        return default
+    record_cache(started, gets=1, hits=int(value is not None))
+    record_cache_lookup(key, value is not None)
+
+    if value is None:
+        return default
+    return cache.client.decode(value)
+
+
+async def aset(key, value, timeout):
+    """Grava uma chave no cache sem bloquear o event loop"""
+    if not is_redis_cache():
+        return await cache.aset(key, value, timeout)
+
+    started = time.perf_counter()
+    try:
+        await _get_client().set(cache.make_key(key), cache.client.encode(value), ex=int(timeout))
+        record_cache(started, sets=1)
+    except Exception as e:
+        logger.warning(f"Erro ao gravar cache async {key}: {e}")
+
+
+async def adelete(key):
+    """Remove uma chave do cache sem bloquear o event loop"""
+    if not is_redis_cache():
+        return await cache.adelete(key)
+
+    try:
+        await _get_client().delete(cache.make_key(key))
+    except Exception as e:
+        logger.warning(f"Erro ao remover cache async {key}: {e}")
@@ -0,0 +1,69 @@
+"""
+Paginação para views async (modo ASGI)
+
+Reproduz o formato do ``StandardResultsSetPagination`` do DRF
+(count/next/previous/results) usando o ORM assíncrono do Django.
+"""
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class InvalidPage(Exception):
+    """Página solicitada inexistente ou inválida"""
+
+
+def _parse_page(request, page_size, max_page_size):
+    """Lê ``page`` e ``page_size`` da query string"""
+    try:
+        size = int(request.GET.get('page_size', page_size))
+        size = min(size, max_page_size) if size > 0 else page_size
+    except (TypeError, ValueError):
+        size = page_size
+
+    try:
+        page = int(request.GET.get('page', 1))
+    except (TypeError, ValueError):
+        raise InvalidPage()
+
+    return page, size
+
+
+def _page_metadata(request, count, page, size):
+    """Monta count/next/previous; levanta ``InvalidPage`` fora do intervalo"""
+    num_pages = max(1, (count + size - 1) // size)
+    if page < 1 or page > num_pages:
+        raise InvalidPage()
+
+    url = request.build_absolute_uri()
+    next_url = replace_query_param(url, 'page', page + 1) if page < num_pages else None
+    if page <= 1:
+        previous_url = None
+    elif page == 2:
+        previous_url = remove_query_param(url, 'page')
+    else:
+        previous_url = replace_query_param(url, 'page', page - 1)
+
+    return {'count': count, 'next': next_url, 'previous': previous_url}
+
+
+async def apaginate(request, queryset, page_size=20, max_page_size=100):
+    """
+    Retorna (objetos_da_página, metadados) para o queryset
+
+    Os metadados têm as chaves ``count``, ``next`` e ``previous``; levanta
+    ``InvalidPage`` para páginas fora do intervalo, como o DRF.
+    """
+    page, size = _parse_page(request, page_size, max_page_size)
+    metadata = _page_metadata(request, await queryset.acount(), page, size)
+
+    start = (page - 1) * size
+    objects = [obj async for obj in queryset[start:start + size]]
+    return objects, metadata
+
+
+def paginate_list(request, items, page_size=20, max_page_size=100):
+    """Mesmo que ``apaginate`` para uma lista já carregada (ex.: vinda do cache)"""
+    page, size = _parse_page(request, page_size, max_page_size)
+    metadata = _page_metadata(request, len(items), page, size)
+
+    start = (page - 1) * size
+    return items[start:start + size], metadata
@@ -0,0 +1,18 @@
+"""
+Aplicação Celery do projeto
+
+Configuração lida das settings com prefixo ``CELERY_``; as tasks ficam em
+``apps/<app>/tasks.py`` e são descobertas automaticamente.
+
+Worker (``-B`` também roda as tasks periódicas de ``CELERY_BEAT_SCHEDULE``):
+    celery -A ehit_backend worker -B -l info
+"""
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ehit_backend.settings')
+
+app = Celery('ehit_backend')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
@@ -0,0 +1,74 @@
+"""
+Métricas das conexões com o banco de dados
+
+Expõe o estado das conexões de acordo com ``DB_POOL_MODE``:
+
+- ``pool``: estatísticas do pool do psycopg 3 (conexões em uso, livres,
+  requisições aguardando e latência média de aquisição);
+- ``persistent``/``none``: quantidade de conexões abertas pelo processo,
+  contadas pelo signal ``connection_created``.
+
+Os valores são por processo (cada worker do gunicorn tem o seu pool).
+"""
+import threading
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+_lock = threading.Lock()
+_connections_opened = {}
+
+
+def _count_connection(sender, connection, **kwargs):
+    """Conta as conexões novas abertas por alias"""
+    with _lock:
+        _connections_opened[connection.alias] = _connections_opened.get(connection.alias, 0) + 1
+
+
+connection_created.connect(_count_connection, dispatch_uid='ehit_db_pool_connection_created')
+
+
+def get_pool_stats(alias='default'):
+    """
+    Retorna um dicionário com o estado das conexões do alias informado
+    """
+    connection = connections[alias]
+    db_settings = connection.settings_dict
+    stats = {
+        'mode': getattr(settings, 'DB_POOL_MODE', 'none'),
+        'vendor': connection.vendor,
+        'conn_max_age': db_settings.get('CONN_MAX_AGE', 0),
+        'health_checks': db_settings.get('CONN_HEALTH_CHECKS', False),
+        'pgbouncer_transaction_mode': getattr(settings, 'DB_PGBOUNCER_TRANSACTION_MODE', False),
+        'connections_opened': _connections_opened.get(alias, 0),
+    }
+
+    pool = getattr(connection, 'pool', None)
+    if pool is None:
+        return stats
+
+    raw = pool.get_stats()
+    pool_size = raw.get('pool_size', 0)
+    pool_available = raw.get('pool_available', 0)
+    requests_num = raw.get('requests_num', 0)
+    requests_wait_ms = raw.get('requests_wait_ms', 0)
+    # O pool só é aberto na primeira conexão do processo
+    is_open = not getattr(pool, 'closed', False)
+    stats['pool'] = {
+        'open': is_open,
+        'min_size': pool.min_size,
+        'max_size': pool.max_size,
+        'size': pool_size,
+        'in_use': pool_size - pool_available if is_open else 0,
+        'available': pool_available,
+        'waiting': raw.get('requests_waiting', 0),
+        'requests': requests_num,
+        'requests_queued': raw.get('requests_queued', 0),
+        'requests_timeouts': raw.get('requests_errors', 0),
+        'acquire_wait_ms_total': requests_wait_ms,
+        'acquire_wait_ms_avg': round(requests_wait_ms / requests_num, 2) if requests_num else 0,
+        'connections_errors': raw.get('connections_errors', 0),
+        'connections_lost': raw.get('connections_lost', 0),
+    }
+    return stats
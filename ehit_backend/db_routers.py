@@ -0,0 +1,194 @@
+"""
+Roteamento de leituras do catálogo para réplicas do PostgreSQL
+
+- Leituras dos apps de catálogo (músicas, artistas, álbuns, playlists,
+  gêneros e banners) em requisições GET/HEAD/OPTIONS vão para uma réplica;
+- qualquer escrita na requisição fixa o restante dela no primário, e o
+  ``ReplicaRoutingMiddleware`` fixa as próximas requisições do cliente por
+  ``DATABASE_REPLICA_PIN_SECONDS`` (cookie e cache por usuário), garantindo
+  que ele leia o que acabou de escrever;
+- réplicas com atraso de replicação acima de ``DATABASE_REPLICA_MAX_LAG`` (ou
+  inacessíveis) são ignoradas e a leitura volta para o primário.
+
+Fora de requisições (admin commands, Celery, testes) tudo vai para o primário.
+"""
+import contextvars
+import logging
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.utils.deprecation import MiddlewareMixin
+
+logger = logging.getLogger(__name__)
+
+CATALOG_APP_LABELS = {'music', 'artists', 'playlists', 'genres', 'banners'}
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PIN_COOKIE_NAME = 'ehit_db_pin'
+
+# Estado da requisição atual (None fora de requisições)
+_request_state = contextvars.ContextVar('ehit_db_request_state', default=None)
+
+# Atraso medido por réplica: alias -> (verificado_em, atraso_em_segundos)
+_lag_lock = threading.Lock()
+_lag_cache = {}
+
+
+class _RequestState:
+    """Decisão de roteamento de uma requisição"""
+
+    def __init__(self, request, use_replica):
+        self.request = request
+        self.use_replica = use_replica
+        self.wrote = False
+        # Pin por usuário já consultado no cache nesta requisição (usuário, fixado)
+        self.pin_user_id = None
+        self.pinned = False
+
+
+def get_replica_aliases():
+    return list(getattr(settings, 'DATABASE_REPLICAS', []))
+
+
+def _pin_seconds():
+    return getattr(settings, 'DATABASE_REPLICA_PIN_SECONDS', 10)
+
+
+def _user_pin_key(user_id):
+    return f"db_pin_user_{user_id}"
+
+
+def measure_replica_lag(alias):
+    """
+    Atraso de replicação da réplica em segundos
+
+    Zero quando a réplica já aplicou todo o WAL recebido; None se não for
+    possível medir (réplica fora do ar).
+    """
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return 0.0
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+            )
+            row = cursor.fetchone()
+        return float(row[0] or 0)
+    except Exception as e:
+        logger.warning(f"Erro ao medir atraso da réplica {alias}: {e}")
+        return None
+
+
+def get_replica_lag(alias):
+    """Atraso da réplica, medido no máximo a cada DATABASE_REPLICA_LAG_CHECK_INTERVAL segundos"""
+    interval = getattr(settings, 'DATABASE_REPLICA_LAG_CHECK_INTERVAL', 5)
+    now = time.monotonic()
+    with _lag_lock:
+        cached = _lag_cache.get(alias)
+        if cached and now - cached[0] < interval:
+            return cached[1]
+
+    lag = measure_replica_lag(alias)
+    with _lag_lock:
+        _lag_cache[alias] = (now, lag)
+    return lag
+
+
+def get_healthy_replicas():
+    """Réplicas acessíveis com atraso dentro do limite"""
+    max_lag = getattr(settings, 'DATABASE_REPLICA_MAX_LAG', 5)
+    healthy = []
+    for alias in get_replica_aliases():
+        lag = get_replica_lag(alias)
+        if lag is not None and lag <= max_lag:
+            healthy.append(alias)
+    return healthy
+
+
+def _is_pinned(state):
+    """Verifica se o cliente escreveu recentemente (cookie ou cache por usuário)"""
+    request = state.request
+    if request.COOKIES.get(PIN_COOKIE_NAME):
+        return True
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return False
+    # Uma consulta ao cache por requisição, não por query (o usuário do DRF só aparece na view)
+    if state.pin_user_id != user.pk:
+        state.pin_user_id = user.pk
+        state.pinned = bool(cache.get(_user_pin_key(user.pk)))
+    return state.pinned
+
+
+class CatalogReplicaRouter:
+    """Envia leituras seguras do catálogo para réplicas saudáveis"""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label not in CATALOG_APP_LABELS:
+            return None
+
+        state = _request_state.get()
+        if state is None or not state.use_replica or state.wrote:
+            return None
+
+        # Usuário autenticado pelo DRF só é conhecido dentro da view
+        if _is_pinned(state):
+            state.use_replica = False
+            return None
+
+        replicas = get_healthy_replicas()
+        if not replicas:
+            return None
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state.wrote = True
+            state.pinned = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {'default', *get_replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Réplicas recebem o schema pela replicação
+        if db in get_replica_aliases():
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware(MiddlewareMixin):
+    """Define o roteamento da requisição e fixa o cliente no primário após escritas"""
+
+    def process_request(self, request):
+        use_replica = request.method in SAFE_METHODS and bool(get_replica_aliases())
+        request._db_route_state = _RequestState(request, use_replica)
+        request._db_route_token = _request_state.set(request._db_route_state)
+
+    def process_response(self, request, response):
+        state = getattr(request, '_db_route_state', None)
+        if state is None:
+            return response
+
+        if state.wrote or request.method not in SAFE_METHODS:
+            pin_seconds = _pin_seconds()
+            response.set_cookie(PIN_COOKIE_NAME, '1', max_age=pin_seconds, httponly=True, samesite='Lax')
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                cache.set(_user_pin_key(user.pk), 1, pin_seconds)
+
+        try:
+            _request_state.reset(request._db_route_token)
+        except ValueError:
+            # Contexto diferente (ex.: resposta finalizada em outra thread)
+            _request_state.set(None)
+        return response
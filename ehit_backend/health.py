@@ -0,0 +1,155 @@
+"""
+Verificações de saúde em segundo plano
+
+As dependências (banco, Redis, arquivos estáticos, variáveis de ambiente) são
+verificadas por uma thread de cada processo a cada ``HEALTH_CHECK_INTERVAL``
+segundos; ``/health/`` e ``/health/ready`` só devolvem o último resultado.
+Assim a carga gerada pelos probes (Docker, nginx, monitoramento externo) é
+constante, qualquer que seja a frequência deles.
+
+A thread é iniciada na primeira consulta do processo (depois do fork dos
+workers do gunicorn), que faz a primeira verificação de forma síncrona. Um
+resultado mais velho que ``HEALTH_CHECK_STALE_AFTER`` intervalos (thread
+travada em uma dependência) é reportado como indisponível.
+
+Com ``HEALTH_CHECK_INTERVAL = 0`` não há thread: cada consulta verifica na hora.
+"""
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+from .async_cache import is_redis_cache
+from .db_pool import get_pool_stats
+from .db_routers import get_replica_aliases, get_replica_lag
+
+logger = logging.getLogger(__name__)
+
+HEALTH_CHECK_STALE_AFTER = 3
+READINESS_SERVICES = ("database", "redis")
+
+_lock = threading.Lock()
+_result = None
+_checked_at = 0.0
+_thread_pid = None
+
+
+def _check_database():
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        database = {
+            "status": "healthy",
+            "type": connection.vendor,
+            "connections": get_pool_stats(),
+        }
+        # Atraso das réplicas de leitura (None = inacessível)
+        replicas = get_replica_aliases()
+        if replicas:
+            database["replicas_lag_seconds"] = {alias: get_replica_lag(alias) for alias in replicas}
+        return database
+    except Exception as e:
+        return {"status": "unhealthy", "error": str(e)}
+    finally:
+        # A thread não passa pelo request_finished: fecha conexões vencidas aqui
+        close_old_connections()
+
+
+def _check_cache():
+    try:
+        if is_redis_cache():
+            from django_redis import get_redis_connection
+
+            get_redis_connection("default").ping()
+        else:
+            cache.get('health_check')
+        return {"status": "healthy", "type": "redis" if is_redis_cache() else "locmem"}
+    except Exception as e:
+        return {"status": "unhealthy", "error": str(e)}
+
+
+def _check_static_files():
+    static_root = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'staticfiles')
+    if os.path.exists(static_root):
+        return {"status": "healthy", "path": static_root}
+    return {"status": "warning", "message": "Static files directory not found"}
+
+
+def _check_environment():
+    missing_vars = []
+    if not settings.SECRET_KEY:
+        missing_vars.append('SECRET_KEY')
+    if not os.getenv('DATABASE_URL'):
+        missing_vars.append('DATABASE_URL')
+    if missing_vars:
+        return {"status": "unhealthy", "missing_variables": missing_vars}
+    return {"status": "healthy"}
+
+
+def run_checks():
+    """Verifica todas as dependências e guarda o resultado"""
+    global _result, _checked_at
+    services = {
+        "database": _check_database(),
+        "redis": _check_cache(),
+        "static_files": _check_static_files(),
+        "environment": _check_environment(),
+    }
+    healthy = all(service["status"] != "unhealthy" for service in services.values())
+    result = {
+        "status": "healthy" if healthy else "unhealthy",
+        # Pronto para receber tráfego: depende só do banco e do Redis
+        "ready": all(services[name]["status"] == "healthy" for name in READINESS_SERVICES),
+        "timestamp": timezone.now().isoformat(),
+        "services": services,
+    }
+    with _lock:
+        _result, _checked_at = result, time.monotonic()
+    return result
+
+
+def _loop(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            run_checks()
+        except Exception:
+            # Mantém a thread viva: a próxima rodada tenta de novo
+            logger.exception("Erro no health check em segundo plano")
+
+
+def _ensure_started(interval):
+    """Inicia a thread uma vez por processo (workers herdam o módulo do master)"""
+    global _thread_pid
+    pid = os.getpid()
+    with _lock:
+        if _thread_pid == pid:
+            return
+        _thread_pid = pid
+    run_checks()
+    threading.Thread(target=_loop, args=(interval,), name='health-check', daemon=True).start()
+
+
+def get_health():
+    """Último resultado das verificações (com a idade em segundos)"""
+    interval = getattr(settings, 'HEALTH_CHECK_INTERVAL', 10)
+    if interval <= 0:
+        return dict(run_checks(), age_seconds=0.0)
+
+    _ensure_started(interval)
+    with _lock:
+        result, checked_at = _result, _checked_at
+    if result is None:
+        # Outra requisição iniciou a thread e ainda faz a primeira verificação
+        result, checked_at = run_checks(), time.monotonic()
+    result, age = dict(result), time.monotonic() - checked_at
+    result["age_seconds"] = round(age, 1)
+    if age > interval * HEALTH_CHECK_STALE_AFTER:
+        result["status"], result["ready"] = "unhealthy", False
+        result["error"] = "health check desatualizado"
+    return result
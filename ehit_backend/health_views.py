@@ -1,118 +1,70 @@
-from django.http import JsonResponse
+import hmac
+
+from django.http import HttpResponse, JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
-from django.db import connection
-from django.core.cache import cache
-import redis
-import os
+
+from .health import get_health
+from .metrics import render_metrics
+
 
 @require_http_methods(["GET"])
 @csrf_exempt
 def health_check(request):
     """
     Endpoint de health check para monitoramento da aplicação
+
+    Devolve o último resultado das verificações em segundo plano (health.py),
+    sem consultar as dependências na requisição.
+    """
+    health_status = get_health()
+    return JsonResponse(health_status, status=200 if health_status["status"] == "healthy" else 503)
+
+
+@require_http_methods(["GET", "HEAD"])
+@csrf_exempt
+def liveness_check(request):
+    """
+    Liveness: o processo responde (sem I/O)
+    """
+    return JsonResponse({"status": "alive"})
+
+
+@require_http_methods(["GET", "HEAD"])
+@csrf_exempt
+def readiness_check(request):
+    """
+    Readiness: banco e Redis disponíveis segundo a última verificação
     """
-    health_status = {
-        "status": "healthy",
-        "timestamp": None,
-        "services": {}
+    health_status = get_health()
+    body = {
+        "status": "ready" if health_status["ready"] else "unavailable",
+        "age_seconds": health_status["age_seconds"],
+        "services": {name: service["status"] for name, service in health_status["services"].items()},
     }
-    
-    try:
-        from django.utils import timezone
-        health_status["timestamp"] = timezone.now().isoformat()
-    except Exception as e:
-        health_status["timestamp"] = "unknown"
-    
-    # Verificar banco de dados
-    try:
-        with connection.cursor() as cursor:
-            cursor.execute("SELECT 1")
-            health_status["services"]["database"] = {
-                "status": "healthy",
-                "type": "postgresql"
-            }
-    except Exception as e:
-        health_status["services"]["database"] = {
-            "status": "unhealthy",
-            "error": str(e)
-        }
-        health_status["status"] = "unhealthy"
-    
-    # Verificar Redis
-    try:
-        cache.set('health_check', 'ok', 10)
-        cache_result = cache.get('health_check')
-        if cache_result == 'ok':
-            health_status["services"]["redis"] = {
-                "status": "healthy",
-                "type": "redis"
-            }
-        else:
-            raise Exception("Cache test failed")
-    except Exception as e:
-        health_status["services"]["redis"] = {
-            "status": "unhealthy",
-            "error": str(e)
-        }
-        health_status["status"] = "unhealthy"
-    
-    # Verificar arquivos estáticos
-    try:
-        static_root = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'staticfiles')
-        if os.path.exists(static_root):
-            health_status["services"]["static_files"] = {
-                "status": "healthy",
-                "path": static_root
-            }
-        else:
-            health_status["services"]["static_files"] = {
-                "status": "warning",
-                "message": "Static files directory not found"
-            }
-    except Exception as e:
-        health_status["services"]["static_files"] = {
-            "status": "unhealthy",
-            "error": str(e)
-        }
-    
-    # Verificar variáveis de ambiente críticas
-    try:
-        from django.conf import settings
-        missing_vars = []
-        
-        # Verificar SECRET_KEY através do Django settings
-        print(f"DEBUG: SECRET_KEY = {repr(settings.SECRET_KEY)}")
-        print(f"DEBUG: SECRET_KEY length = {len(settings.SECRET_KEY) if settings.SECRET_KEY else 0}")
-        if not settings.SECRET_KEY:
-            print("DEBUG: SECRET_KEY is missing or empty")
-            missing_vars.append('SECRET_KEY')
-        else:
-            print("DEBUG: SECRET_KEY is present")
-        
-        # Verificar DATABASE_URL através de variável de ambiente
-        if not os.getenv('DATABASE_URL'):
-            missing_vars.append('DATABASE_URL')
-        
-        if missing_vars:
-            health_status["services"]["environment"] = {
-                "status": "unhealthy",
-                "missing_variables": missing_vars
-            }
-            health_status["status"] = "unhealthy"
-        else:
-            health_status["services"]["environment"] = {
-                "status": "healthy"
-            }
-    except Exception as e:
-        health_status["services"]["environment"] = {
-            "status": "unhealthy",
-            "error": str(e)
-        }
-        health_status["status"] = "unhealthy"
-    
-    # Determinar status HTTP
-    if health_status["status"] == "healthy":
-        return JsonResponse(health_status, status=200)
-    else:
-        return JsonResponse(health_status, status=503)
+    return JsonResponse(body, status=200 if health_status["ready"] else 503)
+
+
+def _metrics_allowed(request):
+    """Token (METRICS_TOKEN) ou IP liberado; em DEBUG sem token, sempre liberado"""
+    from django.conf import settings
+
+    token = settings.METRICS_TOKEN
+    if token:
+        authorization = request.META.get('HTTP_AUTHORIZATION', '')
+        return hmac.compare_digest(authorization, f'Bearer {token}')
+    if settings.DEBUG:
+        return True
+    # REMOTE_ADDR e não X-Forwarded-For: o nginx bloqueia /metrics, a coleta vai direto ao gunicorn
+    return request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS
+
+
+@require_http_methods(["GET"])
+def metrics_view(request):
+    """
+    Métricas no formato texto do Prometheus (agregadas entre os workers)
+    """
+    if not _metrics_allowed(request):
+        return HttpResponse(status=403)
+    body, content_type = render_metrics()
+    return HttpResponse(body, content_type=content_type)
@@ -0,0 +1,182 @@
+"""
+Coleta de métricas por requisição (banco, cache e serialização)
+
+As métricas ficam em um ``ContextVar`` ativado pelo
+``ServerTimingMiddleware``; fora de uma requisição os coletores não fazem nada.
+
+- banco: um execute wrapper instalado em cada conexão nova (signal
+  ``connection_created``) conta queries e tempo;
+- cache: ``InstrumentedRedisClient`` (CLIENT_CLASS do django-redis) e
+  ``InstrumentedLocMemCache`` contam gets, hits, misses, sets e bytes (e
+  alimentam o hit/miss por família de chave do ``/metrics``);
+- serialização: ``TimedJSONRenderer`` mede o tempo de renderização do DRF.
+"""
+import contextvars
+import time
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.backends.signals import connection_created
+from django_redis.client import DefaultClient
+from rest_framework.renderers import JSONRenderer
+
+from .metrics import record_cache_lookup
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+_MISSING = object()
+
+
+class RequestMetrics:
+    """Contadores de uma requisição (tempos em segundos)"""
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.cache_gets = 0
+        self.cache_hits = 0
+        self.cache_sets = 0
+        self.cache_time = 0.0
+        self.cache_bytes_read = 0
+        self.cache_bytes_written = 0
+        self.serialize_time = 0.0
+
+    @property
+    def cache_misses(self):
+        return self.cache_gets - self.cache_hits
+
+
+def start_request():
+    """Ativa um novo conjunto de métricas para o contexto atual"""
+    metrics = RequestMetrics()
+    _current.set(metrics)
+    return metrics
+
+
+def end_request():
+    _current.set(None)
+
+
+def current_metrics():
+    """Métricas da requisição em andamento (None fora de uma requisição)"""
+    return _current.get()
+
+
+def record_cache(started=None, gets=0, hits=0, sets=0, bytes_read=0, bytes_written=0):
+    metrics = _current.get()
+    if metrics is None:
+        return
+    if started is not None:
+        metrics.cache_time += time.perf_counter() - started
+    metrics.cache_gets += gets
+    metrics.cache_hits += hits
+    metrics.cache_sets += sets
+    metrics.cache_bytes_read += bytes_read
+    metrics.cache_bytes_written += bytes_written
+
+
+def _size(value):
+    return len(value) if isinstance(value, (bytes, bytearray, str)) else 0
+
+
+# =============================================================================
+# BANCO DE DADOS
+# =============================================================================
+
+def _query_wrapper(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_queries += 1
+        metrics.db_time += time.perf_counter() - started
+
+
+def _install_query_wrapper(sender, connection, **kwargs):
+    if _query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_query_wrapper)
+
+
+connection_created.connect(_install_query_wrapper, dispatch_uid='ehit_instrumentation_query_wrapper')
+
+
+# =============================================================================
+# CACHE
+# =============================================================================
+
+class InstrumentedRedisClient(DefaultClient):
+    """Client do django-redis que registra gets, hits e bytes trafegados"""
+
+    def get(self, key, default=None, version=None, client=None):
+        started = time.perf_counter()
+        value = super().get(key, default=_MISSING, version=version, client=client)
+        record_cache(started, gets=1, hits=int(value is not _MISSING))
+        record_cache_lookup(key, value is not _MISSING)
+        return default if value is _MISSING else value
+
+    def get_many(self, keys, version=None, client=None):
+        started = time.perf_counter()
+        keys = list(keys)
+        values = super().get_many(keys, version=version, client=client)
+        record_cache(started, gets=len(keys), hits=len(values))
+        for key in keys:
+            record_cache_lookup(key, key in values)
+        return values
+
+    def set(self, *args, **kwargs):
+        started = time.perf_counter()
+        result = super().set(*args, **kwargs)
+        record_cache(started, sets=1)
+        return result
+
+    def decode(self, value):
+        # Também usado pelo cache async (ehit_backend/async_cache.py)
+        record_cache(bytes_read=_size(value))
+        return super().decode(value)
+
+    def encode(self, value):
+        encoded = super().encode(value)
+        record_cache(bytes_written=_size(encoded))
+        return encoded
+
+
+class InstrumentedLocMemCache(LocMemCache):
+    """LocMemCache (desenvolvimento) com as mesmas métricas do Redis"""
+
+    def get(self, key, default=None, version=None):
+        started = time.perf_counter()
+        value = super().get(key, _MISSING, version)
+        hit = value is not _MISSING
+        stored = self._cache.get(self.make_key(key, version)) if hit else None
+        record_cache(started, gets=1, hits=int(hit), bytes_read=_size(stored))
+        record_cache_lookup(key, hit)
+        return value if hit else default
+
+    def set(self, key, value, timeout=None, version=None):
+        started = time.perf_counter()
+        super().set(key, value, timeout, version)
+        record_cache(started, sets=1)
+
+    def _set(self, key, value, timeout=None):
+        # value já serializado (pickle)
+        record_cache(bytes_written=_size(value))
+        super()._set(key, value, timeout)
+
+
+# =============================================================================
+# SERIALIZAÇÃO
+# =============================================================================
+
+class TimedJSONRenderer(JSONRenderer):
+    """JSONRenderer que registra o tempo de serialização da resposta"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        started = time.perf_counter()
+        try:
+            return super().render(data, accepted_media_type, renderer_context)
+        finally:
+            metrics = _current.get()
+            if metrics is not None:
+                metrics.serialize_time += time.perf_counter() - started
@@ -0,0 +1,208 @@
+"""
+Métricas no formato do Prometheus (endpoint ``/metrics``)
+
+- latência por view (nome da URL) e método, respostas por status e número de
+  queries por requisição, alimentados pelo ``ServerTimingMiddleware``;
+- consultas ao cache por família de chave (trending, autocomplete, listas...)
+  com hit/miss, registradas pelos clients instrumentados do cache;
+- decisões do rate limit por política;
+- uso dos pools de conexões do Redis e do banco em cada worker;
+- workers vivos e modo do servidor (gunicorn WSGI/ASGI).
+
+Com vários workers do gunicorn, ``PROMETHEUS_MULTIPROC_DIR`` aponta para um
+diretório compartilhado onde cada processo grava seus valores; o endpoint
+agrega todos (``MultiProcessCollector``). O ``gunicorn.conf.py`` remove os
+gauges dos workers que saem. Sem a variável (runserver, testes), os valores
+ficam no registro do próprio processo.
+"""
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess,
+)
+
+logger = logging.getLogger(__name__)
+
+REQUEST_LATENCY = Histogram(
+    'ehit_http_request_duration_seconds',
+    'Tempo de resposta por view',
+    ['view', 'method'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+RESPONSES = Counter(
+    'ehit_http_responses',
+    'Respostas por view e status',
+    ['view', 'method', 'status'],
+)
+REQUEST_DB_QUERIES = Histogram(
+    'ehit_http_request_db_queries',
+    'Queries ao banco por requisição',
+    ['view'],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200),
+)
+CACHE_REQUESTS = Counter(
+    'ehit_cache_requests',
+    'Consultas ao cache por família de chave',
+    ['family', 'result'],
+)
+RATE_LIMIT_DECISIONS = Counter(
+    'ehit_rate_limit_decisions',
+    'Decisões do rate limit por política (local, redis, error ou limited)',
+    ['policy', 'decision'],
+)
+REDIS_POOL_CONNECTIONS = Gauge(
+    'ehit_redis_pool_connections',
+    'Conexões do pool do Redis (criadas e em uso)',
+    ['state'],
+    multiprocess_mode='livesum',
+)
+REDIS_POOL_MAX = Gauge(
+    'ehit_redis_pool_max_connections',
+    'Limite de conexões do pool do Redis por worker',
+    multiprocess_mode='liveall',
+)
+DB_POOL_CONNECTIONS = Gauge(
+    'ehit_db_pool_connections',
+    'Conexões do pool do banco (psycopg 3) por estado',
+    ['state'],
+    multiprocess_mode='livesum',
+)
+DB_CONNECTIONS_OPENED = Counter(
+    'ehit_db_connections_opened',
+    'Conexões abertas com o banco',
+    ['alias'],
+)
+WORKERS = Gauge(
+    'ehit_workers',
+    'Workers vivos',
+    multiprocess_mode='livesum',
+)
+SERVER_INFO = Gauge(
+    'ehit_server_info',
+    'Modo do servidor e workers configurados',
+    ['server_mode', 'workers'],
+    multiprocess_mode='max',
+)
+
+# Ordem importa: o primeiro prefixo que casar define a família
+CACHE_KEY_FAMILIES = (
+    ('trending_', 'trending'),
+    ('popular_', 'popular'),
+    ('featured_', 'featured'),
+    ('music_autocomplete_', 'autocomplete'),
+    ('music_stats_', 'stats'),
+    ('musics_list_', 'lists'),
+    ('artists_list_', 'lists'),
+    ('albums_list_', 'lists'),
+    ('playlists_list_', 'lists'),
+    ('radio_', 'radio'),
+    ('liked_user_', 'likes'),
+    ('likes_pending', 'likes'),
+    ('feed_', 'feed'),
+    ('playlist_', 'playlists'),
+    ('artist_', 'artists'),
+    ('album_', 'albums'),
+    ('banners_', 'banners'),
+    ('db_pin_user_', 'replica_pin'),
+    ('rate_limit_', 'rate_limit'),
+    ('django.contrib.sessions', 'sessions'),
+    ('views.decorators.cache', 'pages'),
+)
+
+# Intervalo mínimo (segundos) entre leituras dos pools em cada worker
+POOL_SAMPLE_INTERVAL = 5.0
+_last_pool_sample = 0.0
+
+
+def cache_key_family(key):
+    """Família de uma chave de cache (rótulo com poucos valores possíveis)"""
+    key = str(key)
+    for prefix, family in CACHE_KEY_FAMILIES:
+        if key.startswith(prefix):
+            return family
+    return 'other'
+
+
+def record_cache_lookup(key, hit):
+    CACHE_REQUESTS.labels(cache_key_family(key), 'hit' if hit else 'miss').inc()
+
+
+def observe_request(request, response, queries, duration):
+    """Registra uma requisição encerrada (chamado pelo ServerTimingMiddleware)"""
+    resolver_match = getattr(request, 'resolver_match', None)
+    view = resolver_match.view_name if resolver_match and resolver_match.view_name else '<unresolved>'
+    REQUEST_LATENCY.labels(view, request.method).observe(duration)
+    RESPONSES.labels(view, request.method, str(response.status_code)).inc()
+    REQUEST_DB_QUERIES.labels(view).observe(queries)
+    sample_pools()
+
+
+def sample_pools(force=False):
+    """Atualiza os gauges dos pools do Redis e do banco deste worker"""
+    global _last_pool_sample
+    now = time.monotonic()
+    if not force and now - _last_pool_sample < POOL_SAMPLE_INTERVAL:
+        return
+    _last_pool_sample = now
+    _sample_redis_pool()
+    _sample_db_pool()
+
+
+def _sample_redis_pool():
+    from .async_cache import is_redis_cache
+
+    if not is_redis_cache():
+        return
+    try:
+        from django_redis import get_redis_connection
+
+        pool = get_redis_connection('default').connection_pool
+        if hasattr(pool, 'pool'):
+            # BlockingConnectionPool: a fila guarda as conexões livres e None nos espaços vazios
+            created = len(pool._connections)
+            idle = sum(1 for connection in list(pool.pool.queue) if connection is not None)
+        else:
+            created = pool._created_connections
+            idle = len(pool._available_connections)
+        REDIS_POOL_CONNECTIONS.labels('created').set(created)
+        REDIS_POOL_CONNECTIONS.labels('in_use').set(created - idle)
+        REDIS_POOL_MAX.set(pool.max_connections)
+    except Exception as e:
+        logger.warning(f"Erro ao ler o pool do Redis: {e}")
+
+
+def _sample_db_pool():
+    from .db_pool import get_pool_stats
+
+    stats = get_pool_stats().get('pool')
+    if not stats:
+        return
+    for state in ('size', 'in_use', 'available', 'waiting'):
+        DB_POOL_CONNECTIONS.labels(state).set(stats[state])
+
+
+def _count_connection(sender, connection, **kwargs):
+    DB_CONNECTIONS_OPENED.labels(connection.alias).inc()
+
+
+connection_created.connect(_count_connection, dispatch_uid='ehit_metrics_connection_created')
+
+WORKERS.set(1)
+SERVER_INFO.labels(
+    getattr(settings, 'SERVER_MODE', 'wsgi'),
+    os.environ.get('GUNICORN_WORKERS', '1'),
+).set(1)
+
+
+def render_metrics():
+    """Corpo e content type da resposta do /metrics"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,113 @@
+"""
+Instrumentação de desempenho por requisição
+
+``ServerTimingMiddleware`` ativa os coletores de ``instrumentation.py`` e, ao
+final da requisição:
+
+- envia o cabeçalho ``Server-Timing`` (banco, cache, serialização, view e
+  total), visível no DevTools do navegador, quando ``SERVER_TIMING_HEADER``
+  está ligado ou o usuário é staff;
+- grava uma linha JSON no logger ``performance``;
+- alimenta os histogramas e contadores do ``/metrics`` (``metrics.py``);
+- marca as requisições acima de ``PERFORMANCE_QUERY_BUDGET`` queries ou
+  ``PERFORMANCE_LATENCY_BUDGET_MS`` milissegundos (log em WARNING e
+  ``budget`` no Server-Timing).
+"""
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.utils.deprecation import MiddlewareMixin
+
+from .instrumentation import end_request, start_request
+from .metrics import observe_request
+
+logger = logging.getLogger('performance')
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+class ServerTimingMiddleware(MiddlewareMixin):
+    """Mede banco, cache, serialização e tempo total de cada requisição"""
+
+    def process_request(self, request):
+        if not getattr(settings, 'SERVER_TIMING_ENABLED', True):
+            return None
+        request._performance_metrics = start_request()
+        request._performance_started = time.perf_counter()
+        return None
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._performance_view_started = time.perf_counter()
+        return None
+
+    def process_response(self, request, response):
+        metrics = getattr(request, '_performance_metrics', None)
+        if metrics is None:
+            return response
+        end_request()
+
+        finished = time.perf_counter()
+        total = finished - request._performance_started
+        view_started = getattr(request, '_performance_view_started', None)
+        view = finished - view_started if view_started is not None else 0.0
+
+        exceeded = []
+        if metrics.db_queries > settings.PERFORMANCE_QUERY_BUDGET:
+            exceeded.append('queries')
+        if total * 1000 > settings.PERFORMANCE_LATENCY_BUDGET_MS:
+            exceeded.append('latency')
+
+        self.log_request(request, response, metrics, total, view, exceeded)
+        observe_request(request, response, metrics.db_queries, total)
+
+        user = getattr(request, 'user', None)
+        if settings.SERVER_TIMING_HEADER or (user is not None and user.is_staff):
+            response['Server-Timing'] = self.server_timing(metrics, total, view, exceeded)
+        return response
+
+    def server_timing(self, metrics, total, view, exceeded):
+        """Valor do cabeçalho Server-Timing"""
+        entries = [
+            f'db;dur={_ms(metrics.db_time)};desc="{metrics.db_queries} queries"',
+            # Sem vírgulas no desc: muitos parsers separam as métricas por vírgula
+            f'cache;dur={_ms(metrics.cache_time)};desc="{metrics.cache_gets} gets '
+            f'{metrics.cache_hits} hits {metrics.cache_misses} misses '
+            f'{metrics.cache_bytes_read + metrics.cache_bytes_written} bytes"',
+            f'serialize;dur={_ms(metrics.serialize_time)}',
+            f'view;dur={_ms(view)}',
+            f'total;dur={_ms(total)}',
+        ]
+        if exceeded:
+            entries.append(f'budget;desc="{" ".join(exceeded)}"')
+        return ', '.join(entries)
+
+    def log_request(self, request, response, metrics, total, view, exceeded):
+        """Linha JSON por requisição no logger ``performance``"""
+        level = logging.WARNING if exceeded else logging.INFO
+        if not logger.isEnabledFor(level):
+            return
+        resolver_match = getattr(request, 'resolver_match', None)
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'route': resolver_match.route if resolver_match else None,
+            'status': response.status_code,
+            'total_ms': _ms(total),
+            'view_ms': _ms(view),
+            'db_queries': metrics.db_queries,
+            'db_ms': _ms(metrics.db_time),
+            'cache_gets': metrics.cache_gets,
+            'cache_hits': metrics.cache_hits,
+            'cache_misses': metrics.cache_misses,
+            'cache_sets': metrics.cache_sets,
+            'cache_bytes_read': metrics.cache_bytes_read,
+            'cache_bytes_written': metrics.cache_bytes_written,
+            'cache_ms': _ms(metrics.cache_time),
+            'serialize_ms': _ms(metrics.serialize_time),
+            'budget_exceeded': exceeded,
+        }
+        logger.log(level, json.dumps(record))
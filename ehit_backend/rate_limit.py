@@ -0,0 +1,231 @@
+"""
+Rate limiting por rota (GCRA atômico no Redis)
+
+Cada política de ``RATE_LIMIT_POLICIES`` define um padrão de caminho, os
+métodos e a taxa (``'10/m'``, ``'600/h'``...). A primeira política que casar
+com a requisição é aplicada por IP do cliente.
+
+O limite usa GCRA (generic cell rate algorithm): uma única chave por
+política/cliente guarda o "tempo teórico de chegada" e um script Lua decide e
+atualiza em uma só ida ao Redis, de forma atômica entre todos os workers. O
+efeito é o de uma janela deslizante: ``10/m`` permite uma rajada de 10 e depois
+uma requisição a cada 6 segundos, sem o reset abrupto de janelas fixas.
+
+Para não consultar o Redis a cada requisição de clientes muito abaixo do
+limite, o script pode reservar um lote de permissões (``RATE_LIMIT_LOCAL_BATCH``
+do limite) que o worker consome localmente por alguns segundos. Perto do
+limite a reserva volta a ser de uma permissão por vez, e permissões reservadas
+e não usadas só deixam o limite mais rígido, nunca mais frouxo.
+
+Sem Redis (desenvolvimento/testes) o mesmo algoritmo roda sobre o cache local.
+"""
+import logging
+import re
+import threading
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .async_cache import is_redis_cache
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1]: chave do cliente; ARGV: intervalo entre requisições (ms),
+# tolerância de rajada (ms) e tamanho do lote pedido.
+# Retorna {permissões concedidas, restantes} ou {0, ms até a próxima}.
+GCRA_SCRIPT = """
+local emission = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local batch = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+local available = math.floor((now + tolerance - tat) / emission)
+if available < 1 then
+    return {0, math.ceil(tat - tolerance + emission - now)}
+end
+local granted = 1
+if available >= batch * 2 then granted = batch end
+tat = math.ceil(tat + granted * emission)
+redis.call('SET', KEYS[1], tat, 'PX', math.max(1, tat - now))
+return {granted, available - granted}
+"""
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# Tempo máximo (s) que um lote reservado fica disponível no worker
+LOCAL_LEASE_SECONDS = 5.0
+LOCAL_MAX_CLIENTS = 10000
+
+
+@dataclass(frozen=True)
+class Policy:
+    name: str
+    pattern: re.Pattern
+    methods: frozenset
+    limit: int
+    period: int
+
+    @property
+    def emission_ms(self):
+        return self.period * 1000 / self.limit
+
+    def matches(self, request):
+        if self.methods and request.method not in self.methods:
+            return False
+        return bool(self.pattern.match(request.path))
+
+
+@dataclass
+class Decision:
+    allowed: bool
+    policy: Policy
+    retry_after: float = 0.0
+    source: str = 'redis'
+
+
+def parse_rate(rate):
+    """'10/m' -> (10, 60)"""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0]]
+
+
+_policies = None
+_policies_source = None
+
+
+def get_policies():
+    """Políticas de RATE_LIMIT_POLICIES (compiladas uma vez)"""
+    global _policies, _policies_source
+    configured = getattr(settings, 'RATE_LIMIT_POLICIES', [])
+    if configured is not _policies_source:
+        policies = []
+        for item in configured:
+            limit, period = parse_rate(item['rate'])
+            policies.append(Policy(
+                name=item['name'],
+                pattern=re.compile(item['path']),
+                methods=frozenset(item.get('methods') or ()),
+                limit=limit,
+                period=period,
+            ))
+        _policies, _policies_source = policies, configured
+    return _policies
+
+
+def match_policy(request):
+    for policy in get_policies():
+        if policy.matches(request):
+            return policy
+    return None
+
+
+# =============================================================================
+# RESERVA LOCAL
+# =============================================================================
+
+_local_lock = threading.Lock()
+# (política, cliente) -> [permissões restantes, validade (monotonic)]
+_local_leases = {}
+
+
+def _take_local(key):
+    with _local_lock:
+        lease = _local_leases.get(key)
+        if lease is None:
+            return False
+        if lease[0] <= 0 or lease[1] < time.monotonic():
+            del _local_leases[key]
+            return False
+        lease[0] -= 1
+        return True
+
+
+def _store_local(key, permits, seconds):
+    if permits <= 0:
+        return
+    with _local_lock:
+        if len(_local_leases) >= LOCAL_MAX_CLIENTS:
+            now = time.monotonic()
+            for stale in [k for k, lease in _local_leases.items() if lease[1] < now]:
+                del _local_leases[stale]
+            if len(_local_leases) >= LOCAL_MAX_CLIENTS:
+                _local_leases.clear()
+        _local_leases[key] = [permits, time.monotonic() + seconds]
+
+
+def _batch_size(policy):
+    fraction = getattr(settings, 'RATE_LIMIT_LOCAL_BATCH', 0.02)
+    return max(1, int(policy.limit * fraction))
+
+
+# =============================================================================
+# GCRA
+# =============================================================================
+
+_script = None
+
+
+def _acquire_redis(key, policy, batch):
+    global _script
+    from django_redis import get_redis_connection
+
+    if _script is None:
+        _script = get_redis_connection('default').register_script(GCRA_SCRIPT)
+    granted, value = _script(
+        keys=[cache.make_key(key)],
+        args=[policy.emission_ms, policy.period * 1000, batch],
+    )
+    return int(granted), int(value)
+
+
+_fallback_lock = threading.Lock()
+
+
+def _acquire_cache(key, policy, batch):
+    """Mesmo algoritmo do script Lua sobre o cache local (sem Redis)"""
+    emission = policy.emission_ms
+    tolerance = policy.period * 1000
+    with _fallback_lock:
+        now = time.time() * 1000
+        tat = max(cache.get(key) or now, now)
+        available = int((now + tolerance - tat) // emission)
+        if available < 1:
+            return 0, int(tat - tolerance + emission - now) + 1
+        granted = batch if available >= batch * 2 else 1
+        tat += granted * emission
+        cache.set(key, tat, max(1, int((tat - now) / 1000) + 1))
+    return granted, available - granted
+
+
+def check(policy, client):
+    """Consome uma permissão de ``client`` na política (Decision.allowed=False se excedido)"""
+    key = f'rate_limit_{policy.name}_{client}'
+    if _take_local(key):
+        return Decision(True, policy, source='local')
+
+    batch = _batch_size(policy)
+    try:
+        if is_redis_cache():
+            granted, value = _acquire_redis(key, policy, batch)
+        else:
+            granted, value = _acquire_cache(key, policy, batch)
+    except Exception as e:
+        # Falha no Redis não derruba a API: libera a requisição
+        logger.warning(f"Erro no rate limit ({policy.name}): {e}")
+        return Decision(True, policy, source='error')
+
+    if not granted:
+        return Decision(False, policy, retry_after=value / 1000)
+    if granted > 1:
+        lease = min(LOCAL_LEASE_SECONDS, granted * policy.emission_ms / 1000)
+        _store_local(key, granted - 1, lease)
+    return Decision(True, policy)
+
+
+def client_ip(request):
+    """IP do cliente (X-Real-IP definido pelo nginx; sem proxy, REMOTE_ADDR)"""
+    return request.META.get('HTTP_X_REAL_IP') or request.META.get('REMOTE_ADDR', '')
@@ -0,0 +1,121 @@
+"""
+Storage de mídia em S3 (ou compatível: MinIO, R2, Spaces) com URLs assinadas
+
+Ativado com ``MEDIA_STORAGE=s3``. Os arquivos são gravados pelo
+django-storages/boto3; as URLs de leitura são assinadas localmente com
+SigV4 (HMAC-SHA256), sem nenhuma chamada à API por requisição, e o cliente
+baixa direto do bucket. Assim os nós web não guardam mídia.
+
+A data da assinatura é arredondada para janelas de
+``MEDIA_URL_SIGNING_WINDOW`` segundos: dentro da janela a URL de um arquivo é
+sempre a mesma (aproveita cache do navegador/CDN e das respostas da API) e
+continua válida por pelo menos ``MEDIA_URL_EXPIRE - MEDIA_URL_SIGNING_WINDOW``
+segundos depois de gerada.
+"""
+import hashlib
+import hmac
+import time
+from datetime import datetime, timezone
+from urllib.parse import quote, urlsplit
+
+from django.conf import settings
+from storages.backends.s3 import S3Storage
+from storages.utils import clean_name
+
+from .storage import ContentAddressedMixin
+
+ALGORITHM = 'AWS4-HMAC-SHA256'
+
+
+def _hmac(key, message):
+    return hmac.new(key, message.encode('utf-8'), hashlib.sha256).digest()
+
+
+def _quote(value):
+    return quote(value, safe='-_.~')
+
+
+def signing_time(now=None, window=None):
+    """Início da janela de assinatura atual (timestamp)"""
+    window = window or settings.MEDIA_URL_SIGNING_WINDOW
+    now = time.time() if now is None else now
+    return int(now // window * window)
+
+
+def presign_get_url(*, endpoint, bucket, key, access_key, secret_key, region,
+                    expires, signed_at, path_style=True):
+    """
+    URL GET pré-assinada (SigV4 por query string) calculada localmente
+
+    Args:
+        endpoint (str): URL base do serviço (ex.: https://s3.us-east-1.amazonaws.com)
+        key (str): chave do objeto no bucket
+        expires (int): validade em segundos a partir de ``signed_at``
+        signed_at (int): timestamp da assinatura
+        path_style (bool): ``/bucket/chave`` em vez de ``bucket.host/chave``
+    """
+    parts = urlsplit(endpoint)
+    if path_style:
+        host = parts.netloc
+        path = f"/{bucket}/{key}"
+    else:
+        host = f"{bucket}.{parts.netloc}"
+        path = f"/{key}"
+    canonical_uri = quote(path, safe='/-_.~')
+
+    moment = datetime.fromtimestamp(signed_at, tz=timezone.utc)
+    amz_date = moment.strftime('%Y%m%dT%H%M%SZ')
+    datestamp = moment.strftime('%Y%m%d')
+    scope = f"{datestamp}/{region}/s3/aws4_request"
+
+    query = {
+        'X-Amz-Algorithm': ALGORITHM,
+        'X-Amz-Credential': f"{access_key}/{scope}",
+        'X-Amz-Date': amz_date,
+        'X-Amz-Expires': str(expires),
+        'X-Amz-SignedHeaders': 'host',
+    }
+    canonical_query = '&'.join(f"{_quote(k)}={_quote(v)}" for k, v in sorted(query.items()))
+    canonical_request = '\n'.join([
+        'GET', canonical_uri, canonical_query, f"host:{host}", '', 'host', 'UNSIGNED-PAYLOAD',
+    ])
+    string_to_sign = '\n'.join([
+        ALGORITHM, amz_date, scope, hashlib.sha256(canonical_request.encode('utf-8')).hexdigest(),
+    ])
+
+    signing_key = _hmac(('AWS4' + secret_key).encode('utf-8'), datestamp)
+    for part in (region, 's3', 'aws4_request'):
+        signing_key = _hmac(signing_key, part)
+    signature = hmac.new(signing_key, string_to_sign.encode('utf-8'), hashlib.sha256).hexdigest()
+
+    return f"{parts.scheme}://{host}{canonical_uri}?{canonical_query}&X-Amz-Signature={signature}"
+
+
+class S3MediaStorage(S3Storage):
+    """S3Storage com URLs de leitura assinadas localmente e estáveis por janela"""
+
+    def _url_endpoint(self):
+        endpoint = getattr(settings, 'MEDIA_URL_ENDPOINT', '') or self.endpoint_url
+        if endpoint:
+            return endpoint
+        return f"https://s3.{self.region_name or 'us-east-1'}.amazonaws.com"
+
+    def url(self, name, parameters=None, expire=None, http_method=None):
+        if parameters or http_method not in (None, 'GET') or not self.querystring_auth:
+            return super().url(name, parameters=parameters, expire=expire, http_method=http_method)
+
+        return presign_get_url(
+            endpoint=self._url_endpoint(),
+            bucket=self.bucket_name,
+            key=self._normalize_name(clean_name(name)),
+            access_key=self.access_key,
+            secret_key=self.secret_key,
+            region=self.region_name or 'us-east-1',
+            expires=expire or settings.MEDIA_URL_EXPIRE,
+            signed_at=signing_time(),
+            path_style=self.addressing_style == 'path',
+        )
+
+
+class S3ContentAddressedStorage(ContentAddressedMixin, S3MediaStorage):
+    """Áudio no S3 nomeado pelo hash do conteúdo (objetos imutáveis)"""
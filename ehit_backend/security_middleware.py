@@ -1,10 +1,20 @@
 # ehit_backend/security_middleware.py
 
-from django.http import HttpResponse
+from django.conf import settings
+from django.http import JsonResponse
 from django.utils.deprecation import MiddlewareMixin
-from django.core.cache import cache
+from urllib.parse import unquote_plus
+import logging
+import math
+import random
+import re
 import time
-import hashlib
+
+from . import rate_limit
+from .metrics import RATE_LIMIT_DECISIONS
+from .rate_limit import match_policy
+
+logger = logging.getLogger('security')
 
 class SecurityHeadersMiddleware(MiddlewareMixin):
     """Middleware para adicionar headers de segurança"""
@@ -34,58 +44,119 @@ class SecurityHeadersMiddleware(MiddlewareMixin):
         return response
 
 class RateLimitMiddleware(MiddlewareMixin):
-    """Middleware para rate limiting personalizado"""
+    """Rate limiting por rota (políticas em RATE_LIMIT_POLICIES, ver rate_limit.py)"""
     
     def process_request(self, request):
-        # Rate limiting para API
-        if request.path.startswith('/api/'):
-            client_ip = self.get_client_ip(request)
-            cache_key = f"rate_limit_{client_ip}"
-            
-            # Verificar limite (100 requests por hora)
-            current_count = cache.get(cache_key, 0)
-            if current_count >= 100:
-                return HttpResponse("Rate limit exceeded", status=429)
-            
-            # Incrementar contador
-            cache.set(cache_key, current_count + 1, 3600)  # 1 hora
+        if not settings.RATE_LIMIT_ENABLED:
+            return None
+        policy = match_policy(request)
+        if policy is None:
+            return None
         
-        return None
-    
-    def get_client_ip(self, request):
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0]
-        else:
-            ip = request.META.get('REMOTE_ADDR')
-        return ip
+        decision = rate_limit.check(policy, rate_limit.client_ip(request))
+        RATE_LIMIT_DECISIONS.labels(policy.name, decision.source if decision.allowed else 'limited').inc()
+        if decision.allowed:
+            return None
+        
+        retry_after = max(1, math.ceil(decision.retry_after))
+        response = JsonResponse(
+            {'detail': f'Limite de requisições excedido. Tente novamente em {retry_after} segundos.'},
+            status=429,
+        )
+        response['Retry-After'] = str(retry_after)
+        return response
+
+# Padrões suspeitos em um único regex pré-compilado (uma passada por texto)
+SUSPICIOUS_PATTERN = re.compile(
+    '|'.join([
+        re.escape('..'),  # Path traversal
+        re.escape('<script'),  # XSS
+        r'union\s+select',  # SQL injection
+        re.escape('eval('),  # Code injection
+        re.escape('base64'),  # Encoding attempts
+    ]),
+    re.IGNORECASE,
+)
+
+FORM_CONTENT_TYPE = 'application/x-www-form-urlencoded'
+MULTIPART_CONTENT_TYPE = 'multipart/form-data'
+
 
 class SecurityAuditMiddleware(MiddlewareMixin):
-    """Middleware para auditoria de segurança"""
+    """
+    Middleware para auditoria de segurança
+
+    Inspeciona a query string e corpos de formulário pequenos (até
+    SECURITY_AUDIT_MAX_BYTES) sem consumir o corpo de uploads: em multipart,
+    os campos de texto são conferidos na resposta, a partir do POST que a
+    view já parseou, e as partes de arquivo (FILES) nunca são lidas aqui.
+    JSON não é inspecionado. Leituras nas rotas de
+    SECURITY_AUDIT_SAMPLED_PATHS são inspecionadas por amostragem
+    (SECURITY_AUDIT_SAMPLE_RATE).
+    """
     
     def process_request(self, request):
+        if not self.should_inspect(request):
+            return None
+        
         # Log tentativas de acesso suspeitas
         if self.is_suspicious_request(request):
             self.log_suspicious_activity(request)
+        elif request.META.get('CONTENT_TYPE', '').startswith(MULTIPART_CONTENT_TYPE):
+            # Parsear aqui leria os arquivos antes da view, que consome o upload em streaming
+            request._audit_form_fields = True
         
         return None
     
+    def process_response(self, request, response):
+        if getattr(request, '_audit_form_fields', False) and self.has_suspicious_form_fields(request):
+            self.log_suspicious_activity(request)
+        return response
+    
+    def should_inspect(self, request):
+        if request.method not in ('GET', 'HEAD'):
+            return True
+        if not request.path.startswith(tuple(settings.SECURITY_AUDIT_SAMPLED_PATHS)):
+            return True
+        return random.random() < settings.SECURITY_AUDIT_SAMPLE_RATE
+    
     def is_suspicious_request(self, request):
-        suspicious_patterns = [
-            '..',  # Path traversal
-            '<script',  # XSS
-            'union select',  # SQL injection
-            'eval(',  # Code injection
-            'base64',  # Encoding attempts
-        ]
+        max_bytes = settings.SECURITY_AUDIT_MAX_BYTES
         
-        query_string = str(request.GET) + str(request.POST)
-        return any(pattern in query_string.lower() for pattern in suspicious_patterns)
+        query_string = request.META.get('QUERY_STRING', '')
+        if query_string and SUSPICIOUS_PATTERN.search(unquote_plus(query_string[:max_bytes])):
+            return True
+        
+        # Corpo só para formulários pequenos (multipart é conferido na resposta, JSON fica de fora)
+        content_type = request.META.get('CONTENT_TYPE', '')
+        if not content_type.startswith(FORM_CONTENT_TYPE):
+            return False
+        try:
+            content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            return False
+        if not 0 < content_length <= max_bytes:
+            return False
+        body = request.body.decode('utf-8', errors='replace')
+        return bool(SUSPICIOUS_PATTERN.search(unquote_plus(body)))
+    
+    def has_suspicious_form_fields(self, request):
+        """Campos de texto do multipart, se a view leu o formulário (POST já parseado)"""
+        post = request.__dict__.get('_post')
+        if not post:
+            return False
+        remaining = settings.SECURITY_AUDIT_MAX_BYTES
+        for values in post.lists():
+            for value in [values[0], *values[1]]:
+                text = value[:remaining]
+                if SUSPICIOUS_PATTERN.search(text):
+                    return True
+                remaining -= len(text)
+                if remaining <= 0:
+                    return False
+        return False
     
     def log_suspicious_activity(self, request):
-        import logging
-        logger = logging.getLogger('security')
-        
         log_data = {
             'ip': self.get_client_ip(request),
             'path': request.path,
@@ -15,6 +15,7 @@ from pathlib import Path
 import os
 from decouple import config
 import dj_database_url
+from celery.schedules import crontab
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -63,7 +64,6 @@ INSTALLED_APPS = [
     'rest_framework',
     'rest_framework_simplejwt',
     'corsheaders',
-    'django_ratelimit',
     'axes',
     'django_filters',
     
@@ -81,6 +81,7 @@ MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'ehit_backend.security_middleware.RateLimitMiddleware',  # Rate limiting por rota (antes de sessão/auth)
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -90,6 +91,7 @@ MIDDLEWARE = [
     'axes.middleware.AxesMiddleware',  # Brute force protection
     'ehit_backend.security_middleware.SecurityHeadersMiddleware',  # Security headers
     'ehit_backend.security_middleware.SecurityAuditMiddleware',  # Security audit
+    'ehit_backend.performance_middleware.ServerTimingMiddleware',  # Server-Timing e orçamento de queries/latência
 ]
 
 ROOT_URLCONF = 'ehit_backend.urls'
@@ -110,6 +112,11 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'ehit_backend.wsgi.application'
+ASGI_APPLICATION = 'ehit_backend.asgi.application'
+
+# Modo do servidor: 'wsgi' (gunicorn sync) ou 'asgi' (gunicorn + uvicorn workers)
+# Em ASGI as rotas de leitura mais acessadas usam as views async (ver *async_views.py)
+SERVER_MODE = config('SERVER_MODE', default='wsgi')
 
 
 # Database
@@ -149,6 +156,65 @@ else:
     }
     print("🚀 Ambiente: PRODUÇÃO - Usando banco de dados configurado")
 
+# Conexões com o PostgreSQL (configurável por ambiente)
+# DB_POOL_MODE:
+#   - 'none': abre e fecha uma conexão por requisição (comportamento padrão do Django)
+#   - 'persistent': reaproveita a conexão do worker por DB_CONN_MAX_AGE segundos,
+#     validando-a no início de cada requisição (CONN_HEALTH_CHECKS)
+#   - 'pool': pool nativo do psycopg 3 (psycopg_pool), compartilhado pelas threads do processo
+# DB_PGBOUNCER_TRANSACTION_MODE: compatibilidade com pgbouncer em pool_mode=transaction
+# (sem cursores do lado do servidor e sem prepared statements)
+DB_POOL_MODE = config('DB_POOL_MODE', default='persistent' if ENVIRONMENT == 'production' else 'none')
+DB_PGBOUNCER_TRANSACTION_MODE = config('DB_PGBOUNCER_TRANSACTION_MODE', default=False, cast=bool)
+
+if DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+    _db_options = DATABASES['default'].setdefault('OPTIONS', {})
+
+    if DB_POOL_MODE == 'persistent':
+        DATABASES['default']['CONN_MAX_AGE'] = config('DB_CONN_MAX_AGE', default=600, cast=int)
+        DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+    elif DB_POOL_MODE == 'pool':
+        # O pool do Django exige CONN_MAX_AGE = 0 (a conexão volta ao pool ao fim da requisição)
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        # Com pool, o health check valida a conexão antes de entregá-la
+        DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+        _db_options['pool'] = {
+            'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+            'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+            'timeout': config('DB_POOL_TIMEOUT', default=10, cast=float),
+            'max_idle': config('DB_POOL_MAX_IDLE', default=300, cast=float),
+        }
+    else:
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+
+    if DB_PGBOUNCER_TRANSACTION_MODE:
+        DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+        _db_options['prepare_threshold'] = None
+
+# Réplicas de leitura para o catálogo (ver ehit_backend/db_routers.py)
+# DATABASE_REPLICA_URLS: URLs separadas por vírgula; vazio desativa o roteamento
+DATABASE_REPLICAS = []
+for _index, _replica_url in enumerate(filter(None, config('DATABASE_REPLICA_URLS', default='').split(',')), start=1):
+    _alias = f'replica_{_index}'
+    _replica = dj_database_url.parse(_replica_url.strip())
+    # Mesmo modo de conexão do primário
+    for _key in ('CONN_MAX_AGE', 'CONN_HEALTH_CHECKS', 'DISABLE_SERVER_SIDE_CURSORS'):
+        if _key in DATABASES['default']:
+            _replica[_key] = DATABASES['default'][_key]
+    _replica['OPTIONS'] = dict(DATABASES['default'].get('OPTIONS', {}))
+    _replica['TEST'] = {'MIRROR': 'default'}
+    DATABASES[_alias] = _replica
+    DATABASE_REPLICAS.append(_alias)
+
+DATABASE_REPLICA_MAX_LAG = config('DATABASE_REPLICA_MAX_LAG', default=5, cast=float)  # segundos
+DATABASE_REPLICA_LAG_CHECK_INTERVAL = config('DATABASE_REPLICA_LAG_CHECK_INTERVAL', default=5, cast=float)
+# Tempo que o cliente fica no primário após uma escrita (deve cobrir o atraso máximo)
+DATABASE_REPLICA_PIN_SECONDS = config('DATABASE_REPLICA_PIN_SECONDS', default=10, cast=int)
+
+if DATABASE_REPLICAS:
+    DATABASE_ROUTERS = ['ehit_backend.db_routers.CatalogReplicaRouter']
+    MIDDLEWARE.append('ehit_backend.db_routers.ReplicaRoutingMiddleware')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -190,6 +256,50 @@ STATIC_ROOT = config('STATIC_ROOT', default=BASE_DIR / 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = config('MEDIA_ROOT', default=BASE_DIR / 'media')
 
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+    # Áudio nomeado pelo hash do conteúdo (music/ab/cd/<hash>.mp3), sem duplicatas
+    'audio': {
+        'BACKEND': 'ehit_backend.storage.ContentAddressedStorage',
+    },
+}
+
+# Mídia (áudio, capas e banners): 'local' (MEDIA_ROOT) ou 's3' (S3/MinIO com URLs assinadas)
+MEDIA_STORAGE = config('MEDIA_STORAGE', default='local')
+# Validade das URLs assinadas; a assinatura é reaproveitada dentro de cada janela.
+# EXPIRE - SIGNING_WINDOW deve ser maior que o cache das respostas da API (até 1h)
+MEDIA_URL_EXPIRE = config('MEDIA_URL_EXPIRE', default=2 * 60 * 60, cast=int)
+MEDIA_URL_SIGNING_WINDOW = config('MEDIA_URL_SIGNING_WINDOW', default=15 * 60, cast=int)
+# Host público usado nas URLs (ex.: MinIO acessível pelos clientes); vazio = endpoint do S3
+MEDIA_URL_ENDPOINT = config('MEDIA_URL_ENDPOINT', default='')
+
+if MEDIA_STORAGE == 's3':
+    AWS_STORAGE_BUCKET_NAME = config('AWS_STORAGE_BUCKET_NAME')
+    AWS_ACCESS_KEY_ID = config('AWS_ACCESS_KEY_ID')
+    AWS_SECRET_ACCESS_KEY = config('AWS_SECRET_ACCESS_KEY')
+    AWS_S3_REGION_NAME = config('AWS_S3_REGION_NAME', default='us-east-1')
+    AWS_S3_ENDPOINT_URL = config('AWS_S3_ENDPOINT_URL', default=None)  # MinIO/R2/Spaces
+    AWS_S3_ADDRESSING_STYLE = config('AWS_S3_ADDRESSING_STYLE', default='path' if AWS_S3_ENDPOINT_URL else 'virtual')
+    AWS_S3_SIGNATURE_VERSION = 's3v4'
+    AWS_QUERYSTRING_AUTH = True
+    AWS_QUERYSTRING_EXPIRE = MEDIA_URL_EXPIRE
+    AWS_DEFAULT_ACL = None
+    AWS_S3_FILE_OVERWRITE = False
+
+    STORAGES['default'] = {'BACKEND': 'ehit_backend.s3_storage.S3MediaStorage'}
+    STORAGES['audio'] = {
+        'BACKEND': 'ehit_backend.s3_storage.S3ContentAddressedStorage',
+        'OPTIONS': {
+            # Nome = hash do conteúdo: o objeto nunca muda
+            'object_parameters': {'CacheControl': 'public, max-age=31536000, immutable'},
+        },
+    }
+
 # File Upload Settings - Otimizado para upload rápido
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB - arquivos maiores vão direto para disco
 DATA_UPLOAD_MAX_MEMORY_SIZE = 500 * 1024 * 1024  # 500MB
@@ -199,6 +309,15 @@ FILE_UPLOAD_HANDLERS = [
     'django.core.files.uploadhandler.MemoryFileUploadHandler',     # Apenas para arquivos pequenos
 ]
 
+# Upload de áudio em partes, retomável (/api/uploads/)
+UPLOAD_MAX_SIZE = config('UPLOAD_MAX_SIZE', default=DATA_UPLOAD_MAX_MEMORY_SIZE, cast=int)
+UPLOAD_CHUNK_MAX_SIZE = config('UPLOAD_CHUNK_MAX_SIZE', default=32 * 1024 * 1024, cast=int)  # abaixo do client_max_body_size do nginx
+UPLOAD_SESSION_EXPIRY_HOURS = config('UPLOAD_SESSION_EXPIRY_HOURS', default=24, cast=int)
+UPLOAD_AUDIO_EXTENSIONS = ['.mp3', '.wav', '.m4a', '.aac', '.ogg', '.flac']
+
+# Admin: acima deste número de linhas (estimado pelo PostgreSQL) a paginação usa a estimativa em vez de COUNT(*)
+ADMIN_ESTIMATED_COUNT_THRESHOLD = config('ADMIN_ESTIMATED_COUNT_THRESHOLD', default=10000, cast=int)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -222,7 +341,7 @@ if ENVIRONMENT == 'development':
                 'BACKEND': 'django_redis.cache.RedisCache',
                 'LOCATION': config('REDIS_URL', default='redis://localhost:6380/0'),
                 'OPTIONS': {
-                    'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+                    'CLIENT_CLASS': 'ehit_backend.instrumentation.InstrumentedRedisClient',
                     'COMPRESSOR': 'django_redis.compressors.zlib.ZlibCompressor',
                     'SERIALIZER': 'django_redis.serializers.json.JSONSerializer',
                     'COMPRESS_MIN_LENGTH': 100,
@@ -236,7 +355,7 @@ if ENVIRONMENT == 'development':
         # Cache simples em memória para desenvolvimento
         CACHES = {
             'default': {
-                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'BACKEND': 'ehit_backend.instrumentation.InstrumentedLocMemCache',
                 'KEY_PREFIX': 'ehit_dev',
                 'VERSION': config('CACHE_VERSION', default='1'),
             }
@@ -249,7 +368,7 @@ else:
             'BACKEND': 'django_redis.cache.RedisCache',
             'LOCATION': config('REDIS_URL', default='redis://localhost:6379/0'),
             'OPTIONS': {
-                'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+                'CLIENT_CLASS': 'ehit_backend.instrumentation.InstrumentedRedisClient',
                 'COMPRESSOR': 'django_redis.compressors.zlib.ZlibCompressor',
                 'SERIALIZER': 'django_redis.serializers.json.JSONSerializer',
                 'COMPRESS_MIN_LENGTH': 100,
@@ -338,15 +457,31 @@ CSP_OBJECT_SRC = ("'none'",)
 CSP_BASE_URI = ("'self'",)
 CSP_FRAME_ANCESTORS = ("'none'",)
 
-# Rate Limiting Configuration
-RATELIMIT_USE_CACHE = 'default'
-RATELIMIT_VIEW = 'django_ratelimit.views.RatelimitView'
+# Rate limiting por rota (ehit_backend/rate_limit.py): a primeira política que casar é aplicada por IP
+RATE_LIMIT_POLICIES = [
+    # Login/refresh de token: rígido contra força bruta
+    {'name': 'auth', 'path': r'^/api/auth/token/', 'methods': ['POST'], 'rate': '10/m'},
+    # Upload em partes: muitas requisições por arquivo
+    {'name': 'uploads', 'path': r'^/api/uploads/', 'rate': '1200/h'},
+    {'name': 'search', 'path': r'^/api/music/search/', 'rate': '120/m'},
+    # Navegação na API: generoso
+    {'name': 'api', 'path': r'^/api/', 'rate': '600/m'},
+]
+# Fração do limite reservada de uma vez para consumo local no worker (clientes longe do limite)
+RATE_LIMIT_LOCAL_BATCH = 0.02
 
 # Desabilitar rate limiting durante testes
 if DEBUG or 'test' in sys.argv:
-    RATELIMIT_ENABLE = False
+    RATE_LIMIT_ENABLED = False
 else:
-    RATELIMIT_ENABLE = True
+    RATE_LIMIT_ENABLED = True
+
+# Auditoria de requisições suspeitas (SecurityAuditMiddleware)
+# Tamanho máximo inspecionado da query string e de corpos de formulário
+SECURITY_AUDIT_MAX_BYTES = 8192
+# Leituras de alto volume do catálogo são inspecionadas por amostragem
+SECURITY_AUDIT_SAMPLED_PATHS = ['/api/music/', '/api/artists/', '/api/playlists/', '/api/genres/', '/api/banners/']
+SECURITY_AUDIT_SAMPLE_RATE = config('SECURITY_AUDIT_SAMPLE_RATE', default=0.1, cast=float)
 
 # Django Axes Configuration (Brute Force Protection)
 AXES_CACHE = 'default'
@@ -365,6 +500,62 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+# Tasks longas (compressão de áudio): cada worker reserva uma por vez
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+# Sem worker (desenvolvimento): executa as tasks na própria requisição
+CELERY_TASK_ALWAYS_EAGER = config('CELERY_TASK_ALWAYS_EAGER', default=False, cast=bool)
+
+# Ações em massa do admin: registros processados por lote (progresso salvo a cada lote)
+BULK_JOB_CHUNK_SIZE = config('BULK_JOB_CHUNK_SIZE', default=100, cast=int)
+# Segundos sem heartbeat (gravado a cada lote) para um job em execução ser retomado por
+# outro worker; deve ser maior que o tempo de um lote (compressão de áudio é a mais lenta)
+BULK_JOB_STALE_SECONDS = config('BULK_JOB_STALE_SECONDS', default=30 * 60, cast=int)
+
+# Músicas relacionadas (apps/music/recommendations.py): vizinhos por faixa e pesos somados
+# à similaridade de cosseno das PlayHits (0 a 1) para mesmo artista e mesmo gênero
+RELATED_MUSIC_TOP_K = 20
+RELATED_MUSIC_ARTIST_WEIGHT = 0.15
+RELATED_MUSIC_GENRE_WEIGHT = 0.05
+
+# Rádio (apps/music/radio.py): tamanho da fila por semente, limites do cálculo e cache
+RADIO_QUEUE_LENGTH = 200
+RADIO_MAX_EXPANSIONS = 20
+RADIO_BUILD_SECONDS = 0.5
+RADIO_CACHE_TIMEOUT = 60 * 60
+
+# Curtidas (apps/music/likes.py): validade (s) do conjunto de músicas curtidas de cada
+# usuário no cache e intervalo (s) entre as recontagens de likes_count
+LIKED_SET_TIMEOUT = 60 * 60 * 24
+LIKES_FLUSH_INTERVAL = 30
+
+# Feed de novidades dos artistas seguidos (apps/artists/feed.py): acima deste número de
+# seguidores os lançamentos são lidos na hora em vez de copiados para cada seguidor;
+# itens mantidos por lista e validade (s) do feed de cada usuário no cache
+FEED_FANOUT_MAX_FOLLOWERS = 10000
+FEED_MAX_ITEMS = 500
+FEED_TIMEOUT = 60 * 60 * 24 * 30
+
+# Forma de onda do player (apps/music/waveform.py): taxa (Hz) do PCM decodificado, pares
+# (mínimo, máximo) em cada resolução servida e tempo máximo (s) do FFmpeg por música
+WAVEFORM_SAMPLE_RATE = 8000
+WAVEFORM_RESOLUTIONS = (2048, 512, 128)
+WAVEFORM_DECODE_TIMEOUT = 120
+
+# Tasks periódicas (worker iniciado com -B, ver docker/prod/docker-compose.yml)
+CELERY_BEAT_SCHEDULE = {
+    'flush-like-counts': {
+        'task': 'apps.music.tasks.flush_like_counts',
+        'schedule': LIKES_FLUSH_INTERVAL,
+    },
+    'recover-stale-bulk-jobs': {
+        'task': 'apps.music.tasks.recover_stale_bulk_jobs',
+        'schedule': BULK_JOB_STALE_SECONDS / 2,
+    },
+    'build-related-music': {
+        'task': 'apps.music.tasks.build_related_music',
+        'schedule': crontab(hour=4, minute=0),
+    },
+}
 
 # Logging Configuration
 LOGGING = {
@@ -379,6 +570,10 @@ LOGGING = {
             'format': 'SECURITY {asctime} {levelname} {message}',
             'style': '{',
         },
+        'performance': {
+            'format': '{message}',
+            'style': '{',
+        },
     },
     'handlers': {
         'file': {
@@ -398,6 +593,12 @@ LOGGING = {
             'class': 'logging.StreamHandler',
             'formatter': 'verbose',
         },
+        'performance_file': {
+            'level': 'INFO',
+            'class': 'logging.FileHandler',
+            'filename': 'logs/performance.log',
+            'formatter': 'performance',
+        },
     },
     'loggers': {
         'django': {
@@ -415,6 +616,12 @@ LOGGING = {
             'level': 'INFO',
             'propagate': True,
         },
+        # Uma linha JSON por requisição; WARNING = só as que estouram o orçamento
+        'performance': {
+            'handlers': ['performance_file'],
+            'level': config('PERFORMANCE_LOG_LEVEL', default='WARNING'),
+            'propagate': False,
+        },
     },
 }
 
@@ -458,5 +665,25 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
+    'DEFAULT_RENDERER_CLASSES': [
+        'ehit_backend.instrumentation.TimedJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
+# Instrumentação por requisição (ehit_backend/performance_middleware.py)
+SERVER_TIMING_ENABLED = config('SERVER_TIMING_ENABLED', default=True, cast=bool)
+# Cabeçalho Server-Timing para todos (staff sempre recebe)
+SERVER_TIMING_HEADER = config('SERVER_TIMING_HEADER', default=DEBUG, cast=bool)
+# Acima disso a requisição é registrada em WARNING no log de performance
+PERFORMANCE_QUERY_BUDGET = config('PERFORMANCE_QUERY_BUDGET', default=30, cast=int)
+PERFORMANCE_LATENCY_BUDGET_MS = config('PERFORMANCE_LATENCY_BUDGET_MS', default=500, cast=int)
+
+# Intervalo (segundos) das verificações de saúde em segundo plano; 0 = verificar a cada requisição
+HEALTH_CHECK_INTERVAL = config('HEALTH_CHECK_INTERVAL', default=10, cast=int)
+
+# Endpoint /metrics (ehit_backend/metrics.py): com token, exige "Authorization: Bearer <token>";
+# sem token, só os IPs abaixo (ou qualquer um em DEBUG)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+METRICS_ALLOWED_IPS = config('METRICS_ALLOWED_IPS', default='127.0.0.1').split(',')
+
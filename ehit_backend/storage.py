@@ -0,0 +1,124 @@
+"""
+Armazenamento de áudio endereçado por conteúdo
+
+Os arquivos de ``Music.file`` são gravados com o hash do conteúdo como nome,
+em diretórios de dois níveis (``music/ab/cd/<hash>.mp3``):
+
+- o mesmo áudio enviado mais de uma vez ocupa o disco uma única vez (o
+  segundo upload apenas aponta para o arquivo existente);
+- o diretório não cresce sem limite (no máximo 256 subdiretórios por nível);
+- o conteúdo de um nome nunca muda, então o nginx serve com cache imutável.
+
+O hash é o mesmo do upload em partes (SHA-256 de blocos de 4 MiB); quando o
+arquivo já traz o hash calculado (``content.content_hash``) ele não é relido.
+A contagem de referências fica em ``apps.music.models.AudioBlob``.
+"""
+import hashlib
+import os
+import re
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, storages
+
+CONTENT_HASH_BLOCK_SIZE = 4 * 1024 * 1024
+
+_HASHED_NAME_RE = re.compile(r'(?:^|/)[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})(?:\.[^/]*)?$')
+
+
+class ContentHasher:
+    """
+    Hash do conteúdo em blocos, que pode ser retomado entre requisições
+
+    Args:
+        block_hashes (str): hashes (hex) dos blocos completos já processados
+        tail (bytes): bytes do bloco incompleto atual
+    """
+
+    def __init__(self, block_hashes='', tail=b''):
+        self.block_hashes = [block_hashes[i:i + 64] for i in range(0, len(block_hashes), 64)]
+        self._block = hashlib.sha256(tail)
+        self._block_length = len(tail)
+
+    def update(self, data):
+        view = memoryview(data)
+        while view:
+            part = view[:CONTENT_HASH_BLOCK_SIZE - self._block_length]
+            self._block.update(part)
+            self._block_length += len(part)
+            view = view[len(part):]
+            if self._block_length == CONTENT_HASH_BLOCK_SIZE:
+                self.block_hashes.append(self._block.hexdigest())
+                self._block = hashlib.sha256()
+                self._block_length = 0
+
+    @property
+    def completed_blocks(self):
+        """Hashes dos blocos completos, para salvar na sessão"""
+        return ''.join(self.block_hashes)
+
+    def hexdigest(self):
+        digests = [bytes.fromhex(block_hash) for block_hash in self.block_hashes]
+        if self._block_length:
+            digests.append(self._block.digest())
+        return hashlib.sha256(b''.join(digests)).hexdigest()
+
+
+def content_hash_file(file_obj, chunk_size=CONTENT_HASH_BLOCK_SIZE):
+    """Calcula o hash do conteúdo de um arquivo já existente"""
+    hasher = ContentHasher()
+    for chunk in iter(lambda: file_obj.read(chunk_size), b''):
+        hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def hashed_name(name, content_hash):
+    """``music/faixa.mp3`` -> ``music/ab/cd/<hash>.mp3``"""
+    directory = os.path.dirname(name)
+    extension = os.path.splitext(name)[1].lower()
+    return os.path.join(directory, content_hash[:2], content_hash[2:4], f"{content_hash}{extension}")
+
+
+def content_hash_from_name(name):
+    """Hash do conteúdo a partir de um nome gerado por ``hashed_name`` (None se não for)"""
+    match = _HASHED_NAME_RE.search(name or '')
+    return match.group(1) if match else None
+
+
+class ContentAddressedMixin:
+    """Nomeia os arquivos pelo hash do conteúdo (qualquer backend de storage)"""
+
+    def save(self, name, content, max_length=None):
+        content_hash = getattr(content, 'content_hash', None)
+        if not content_hash:
+            if hasattr(content, 'seek'):
+                content.seek(0)
+            content_hash = content_hash_file(content)
+            if hasattr(content, 'seek'):
+                content.seek(0)
+
+        name = hashed_name(name, content_hash)
+        if self.exists(name):
+            # Mesmo conteúdo já armazenado: reaproveita o arquivo
+            return name
+        return super().save(name, content, max_length=max_length)
+
+
+class ContentAddressedStorage(ContentAddressedMixin, FileSystemStorage):
+    """FileSystemStorage que nomeia os arquivos pelo hash do conteúdo"""
+
+
+def media_url_max_age():
+    """
+    Por quanto tempo (segundos) uma URL de mídia gerada agora continua válida
+
+    None quando as URLs não expiram (MEDIA_ROOT local). Caches que guardam
+    respostas com URLs de mídia não devem durar mais que isso.
+    """
+    if getattr(settings, 'MEDIA_STORAGE', 'local') != 's3':
+        return None
+    return settings.MEDIA_URL_EXPIRE - settings.MEDIA_URL_SIGNING_WINDOW
+
+
+def audio_storage():
+    """Storage dos arquivos de áudio (alias ``audio`` de STORAGES)"""
+    return storages['audio']
@@ -0,0 +1,576 @@
+from unittest import mock
+
+from django.db import connection, connections
+from django.test import TestCase, override_settings
+
+from .db_pool import get_pool_stats
+
+
+class DatabasePoolStatsTest(TestCase):
+    """Testes para as métricas de conexões com o banco"""
+
+    @override_settings(DB_POOL_MODE='persistent')
+    def test_stats_without_pool(self):
+        """Testa métricas quando não há pool (conexões persistentes ou por requisição)"""
+        stats = get_pool_stats()
+        self.assertEqual(stats['mode'], 'persistent')
+        self.assertEqual(stats['vendor'], connection.vendor)
+        self.assertNotIn('pool', stats)
+
+    @override_settings(DB_POOL_MODE='pool')
+    def test_stats_with_pool(self):
+        """Testa o cálculo de conexões em uso e latência média de aquisição"""
+        pool = mock.Mock(min_size=2, max_size=10, closed=False)
+        pool.get_stats.return_value = {
+            'pool_size': 4,
+            'pool_available': 1,
+            'requests_waiting': 2,
+            'requests_num': 10,
+            'requests_wait_ms': 55,
+        }
+        with mock.patch.object(type(connections['default']), 'pool', mock.PropertyMock(return_value=pool), create=True):
+            stats = get_pool_stats()
+
+        self.assertEqual(stats['pool']['in_use'], 3)
+        self.assertEqual(stats['pool']['waiting'], 2)
+        self.assertEqual(stats['pool']['acquire_wait_ms_avg'], 5.5)
+
+    def test_health_check_includes_connection_stats(self):
+        """Testa que o health check expõe as métricas de conexões"""
+        response = self.client.get('/health/')
+        database = response.json()['services']['database']
+        self.assertIn('connections', database)
+
+
+class HealthProbesTest(TestCase):
+    """Testes para os probes de liveness e readiness"""
+
+    def test_liveness_without_io(self):
+        """Liveness não consulta banco nem cache"""
+        with self.assertNumQueries(0), mock.patch('ehit_backend.health.run_checks') as run_checks:
+            response = self.client.get('/health/live')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'status': 'alive'})
+        run_checks.assert_not_called()
+
+    @override_settings(HEALTH_CHECK_INTERVAL=60)
+    def test_readiness_uses_cached_result(self):
+        """Readiness devolve a última verificação sem repetir as consultas"""
+        from . import health
+
+        with mock.patch.object(health, '_thread_pid', None), mock.patch.object(health, '_result', None), \
+                mock.patch('ehit_backend.health.threading.Thread') as thread:
+            first = self.client.get('/health/ready')
+            with self.assertNumQueries(0):
+                second = self.client.get('/health/ready/')
+
+        thread.return_value.start.assert_called_once()
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json()['services']['database'], 'healthy')
+
+    @override_settings(HEALTH_CHECK_INTERVAL=10)
+    def test_readiness_stale_result_is_unhealthy(self):
+        """Resultado antigo (thread travada) é reportado como indisponível"""
+        import os
+        import time
+
+        from . import health
+
+        result = {'status': 'healthy', 'ready': True, 'timestamp': '', 'services': {'database': {'status': 'healthy'}}}
+        with mock.patch.object(health, '_thread_pid', os.getpid()), mock.patch.object(health, '_result', result), \
+                mock.patch.object(health, '_checked_at', time.monotonic() - 31):
+            response = self.client.get('/health/ready')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()['status'], 'unavailable')
+
+    @override_settings(HEALTH_CHECK_INTERVAL=0)
+    def test_readiness_reports_unavailable_dependency(self):
+        """Falha em uma dependência deixa o serviço não pronto"""
+        with mock.patch('ehit_backend.health._check_cache', return_value={'status': 'unhealthy', 'error': 'down'}):
+            response = self.client.get('/health/ready')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()['services']['redis'], 'unhealthy')
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1'], DATABASE_REPLICA_MAX_LAG=5)
+class CatalogReplicaRouterTest(TestCase):
+    """Testes para o roteamento de leituras do catálogo para réplicas"""
+
+    def setUp(self):
+        from apps.music.models import Music
+        from .db_routers import CatalogReplicaRouter, ReplicaRoutingMiddleware
+
+        self.music_model = Music
+        self.router = CatalogReplicaRouter()
+        self.middleware = ReplicaRoutingMiddleware(lambda request: None)
+        self.lag_patcher = mock.patch('ehit_backend.db_routers.get_replica_lag', return_value=0.5)
+        self.lag = self.lag_patcher.start()
+        self.addCleanup(self.lag_patcher.stop)
+
+    def _request(self, method='get', **cookies):
+        from django.contrib.auth.models import AnonymousUser
+        from django.test import RequestFactory
+
+        request = getattr(RequestFactory(), method)('/api/artists/')
+        request.COOKIES.update(cookies)
+        request.user = AnonymousUser()
+        return request
+
+    def test_reads_outside_request_use_primary(self):
+        """Testa que fora de requisições as leituras vão para o primário"""
+        self.assertIsNone(self.router.db_for_read(self.music_model))
+
+    def test_safe_request_reads_from_replica(self):
+        """Testa leitura do catálogo em GET indo para a réplica"""
+        from django.http import HttpResponse
+
+        request = self._request()
+        self.middleware.process_request(request)
+        try:
+            self.assertEqual(self.router.db_for_read(self.music_model), 'replica_1')
+            # Apps fora do catálogo continuam no primário
+            from django.contrib.auth.models import User
+            self.assertIsNone(self.router.db_for_read(User))
+        finally:
+            self.middleware.process_response(request, HttpResponse())
+
+    def test_write_pins_request_and_client(self):
+        """Testa que uma escrita fixa a requisição e o cliente no primário"""
+        from django.http import HttpResponse
+
+        request = self._request()
+        self.middleware.process_request(request)
+        self.assertEqual(self.router.db_for_write(self.music_model), 'default')
+        self.assertIsNone(self.router.db_for_read(self.music_model))
+        response = self.middleware.process_response(request, HttpResponse())
+        self.assertIn('ehit_db_pin', response.cookies)
+
+        pinned_request = self._request(ehit_db_pin='1')
+        self.middleware.process_request(pinned_request)
+        try:
+            self.assertIsNone(self.router.db_for_read(self.music_model))
+        finally:
+            self.middleware.process_response(pinned_request, HttpResponse())
+
+    def test_user_pin_checked_once_per_request(self):
+        """Testa que o pin do usuário é lido do cache uma vez por requisição, não por query"""
+        from django.contrib.auth import get_user_model
+        from django.core.cache import cache
+        from django.http import HttpResponse
+
+        user = get_user_model().objects.create_user(username='leitor', password='testpass123')
+        request = self._request()
+        self.middleware.process_request(request)
+        try:
+            request.user = user
+            with mock.patch('ehit_backend.db_routers.cache.get', wraps=cache.get) as cache_get:
+                for _ in range(5):
+                    self.assertEqual(self.router.db_for_read(self.music_model), 'replica_1')
+            self.assertEqual(cache_get.call_count, 1)
+        finally:
+            self.middleware.process_response(request, HttpResponse())
+
+    def test_lagging_replica_falls_back_to_primary(self):
+        """Testa volta ao primário quando o atraso passa do limite"""
+        from django.http import HttpResponse
+
+        self.lag.return_value = 30
+        request = self._request()
+        self.middleware.process_request(request)
+        try:
+            self.assertIsNone(self.router.db_for_read(self.music_model))
+        finally:
+            self.middleware.process_response(request, HttpResponse())
+
+    def test_unsafe_method_uses_primary(self):
+        """Testa que requisições POST não leem da réplica"""
+        from django.http import HttpResponse
+
+        request = self._request('post')
+        self.middleware.process_request(request)
+        try:
+            self.assertIsNone(self.router.db_for_read(self.music_model))
+        finally:
+            self.middleware.process_response(request, HttpResponse())
+
+
+@override_settings(MEDIA_STORAGE='s3', MEDIA_URL_EXPIRE=7200, MEDIA_URL_SIGNING_WINDOW=900, MEDIA_URL_ENDPOINT='')
+class S3MediaStorageTest(TestCase):
+    """Testes para as URLs assinadas localmente do storage S3"""
+
+    def make_storage(self):
+        from .s3_storage import S3MediaStorage
+
+        return S3MediaStorage(
+            bucket_name='ehit-media', access_key='AKTEST', secret_key='SKTEST',
+            region_name='us-east-1', endpoint_url='http://localhost:9000', addressing_style='path'
+        )
+
+    def test_signature_matches_botocore(self):
+        """Testa que a assinatura local é idêntica à do boto3"""
+        import datetime
+        import boto3
+        from botocore.config import Config
+        from .s3_storage import presign_get_url
+
+        signed_at = 1760000000
+        client = boto3.client(
+            's3', endpoint_url='http://localhost:9000', aws_access_key_id='AKTEST',
+            aws_secret_access_key='SKTEST', region_name='us-east-1',
+            config=Config(signature_version='s3v4', s3={'addressing_style': 'path'})
+        )
+        moment = datetime.datetime.fromtimestamp(signed_at, tz=datetime.timezone.utc).replace(tzinfo=None)
+        with mock.patch('botocore.auth.get_current_datetime', return_value=moment):
+            expected = client.generate_presigned_url(
+                'get_object', Params={'Bucket': 'ehit-media', 'Key': 'covers/capa nova.jpg'}, ExpiresIn=7200
+            )
+
+        url = presign_get_url(
+            endpoint='http://localhost:9000', bucket='ehit-media', key='covers/capa nova.jpg',
+            access_key='AKTEST', secret_key='SKTEST', region='us-east-1', expires=7200, signed_at=signed_at
+        )
+        self.assertEqual(url.split('?')[0], expected.split('?')[0])
+        self.assertEqual(sorted(url.split('?')[1].split('&')), sorted(expected.split('?')[1].split('&')))
+
+    def test_url_stable_within_window_without_api_calls(self):
+        """Testa que a URL não muda dentro da janela e não acessa o S3"""
+        from .s3_storage import S3MediaStorage
+
+        storage = self.make_storage()
+        with mock.patch.object(S3MediaStorage, 'connection', new_callable=mock.PropertyMock) as connection_mock:
+            with mock.patch('ehit_backend.s3_storage.time.time', return_value=1760000450):
+                first = storage.url('music/ab/cd/faixa.mp3')
+            with mock.patch('ehit_backend.s3_storage.time.time', return_value=1760001250):
+                same_window = storage.url('music/ab/cd/faixa.mp3')
+            with mock.patch('ehit_backend.s3_storage.time.time', return_value=1760001350):
+                next_window = storage.url('music/ab/cd/faixa.mp3')
+        connection_mock.assert_not_called()
+
+        self.assertTrue(first.startswith('http://localhost:9000/ehit-media/music/ab/cd/faixa.mp3?'))
+        self.assertIn('X-Amz-Expires=7200', first)
+        self.assertEqual(first, same_window)
+        self.assertNotEqual(first, next_window)
+
+    def test_banner_schedule_expires_before_urls(self):
+        """Testa que a agenda de banners em cache não dura mais que as URLs assinadas"""
+        from django.utils import timezone
+        from banners.schedule import build_schedule
+
+        now = timezone.now()
+        schedule = build_schedule(now)
+        self.assertAlmostEqual(schedule['valid_until'], now.timestamp() + 7200 - 900, delta=1)
+
+
+class ServerTimingMiddlewareTest(TestCase):
+    """Testes da instrumentação por requisição (Server-Timing)"""
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        from apps.artists.models import Artist
+
+        cache.clear()
+        Artist.objects.create(stage_name='Timing Artist')
+
+    def parse(self, header):
+        entries = {}
+        for entry in header.split(', '):
+            name, *params = entry.split(';')
+            entries[name] = dict(param.split('=', 1) for param in params)
+        return entries
+
+    @override_settings(SERVER_TIMING_HEADER=True)
+    def test_header_reports_queries_cache_and_serialization(self):
+        """O cabeçalho traz queries, gets/hits de cache e tempos"""
+        response = self.client.get('/api/music/trending/')
+        first = self.parse(response['Server-Timing'])
+        self.assertIn('queries', first['db']['desc'])
+        self.assertGreater(int(first['db']['desc'].strip('"').split()[0]), 0)
+        self.assertIn('0 hits', first['cache']['desc'])
+        for name in ('serialize', 'view', 'total'):
+            self.assertIn('dur', first[name])
+
+        # Segunda chamada sai do cache: hit, sem consultar o catálogo
+        response = self.client.get('/api/music/trending/')
+        second = self.parse(response['Server-Timing'])
+        self.assertIn('1 hits', second['cache']['desc'])
+        self.assertEqual(second['db']['desc'], '"0 queries"')
+
+    @override_settings(SERVER_TIMING_HEADER=False)
+    def test_header_hidden_for_anonymous_when_disabled(self):
+        """Sem SERVER_TIMING_HEADER o cabeçalho não é exposto"""
+        response = self.client.get('/api/artists/')
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(SERVER_TIMING_HEADER=True, PERFORMANCE_QUERY_BUDGET=0)
+    def test_budget_exceeded_is_flagged_and_logged(self):
+        """Requisições acima do orçamento são marcadas e registradas em WARNING"""
+        import json
+
+        with self.assertLogs('performance', level='WARNING') as logs:
+            response = self.client.get('/api/artists/')
+        self.assertEqual(self.parse(response['Server-Timing'])['budget']['desc'], '"queries"')
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['path'], '/api/artists/')
+        self.assertEqual(record['budget_exceeded'], ['queries'])
+        self.assertGreater(record['db_queries'], 0)
+
+
+class PrometheusMetricsTest(TestCase):
+    """Testes para o endpoint /metrics"""
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+
+    def sample(self, name, labels):
+        from prometheus_client import REGISTRY
+
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    @override_settings(DEBUG=True, METRICS_TOKEN='')
+    def test_request_metrics_by_view(self):
+        """Latência, status e queries são registrados pelo nome da view"""
+        labels = {'view': 'music:trending-music', 'method': 'GET'}
+        before = self.sample('ehit_http_request_duration_seconds_count', labels)
+        responses_before = self.sample('ehit_http_responses_total', {**labels, 'status': '200'})
+
+        self.client.get('/api/music/trending/')
+
+        self.assertEqual(self.sample('ehit_http_request_duration_seconds_count', labels), before + 1)
+        self.assertEqual(self.sample('ehit_http_responses_total', {**labels, 'status': '200'}), responses_before + 1)
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        body = response.content.decode()
+        self.assertIn('ehit_http_request_duration_seconds_bucket{', body)
+        self.assertIn('view="music:trending-music"', body)
+        self.assertIn('ehit_http_request_db_queries_count{view="music:trending-music"}', body)
+
+    def test_cache_lookups_by_family(self):
+        """Hits e misses do cache são contados por família de chave"""
+        miss = {'family': 'trending', 'result': 'miss'}
+        hit = {'family': 'trending', 'result': 'hit'}
+        misses_before, hits_before = self.sample('ehit_cache_requests_total', miss), self.sample('ehit_cache_requests_total', hit)
+
+        self.client.get('/api/music/trending/')
+        self.client.get('/api/music/trending/')
+
+        self.assertEqual(self.sample('ehit_cache_requests_total', miss), misses_before + 1)
+        self.assertEqual(self.sample('ehit_cache_requests_total', hit), hits_before + 1)
+
+    def test_cache_key_family(self):
+        """Testa o agrupamento das chaves em famílias"""
+        from .metrics import cache_key_family
+
+        self.assertEqual(cache_key_family('music_autocomplete_amor_10_'), 'autocomplete')
+        self.assertEqual(cache_key_family('musics_list_2'), 'lists')
+        self.assertEqual(cache_key_family('playlists_list_abc'), 'lists')
+        self.assertEqual(cache_key_family('playlist_detail_3'), 'playlists')
+        self.assertEqual(cache_key_family('banners_active_schedule'), 'banners')
+        self.assertEqual(cache_key_family('views.decorators.cache.cache_page.x'), 'pages')
+        self.assertEqual(cache_key_family('qualquer'), 'other')
+
+    @override_settings(DEBUG=False, METRICS_TOKEN='', METRICS_ALLOWED_IPS=['10.0.0.5'])
+    def test_access_restricted_by_ip(self):
+        """Sem token, só os IPs liberados acessam"""
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='10.0.0.5').status_code, 200)
+
+    @override_settings(DEBUG=True, METRICS_TOKEN='segredo')
+    def test_access_with_token(self):
+        """Com METRICS_TOKEN, o cabeçalho Authorization é obrigatório"""
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer errado').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer segredo').status_code, 200)
+
+
+@override_settings(
+    RATE_LIMIT_ENABLED=True,
+    RATE_LIMIT_LOCAL_BATCH=0.02,
+    RATE_LIMIT_POLICIES=[
+        {'name': 'auth', 'path': r'^/api/auth/token/', 'methods': ['POST'], 'rate': '3/m'},
+        {'name': 'api', 'path': r'^/api/', 'rate': '1000/m'},
+    ],
+)
+class RateLimitTest(TestCase):
+    """Testes para o rate limiting por rota"""
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        from . import rate_limit
+
+        cache.clear()
+        rate_limit._local_leases.clear()
+
+    def test_strict_policy_blocks_after_burst(self):
+        """A política do token recusa acima do limite, com Retry-After"""
+        for _ in range(3):
+            response = self.client.post('/api/auth/token/', {}, REMOTE_ADDR='10.0.0.1')
+            self.assertNotEqual(response.status_code, 429)
+
+        response = self.client.post('/api/auth/token/', {}, REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(int(response['Retry-After']), 20)
+
+        # Outros clientes e outros métodos seguem liberados
+        self.assertNotEqual(self.client.post('/api/auth/token/', {}, REMOTE_ADDR='10.0.0.2').status_code, 429)
+        self.assertNotEqual(self.client.get('/api/auth/token/', REMOTE_ADDR='10.0.0.1').status_code, 429)
+
+    def test_sliding_window_releases_gradually(self):
+        """Após a rajada, libera uma requisição a cada intervalo (sem reset da janela)"""
+        from . import rate_limit
+
+        policy = rate_limit.get_policies()[0]
+        with mock.patch('ehit_backend.rate_limit.time.time', return_value=1000.0):
+            results = [rate_limit.check(policy, 'cliente').allowed for _ in range(4)]
+        self.assertEqual(results, [True, True, True, False])
+
+        with mock.patch('ehit_backend.rate_limit.time.time', return_value=1019.0):
+            self.assertFalse(rate_limit.check(policy, 'cliente').allowed)
+        with mock.patch('ehit_backend.rate_limit.time.time', return_value=1020.0):
+            self.assertTrue(rate_limit.check(policy, 'cliente').allowed)
+            self.assertFalse(rate_limit.check(policy, 'cliente').allowed)
+
+    def test_local_lease_avoids_shared_store(self):
+        """Clientes longe do limite consomem permissões reservadas no worker"""
+        from . import rate_limit
+
+        policy = rate_limit.get_policies()[1]
+        with mock.patch('ehit_backend.rate_limit._acquire_cache', wraps=rate_limit._acquire_cache) as acquire:
+            decisions = [rate_limit.check(policy, 'cliente') for _ in range(20)]
+
+        self.assertTrue(all(decision.allowed for decision in decisions))
+        self.assertEqual(acquire.call_count, 1)
+        self.assertEqual(decisions[1].source, 'local')
+
+    def test_redis_script_result(self):
+        """Com Redis, uma chamada ao script decide e reserva o lote"""
+        from . import rate_limit
+
+        policy = rate_limit.get_policies()[1]
+        script = mock.Mock(side_effect=[[20, 900], [0, 1500]])
+        with mock.patch('ehit_backend.rate_limit.is_redis_cache', return_value=True), \
+                mock.patch.object(rate_limit, '_script', script):
+            self.assertTrue(rate_limit.check(policy, 'a').allowed)
+            self.assertEqual(script.call_args.kwargs['args'], [60.0, 60000, 20])
+            for _ in range(19):
+                self.assertEqual(rate_limit.check(policy, 'a').source, 'local')
+            decision = rate_limit.check(policy, 'a')
+
+        self.assertFalse(decision.allowed)
+        self.assertEqual(decision.retry_after, 1.5)
+        self.assertEqual(script.call_count, 2)
+
+    def test_redis_failure_allows_request(self):
+        """Erro no Redis libera a requisição"""
+        from . import rate_limit
+
+        policy = rate_limit.get_policies()[0]
+        with mock.patch('ehit_backend.rate_limit.is_redis_cache', return_value=True), \
+                mock.patch.object(rate_limit, '_script', mock.Mock(side_effect=ConnectionError('down'))):
+            decision = rate_limit.check(policy, 'a')
+        self.assertTrue(decision.allowed)
+        self.assertEqual(decision.source, 'error')
+
+
+@override_settings(SECURITY_AUDIT_SAMPLE_RATE=0)
+class SecurityAuditMiddlewareTest(TestCase):
+    """Testes para a inspeção de requisições suspeitas"""
+
+    def setUp(self):
+        from django.test import RequestFactory
+
+        from .security_middleware import SecurityAuditMiddleware
+
+        self.factory = RequestFactory()
+        self.middleware = SecurityAuditMiddleware(lambda request: None)
+
+    def test_query_string_is_inspected(self):
+        """Padrões na query string (inclusive codificados) são registrados"""
+        request = self.factory.get('/api/uploads/', {'q': '1 UNION  SELECT password'})
+        with self.assertLogs('security', level='WARNING'):
+            self.middleware.process_request(request)
+
+    def test_small_form_body_is_inspected(self):
+        """Formulários pequenos são inspecionados"""
+        request = self.factory.post(
+            '/api/auth/token/', 'username=%3Cscript%3Ealert(1)', content_type='application/x-www-form-urlencoded'
+        )
+        with self.assertLogs('security', level='WARNING'):
+            self.middleware.process_request(request)
+
+    def test_multipart_body_is_not_read(self):
+        """Uploads multipart não são lidos pela auditoria"""
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        request = self.factory.post('/api/uploads/', {'file': SimpleUploadedFile('a.mp3', b'base64 ../../')})
+        with self.assertNoLogs('security', level='WARNING'):
+            self.middleware.process_request(request)
+        self.assertFalse(hasattr(request, '_body'))
+        self.assertFalse(hasattr(request, '_post'))
+
+    def test_multipart_text_fields_are_inspected(self):
+        """Campos de texto do multipart são conferidos na resposta; arquivos não"""
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        request = self.factory.post('/api/uploads/', {
+            'title': 'Faixa <script>', 'file': SimpleUploadedFile('a.mp3', b'base64'),
+        })
+        self.middleware.process_request(request)
+        request.POST  # A view lê o formulário
+        with self.assertLogs('security', level='WARNING'):
+            self.middleware.process_response(request, None)
+
+        request = self.factory.post('/api/uploads/', {
+            'title': 'Faixa', 'file': SimpleUploadedFile('a.mp3', b'base64 ../../ <script'),
+        })
+        self.middleware.process_request(request)
+        request.POST
+        with self.assertNoLogs('security', level='WARNING'):
+            self.middleware.process_response(request, None)
+
+    def test_multipart_fields_parsed_by_drf_view(self):
+        """O POST parseado pelo DRF fica no request do Django e é inspecionado"""
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from rest_framework.decorators import api_view, permission_classes
+        from rest_framework.permissions import AllowAny
+        from rest_framework.response import Response
+
+        from .security_middleware import SecurityAuditMiddleware
+
+        @api_view(['POST'])
+        @permission_classes([AllowAny])
+        def view(request):
+            return Response({'fields': sorted(request.data)})
+
+        middleware = SecurityAuditMiddleware(view)
+        request = self.factory.post('/api/uploads/', {
+            'name': '1 union select 1', 'file': SimpleUploadedFile('a.mp3', b'audio'),
+        })
+        with self.assertLogs('security', level='WARNING'):
+            response = middleware(request)
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(SECURITY_AUDIT_MAX_BYTES=16)
+    def test_large_form_body_is_skipped(self):
+        """Corpos acima do limite não são lidos"""
+        request = self.factory.post(
+            '/api/auth/token/', 'username=' + 'a' * 32 + '<script', content_type='application/x-www-form-urlencoded'
+        )
+        with self.assertNoLogs('security', level='WARNING'):
+            self.middleware.process_request(request)
+        self.assertFalse(hasattr(request, '_body'))
+
+    def test_catalog_reads_are_sampled(self):
+        """Leituras do catálogo são amostradas; escritas sempre inspecionadas"""
+        with self.assertNoLogs('security', level='WARNING'):
+            self.middleware.process_request(self.factory.get('/api/music/', {'q': '<script'}))
+        with self.assertLogs('security', level='WARNING'):
+            self.middleware.process_request(self.factory.post('/api/music/?q=<script'))
+        with override_settings(SECURITY_AUDIT_SAMPLE_RATE=1):
+            with self.assertLogs('security', level='WARNING'):
+                self.middleware.process_request(self.factory.get('/api/music/', {'q': '<script'}))
@@ -15,7 +15,7 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from rest_framework_simplejwt.views import (
@@ -29,7 +29,12 @@ from .artist_views import (
     artist_dashboard, artist_music_list, artist_music_create,
     artist_music_edit, artist_music_delete, artist_albums, artist_stats
 )
-from .health_views import health_check
+from .health_views import health_check, liveness_check, metrics_view, readiness_check
+from apps.music.urls import (
+    home_urlpatterns as music_home_urlpatterns, stream_urlpatterns as music_stream_urlpatterns,
+    related_urlpatterns as music_related_urlpatterns, likes_urlpatterns as music_likes_urlpatterns,
+    waveform_urlpatterns as music_waveform_urlpatterns, upload_urlpatterns
+)
 
 urlpatterns = [
     # Home page
@@ -37,6 +42,12 @@ urlpatterns = [
     
     # Health check endpoint
     path('health/', health_check, name='health-check'),
+    # Probes baratos: liveness sem I/O, readiness com o resultado em cache (ehit_backend/health.py)
+    re_path(r'^health/live/?$', liveness_check, name='health-live'),
+    re_path(r'^health/ready/?$', readiness_check, name='health-ready'),
+
+    # Métricas do Prometheus
+    path('metrics', metrics_view, name='metrics'),
     
     # API Info (JSON)
     path('api-info/', api_info_view, name='api-info'),
@@ -65,6 +76,11 @@ urlpatterns = [
     path('api/playlists/', include('apps.playlists.urls')),
     path('api/genres/', include('apps.genres.urls')),  # Gêneros API
     path('api/', include('banners.urls')),  # Banners API
+    path('api/music/', include((
+        music_home_urlpatterns + music_stream_urlpatterns + music_related_urlpatterns + music_likes_urlpatterns
+        + music_waveform_urlpatterns, 'music'
+    ))),  # Listas da home, autocomplete, stream, relacionadas, curtidas e forma de onda
+    path('api/uploads/', include((upload_urlpatterns, 'uploads'))),  # Upload de áudio em partes
     # Commented out - not used
     # path('api/users/', include('apps.users.urls')),
     # path('api/music/', include('apps.music.urls')),
@@ -46,10 +46,31 @@ python manage.py collectstatic --noinput
 
 echo "✅ Setup complete! Starting server..."
 
+GUNICORN_WORKERS=${GUNICORN_WORKERS:-3}
+export GUNICORN_WORKERS
+
+# Métricas do /metrics agregadas entre os workers (limpa valores de execuções anteriores)
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus}
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
 # Start Gunicorn
+# SERVER_MODE=asgi usa workers uvicorn (views async de leitura); padrão é WSGI sync
+if [ "${SERVER_MODE:-wsgi}" = "asgi" ]; then
+    echo "⚡ Servidor ASGI (uvicorn workers: $GUNICORN_WORKERS)"
+    exec gunicorn ehit_backend.asgi:application \
+        --worker-class uvicorn.workers.UvicornWorker \
+        --bind 0.0.0.0:3030 \
+        --workers "$GUNICORN_WORKERS" \
+        --timeout 30 \
+        --access-logfile - \
+        --error-logfile -
+fi
+
+echo "🐍 Servidor WSGI (sync workers: $GUNICORN_WORKERS)"
 exec gunicorn ehit_backend.wsgi:application \
     --bind 0.0.0.0:3030 \
-    --workers 3 \
+    --workers "$GUNICORN_WORKERS" \
     --timeout 30 \
     --access-logfile - \
     --error-logfile -
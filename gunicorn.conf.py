@@ -0,0 +1,14 @@
+"""
+Configuração do gunicorn carregada automaticamente (arquivo na raiz do projeto)
+
+As opções de bind/workers continuam no entrypoint_prod.sh; aqui ficam os hooks.
+"""
+import os
+
+
+def child_exit(server, worker):
+    # Remove os gauges "live" do worker encerrado (métricas multiprocesso do /metrics)
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)